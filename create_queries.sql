@@ -80,7 +80,11 @@ CREATE TABLE publications (
   topic VARCHAR(20),
   price DECIMAL(6, 2) NOT NULL,
   publication_date DATE NOT NULL,
-  CONSTRAINT publication_pk PRIMARY KEY (publication_id)
+  version INT UNSIGNED NOT NULL DEFAULT 1,
+  updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  title_key VARCHAR(100) AS (lower(title)) PERSISTENT,
+  CONSTRAINT publication_pk PRIMARY KEY (publication_id),
+  INDEX publication_title_idx (title_key)
 );
 
 CREATE TABLE books (
@@ -127,6 +131,31 @@ CREATE TABLE articles (
   CONSTRAINT article_fk FOREIGN KEY (publication_id) REFERENCES publications(publication_id)
 );
 
+-- Compressed bodies of long chapters and articles, their text column is left empty
+CREATE TABLE chapter_bodies (
+  chapter_id INT(6) UNSIGNED NOT NULL,
+  publication_id INT(6) UNSIGNED NOT NULL,
+  encoding VARCHAR(10) NOT NULL,
+  text_length INT UNSIGNED NOT NULL,
+  excerpt VARCHAR(255) NOT NULL,
+  body MEDIUMBLOB NOT NULL,
+  CONSTRAINT chapter_body_pk PRIMARY KEY (chapter_id, publication_id),
+  CONSTRAINT chapter_body_fk FOREIGN KEY (chapter_id, publication_id) REFERENCES chapters(chapter_id, publication_id)
+    ON DELETE CASCADE
+);
+
+CREATE TABLE article_bodies (
+  article_id INT(6) UNSIGNED NOT NULL,
+  publication_id INT(6) UNSIGNED NOT NULL,
+  encoding VARCHAR(10) NOT NULL,
+  text_length INT UNSIGNED NOT NULL,
+  excerpt VARCHAR(255) NOT NULL,
+  body MEDIUMBLOB NOT NULL,
+  CONSTRAINT article_body_pk PRIMARY KEY (article_id, publication_id),
+  CONSTRAINT article_body_fk FOREIGN KEY (article_id, publication_id) REFERENCES articles(article_id, publication_id)
+    ON DELETE CASCADE
+);
+
 CREATE TABLE review_publications (
   emp_id VARCHAR(6) NOT NULL,
   publication_id INT(6) UNSIGNED NOT NULL,
@@ -216,11 +245,91 @@ CREATE TABLE reports (
     report_id INT(6) UNSIGNED AUTO_INCREMENT,
     month INT(2) NOT NULL,
     year INT(4) NOT NULL,
-    total_expenses DECIMAL(8,2) NOT NULL,
-    total_revenue DECIMAL(8,2) NOT NULL,
+    total_expense DECIMAL(12,2) NOT NULL,
+    total_revenue DECIMAL(12,2) NOT NULL,
+    salary_expense DECIMAL(12,2) NOT NULL DEFAULT 0,
+    shipping_cost DECIMAL(12,2) NOT NULL DEFAULT 0,
+    refreshed_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
     CONSTRAINT report_pk PRIMARY KEY (report_id),
     CONSTRAINT report_uk1 UNIQUE (month, year)
 );
 
+CREATE TABLE report_publication_distributors (
+    month INT(2) NOT NULL,
+    year INT(4) NOT NULL,
+    account_id INT(6) UNSIGNED NOT NULL,
+    publication_id INT(6) UNSIGNED NOT NULL,
+    total_quantity INT(8) UNSIGNED NOT NULL,
+    total_price DECIMAL(12,2) NOT NULL,
+    CONSTRAINT report_publication_distributor_pk PRIMARY KEY (month, year, account_id, publication_id),
+    CONSTRAINT report_publication_distributor_fk FOREIGN KEY (month, year) REFERENCES reports(month, year)
+);
+
+CREATE TABLE jobs (
+    job_id INT(8) UNSIGNED AUTO_INCREMENT,
+    job_type VARCHAR(50) NOT NULL,
+    params TEXT NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    progress INT(3) UNSIGNED NOT NULL DEFAULT 0,
+    message VARCHAR(255),
+    result MEDIUMTEXT,
+    attempts INT(2) UNSIGNED NOT NULL DEFAULT 0,
+    max_attempts INT(2) UNSIGNED NOT NULL DEFAULT 3,
+    cancel_requested BOOL NOT NULL DEFAULT 0,
+    worker VARCHAR(100),
+    run_after DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    finished_at DATETIME,
+    CONSTRAINT job_pk PRIMARY KEY (job_id),
+    INDEX job_queue_idx (status, run_after)
+);
+
+CREATE TABLE account_ledger (
+    entry_id BIGINT UNSIGNED AUTO_INCREMENT,
+    account_id INT(6) UNSIGNED NOT NULL,
+    entry_type VARCHAR(20) NOT NULL,
+    reference_id INT(8) UNSIGNED NOT NULL,
+    amount DECIMAL(10,2) NOT NULL,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT account_ledger_pk PRIMARY KEY (entry_id),
+    INDEX account_ledger_idx (account_id, entry_id)
+);
+
+CREATE TABLE account_balance_snapshots (
+    account_id INT(6) UNSIGNED NOT NULL,
+    balance DECIMAL(12,2) NOT NULL,
+    last_entry_id BIGINT UNSIGNED NOT NULL,
+    taken_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT account_balance_snapshot_pk PRIMARY KEY (account_id)
+);
+
+CREATE TABLE idempotency_keys (
+    account_id INT(6) UNSIGNED NOT NULL,
+    idempotency_key VARCHAR(64) NOT NULL,
+    request_hash CHAR(64) NOT NULL,
+    reservation CHAR(32) NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'processing',
+    order_id INT(6) UNSIGNED,
+    response_code INT(3),
+    response MEDIUMTEXT,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    expires_at DATETIME NOT NULL,
+    CONSTRAINT idempotency_key_pk PRIMARY KEY (account_id, idempotency_key),
+    INDEX idempotency_key_expiry_idx (expires_at)
+);
+
+CREATE TABLE catalog_imports (
+    import_id VARCHAR(64) NOT NULL,
+    source VARCHAR(255) NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'running',
+    records_done INT UNSIGNED NOT NULL DEFAULT 0,
+    publications INT UNSIGNED NOT NULL DEFAULT 0,
+    rejected INT UNSIGNED NOT NULL DEFAULT 0,
+    started_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    CONSTRAINT catalog_import_pk PRIMARY KEY (import_id)
+);
+
 -- Create triggers
 CREATE TRIGGER inactivate_distributor BEFORE UPDATE ON distributors FOR EACH ROW UPDATE accounts set is_active=new.is_active where distributor_id = old.distributor_id and old.is_active != new.is_active;
\ No newline at end of file
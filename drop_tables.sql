@@ -6,9 +6,11 @@ TRUNCATE TABLE authors;
 TRUNCATE TABLE editors;
 TRUNCATE TABLE management;
 TRUNCATE TABLE periodical_orders_info;
+TRUNCATE TABLE article_bodies;
 TRUNCATE TABLE articles;
 TRUNCATE TABLE periodicals;
 TRUNCATE TABLE book_orders_info;
+TRUNCATE TABLE chapter_bodies;
 TRUNCATE TABLE chapters;
 TRUNCATE TABLE books;
 TRUNCATE TABLE publications;
@@ -21,8 +23,14 @@ TRUNCATE TABLE content_writers;
 TRUNCATE TABLE account_reports;
 TRUNCATE TABLE accounts;
 TRUNCATE TABLE distributors;
+TRUNCATE TABLE report_publication_distributors;
 TRUNCATE TABLE reports;
 TRUNCATE TABLE publication_houses;
+TRUNCATE TABLE jobs;
+TRUNCATE TABLE idempotency_keys;
+TRUNCATE TABLE account_ledger;
+TRUNCATE TABLE account_balance_snapshots;
+TRUNCATE TABLE catalog_imports;
 DROP TABLE write_books;
 DROP TABLE reviews_of_publication;
 DROP TABLE report_analysis;
@@ -31,9 +39,11 @@ DROP TABLE authors;
 DROP TABLE editors;
 DROP TABLE management;
 DROP TABLE periodical_orders_info;
+DROP TABLE article_bodies;
 DROP TABLE articles;
 DROP TABLE periodicals;
 DROP TABLE book_orders_info;
+DROP TABLE chapter_bodies;
 DROP TABLE chapters;
 DROP TABLE books;
 DROP TABLE publications;
@@ -46,5 +56,11 @@ DROP TABLE content_writers;
 DROP TABLE account_reports;
 DROP TABLE accounts;
 DROP TABLE distributors;
+DROP TABLE report_publication_distributors;
 DROP TABLE reports;
 DROP TABLE publication_houses;
+DROP TABLE jobs;
+DROP TABLE idempotency_keys;
+DROP TABLE account_ledger;
+DROP TABLE account_balance_snapshots;
+DROP TABLE catalog_imports;
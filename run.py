@@ -39,6 +39,9 @@ def initialize_app(flask_app):
     from wolfpub.api.controllers.publication import ns as publication_ns
     api.add_namespace(publication_ns)
 
+    from wolfpub.api.controllers.jobs import ns as jobs_ns
+    api.add_namespace(jobs_ns)
+
     from wolfpub.api.controllers.healthcheck import ns as healthcheck_namespace
     api.add_namespace(healthcheck_namespace)
 
@@ -46,13 +49,45 @@ def initialize_app(flask_app):
     flask_app.register_blueprint(blueprint)
 
 
+# Background tasks of the API, in the pre-fork mode they run in the first worker only
+def start_schedulers():
+    # Materializing the monthly reports in the background
+    if config.API_SETTINGS.get('REPORT_REFRESH_SECONDS', 0):
+        from wolfpub.api.controllers.report import report_scheduler
+        report_scheduler.start()
+    # Deleting the expired idempotency keys of the orders
+    if config.API_SETTINGS.get('IDEMPOTENCY_PURGE_SECONDS', 0):
+        from wolfpub.api.controllers.account import idempotency_scheduler
+        idempotency_scheduler.start()
+    # Snapshotting the account balances of the ledger
+    if config.API_SETTINGS.get('BALANCE_SNAPSHOT_SECONDS', 0):
+        from wolfpub.api.controllers.account import balance_snapshot_scheduler
+        balance_snapshot_scheduler.start()
+
+
+def on_worker_start(slot: int):
+    if slot == 0:
+        start_schedulers()
+
+
 if __name__ == '__main__':
     initialize_app(app)
     # Run the app
-    if config.API_SETTINGS['ENVIRONMENT'] == 'prod':
+    if config.API_SETTINGS['ENVIRONMENT'] == 'prod' and int(config.API_SETTINGS.get('SERVER_WORKERS', 1)) != 1:
+        # Pre-fork workers, SERVER_WORKERS 0 forks one worker per core
+        from wolfpub.api.utils.prefork import PreforkServer
+        PreforkServer(app, config.API_SETTINGS["HOST"], int(config.API_SETTINGS["PORT"]),
+                      workers=config.API_SETTINGS.get('SERVER_WORKERS', 0),
+                      max_requests=config.API_SETTINGS.get('SERVER_MAX_REQUESTS', 0),
+                      max_requests_jitter=config.API_SETTINGS.get('SERVER_MAX_REQUESTS_JITTER', 0),
+                      graceful_timeout=config.API_SETTINGS.get('SERVER_GRACEFUL_TIMEOUT', 30),
+                      on_worker_start=on_worker_start).run()
+    elif config.API_SETTINGS['ENVIRONMENT'] == 'prod':
+        start_schedulers()
         WSGI_SERVER = pywsgi.WSGIServer((config.API_SETTINGS["HOST"], int(config.API_SETTINGS["PORT"])), app)
         WSGI_SERVER.serve_forever()
     else:
+        start_schedulers()
         app.run(host=config.API_SETTINGS['HOST'],
                 port=int(config.API_SETTINGS['PORT']),
                 debug=bool(config.API_SETTINGS['FLASK_DEBUG']))
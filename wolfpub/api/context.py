@@ -0,0 +1,64 @@
+"""
+Application Context: Connectors and handlers shared by all controllers, built on their first use
+"""
+import threading
+
+from wolfpub.api.utils.mariadb_connector import MariaDBConnector
+
+
+class LazyHandler(object):
+    """
+    Stands in for a handler of the context, the handler is built on the first attribute access
+    """
+    __slots__ = ('_context', '_key')
+
+    def __init__(self, context, key: tuple):
+        object.__setattr__(self, '_context', context)
+        object.__setattr__(self, '_key', key)
+
+    def __getattr__(self, name):
+        return getattr(self._context.get(*self._key), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._context.get(*self._key), name, value)
+
+
+class AppContext(object):
+    """
+    One connector for the primary and one for the read replicas per process, every handler class is built once per
+    connector and arguments and shared by the controllers using it
+    """
+
+    def __init__(self):
+        self.connectors = {}
+        self.handlers = {}
+        self.lock = threading.RLock()
+
+    def db(self, read_replica: bool = False):
+        connector = self.connectors.get(read_replica)
+        if connector is None:
+            with self.lock:
+                connector = self.connectors.get(read_replica)
+                if connector is None:
+                    connector = self.connectors[read_replica] = MariaDBConnector(read_replica=read_replica)
+        return connector
+
+    def get(self, handler_class, args: tuple = (), read_replica: bool = False):
+        key = (handler_class, args, read_replica)
+        handler = self.handlers.get(key)
+        if handler is None:
+            with self.lock:
+                handler = self.handlers.get(key)
+                if handler is None:
+                    handler = self.handlers[key] = handler_class(self.db(read_replica), *args)
+        return handler
+
+    def handler(self, handler_class, *args, read_replica: bool = False):
+        """
+        :param args: further arguments of the handler after the connector
+        :return: LazyHandler, built with the connector of the primary or the read replicas on first use
+        """
+        return LazyHandler(self, (handler_class, args, read_replica))
+
+
+CONTEXT = AppContext()
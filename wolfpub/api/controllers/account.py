@@ -2,34 +2,58 @@
 Account Controller
 """
 
-import copy
 import json
-from datetime import datetime, date
 
 from flask import request
 from flask_restplus import Resource
 
-from build.lib.wolfpub.api.handlers.orders import OrderHandler
-from wolfpub.api.handlers.account import AccountHandler, AccountBillHandler
-from wolfpub.api.handlers.distributor import DistributorHandler
-from wolfpub.api.handlers.publication import PublicationHandler, BookHandler, PeriodicalHandler
-from wolfpub.api.models.serializers import PAYMENT_ARGUMENTS, ORDER_ARGUMENTS
+from wolfpub.api.context import CONTEXT
+from wolfpub.api.controllers.jobs import submit_job
+from wolfpub.api.handlers.account import AccountHandler, AccountBillHandler, AccountLedgerHandler, \
+    AccountSummaryHandler
+from wolfpub.api.handlers.idempotency import IdempotencyHandler
+from wolfpub.api.handlers.orders import OrderHandler, OrderPlacementHandler
+from wolfpub.api.models.serializers import PAYMENT_ARGUMENTS, ORDER_ARGUMENTS, BACKGROUND_ARGUMENTS, \
+    IDEMPOTENCY_ARGUMENTS, FIELDS_ARGUMENTS, PAGE_ARGUMENTS
 from wolfpub.api.restplus import api
-from wolfpub.api.utils.custom_exceptions import QueryGenerationException, MariaDBException
+from wolfpub.api.utils.custom_exceptions import QueryGenerationException, MariaDBException, IdempotencyConflict
 from wolfpub.api.utils.custom_response import CustomResponse
-from wolfpub.api.utils.mariadb_connector import MariaDBConnector
+from wolfpub.api.utils.pagination import requested_page, page
+from wolfpub.api.utils.projection import requested_fields, project, sparse, columns_of
+from wolfpub.api.utils.scheduler import PeriodicTask
+from wolfpub.config import API_SETTINGS
+from wolfpub.constants import ORDERS
 
 ns = api.namespace('accounts', description='Route for distributor\'s account with Wolf Pub.')
 
-# Creating handler objects
-mariadb = MariaDBConnector()
-distributor_handler = DistributorHandler(mariadb)
-account_handler = AccountHandler(mariadb)
-account_bill_handler = AccountBillHandler(mariadb)
-publication_handler = PublicationHandler(mariadb)
-book_handler = BookHandler(mariadb)
-periodical_handler = PeriodicalHandler(mariadb)
-order_handler = OrderHandler(mariadb)
+# Handler objects, shared through the app context and built on their first use
+account_handler = CONTEXT.handler(AccountHandler)
+account_bill_handler = CONTEXT.handler(AccountBillHandler)
+account_summary_handler = CONTEXT.handler(AccountSummaryHandler)
+order_handler = CONTEXT.handler(OrderHandler)
+order_placement_handler = CONTEXT.handler(OrderPlacementHandler)
+idempotency_handler = CONTEXT.handler(IdempotencyHandler, API_SETTINGS.get('IDEMPOTENCY_KEY_TTL_SECONDS', 86400),
+                                      API_SETTINGS.get('IDEMPOTENCY_LOCK_SECONDS', 60))
+
+ledger_handler = CONTEXT.handler(AccountLedgerHandler)
+
+
+# Deleting the expired idempotency keys, started in the background by run.py
+def purge_idempotency_keys():
+    idempotency_handler.purge_expired()
+
+
+idempotency_scheduler = PeriodicTask('idempotency-keys', purge_idempotency_keys,
+                                     API_SETTINGS.get('IDEMPOTENCY_PURGE_SECONDS', 3600))
+
+
+# Snapshotting the ledger balances of the accounts, started in the background by run.py
+def take_balance_snapshots():
+    ledger_handler.take_snapshots()
+
+
+balance_snapshot_scheduler = PeriodicTask('balance-snapshots', take_balance_snapshots,
+                                          API_SETTINGS.get('BALANCE_SNAPSHOT_SECONDS', 300))
 
 
 @ns.route("/<string:account_id>")
@@ -39,69 +63,102 @@ class Account(Resource):
     """
 
     # Fetch account details
+    @ns.expect(FIELDS_ARGUMENTS, validate=True)
     def get(self, account_id):
         """
-        End-point to get the existing distributors details
+        End-point to get the existing distributors details, fields=name,balance returns only the given fields
         """
         try:
-            output = account_handler.get(account_id)
-            return CustomResponse(data=output)
+            fields = requested_fields(account_handler.columns)
+            output = account_handler.get(account_id, project(account_handler.columns, fields, ['account_id']))
+            if fields is None or 'balance' in fields:
+                output['balance'] = account_handler.check_balance(account_id)
+            return CustomResponse(data=sparse(output, fields))
         except (QueryGenerationException, MariaDBException, ValueError) as e:
             return CustomResponse(error=e.__class__.__name__, message=e.__str__(), status_code=400)
         except IndexError as e:
             return CustomResponse(error=e.__class__.__name__, message=e.__str__(), status_code=404)
 
 
-# Creating new orders from an account
+@ns.route("/<string:account_id>/summary")
+class AccountSummary(Resource):
+    """
+    Focuses on the order history summary of a distributor's account with WolfPubDB.
+    """
+
+    def get(self, account_id):
+        """
+        End-point to get order count, total spend, open balance, last order and payment dates and the monthly spend of
+        the account
+        """
+        try:
+            return CustomResponse(data=account_summary_handler.get(account_id))
+        except (QueryGenerationException, MariaDBException, ValueError) as e:
+            return CustomResponse(error=e.__class__.__name__, message=e.__str__(), status_code=400)
+        except IndexError as e:
+            return CustomResponse(error=e.__class__.__name__, message=e.__str__(), status_code=404)
+
+
+# Util to prepare the response of a placed order
+def order_response(order: dict):
+    # removed this constraint just to enable demo data insertion. TODO: Revert after Demo date
+    # if datetime.strptime(order['delivery_date'], "%Y-%m-%d").date() <= date.today():
+    #     raise ValueError('Delivery Date has to be ahead of date of placing Order')
+    return {'data': order, 'message': f"Order Placed! Bill Generated with Id {order['bill_id']}"}
+
+
+# Listing and creating orders of an account
 @ns.route("/<string:account_id>/orders")
 class AccountOrders(Resource):
     """
     Focuses on managing orders for an account of WolfPubDB.
     """
 
-    @ns.expect(ORDER_ARGUMENTS, validate=True)
+    @ns.expect(PAGE_ARGUMENTS, validate=True)
+    def get(self, account_id):
+        """
+        End-point to list the orders of the account by order id, next_cursor of the response fetches the next page
+        """
+        try:
+            limit, after = requested_page()
+            account_handler.get(account_id, ['account_id'])
+            orders, next_cursor = page(order_handler.get_orders(account_id, limit=limit + 1, after=after), limit,
+                                       ['order_id'])
+            return CustomResponse(data=orders, next_cursor=next_cursor)
+        except (QueryGenerationException, MariaDBException, ValueError) as e:
+            return CustomResponse(error=e.__class__.__name__, message=e.__str__(), status_code=400)
+        except IndexError as e:
+            return CustomResponse(error=e.__class__.__name__, message=e.__str__(), status_code=404)
+
+    @ns.expect(ORDER_ARGUMENTS, IDEMPOTENCY_ARGUMENTS, validate=True)
     def post(self, account_id):
         """
-        End-point to enable distributors place new orders via their account
+        End-point to enable distributors place new orders via their account, retries with the same Idempotency-Key
+        header get the response of the first request instead of placing the order again
         """
         try:
-            account_handler.get(account_id)
             order = json.loads(request.data)
-            order['account_id'] = account_id
-
-            # removed this constraint just to enable demo data insertion. TODO: Revert after Demo date
-            # if datetime.strptime(order['delivery_date'], "%Y-%m-%d").date() <= date.today():
-            #     raise ValueError('Delivery Date has to be ahead of date of placing Order')
-
-            # Read order date
-            if 'order_date' not in order:
-                order['order_date'] = datetime.today().strftime('%Y-%m-%d')
-
-            # Read order items
-            pub_items = order.pop('items')  # isbn, quantity
-            items = copy.deepcopy(pub_items)
-            books = book_handler.get_ids({'items': items['books']}) if items['books'] else []  # pub_id, isbn, price
-            periodicals = periodical_handler.get_ids({'items': items['periodicals']}) if items['periodicals'] else []
-            books = [{**u, **v} for u in books for v in pub_items['books']
-                     if u['title'] == v['title'] and int(u['edition']) == int(v['edition'])]  # add quantity
-            periodicals = [{**u, **v} for u in periodicals for v in pub_items['periodicals']
-                           if u['title'] == v['title'] and u['issue'] == v['issue']]
-
-            # Prepare order price and shipping cost
-            order['total_price'] = order_handler.get_total_price(books + periodicals)
-            if 'shipping_cost' not in order:
-                shipping_cost = 2 * (sum([b['quantity'] for b in books]) + sum([p['quantity'] for p in periodicals]))
-                order['shipping_cost'] = 100 if shipping_cost > 100 else shipping_cost
-
-            if not books and not periodicals:
-                raise ValueError("Publications to be ordered not found with WolfPub Publication House")
-            order.update(order_handler.set(order, books, periodicals))
+            idempotency_key = request.headers.get('Idempotency-Key')
+            if not idempotency_key:
+                return CustomResponse(data=order_response(order_placement_handler.place(account_id, order)))
+
+            reservation, stored = idempotency_handler.begin(account_id, idempotency_key,
+                                                            idempotency_handler.request_hash(order))
+            if stored:
+                response = stored['response'] or {'data': {'order_id': stored['order_id']}, 'message': 'Order Placed!'}
+                return CustomResponse(data=response, status_code=stored['response_code'] or 200,
+                                      headers={'Idempotent-Replayed': 'true'})
             try:
-                bill = account_bill_handler.create_bill(account_id, order, bill_date=order['order_date'])
-                msg = f"Order Placed! Bill Generated with Id {bill['bill_id']}"
+                queries = [idempotency_handler.complete_query(account_id, idempotency_key, reservation)]
+                response = order_response(order_placement_handler.place(account_id, order, queries))
             except Exception:
-                msg = "Order Placed! Bill Generation Failed"
-            return CustomResponse(data=order, message=msg)
+                # The order was rolled back, the key is released for the retry
+                idempotency_handler.release(account_id, idempotency_key, reservation)
+                raise
+            idempotency_handler.store_response(account_id, idempotency_key, reservation, 200, response)
+            return CustomResponse(data=response)
+        except IdempotencyConflict as e:
+            return CustomResponse(error=e.__class__.__name__, message=e.__str__(), status_code=409)
         except (QueryGenerationException, MariaDBException, ValueError) as e:
             return CustomResponse(error=e.__class__.__name__, message=e.__str__(), status_code=400)
         except IndexError as e:
@@ -115,19 +172,18 @@ class AccountOrder(Resource):
     Focuses on fetching order details placed by distributor from WolfPubDB.
     """
 
+    @ns.expect(FIELDS_ARGUMENTS, validate=True)
     def get(self, account_id, order_id):
         """
         End-point to get the existing order details
         """
         try:
             # GET request for account id and order id
-            account_handler.get(account_id)
-            output = order_handler.get_order(account_id, order_id)
-            if len(output) > 0:
-                return CustomResponse(data=output[0])
-            return CustomResponse(data={}, message=f"Order with id '{order_id}' Not Found for given Account Id",
-                                  status_code=404)
-        except (QueryGenerationException, MariaDBException) as e:
+            fields = requested_fields(columns_of(ORDERS))
+            account_handler.get(account_id, ['account_id'])
+            output = order_handler.get_order(account_id, order_id, project(columns_of(ORDERS), fields))
+            return CustomResponse(data=sparse(output, fields))
+        except (QueryGenerationException, MariaDBException, ValueError) as e:
             return CustomResponse(error=e.__class__.__name__, message=e.__str__(), status_code=400)
         except IndexError as e:
             return CustomResponse(error=e.__class__.__name__, message=e.__str__(), status_code=404)
@@ -146,7 +202,7 @@ class AccountOrderBills(Resource):
         """
         try:
             # Create bill for order of an account if it doesn't exist
-            account_handler.get(account_id)
+            account_handler.get(account_id, ['account_id'])
             order = order_handler.get_order(account_id, order_id)
             try:
                 bill = account_bill_handler.get(account_id, order_id)
@@ -167,21 +223,18 @@ class AccountBills(Resource):
     Focuses on managing the account's bill for distributors of WolfPubDB.
     """
 
+    @ns.expect(BACKGROUND_ARGUMENTS, validate=True)
     def post(self, account_id):
         """
         End-point to add bill to the distributor's account for the orders placed by the distributor
         """
         try:
-            # Get orders for an account
-            account_handler.get(account_id)
+            account_handler.get(account_id, ['account_id'])
+            if BACKGROUND_ARGUMENTS.parse_args().get('background'):
+                return submit_job('account_bills', {'account_id': account_id})
+            # Generate bill for each order of the account without a bill
             orders = order_handler.get_orders(account_id)
-            bill_ids = []
-            # Generate bill for each order
-            for order in orders:
-                try:
-                    account_bill_handler.get(account_id, order['order_id'])
-                except IndexError:
-                    bill_ids.append(account_bill_handler.create_bill(account_id, order)['bill_id'])
+            bill_ids = account_bill_handler.create_bills(account_id, orders)
             return CustomResponse(data={'bill_ids': bill_ids})
         except (QueryGenerationException, MariaDBException, ValueError) as e:
             return CustomResponse(error=e.__class__.__name__, message=e.__str__(), status_code=400)
@@ -203,7 +256,7 @@ class AccountPayments(Resource):
         """
         try:
             # Create payment for an account
-            account_handler.get(account_id)
+            account_handler.get(account_id, ['account_id'])
             payment = json.loads(request.data)
             payment_id = account_bill_handler.pay_bills(account_id, payment['amount'],
                                                         payment.get('payment_date', ''))
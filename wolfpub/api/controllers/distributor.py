@@ -6,27 +6,20 @@ import json
 from flask import request
 from flask_restplus import Resource
 
-from build.lib.wolfpub.api.handlers.orders import OrderHandler
-from wolfpub.api.handlers.account import AccountHandler, AccountBillHandler
+from wolfpub.api.context import CONTEXT
+from wolfpub.api.handlers.account import AccountHandler
 from wolfpub.api.handlers.distributor import DistributorHandler
-from wolfpub.api.handlers.publication import PublicationHandler, BookHandler, PeriodicalHandler
-from wolfpub.api.models.serializers import DISTRIBUTOR_ARGUMENTS
+from wolfpub.api.models.serializers import DISTRIBUTOR_ARGUMENTS, FIELDS_ARGUMENTS
 from wolfpub.api.restplus import api
 from wolfpub.api.utils.custom_exceptions import QueryGenerationException, MariaDBException, UnauthorizedOperation
 from wolfpub.api.utils.custom_response import CustomResponse
-from wolfpub.api.utils.mariadb_connector import MariaDBConnector
+from wolfpub.api.utils.projection import requested_fields, project, sparse
 
 ns = api.namespace('distributors', description='Route admin for distributor actions.')
 
-# Creating handler objects
-mariadb = MariaDBConnector()
-distributor_handler = DistributorHandler(mariadb)
-account_handler = AccountHandler(mariadb)
-account_bill_handler = AccountBillHandler(mariadb)
-publication_handler = PublicationHandler(mariadb)
-book_handler = BookHandler(mariadb)
-periodical_handler = PeriodicalHandler(mariadb)
-order_handler = OrderHandler(mariadb)
+# Handler objects, shared through the app context and built on their first use
+distributor_handler = CONTEXT.handler(DistributorHandler)
+account_handler = CONTEXT.handler(AccountHandler)
 
 
 # Creating new distributors
@@ -63,13 +56,18 @@ class Distributor(Resource):
     """
 
     # Fetch distributor details
+    @ns.expect(FIELDS_ARGUMENTS, validate=True)
     def get(self, distributor_id):
         """
-        End-point to get the existing distributors details
+        End-point to get the existing distributors details, fields=name,balance returns only the given fields
         """
         try:
-            output = distributor_handler.get(distributor_id)
-            return CustomResponse(data=output)
+            fields = requested_fields(distributor_handler.columns)
+            output = distributor_handler.get(distributor_id, project(distributor_handler.columns, fields,
+                                                                     ['account_id']))
+            if fields is None or 'balance' in fields:
+                output['balance'] = account_handler.check_balance(output['account_id'])
+            return CustomResponse(data=sparse(output, fields))
         except (QueryGenerationException, MariaDBException, ValueError) as e:
             return CustomResponse(error=e.__class__.__name__, message=e.__str__(), status_code=400)
         except IndexError as e:
@@ -82,7 +80,7 @@ class Distributor(Resource):
         End-point to update the distributor
         """
         try:
-            distributor_handler.get(distributor_id)
+            distributor_handler.get(distributor_id, ['distributor_id'])
             distributor = json.loads(request.data)
             contact_email = distributor.pop('contact_email', None)
             periodicity = distributor.pop('periodicity', None)
@@ -110,7 +108,7 @@ class Distributor(Resource):
         End-point to delete distributor
         """
         try:
-            distributor_handler.get(distributor_id)
+            distributor_handler.get(distributor_id, ['distributor_id'])
             row_affected = distributor_handler.remove(distributor_id)
             if row_affected < 1:
                 return CustomResponse(data={}, message=f"Distributor with id '{distributor_id}' Not Found",
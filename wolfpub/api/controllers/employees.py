@@ -8,25 +8,27 @@ from datetime import datetime
 from flask import request
 from flask_restplus import Resource
 
+from wolfpub.api.context import CONTEXT
 from wolfpub.api.handlers.authors import AuthorsHandler
 from wolfpub.api.handlers.editors import EditorsHandler
 from wolfpub.api.handlers.employees import EmployeesHandler
 from wolfpub.api.handlers.salary import PaymentHandler
 from wolfpub.api.models.serializers import EMPLOYEE_ARGUMENTS, SALARY_PAYMENT_ARGUMENTS, \
-    SALARY_RECEIPT_ARGUMENTS
+    SALARY_RECEIPT_ARGUMENTS, EMPLOYEE_PUBLICATION_ARGUMENTS, FIELDS_ARGUMENTS, PAGE_ARGUMENTS
 from wolfpub.api.restplus import api
 from wolfpub.api.utils.custom_exceptions import QueryGenerationException, MariaDBException
 from wolfpub.api.utils.custom_response import CustomResponse
-from wolfpub.api.utils.mariadb_connector import MariaDBConnector
+from wolfpub.api.utils.pagination import requested_page, page
+from wolfpub.api.utils.projection import requested_fields, columns_of
+from wolfpub.constants import EMPLOYEES
 
 ns = api.namespace('employees', description='Route admin for employee actions.')
 
-# Creating handler objects
-mariadb = MariaDBConnector()
-employees_handler = EmployeesHandler(mariadb)
-authors_handler = AuthorsHandler(mariadb)
-editors_handler = EditorsHandler(mariadb)
-payment_handler = PaymentHandler(mariadb)
+# Handler objects, shared through the app context and built on their first use
+employees_handler = CONTEXT.handler(EmployeesHandler)
+authors_handler = CONTEXT.handler(AuthorsHandler)
+editors_handler = CONTEXT.handler(EditorsHandler)
+payment_handler = CONTEXT.handler(PaymentHandler)
 
 
 # Create new employee
@@ -80,17 +82,18 @@ class Employees(Resource):
     """
 
     # Fetch employee
+    @ns.expect(FIELDS_ARGUMENTS, validate=True)
     def get(self, emp_id):
         """
-        End-point to get the existing employee details
+        End-point to get the existing employee details, fields=name,job_type returns only the given fields
         """
         try:
-            output = employees_handler.get(emp_id)
+            output = employees_handler.get(emp_id, requested_fields(columns_of(EMPLOYEES)))
             if len(output) == 0:
                 return CustomResponse(data={}, message=f"Employee with id '{emp_id}' not found",
                                       status_code=404)
             return CustomResponse(data=output[0])
-        except (QueryGenerationException, MariaDBException) as e:
+        except (QueryGenerationException, MariaDBException, ValueError) as e:
             return CustomResponse(error=e.__class__.__name__, message=e.__str__(), status_code=400)
 
     # Update employee
@@ -132,28 +135,41 @@ class Employees(Resource):
     Focuses on viewing publications from WolfPubDB.
     """
 
+    @ns.expect(EMPLOYEE_PUBLICATION_ARGUMENTS, PAGE_ARGUMENTS, validate=True)
     def get(self, emp_id: str):
         """
-        End-point to get the associated publication details for employee
+        End-point to get the associated publication details for employee, next_cursor of the response fetches the
+        next page
         """
         try:
+            limit, after = requested_page()
+            if EMPLOYEE_PUBLICATION_ARGUMENTS.parse_args().get('expand'):
+                # Full publication details for all roles of the employee in one query
+                publications, next_cursor = page(employees_handler.get_publication_details(emp_id, limit + 1, after),
+                                                 limit, ['publication_id'])
+                return CustomResponse(data=publications, next_cursor=next_cursor)
+
             # Fetch employee
-            output = employees_handler.get(emp_id)
+            output = employees_handler.get(emp_id, ['emp_id'])
             if len(output) == 0:
                 return CustomResponse(data={}, message=f"Employee with id '{emp_id}' not found",
                                       status_code=404)
-            publications = None
+            publications, keys = None, employees_handler.publication_keys()
             if emp_id[0].lower() == 'a':
                 output = authors_handler.get(emp_id)
                 if len(output) == 0:
                     return CustomResponse(data={}, message=f"Employee with id '{emp_id}' is not an author",
                                           status_code=404)
                 author_type = output[0].get('author_type', None)
-                publications = employees_handler.get_author_publications(emp_id, author_type)
+                keys = employees_handler.publication_keys(author_type)
+                publications = employees_handler.get_author_publications(emp_id, author_type, limit + 1, after)
             elif emp_id[0].lower() == 'e':
-                publications = employees_handler.get_editor_publications(emp_id)
-            return CustomResponse(data=publications)
-        except (QueryGenerationException, MariaDBException) as e:
+                publications = employees_handler.get_editor_publications(emp_id, limit + 1, after)
+            if publications is None:
+                return CustomResponse(data=publications)
+            publications, next_cursor = page(publications, limit, keys)
+            return CustomResponse(data=publications, next_cursor=next_cursor)
+        except (QueryGenerationException, MariaDBException, ValueError) as e:
             return CustomResponse(error=e.__class__.__name__, message=e.__str__(), status_code=400)
 
 
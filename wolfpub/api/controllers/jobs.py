@@ -0,0 +1,78 @@
+"""
+To handle the background jobs
+"""
+
+import json
+
+from flask import request
+from flask_restplus import Resource
+
+from wolfpub.api.context import CONTEXT
+from wolfpub.api.handlers.jobs import JobHandler
+from wolfpub.api.models.serializers import JOB_ARGUMENTS
+from wolfpub.api.restplus import api
+from wolfpub.api.utils.custom_exceptions import QueryGenerationException, MariaDBException
+from wolfpub.api.utils.custom_response import CustomResponse
+from wolfpub.config import API_SETTINGS
+from wolfpub.jobs.tasks import JOB_TYPES
+
+ns = api.namespace('jobs', description='Route for background jobs, run by python -m wolfpub.jobs.')
+
+# Handler objects, shared through the app context and built on their first use
+job_handler = CONTEXT.handler(JobHandler)
+
+
+# Util to submit a job, used by the end-points offering to run in the background
+def submit_job(job_type: str, params: dict, max_attempts: int = None):
+    if job_type not in JOB_TYPES:
+        raise ValueError(f"Unknown job type '{job_type}', expected one of: {', '.join(JOB_TYPES)}")
+    job = job_handler.submit(job_type, params, max_attempts or API_SETTINGS.get('JOB_MAX_ATTEMPTS', 3))
+    return CustomResponse(data=job, message=f"Job submitted, poll its status at /jobs/{job['job_id']}",
+                          status_code=202)
+
+
+@ns.route("")
+class Jobs(Resource):
+    """
+    Focuses on submitting background jobs.
+    """
+
+    @ns.expect(JOB_ARGUMENTS, validate=True)
+    def post(self):
+        """
+        End-point to submit a background job, returns the job id right away
+        """
+        try:
+            job = json.loads(request.data)
+            return submit_job(job['job_type'], job.get('params') or {}, job.get('max_attempts'))
+        except (QueryGenerationException, MariaDBException, ValueError) as e:
+            return CustomResponse(error=e.__class__.__name__, message=e.__str__(), status_code=400)
+
+
+@ns.route("/<string:job_id>")
+class Job(Resource):
+    """
+    Focuses on the status and cancellation of a background job.
+    """
+
+    def get(self, job_id):
+        """
+        End-point to get status, progress and result of a job
+        """
+        try:
+            return CustomResponse(data=job_handler.get(job_id))
+        except (QueryGenerationException, MariaDBException, ValueError) as e:
+            return CustomResponse(error=e.__class__.__name__, message=e.__str__(), status_code=400)
+        except IndexError as e:
+            return CustomResponse(error=e.__class__.__name__, message=e.__str__(), status_code=404)
+
+    def delete(self, job_id):
+        """
+        End-point to cancel a job, a running job stops at its next progress report
+        """
+        try:
+            return CustomResponse(data=job_handler.cancel(job_id), message='Cancellation requested')
+        except (QueryGenerationException, MariaDBException, ValueError) as e:
+            return CustomResponse(error=e.__class__.__name__, message=e.__str__(), status_code=400)
+        except IndexError as e:
+            return CustomResponse(error=e.__class__.__name__, message=e.__str__(), status_code=404)
@@ -8,6 +8,7 @@ from datetime import datetime
 from flask import request
 from flask_restplus import Resource
 
+from wolfpub.api.context import CONTEXT
 from wolfpub.api.handlers.authors import AuthorsHandler
 from wolfpub.api.handlers.publication import BookHandler
 from wolfpub.api.handlers.publication import PeriodicalHandler
@@ -17,6 +18,9 @@ from wolfpub.api.models.serializers import ARTICLE_AUTHOR_ARGUMENTS
 from wolfpub.api.models.serializers import BOOK_ARGUMENTS
 from wolfpub.api.models.serializers import BOOK_AUTHOR_ARGUMENTS
 from wolfpub.api.models.serializers import CHAPTER_ARGUMENTS
+from wolfpub.api.models.serializers import CONTENT_RANGE_ARGUMENTS
+from wolfpub.api.models.serializers import FIELDS_ARGUMENTS
+from wolfpub.api.models.serializers import PAGE_ARGUMENTS
 from wolfpub.api.models.serializers import PERIODICAL_ARGUMENTS
 from wolfpub.api.models.serializers import PUBLICATION_ALL_ARGUMENTS
 from wolfpub.api.models.serializers import PUBLICATION_ARGUMENTS
@@ -25,17 +29,33 @@ from wolfpub.api.models.serializers import SEARCH_ARGUMENTS
 from wolfpub.api.restplus import api
 from wolfpub.api.utils.custom_exceptions import QueryGenerationException, MariaDBException
 from wolfpub.api.utils.custom_response import CustomResponse
-from wolfpub.api.utils.mariadb_connector import MariaDBConnector
-from wolfpub.constants import BOOKS, PERIODICALS
+from wolfpub.api.utils.http_cache import not_modified, set_validators
+from wolfpub.api.utils.pagination import requested_page, page
+from wolfpub.api.utils.projection import requested_fields, project, sparse, response_columns
+from wolfpub.constants import PUBLICATIONS, BOOKS, PERIODICALS
 
 ns = api.namespace('publication', description='Route admin for publication actions.')
 
-# Create handler objects
-mariadb = MariaDBConnector()
-publication_handler = PublicationHandler(mariadb)
-book_handler = BookHandler(mariadb)
-periodical_handler = PeriodicalHandler(mariadb)
-authors_handler = AuthorsHandler(mariadb)
+# Handler objects, shared through the app context and built on their first use
+publication_handler = CONTEXT.handler(PublicationHandler)
+book_handler = CONTEXT.handler(BookHandler)
+periodical_handler = CONTEXT.handler(PeriodicalHandler)
+authors_handler = CONTEXT.handler(AuthorsHandler)
+
+# Catalog reads (GET and search) are served by the read replicas
+replica_publication_handler = CONTEXT.handler(PublicationHandler, read_replica=True)
+replica_book_handler = CONTEXT.handler(BookHandler, read_replica=True)
+replica_periodical_handler = CONTEXT.handler(PeriodicalHandler, read_replica=True)
+
+
+# Util to read the requested range of a chapter or article text
+def content_range():
+    offset = int(request.args.get('offset') or 0)
+    length = request.args.get('length')
+    length = int(length) if length is not None else None
+    if offset < 0 or (length is not None and length < 1):
+        raise ValueError('offset has to be 0 or more and length 1 or more')
+    return offset, length
 
 
 # Create new book
@@ -63,18 +83,11 @@ class Book(Resource):
             is_available = int(publication.pop('is_available', 1))
             book = {
                 'isbn': isbn,
-                'edition': 1,
                 'creation_date': creation_date,
                 'is_available': is_available
             }
-            book_id = book_handler.get_id_from_title(publication.get('title', None).lower())
-            if book_id is not None:
-                book['book_id'] = book_id
-                edition = book_handler.get_edition(book_id)
-                book['edition'] = int(edition)
-            else:
-                book['book_id'] = book_handler.new_book_id()
 
+            # book_id and edition are allocated from the title in the transaction inserting the book
             publication['pub_type'] = "book"
             publication_id = publication_handler.set(publication, book)
             return CustomResponse(data=publication_id)
@@ -116,12 +129,8 @@ class Periodical(Resource):
                 'periodical_type': periodical_type,
                 'is_available': is_available
             }
-            periodical_id = periodical_handler.get_id_from_title(publication.get('title', None).lower())
-            if periodical_id is not None:
-                periodical['periodical_id'] = periodical_id
-            else:
-                periodical['periodical_id'] = periodical_handler.new_periodical_id()
 
+            # periodical_id is resolved from the title in the transaction inserting the periodical
             publication['pub_type'] = "periodical"
             publication_id = publication_handler.set(publication, None, periodical)
             return CustomResponse(data=publication_id)
@@ -138,30 +147,46 @@ class Publication(Resource):
     Focuses on publication operations in WolfPubDB.
     """
 
+    @ns.expect(FIELDS_ARGUMENTS, validate=True)
     def get(self, publication_id):
         """
-        End-point to get the existing publication details
+        End-point to get the existing publication details, with ETag and Last-Modified validators for caches.
+        fields=title,price returns only the given fields
         """
         try:
-            output = publication_handler.get_by_id(publication_id)
+            fields = requested_fields(response_columns(PUBLICATIONS, BOOKS, PERIODICALS))
+            # Clients and caches holding the current version get a 304 without reading the publication
+            version = replica_publication_handler.get_version(publication_id)
+            if version is None:
+                return CustomResponse(data={}, message=f"Publication with id '{publication_id}' not found",
+                                      status_code=404)
+            tag = f"publication-{publication_id}-{version['version']}"
+            cached = not_modified('publication', tag, version['updated_at'])
+            if cached:
+                return cached
+            output = replica_publication_handler.get_by_id(
+                publication_id, project(replica_publication_handler.select_columns, fields, ['publication_id']))
             if len(output) == 0:
                 return CustomResponse(data={}, message=f"Publication with id '{publication_id}' not found",
                                       status_code=404)
             publication = output[0]
-            book_output = book_handler.get(publication_id)
+            book_output = replica_book_handler.get(
+                publication_id, project(replica_book_handler.select_columns, fields, ['publication_id']))
             if len(book_output) > 0:
                 publication.update(book_output[0])
             else:
-                periodical_output = periodical_handler.get(publication_id)
+                periodical_output = replica_periodical_handler.get(
+                    publication_id, project(replica_periodical_handler.select_columns, fields, ['publication_id']))
                 if len(periodical_output) > 0:
                     publication.update(periodical_output[0])
                 else:
                     return CustomResponse(data={}, message=f"Publication with id '{publication_id}' not found",
                                           status_code=404)
 
-            return CustomResponse(data=publication)
+            return set_validators(CustomResponse(data=sparse(publication, fields)), 'publication', tag,
+                                  version['updated_at'])
 
-        except (QueryGenerationException, MariaDBException) as e:
+        except (QueryGenerationException, MariaDBException, ValueError) as e:
             return CustomResponse(error=e.__class__.__name__, message=e.__str__(), status_code=400)
 
     @ns.doc(PUBLICATION_ALL_ARGUMENTS, validate=False)
@@ -193,7 +218,7 @@ class Publication(Resource):
         End-point to delete publication
         """
         try:
-            output = publication_handler.get_by_id(publication_id)
+            output = publication_handler.get_by_id(publication_id, ['publication_id'])
             if len(output) == 0:
                 return CustomResponse(data={}, message=f"Publication with id '{publication_id}' not found",
                                       status_code=404)
@@ -239,18 +264,27 @@ class Chapter(Resource):
     Focuses on chapter operations in WolfPubDB.
     """
 
+    @ns.expect(CONTENT_RANGE_ARGUMENTS, validate=True)
     def get(self, publication_id, chapter_id):
         """
-        End-point to get the existing chapter details
+        End-point to get the existing chapter details, with ETag and Last-Modified validators for caches. Long texts
+        can be paged through with offset and length
         """
         try:
-            output = book_handler.get_chapter(publication_id, chapter_id)
-            if len(output) > 0:
-                return CustomResponse(data=output[0])
+            offset, length = content_range()
+            version = replica_book_handler.get_version(publication_id)
+            if version:
+                tag = f"chapter-{publication_id}-{chapter_id}-{version['version']}"
+                cached = not_modified('chapter', tag, version['updated_at'])
+                if cached:
+                    return cached
+                output = replica_book_handler.get_chapter(publication_id, chapter_id, offset, length)
+                if len(output) > 0:
+                    return set_validators(CustomResponse(data=output[0]), 'chapter', tag, version['updated_at'])
             return CustomResponse(data={},
                                   message=f"Chapter with id '{chapter_id}' for publication with id '{publication_id}' not found",
                                   status_code=404)
-        except (QueryGenerationException, MariaDBException) as e:
+        except (QueryGenerationException, MariaDBException, ValueError) as e:
             return CustomResponse(error=e.__class__.__name__, message=e.__str__(), status_code=400)
 
     @ns.doc(CHAPTER_ARGUMENTS, validate=False)
@@ -315,18 +349,27 @@ class Article(Resource):
     Focuses on article operations in WolfPubDB.
     """
 
+    @ns.expect(CONTENT_RANGE_ARGUMENTS, validate=True)
     def get(self, publication_id, article_id):
         """
-        End-point to get the existing article details
+        End-point to get the existing article details, with ETag and Last-Modified validators for caches. Long texts
+        can be paged through with offset and length
         """
         try:
-            output = periodical_handler.get_article(publication_id, article_id)
-            if len(output) > 0:
-                return CustomResponse(data=output[0])
+            offset, length = content_range()
+            version = replica_periodical_handler.get_version(publication_id)
+            if version:
+                tag = f"article-{publication_id}-{article_id}-{version['version']}"
+                cached = not_modified('article', tag, version['updated_at'])
+                if cached:
+                    return cached
+                output = replica_periodical_handler.get_article(publication_id, article_id, offset, length)
+                if len(output) > 0:
+                    return set_validators(CustomResponse(data=output[0]), 'article', tag, version['updated_at'])
             return CustomResponse(data={},
                                   message=f"Article with id '{article_id}' for publication with id '{publication_id}' not found",
                                   status_code=404)
-        except (QueryGenerationException, MariaDBException) as e:
+        except (QueryGenerationException, MariaDBException, ValueError) as e:
             return CustomResponse(error=e.__class__.__name__, message=e.__str__(), status_code=400)
 
     @ns.doc(ARTICLE_ARGUMENTS, validate=False)
@@ -450,7 +493,7 @@ class Publication(Resource):
         End-point to associate authors with a book
         """
         try:
-            book_output = book_handler.get(publication_id)
+            book_output = book_handler.get(publication_id, ['publication_id'])
             if len(book_output) <= 0:
                 return CustomResponse(data={}, message=f"Book with id '{publication_id}' not found",
                                       status_code=404)
@@ -521,7 +564,7 @@ class Publication(Resource):
         End-point to associate editors with a publication
         """
         try:
-            output = publication_handler.get_by_id(publication_id)
+            output = publication_handler.get_by_id(publication_id, ['publication_id'])
             if len(output) == 0:
                 return CustomResponse(data={}, message=f"Publication with id '{publication_id}' not found",
                                       status_code=404)
@@ -577,12 +620,13 @@ class Search(Resource):
     Focuses on publication filters in WolfPubDB.
     """
 
-    @ns.expect(SEARCH_ARGUMENTS, validate=True)
+    @ns.expect(SEARCH_ARGUMENTS, PAGE_ARGUMENTS, validate=True)
     def get(self):
         """
-        End-point to get the existing publication details
+        End-point to get the existing publication details, next_cursor of the response fetches the next page
         """
         try:
+            limit, after = requested_page()
             filter_data = json.loads(request.data)
             filter_attribute = filter_data["filter"].lower()
             filter_criteria = filter_data["meta"]
@@ -598,17 +642,21 @@ class Search(Resource):
             if len(filter_condition.keys()) == 0 or filter_attribute not in ["book", "article"]:
                 raise ValueError("Invalid filter criteria provided")
             elif filter_attribute == "book":
-                books = book_handler.get_filter_result(filter_condition, ['*'])
+                books = replica_book_handler.get_filter_result(filter_condition, limit=limit + 1, after=after)
                 if len(books) == 0:
                     return CustomResponse(data={}, message=f"No books found for this filter criteria",
                                           status_code=404)
-                return CustomResponse(data=books)
+                books, next_cursor = page(books, limit, replica_book_handler.search_keys)
+                return CustomResponse(data=books, next_cursor=next_cursor)
             elif filter_attribute == "article":
-                articles = periodical_handler.get_filter_result(filter_condition, ['*'])
+                # Articles are listed with an excerpt, their text is read by the article end-point
+                articles = replica_periodical_handler.get_filter_result(filter_condition, limit=limit + 1,
+                                                                        after=after)
                 if len(articles) == 0:
                     return CustomResponse(data={}, message=f"No articles found for this filter criteria",
                                           status_code=404)
-                return CustomResponse(data=articles)
+                articles, next_cursor = page(articles, limit, replica_periodical_handler.search_keys)
+                return CustomResponse(data=articles, next_cursor=next_cursor)
 
         except (QueryGenerationException, MariaDBException, ValueError) as e:
             return CustomResponse(error=e.__class__.__name__, message=e.__str__(), status_code=400)
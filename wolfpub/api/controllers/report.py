@@ -2,29 +2,47 @@
 To handle the Distributor and its account
 """
 
+import itertools
 from datetime import datetime, timedelta
 
-from dateutil.relativedelta import relativedelta
-from flask import request
+from flask import request, Response, stream_with_context
 from flask_restplus import Resource
 
-from wolfpub.api.handlers.account import AccountBillHandler
-from wolfpub.api.handlers.distributor import DistributorHandler
-from wolfpub.api.handlers.report import ReportHandler
+from wolfpub.api.context import CONTEXT
+from wolfpub.api.controllers.jobs import submit_job
+from wolfpub.api.handlers.report import ReportHandler, ColumnarReportHandler
 from wolfpub.api.models.serializers import REVENUE_REPORT_ARGUMENTS, SALARY_REPORT_ARGUMENTS, \
-    TIME_PERIOD_REPORT_ARGUMENTS, MONTHLY_REPORT_ARGUMENTS
+    TIME_PERIOD_REPORT_ARGUMENTS, MONTHLY_REPORT_ARGUMENTS, EXPORT_REPORT_ARGUMENTS, BACKGROUND_ARGUMENTS, \
+    PAGE_ARGUMENTS
 from wolfpub.api.restplus import api
 from wolfpub.api.utils.custom_exceptions import QueryGenerationException, MariaDBException
 from wolfpub.api.utils.custom_response import CustomResponse
-from wolfpub.api.utils.mariadb_connector import MariaDBConnector
+from wolfpub.api.utils.export import EXPORT_FORMATS, check_format, export_chunks
+from wolfpub.api.utils.pagination import requested_page, page
+from wolfpub.api.utils.scheduler import PeriodicTask
+from wolfpub.config import API_SETTINGS
 
 ns = api.namespace('reports', description='Route admin for report actions.')
 
-# Creating handler objects
-mariadb = MariaDBConnector()
-distributor_handler = DistributorHandler(mariadb)
-report_handler = ReportHandler(mariadb)
-account_bill_handler = AccountBillHandler(mariadb)
+# Handler objects, shared through the app context and built on their first use. Reports are read from the read
+# replicas to keep them away from order placement
+# Columnar reports aggregate an in memory copy of the tables instead of querying the database per request
+if API_SETTINGS.get('COLUMNAR_REPORTS', False):
+    report_handler = CONTEXT.handler(ColumnarReportHandler, API_SETTINGS.get('COLUMNAR_REFRESH_SECONDS', 60),
+                                     read_replica=True)
+else:
+    report_handler = CONTEXT.handler(ReportHandler, read_replica=True)
+# Monthly reports are materialized from the primary, a lagging replica could miss the last rows of a month
+report_materializer = CONTEXT.handler(ReportHandler)
+
+
+# Materialize the closed months and refresh the current month, started in the background by run.py
+def refresh_monthly_reports():
+    report_materializer.refresh_monthly_reports(API_SETTINGS.get('REPORT_BACKFILL_MONTHS', 12))
+
+
+report_scheduler = PeriodicTask('monthly-reports', refresh_monthly_reports,
+                                API_SETTINGS.get('REPORT_REFRESH_SECONDS', 3600))
 
 
 # Generate monthly reports
@@ -34,10 +52,10 @@ class MonthlyReport(Resource):
     Focuses on monthly report of WolfPubDB.
     """
 
-    @ns.expect(MONTHLY_REPORT_ARGUMENTS, validate=True)
+    @ns.expect(MONTHLY_REPORT_ARGUMENTS, BACKGROUND_ARGUMENTS, validate=True)
     def get(self):
         """
-        End-point to get the monthly report of revenue and expenditure
+        End-point to get the monthly report of revenue and expenditure, or to materialize it in the background
         """
         try:
             month = request.args.get('month', None)
@@ -46,16 +64,15 @@ class MonthlyReport(Resource):
                 today = datetime.today()
                 month = today.month
                 year = today.year
-            start_date = datetime(int(year), int(month), 1)
-            end_date = start_date + relativedelta(months=1)
-            start_date = start_date.strftime('%Y-%m-%d')
-            end_date = end_date.strftime('%Y-%m-%d')
-            output = {}
-            output['order_per_pub_per_dist'] = report_handler.get_number_price_per_publication_per_distributor(start_date, end_date)
-            output['total_revenue'] = report_handler.get_revenue(start_date, end_date)
-            output['total_expense'] = report_handler.get_salary_expense(start_date, end_date)
-            output['total_expense'].update(report_handler.get_shipping_cost_expense(start_date, end_date))
-            report_handler.set_monthly_report(output, month, year)
+            if BACKGROUND_ARGUMENTS.parse_args().get('background'):
+                return submit_job('monthly_report', {'month': int(month), 'year': int(year)})
+            # Closed months are served from the materialized reports, only the current month is computed live
+            if report_handler.is_closed(month, year):
+                output = report_handler.get_materialized_monthly_report(month, year)
+                if output is None:
+                    output = report_materializer.materialize_monthly_report(month, year)
+            else:
+                output = report_handler.compute_monthly_report(month, year)
             return CustomResponse(data=output)
         except (QueryGenerationException, MariaDBException, ValueError) as e:
             return CustomResponse(error=e.__class__.__name__, message=e.__str__(), status_code=400)
@@ -68,10 +85,11 @@ class RevenueReport(Resource):
     Focuses on revenue report of WolfPubDB.
     """
 
-    @ns.expect(TIME_PERIOD_REPORT_ARGUMENTS, REVENUE_REPORT_ARGUMENTS, validate=True)
+    @ns.expect(TIME_PERIOD_REPORT_ARGUMENTS, REVENUE_REPORT_ARGUMENTS, PAGE_ARGUMENTS, validate=True)
     def get(self):
         """
-        End-point to get the report of revenue per_distributor or per_city or per_location
+        End-point to get the report of revenue per_distributor or per_city or per_location, the distributor_wise
+        breakdown is paged, next_cursor of the response fetches its next page
         """
         try:
             start_date = request.args.get('start_date', None)
@@ -80,13 +98,17 @@ class RevenueReport(Resource):
             output = {stat.strip(): {} for stat in stats.split(',')}
             if 'total' in output:
                 output['total'] = report_handler.get_revenue(start_date, end_date)
+            pages = {}
             if 'distributor_wise' in output:
-                output['distributor_wise'] = report_handler.get_revenue_per_distributor(start_date, end_date)
+                limit, after = requested_page()
+                output['distributor_wise'], pages['next_cursor'] = page(
+                    report_handler.get_revenue_per_distributor(start_date, end_date, limit + 1, after), limit,
+                    ['account_id'])
             if 'city_wise' in output:
                 output['city_wise'] = report_handler.get_revenue_per_city(start_date, end_date)
             if 'location_wise' in output:
                 output['location_wise'] = report_handler.get_revenue_per_location(start_date, end_date)
-            return CustomResponse(data={'revenue': output})
+            return CustomResponse(data={'revenue': output}, **pages)
         except (QueryGenerationException, MariaDBException, ValueError) as e:
             return CustomResponse(error=e.__class__.__name__, message=e.__str__(), status_code=400)
 
@@ -135,3 +157,32 @@ class SalaryReport(Resource):
             return CustomResponse(data=output)
         except (QueryGenerationException, MariaDBException, ValueError) as e:
             return CustomResponse(error=e.__class__.__name__, message=e.__str__(), status_code=400)
+
+
+# Export reports as files
+@ns.route("/export")
+class ReportExport(Resource):
+    """
+    Focuses on exporting the reports of WolfPubDB as csv or parquet files.
+    """
+
+    @ns.expect(TIME_PERIOD_REPORT_ARGUMENTS, EXPORT_REPORT_ARGUMENTS, validate=True)
+    def get(self):
+        """
+        End-point to download a report as csv or parquet file, rows are streamed from the database in batches
+        """
+        try:
+            report = request.args.get('report', None)
+            export_format = request.args.get('format', 'csv')
+            start_date = request.args.get('start_date', None)
+            end_date = request.args.get('end_date', None)
+            check_format(export_format)
+            batches = report_handler.stream_report(report, start_date, end_date,
+                                                   API_SETTINGS.get('EXPORT_BATCH_SIZE', 1000))
+            # The first batch is fetched before responding, so query errors are still returned as error response
+            first_batch = next(batches)
+            chunks = export_chunks(export_format, itertools.chain([first_batch], batches))
+            return Response(stream_with_context(chunks), mimetype=EXPORT_FORMATS[export_format],
+                            headers={'Content-Disposition': f'attachment; filename={report}.{export_format}'})
+        except (QueryGenerationException, MariaDBException, ValueError) as e:
+            return CustomResponse(error=e.__class__.__name__, message=e.__str__(), status_code=400)
@@ -1,12 +1,17 @@
 """
 Module for handling the account of distributor with wolfpub
 """
+import threading
 from datetime import date, datetime
 
 from dateutil.relativedelta import relativedelta
 
-from wolfpub.api.utils.query_generator import QueryGenerator
-from wolfpub.constants import ACCOUNTS, ACCOUNT_BILLS, ACCOUNT_PAYMENTS, DISTRIBUTORS
+from wolfpub.api.utils.lru_cache import LRUCache
+from wolfpub.api.utils.projection import columns_of
+from wolfpub.api.utils.query_generator import QueryGenerator, RawSQL
+from wolfpub.config import API_SETTINGS
+from wolfpub.constants import ACCOUNTS, ACCOUNT_BILLS, ACCOUNT_PAYMENTS, DISTRIBUTORS, ACCOUNT_LEDGER, \
+    ACCOUNT_BALANCE_SNAPSHOTS, ORDERS
 
 
 class AccountHandler(object):
@@ -17,6 +22,7 @@ class AccountHandler(object):
     def __init__(self, db):
         self.db = db
         self.table_name = ACCOUNTS['table_name']
+        self.columns = columns_of(ACCOUNTS, DISTRIBUTORS)
         self.query_gen = QueryGenerator()
 
     # Register account
@@ -26,10 +32,12 @@ class AccountHandler(object):
         return {'account_id': last_row_id[-1]}
 
     # Get account
-    def get(self, account_id: str):
+    def get(self, account_id: str, select_cols: list = None):
+        if select_cols is None:
+            select_cols = self.columns
         cond = {'account_id': account_id, 'is_active': 1}
         table = f"{self.table_name} natural join {DISTRIBUTORS['table_name']}"
-        select_query = self.query_gen.select(table, ['*'], cond)
+        select_query = self.query_gen.select(table, select_cols, cond)
         account = self.db.get_result(select_query)
         if not account:
             raise IndexError(f"Account with id '{account_id}' Not Registered")
@@ -43,17 +51,184 @@ class AccountHandler(object):
         cond['is_active'] = '1'
         update_query = self.query_gen.update(self.table_name, cond, update_data)
         row_affected, _ = self.db.execute([update_query])
+        if account_id:
+            AccountSummaryHandler.invalidate(account_id)
+        else:
+            AccountSummaryHandler.invalidate_all()
         return row_affected
 
     # Check balance of account
     def check_balance(self, account_id: str = None, distributor_id: str = None):
-        cond = {'account_id': account_id} if account_id else {'distributor_id': distributor_id}
-        cond['is_active'] = '1'
-        select_query = self.query_gen.select(self.table_name, ['balance'], cond)
-        balance = self.db.get_result(select_query)
-        if not balance:
+        if not account_id:
+            select_query = self.query_gen.select(self.table_name, ['account_id'], {'distributor_id': distributor_id,
+                                                                                   'is_active': '1'})
+            account = self.db.get_result(select_query)
+            if not account:
+                raise ValueError('Account not registered with Wolf Publication House')
+            account_id = account[0]['account_id']
+        return AccountLedgerHandler(self.db).balance(account_id)
+
+
+class AccountLedgerHandler(object):
+    """
+    Focuses on the append only ledger of bills and payments of the accounts and the balances computed from it
+
+    The balance is the latest snapshot of the account (or its opening balance in accounts.balance) plus the ledger
+    entries after the snapshot. Every transaction appending entries holds a shared lock on the row of its account, the
+    snapshot locks the rows of its accounts exclusively: it waits for the transactions in flight, so no entry with a
+    lower id than the snapshot can commit after it
+    """
+    # Shared by all instances, snapshot (balance, last entry id) per account, read again after the snapshot interval
+    balances = LRUCache(API_SETTINGS.get('BALANCE_CACHE_SIZE', 10000),
+                        API_SETTINGS.get('BALANCE_SNAPSHOT_SECONDS', 300))
+
+    def __init__(self, db):
+        self.db = db
+        self.table_name = ACCOUNT_LEDGER['table_name']
+        self.snapshot_table_name = ACCOUNT_BALANCE_SNAPSHOTS['table_name']
+        self.query_gen = QueryGenerator()
+
+    # Query taking the shared lock on the account row in a transaction appending entries, the order placement locks it
+    # with OrderPlacementHandler.lock_account
+    def lock_query(self, account_id):
+        select_query = self.query_gen.select(ACCOUNTS['table_name'], ['account_id into @ledger_account_id'],
+                                             {'account_id': account_id})
+        return f'{select_query} lock in share mode'
+
+    # Query appending an entry, bills are positive and payments negative amounts
+    def entry_query(self, account_id, entry_type: str, reference_id, amount: float):
+        """
+        :param reference_id: id of the bill or payment, e.g. RawSQL('@bill_id') inserted in the same transaction
+        """
+        data = {'account_id': account_id, 'entry_type': entry_type, 'reference_id': reference_id, 'amount': amount}
+        return self.query_gen.insert(self.table_name, [data])
+
+    # Get the snapshot or the opening balance of an active account
+    def base_balance(self, account_id):
+        select_query = self.query_gen.select(
+            f'{ACCOUNTS["table_name"]} left join {self.snapshot_table_name} using (account_id)',
+            [f'coalesce({self.snapshot_table_name}.balance, {ACCOUNTS["table_name"]}.balance) as balance',
+             'coalesce(last_entry_id, 0) as last_entry_id'], {'account_id': account_id, 'is_active': '1'})
+        account = self.db.get_result(select_query)
+        if not account:
             raise ValueError('Account not registered with Wolf Publication House')
-        return float(balance[0]['balance']) if balance else 0.00
+        return account[0]['balance'], int(account[0]['last_entry_id'])
+
+    # Get balance of account
+    def balance(self, account_id):
+        key = str(account_id)
+        cached = self.balances.get(key)
+        if cached is None:
+            cached = self.base_balance(account_id)
+            self.balances.put(key, cached)
+        balance, last_entry_id = cached
+        # Entries after the snapshot are read on every balance read, one committing late is seen by the next read
+        select_query = self.query_gen.select(self.table_name, ['entry_id', 'amount'],
+                                             {'account_id': account_id, 'entry_id': {'>': last_entry_id}},
+                                             order_by=['entry_id'])
+        return float(balance + sum(entry['amount'] for entry in self.db.get_result(select_query)))
+
+    # Snapshot the balances of the accounts with entries after their last snapshot
+    def take_snapshots(self, batch_size: int = 1000):
+        """
+        :return: number of snapshots taken
+        """
+        ledger, snapshots, accounts = self.table_name, self.snapshot_table_name, ACCOUNTS['table_name']
+        account_ids = [row['account_id'] for row in self.db.get_result(
+            f"select l.account_id from {ledger} l left join {snapshots} s on s.account_id = l.account_id "
+            f"group by l.account_id having max(l.entry_id) > coalesce(max(s.last_entry_id), 0)")]
+        taken = 0
+        for start in range(0, len(account_ids), batch_size):
+            batch = ', '.join(str(int(account_id)) for account_id in account_ids[start:start + batch_size])
+            with self.db.transaction() as cursor:
+                # Waits for the transactions appending entries to the accounts, the entries read below are committed
+                self.db._execute(f"select account_id from {accounts} where account_id in ({batch}) for update", cursor)
+                self.db._execute(
+                    f"insert into {snapshots} (account_id, balance, last_entry_id) "
+                    f"select a.account_id, coalesce(s.balance, a.balance) + sum(l.amount), max(l.entry_id) "
+                    f"from {ledger} l join {accounts} a on a.account_id = l.account_id "
+                    f"left join {snapshots} s on s.account_id = l.account_id "
+                    f"where l.account_id in ({batch}) and l.entry_id > coalesce(s.last_entry_id, 0) "
+                    f"group by a.account_id, a.balance, s.balance "
+                    f"on duplicate key update balance = values(balance), last_entry_id = values(last_entry_id), "
+                    f"taken_at = now()", cursor)
+            taken += len(account_ids[start:start + batch_size])
+        return taken
+
+
+class AccountSummaryHandler(object):
+    """
+    Focuses on the order history summary of an account: order count, total spend, open balance, last order and payment
+    dates and the monthly spend, from one aggregate query (group by ... with rollup)
+
+    Summaries are cached per account until the next order, bill or payment of the account in this process, the other
+    API processes see the write after ACCOUNT_SUMMARY_TTL_SECONDS at the latest
+    """
+    # Shared by all instances, summary per account
+    summaries = LRUCache(API_SETTINGS.get('ACCOUNT_SUMMARY_CACHE_SIZE', 10000),
+                         API_SETTINGS.get('ACCOUNT_SUMMARY_TTL_SECONDS', 60))
+    # Counts the invalidations, a summary read while an invalidation happened is not cached
+    generation = 0
+    generation_lock = threading.Lock()
+
+    def __init__(self, db):
+        self.db = db
+        self.table_name = ORDERS['table_name']
+        self.query_gen = QueryGenerator()
+
+    # Drop the cached summary of the account, called after writing its orders, bills or payments
+    @classmethod
+    def invalidate(cls, account_id):
+        with cls.generation_lock:
+            cls.generation += 1
+        cls.summaries.pop(str(account_id))
+
+    # Drop all cached summaries, e.g. after updating an account by its distributor id
+    @classmethod
+    def invalidate_all(cls):
+        with cls.generation_lock:
+            cls.generation += 1
+        cls.summaries.clear()
+
+    # Query aggregating the orders of an active account per month, the rollup rows hold the totals
+    def summary_query(self, account_id):
+        """
+        :return: rows per (year, month) of the orders, per year and the grand total last. An account without orders
+            has only rows with year and month NULL
+        """
+        table = f"{ACCOUNTS['table_name']} left join {self.table_name} using (account_id) " \
+                f"left join (select account_id, max(payment_date) as last_payment_date " \
+                f"from {ACCOUNT_PAYMENTS['table_name']} group by account_id) as payments using (account_id)"
+        return self.query_gen.select(table, ['year(order_date) as year', 'month(order_date) as month',
+                                             'count(order_id) as orders',
+                                             'coalesce(sum(total_price + shipping_cost), 0) as spend',
+                                             'max(order_date) as last_order_date',
+                                             'max(last_payment_date) as last_payment_date'],
+                                     {'account_id': account_id, 'is_active': 1},
+                                     group_by=['year(order_date)', 'month(order_date) with rollup'])
+
+    # Get order history summary of account
+    def get(self, account_id):
+        key = str(account_id)
+        summary = self.summaries.get(key)
+        if summary is not None:
+            return summary
+        generation = self.generation
+        rows = self.db.get_result(self.summary_query(account_id))
+        if not rows:
+            raise IndexError(f"Account with id '{account_id}' Not Registered")
+        totals = rows[-1]
+        summary = {'account_id': int(account_id), 'orders': int(totals['orders']),
+                   'total_spend': float(totals['spend']),
+                   'balance': AccountLedgerHandler(self.db).balance(account_id),
+                   'last_order_date': str(totals['last_order_date']) if totals['last_order_date'] else None,
+                   'last_payment_date': str(totals['last_payment_date']) if totals['last_payment_date'] else None,
+                   'monthly_spend': [{'month': f"{int(row['year'])}-{int(row['month']):02d}",
+                                      'orders': int(row['orders']), 'spend': float(row['spend'])}
+                                     for row in rows if row['month'] is not None]}
+        if generation == self.generation:
+            self.summaries.put(key, summary)
+        return summary
 
 
 class AccountBillHandler(object):
@@ -85,7 +260,7 @@ class AccountBillHandler(object):
     # Get bill
     def get(self, account_id: str, order_id: str, select_cols: list = None):
         if select_cols is None:
-            select_cols = ['*']
+            select_cols = columns_of(ACCOUNT_BILLS)
         select_query = self.query_gen.select(self.table_name, select_cols, {'account_id': account_id,
                                                                             'order_id': order_id})
         account_bill = self.db.get_result(select_query)
@@ -93,24 +268,52 @@ class AccountBillHandler(object):
             raise IndexError(f"No Billed Order with id '{order_id}' Found")
         return account_bill[0]
 
-    # Create new bill
-    def create_bill(self, account_id: str, order: dict, bill_date=None):
+    # Queries billing an order and charging it to the account's ledger, the bill id is set to @bill_id
+    def bill_queries(self, account_id: str, order: dict, order_id=None, bill_date=None):
+        """
+        :param order_id: id of the order, e.g. RawSQL('@order_id') of the order inserted in the same transaction
+        """
         today = date.today().strftime('%Y-%m-%d')
         bill_amount = float(order['total_price']) + float(order['shipping_cost'])
-        data = {'account_id': account_id, 'order_id': order['order_id'], 'amount': bill_amount,
+        data = {'account_id': account_id, 'order_id': order_id or order['order_id'], 'amount': bill_amount,
                 'bill_date': bill_date or today}
         insert_query = self.query_gen.insert(self.table_name, [data])
-        update_date = {'balance': {'+': bill_amount}}
-        update_query = self.query_gen.update(ACCOUNTS['table_name'], {'account_id': account_id}, update_date)
-        _, last_row_id = self.db.execute([insert_query, update_query])
-        return {'bill_id': last_row_id[0]}
+        entry_query = AccountLedgerHandler(self.db).entry_query(account_id, 'bill', RawSQL('@bill_id'), bill_amount)
+        return [insert_query, 'set @bill_id = last_insert_id()', entry_query]
+
+    # Create new bill
+    def create_bill(self, account_id: str, order: dict, bill_date=None):
+        lock_query = AccountLedgerHandler(self.db).lock_query(account_id)
+        bill = self.db.execute_block([lock_query] + self.bill_queries(account_id, order, bill_date=bill_date),
+                                     'select @bill_id as bill_id')
+        AccountSummaryHandler.invalidate(account_id)
+        return {'bill_id': bill[0]['bill_id']}
+
+    # Create bills for the orders which are not billed yet
+    def create_bills(self, account_id: str, orders: list, progress=None):
+        """
+        :param progress: called with (orders done, total orders) after every order
+        :return: ids of the created bills
+        """
+        select_query = self.query_gen.select(self.table_name, ['order_id'], {'account_id': account_id})
+        billed = {int(bill['order_id']) for bill in self.db.get_result(select_query)}
+        bill_ids = []
+        for i, order in enumerate(orders):
+            if int(order['order_id']) not in billed:
+                bill_ids.append(self.create_bill(account_id, order)['bill_id'])
+            if progress:
+                progress(i + 1, len(orders))
+        return bill_ids
 
     # Pay bill
     def pay_bills(self, account_id: str, amount: float, payment_date=None):
         today = date.today().strftime('%Y-%m-%d')
         data = {'account_id': account_id, 'amount': amount, 'payment_date': payment_date or today}
         insert_query = self.query_gen.insert(ACCOUNT_PAYMENTS['table_name'], [data])
-        update_data = {'balance': {'-': amount}}
-        update_query = self.query_gen.update(ACCOUNTS['table_name'], {'account_id': account_id}, update_data)
-        _, last_row_id = self.db.execute([insert_query, update_query])
-        return {'payment_id': last_row_id[0]}
+        ledger_handler = AccountLedgerHandler(self.db)
+        entry_query = ledger_handler.entry_query(account_id, 'payment', RawSQL('@payment_id'), -float(amount))
+        payment = self.db.execute_block([ledger_handler.lock_query(account_id), insert_query,
+                                         'set @payment_id = last_insert_id()', entry_query],
+                                        'select @payment_id as payment_id')
+        AccountSummaryHandler.invalidate(account_id)
+        return {'payment_id': payment[0]['payment_id']}
@@ -4,6 +4,7 @@ Module for handling Distributors
 from wolfpub.api.handlers.account import AccountHandler
 from wolfpub.api.utils.custom_exceptions import UnauthorizedOperation
 
+from wolfpub.api.utils.projection import columns_of
 from wolfpub.api.utils.query_generator import QueryGenerator
 from wolfpub.constants import DISTRIBUTORS, ACCOUNTS
 
@@ -16,6 +17,7 @@ class DistributorHandler(object):
     def __init__(self, db):
         self.db = db
         self.table_name = DISTRIBUTORS['table_name']
+        self.columns = columns_of(DISTRIBUTORS, ACCOUNTS)
         self.query_gen = QueryGenerator()
 
     # Set new distributor
@@ -26,9 +28,12 @@ class DistributorHandler(object):
         return {'distributor_id': last_row_id[0], 'account_id': last_row_id[1]}
 
     # Fetch active distributor
-    def get(self, distributor_id: str):
+    def get(self, distributor_id: str, select_cols: list = None):
+        if select_cols is None:
+            select_cols = self.columns
         cond = {'distributor_id': distributor_id, 'is_active': 1}
-        select_query = self.query_gen.select(f"{self.table_name} natural join {ACCOUNTS['table_name']}", ['*'], cond)
+        select_query = self.query_gen.select(f"{self.table_name} natural join {ACCOUNTS['table_name']}", select_cols,
+                                             cond)
         dist = self.db.get_result(select_query)
         if not dist:
             raise IndexError(f"Distributor with id '{distributor_id}' Not Found")
@@ -2,6 +2,7 @@
 Module for handling Editors
 """
 
+from wolfpub.api.utils.projection import columns_of
 from wolfpub.api.utils.query_generator import QueryGenerator
 from wolfpub.constants import EDITORS
 
@@ -25,7 +26,7 @@ class EditorsHandler(object):
     # Fetch existing editor
     def get(self, emp_id: str):
         cond = {'emp_id': emp_id}
-        select_query = self.query_gen.select(self.table_name, ['*'], cond)
+        select_query = self.query_gen.select(self.table_name, columns_of(EDITORS), cond)
         return self.db.get_result(select_query)
 
     # Update editor
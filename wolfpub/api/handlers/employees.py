@@ -4,10 +4,12 @@ Module for handling employees
 
 import random
 
-from wolfpub.api.utils.custom_exceptions import MariaDBException
 from wolfpub.api.utils.custom_response import CustomResponse
+from wolfpub.api.utils.pagination import after_keys
+from wolfpub.api.utils.projection import columns_of
 from wolfpub.api.utils.query_generator import QueryGenerator
-from wolfpub.constants import EMPLOYEES, WRITE_BOOKS, WRITE_ARTICLES, REVIEW_PUBLICATION, AUTHORS, EDITORS
+from wolfpub.constants import EMPLOYEES, WRITE_BOOKS, WRITE_ARTICLES, REVIEW_PUBLICATION, AUTHORS, EDITORS, \
+    PUBLICATIONS, BOOKS, PERIODICALS
 
 
 class EmployeesHandler(object):
@@ -26,6 +28,12 @@ class EmployeesHandler(object):
                                          f"{WRITE_ARTICLES['table_name']}"
 
         self.editor_publication_table_name = REVIEW_PUBLICATION['table_name']
+        self.publication_detail_columns = ['p.publication_id', 'p.title', 'p.topic', 'p.price', 'p.publication_date',
+                                           "CASE WHEN b.publication_id IS NOT NULL THEN 'book' "
+                                           "ELSE 'periodical' END AS pub_type",
+                                           'coalesce(b.is_available, pr.is_available) AS is_available',
+                                           'b.book_id', 'b.edition', 'b.isbn', 'b.creation_date',
+                                           'pr.periodical_id', 'pr.issue', 'pr.issn', 'pr.periodical_type']
         self.query_gen = QueryGenerator()
 
     # Generate employee ID based on job type
@@ -56,9 +64,7 @@ class EmployeesHandler(object):
         employee['emp_id'] = emp_id
         content_writer['emp_id'] = emp_id
 
-        cursor = self.db.get_cursor()
-        self.db.conn.autocommit = False
-        try:
+        with self.db.transaction() as cursor:
             insert_query = self.query_gen.insert(self.table_name, [employee])
             _, last_row_id = self.db._execute(insert_query, cursor)
             if cw_type == "author":
@@ -69,17 +75,14 @@ class EmployeesHandler(object):
                 insert_query = self.query_gen.insert(self.editor_table_name, [content_writer])
                 _, last_row_id = self.db._execute(insert_query, cursor)
 
-            self.db.conn.commit()
-        except (MariaDBException, Exception) as e:
-            self.db.conn.rollback()
-            raise e
-
         return {'emp_id': emp_id}
 
     # Fetch existing employee
-    def get(self, emp_id: str):
+    def get(self, emp_id: str, select_cols: list = None):
+        if select_cols is None:
+            select_cols = columns_of(EMPLOYEES)
         cond = {'emp_id': emp_id}
-        select_query = self.query_gen.select(self.table_name, ['*'], cond)
+        select_query = self.query_gen.select(self.table_name, select_cols, cond)
         return self.db.get_result(select_query)
 
     # Update employee
@@ -92,9 +95,7 @@ class EmployeesHandler(object):
     # Remove employee
     def remove(self, emp_id: str):
         cond = {'emp_id': emp_id}
-        cursor = self.db.get_cursor()
-        self.db.conn.autocommit = False
-        try:
+        with self.db.transaction() as cursor:
             delete_query = self.query_gen.delete(self.author_table_name, cond)
             row_affected, _ = self.db._execute(delete_query, cursor)
             if row_affected < 1:
@@ -104,30 +105,62 @@ class EmployeesHandler(object):
             delete_query = self.query_gen.delete(self.table_name, cond)
             row_affected, _ = self.db._execute(delete_query, cursor)
 
-            self.db.conn.commit()
-        except (MariaDBException, Exception) as e:
-            self.db.conn.rollback()
-            raise e
-
         return row_affected
 
+    # Sort key of the publications of an author or editor, pages continue after it
+    @staticmethod
+    def publication_keys(author_type: str = None):
+        return ['publication_id', 'article_id'] if author_type == 'journalist' else ['publication_id']
+
     # Fetch publications for an author based on writer or journalist
-    def get_author_publications(self, emp_id: str, author_type: str):
+    def get_author_publications(self, emp_id: str, author_type: str, limit: int = None, after: list = None):
+        """
+        :param after: sort key (publication_keys) of the last publication of the previous page
+        """
         cond = {'emp_id': emp_id}
+        keys = self.publication_keys(author_type)
+        if after is not None:
+            cond.update(self.query_gen.keyset(after_keys(keys, after)))
         if author_type == "writer":
             select_cols = ['emp_id', 'publication_id']
-            select_query = self.query_gen.select(self.book_author_table_name, select_cols, cond)
+            select_query = self.query_gen.select(self.book_author_table_name, select_cols, cond, order_by=keys,
+                                                 limit=limit)
             author_books = self.db.get_result(select_query)
             return author_books
         elif author_type == "journalist":
             select_cols = ['emp_id', 'publication_id', 'article_id']
-            select_query = self.query_gen.select(self.article_author_table_name, select_cols, cond)
+            select_query = self.query_gen.select(self.article_author_table_name, select_cols, cond, order_by=keys,
+                                                 limit=limit)
             author_articles = self.db.get_result(select_query)
             return author_articles
 
     # Fetch publications for an editor
-    def get_editor_publications(self, emp_id: str):
+    def get_editor_publications(self, emp_id: str, limit: int = None, after: list = None):
         cond = {'emp_id': emp_id}
+        keys = self.publication_keys()
+        if after is not None:
+            cond.update(self.query_gen.keyset(after_keys(keys, after)))
         select_cols = ['emp_id', 'publication_id']
-        select_query = self.query_gen.select(self.editor_publication_table_name, select_cols, cond)
+        select_query = self.query_gen.select(self.editor_publication_table_name, select_cols, cond, order_by=keys,
+                                             limit=limit)
+        return self.db.get_result(select_query)
+
+    # Fetch publication details for an employee (author or editor) with a single joined query
+    def get_publication_details(self, emp_id: str, limit: int, after: list = None):
+        """
+        :param after: [publication_id] of the last publication of the previous page
+        """
+        cond = {'emp_id': emp_id}
+        if after is not None:
+            # The sort key bounds the publications of every role before they are joined
+            cond.update(self.query_gen.keyset(after_keys(['publication_id'], after)))
+        employee_publications = ' union '.join(
+            [self.query_gen.select(table, ['publication_id'], cond)
+             for table in [WRITE_BOOKS['table_name'], WRITE_ARTICLES['table_name'], REVIEW_PUBLICATION['table_name']]])
+        table = f"({employee_publications}) as e " \
+                f"join {PUBLICATIONS['table_name']} as p on p.publication_id = e.publication_id " \
+                f"left join {BOOKS['table_name']} as b on b.publication_id = p.publication_id " \
+                f"left join {PERIODICALS['table_name']} as pr on pr.publication_id = p.publication_id"
+        select_query = self.query_gen.select(table, self.publication_detail_columns, order_by=['p.publication_id'],
+                                             limit=limit)
         return self.db.get_result(select_query)
@@ -0,0 +1,93 @@
+"""
+Module for handling the idempotency keys of retried requests
+"""
+import hashlib
+import json
+import re
+import uuid
+
+from wolfpub.api.utils.custom_exceptions import IdempotencyConflict
+from wolfpub.api.utils.query_generator import QueryGenerator, RawSQL, quote_literal
+from wolfpub.constants import IDEMPOTENCY_KEYS
+
+KEY_PATTERN = re.compile(r'^[A-Za-z0-9_.:-]{1,64}$')
+
+
+class IdempotencyHandler(object):
+    """
+    Focuses on replaying the stored response of a retried request instead of executing it once more
+    """
+
+    def __init__(self, db, ttl: int = 86400, lock_seconds: int = 60):
+        """
+        :param ttl: seconds a key and its stored response are kept
+        :param lock_seconds: a request still processing after that long is taken as lost, its key can be used again
+        """
+        self.db = db
+        self.table_name = IDEMPOTENCY_KEYS['table_name']
+        self.stored_columns = ['request_hash', 'status', 'order_id', 'response_code', 'response']
+        self.query_gen = QueryGenerator()
+        self.ttl = int(ttl)
+        self.lock_seconds = int(lock_seconds)
+
+    # Hash of the request, a key can only be replayed for the same request
+    @staticmethod
+    def request_hash(payload) -> str:
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    # Validate the key sent by the client
+    @staticmethod
+    def check_key(key: str):
+        if not KEY_PATTERN.match(key):
+            raise ValueError('Idempotency-Key has to be 1 to 64 characters of letters, digits and _ . : -')
+
+    # Reserve the key for a new request or get the request stored with the key
+    def begin(self, account_id, key: str, request_hash: str):
+        """
+        :return: (reservation, None) when the key is reserved for this request, the reservation identifies the attempt
+                 holding the key. Else (None, stored request)
+                 {'status': 'completed', 'order_id': 1, 'response_code': 200, 'response': {...}}
+        """
+        self.check_key(key)
+        cond = {'account_id': account_id, 'idempotency_key': key}
+        expired = f"(expires_at < now() or (status = 'processing' and " \
+                  f"created_at < now() - interval {self.lock_seconds} second))"
+        reservation = uuid.uuid4().hex
+        data = {'account_id': account_id, 'idempotency_key': key, 'request_hash': request_hash,
+                'reservation': reservation, 'expires_at': RawSQL(f'now() + interval {self.ttl} second')}
+        insert_query = self.query_gen.insert(self.table_name, [data]).replace('insert into', 'insert ignore into', 1)
+        reserved, _ = self.db.execute([f'{self.query_gen.delete(self.table_name, cond)} and {expired}', insert_query])
+        if reserved:
+            return reservation, None
+        stored = self.db.get_result(self.query_gen.select(self.table_name, self.stored_columns, cond))
+        if not stored:
+            raise IdempotencyConflict(f"Idempotency-Key '{key}' expired while reserving it, retry the request")
+        stored = stored[0]
+        if stored['request_hash'] != request_hash:
+            raise IdempotencyConflict(f"Idempotency-Key '{key}' was already used for a different request")
+        if stored['status'] == 'processing':
+            raise IdempotencyConflict(f"Request with Idempotency-Key '{key}' is still being processed")
+        stored['response'] = json.loads(stored['response']) if stored['response'] else None
+        return None, stored
+
+    # Query completing the key, executed in the transaction placing the order. It changes no row when the reservation
+    # was taken over by a retry after IDEMPOTENCY_LOCK_SECONDS, the order has to be rolled back then
+    def complete_query(self, account_id, key: str, reservation: str):
+        return self.query_gen.update(self.table_name, {'account_id': account_id, 'idempotency_key': key,
+                                                       'status': 'processing', 'reservation': reservation},
+                                     {'status': 'completed', 'order_id': RawSQL('@order_id')})
+
+    # Store the response to be replayed for the retries
+    def store_response(self, account_id, key: str, reservation: str, status_code: int, response: dict):
+        data = {'response_code': int(status_code), 'response': quote_literal(json.dumps(response, default=str))}
+        self.db.execute([self.query_gen.update(self.table_name, {'account_id': account_id, 'idempotency_key': key,
+                                                                 'reservation': reservation}, data)])
+
+    # Release the key of a failed request, so it can be retried with the same key
+    def release(self, account_id, key: str, reservation: str):
+        self.db.execute([self.query_gen.delete(self.table_name, {'account_id': account_id, 'idempotency_key': key,
+                                                                 'status': 'processing', 'reservation': reservation})])
+
+    def purge_expired(self):
+        rows, _ = self.db.execute([f'delete from {self.table_name} where expires_at < now()'])
+        return rows
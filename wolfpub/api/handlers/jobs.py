@@ -0,0 +1,111 @@
+"""
+Module for handling the background jobs of wolfpub
+"""
+import json
+
+from wolfpub.api.utils.projection import columns_of
+from wolfpub.api.utils.query_generator import QueryGenerator, RawSQL, quote_literal
+from wolfpub.constants import JOBS
+
+FINISHED_STATUSES = ['succeeded', 'failed', 'cancelled']
+
+
+class JobHandler(object):
+    """
+    Focuses on providing functionality over the persistent queue of background jobs
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.table_name = JOBS['table_name']
+        self.columns = columns_of(JOBS)
+        self.query_gen = QueryGenerator()
+
+    # Util to decode the json columns of a job
+    @staticmethod
+    def decode(job: dict):
+        for column in ('params', 'result'):
+            job[column] = json.loads(job[column]) if job.get(column) else None
+        return job
+
+    # Submit new job
+    def submit(self, job_type: str, params: dict = None, max_attempts: int = 3):
+        data = {'job_type': job_type, 'params': quote_literal(json.dumps(params or {}, default=str)),
+                'max_attempts': int(max_attempts)}
+        _, last_row_id = self.db.execute([self.query_gen.insert(self.table_name, [data])])
+        return {'job_id': last_row_id[-1], 'status': 'queued'}
+
+    # Get job
+    def get(self, job_id):
+        job = self.db.get_result(self.query_gen.select(self.table_name, self.columns, {'job_id': job_id}))
+        if not job:
+            raise IndexError(f"Job with id '{job_id}' Not Found")
+        return self.decode(job[0])
+
+    # Cancel job, queued jobs are cancelled right away, running jobs stop at their next progress report
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job['status'] in FINISHED_STATUSES:
+            raise ValueError(f"Job with id '{job_id}' already {job['status']}")
+        self.db.execute([self.query_gen.update(self.table_name, {'job_id': job_id}, {'cancel_requested': 1}),
+                         self.query_gen.update(self.table_name, {'job_id': job_id, 'status': 'queued'},
+                                               {'status': 'cancelled', 'finished_at': RawSQL('now()')})])
+        return self.get(job_id)
+
+    # Claim the next due job for the worker, rows locked by other workers are skipped
+    def claim(self, worker: str):
+        job_id = RawSQL('@job_id')
+        queries = [f'set {job_id} = null',
+                   f"select job_id into {job_id} from {self.table_name} where status = 'queued' and run_after <= now() "
+                   f"order by run_after, job_id limit 1 for update skip locked",
+                   self.query_gen.update(self.table_name, {'job_id': job_id},
+                                         {'status': 'running', 'worker': worker, 'attempts': {'+': 1}})]
+        job = self.db.execute_block(queries, self.query_gen.select(self.table_name, self.columns, {'job_id': job_id}))
+        return self.decode(job[0]) if job else None
+
+    # Report progress of a running job
+    def progress(self, job_id, progress: int, message: str = None):
+        """
+        :return: True when the cancellation of the job was requested
+        """
+        data = {'progress': int(progress)}
+        if message:
+            data['message'] = quote_literal(message[:255])
+        job = self.db.execute_block([self.query_gen.update(self.table_name, {'job_id': job_id}, data)],
+                                    self.query_gen.select(self.table_name, ['cancel_requested'], {'job_id': job_id}))
+        return bool(job and job[0]['cancel_requested'])
+
+    # Keep a running job from being requeued as stale
+    def heartbeat(self, job_id):
+        self.db.execute([self.query_gen.update(self.table_name, {'job_id': job_id, 'status': 'running'},
+                                               {'updated_at': RawSQL('now()')})])
+
+    # Finish a job with its result
+    def finish(self, job_id, result=None):
+        data = {'status': 'succeeded', 'progress': 100, 'result': quote_literal(json.dumps(result, default=str)),
+                'finished_at': RawSQL('now()')}
+        self.db.execute([self.query_gen.update(self.table_name, {'job_id': job_id}, data)])
+
+    # Mark a running job as cancelled
+    def cancelled(self, job_id):
+        data = {'status': 'cancelled', 'message': 'Cancelled', 'finished_at': RawSQL('now()')}
+        self.db.execute([self.query_gen.update(self.table_name, {'job_id': job_id}, data)])
+
+    # Retry a failed job after an exponential backoff or fail it when it is out of attempts
+    def fail(self, job: dict, error: str, backoff: float = 30, retry: bool = True):
+        data = {'message': quote_literal(error[:255])}
+        if retry and job['attempts'] < job['max_attempts']:
+            delay = int(backoff * 2 ** (job['attempts'] - 1))
+            data.update({'status': 'queued', 'run_after': RawSQL(f'now() + interval {delay} second')})
+        else:
+            data.update({'status': 'failed', 'finished_at': RawSQL('now()')})
+        self.db.execute([self.query_gen.update(self.table_name, {'job_id': job['job_id']}, data)])
+
+    # Requeue running jobs whose worker stopped sending heartbeats (killed or crashed workers)
+    def requeue_stale(self, stale_seconds: int):
+        stale = f"status = 'running' and updated_at < now() - interval {int(stale_seconds)} second"
+        rows, _ = self.db.execute([
+            f"update {self.table_name} set status = 'failed', message = 'Worker lost', finished_at = now() "
+            f"where {stale} and attempts >= max_attempts",
+            f"update {self.table_name} set status = 'queued', message = 'Worker lost' where {stale}"])
+        return rows
@@ -1,10 +1,15 @@
 """
 Module for handling the account of Distributor with 'Wolf Pub' Publication House
 """
-from wolfpub.api.utils.custom_exceptions import MariaDBException
+from datetime import datetime
 
-from wolfpub.api.utils.query_generator import QueryGenerator
-from wolfpub.constants import ORDERS
+from wolfpub.api.handlers.account import AccountBillHandler, AccountSummaryHandler
+from wolfpub.api.utils.custom_exceptions import IdempotencyConflict
+from wolfpub.api.utils.pagination import after_keys
+from wolfpub.api.utils.projection import columns_of
+from wolfpub.api.utils.query_generator import QueryGenerator, RawSQL
+from wolfpub.constants import ORDERS, BOOK_ORDERS_INFO, PERIODICAL_ORDERS_INFO, ACCOUNTS, BOOKS, PERIODICALS, \
+    PUBLICATIONS
 
 
 class OrderHandler(object):
@@ -30,26 +35,33 @@ class OrderHandler(object):
 
     # Util function to prepare order json
     @staticmethod
-    def reformat_publication_order(obj: list, order_id: int):
+    def reformat_publication_order(obj: list, order_id):
         return [{'order_id': order_id,
                  'publication_id': order['publication_id'],
                  'quantity': order.get('quantity', 1),
                  'price': float(order['price']) * int(order.get('quantity', 1))} for order in obj]
 
-    # Fetch all orders for an account
-    def get_orders(self, account_id, select_cols: list = None):
+    # Fetch the orders for an account in the order of their ids, all of them or a page after the given order
+    def get_orders(self, account_id, select_cols: list = None, limit: int = None, after: list = None):
+        """
+        :param after: [order_id] of the last order of the previous page
+        """
         if select_cols is None:
-            select_cols = ['*']
-        select_query = self.query_gen.select(self.table_name, select_cols, {'account_id': account_id})
+            select_cols = columns_of(ORDERS)
+        cond = {'account_id': account_id}
+        if after is not None:
+            cond.update(self.query_gen.keyset(after_keys([self.id_column], after)))
+        select_query = self.query_gen.select(self.table_name, select_cols, cond, order_by=[self.id_column],
+                                             limit=limit)
         orders = self.db.get_result(select_query)
-        if not orders:
+        if not orders and after is None:
             raise IndexError(f"No Order Found for given Account Id")
         return orders
 
     # Fetch order with ID
     def get_order(self, account_id, order_id, select_cols: list = None):
         if select_cols is None:
-            select_cols = ['*']
+            select_cols = columns_of(ORDERS)
         select_query = self.query_gen.select(self.table_name, select_cols, {'account_id': account_id,
                                                                             'order_id': order_id})
         order = self.db.get_result(select_query)
@@ -69,19 +81,112 @@ class OrderHandler(object):
         :param periodical_orders: [{'order_id': 1, 'publication_id': 5, 'quantity': 2, 'price': 25}]
         :return: {'order_id': 1}
         """
-        insert_query = self.query_gen.insert(self.table_name, [order])
-        cursor = self.db.get_cursor()
-        self.db.conn.autocommit = False
-        try:
-            _, last_row_id = self.db._execute(insert_query, cursor)
-            if book_orders:
-                book_orders = self.reformat_publication_order(book_orders, last_row_id)
-                self.db._execute(self.query_gen.insert('book_orders_info', book_orders), cursor)
-            if periodical_orders:
-                periodical_orders = self.reformat_publication_order(periodical_orders, last_row_id)
-                self.db._execute(self.query_gen.insert('periodical_orders_info', periodical_orders), cursor)
-            self.db.conn.commit()
-        except MariaDBException as e:
-            self.db.conn.rollback()
-            raise e
-        return {'order_id': last_row_id}
+        # Order and its items are inserted in one round trip, the order id is shared through a session variable
+        order_id = RawSQL('@order_id')
+        queries = [self.query_gen.insert(self.table_name, [order]), f'set {order_id} = last_insert_id()']
+        if book_orders:
+            book_orders = self.reformat_publication_order(book_orders, order_id)
+            queries.append(self.query_gen.insert(BOOK_ORDERS_INFO['table_name'], book_orders))
+        if periodical_orders:
+            periodical_orders = self.reformat_publication_order(periodical_orders, order_id)
+            queries.append(self.query_gen.insert(PERIODICAL_ORDERS_INFO['table_name'], periodical_orders))
+        result = self.db.execute_block(queries, f'select {order_id} as order_id')
+        AccountSummaryHandler.invalidate(order['account_id'])
+        return {'order_id': result[0]['order_id']}
+
+
+class OrderPlacementHandler(object):
+    """
+    Focuses on placing an order with its items, its bill and its ledger entry as one transaction on one connection
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.order_handler = OrderHandler(db)
+        self.account_bill_handler = AccountBillHandler(db)
+        self.book_columns = ['publication_id', 'title', 'edition', 'price']
+        self.periodical_columns = ['publication_id', 'title', 'issue', 'price']
+        self.query_gen = QueryGenerator()
+
+    # Util to fetch the rows of a query executed in the transaction
+    def fetch(self, query: str, cursor):
+        self.db._execute(query, cursor)
+        return self.db._fetch(cursor)
+
+    # Lock the active account against deactivation, shared with the concurrent orders of the account
+    def lock_account(self, account_id, cursor):
+        select_query = self.query_gen.select(ACCOUNTS['table_name'], ['account_id'],
+                                             {'account_id': account_id, 'is_active': 1})
+        account = self.fetch(f'{select_query} lock in share mode', cursor)
+        if not account:
+            raise IndexError(f"Account with id '{account_id}' Not Registered")
+        return account[0]
+
+    # Price the ordered books and periodicals, quantities are taken from the items
+    def price_items(self, items: dict, cursor):
+        """
+        :param items: {'books': [{'title': 'T', 'edition': '1', 'quantity': 2}],
+                       'periodicals': [{'title': 'P', 'issue': '2022-04-01', 'quantity': 1}]}
+        :return: [{'publication_id': 4, 'price': 10, 'quantity': 2, ...}], [...]
+        """
+        books, periodicals = [], []
+        if items.get('books'):
+            cond = {'items': [{'title': b['title'], 'edition': b['edition']} for b in items['books']]}
+            rows = self.fetch(self.query_gen.select(f"{BOOKS['table_name']} natural join "
+                                                    f"{PUBLICATIONS['table_name']}", self.book_columns, cond), cursor)
+            books = [{**u, **v} for u in rows for v in items['books']
+                     if u['title'] == v['title'] and int(u['edition']) == int(v['edition'])]
+        if items.get('periodicals'):
+            cond = {'items': [{'title': p['title'], 'issue': p['issue']} for p in items['periodicals']]}
+            rows = self.fetch(self.query_gen.select(f"{PERIODICALS['table_name']} natural join "
+                                                    f"{PUBLICATIONS['table_name']}", self.periodical_columns, cond), cursor)
+            periodicals = [{**u, **v} for u in rows for v in items['periodicals']
+                           if u['title'] == v['title'] and u['issue'] == v['issue']]
+        if not books and not periodicals:
+            raise ValueError("Publications to be ordered not found with WolfPub Publication House")
+        return books, periodicals
+
+    # Place order
+    def place(self, account_id, order: dict, queries: list = None):
+        """
+        Validates the account, prices the items and writes the order, its items, its bill and its ledger entry
+        :param order: {'delivery_date': '2022-05-01', 'items': {'books': [...], 'periodicals': [...]},
+                       'order_date': '2022-04-12', 'shipping_cost': 10}
+        :param queries: executed last in the same transaction, the order id is available as @order_id. Each of them has
+                        to change a row, else the order is rolled back (IdempotencyConflict), e.g. the completion of an
+                        idempotency key reserved again by a retry
+        :return: the order with order_id, total_price, shipping_cost and bill_id
+        """
+        order = dict(order, account_id=account_id)
+        items = order.pop('items')
+        if 'order_date' not in order:
+            order['order_date'] = datetime.today().strftime('%Y-%m-%d')
+        with self.db.transaction() as cursor:
+            self.lock_account(account_id, cursor)
+            books, periodicals = self.price_items(items, cursor)
+
+            # Prepare order price and shipping cost
+            order['total_price'] = self.order_handler.get_total_price(books + periodicals)
+            if 'shipping_cost' not in order:
+                shipping_cost = 2 * (sum([b['quantity'] for b in books]) + sum([p['quantity'] for p in periodicals]))
+                order['shipping_cost'] = 100 if shipping_cost > 100 else shipping_cost
+
+            _, order['order_id'] = self.db._execute(self.query_gen.insert(ORDERS['table_name'], [order]), cursor)
+            order_id = RawSQL('@order_id')
+            self.db._execute(f'set {order_id} = last_insert_id()', cursor)
+            for table_name, publications in ((BOOK_ORDERS_INFO['table_name'], books),
+                                             (PERIODICAL_ORDERS_INFO['table_name'], periodicals)):
+                if publications:
+                    rows = self.order_handler.reformat_publication_order(publications, order_id)
+                    self.db._execute(self.query_gen.insert(table_name, rows), cursor)
+            bill_queries = self.account_bill_handler.bill_queries(account_id, order, order_id, order['order_date'])
+            _, order['bill_id'] = self.db._execute(bill_queries[0], cursor)
+            for query in bill_queries[1:]:
+                self.db._execute(query, cursor)
+            for query in queries or []:
+                rows, _ = self.db._execute(query, cursor)
+                if rows < 1:
+                    raise IdempotencyConflict('The request was taken over by a retry with the same Idempotency-Key, '
+                                              'the order was not placed')
+        AccountSummaryHandler.invalidate(account_id)
+        return order
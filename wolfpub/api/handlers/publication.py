@@ -3,16 +3,25 @@ Module for handling the account of distributor with 'Wolf Pub' Publication House
 """
 import random
 
+from wolfpub.api.utils import content
 from wolfpub.api.utils.custom_exceptions import MariaDBException
-from wolfpub.api.utils.query_generator import QueryGenerator
+from wolfpub.api.utils.lru_cache import LRUCache
+from wolfpub.api.utils.pagination import after_keys
+from wolfpub.api.utils.projection import columns_of, response_columns
+from wolfpub.api.utils.query_generator import QueryGenerator, quote_literal
+from wolfpub.config import API_SETTINGS
 from wolfpub.constants import PUBLICATIONS, BOOKS, PERIODICALS, CHAPTERS, ARTICLES, \
-    WRITE_BOOKS, REVIEW_PUBLICATION, WRITE_ARTICLES, EMPLOYEES
+    WRITE_BOOKS, REVIEW_PUBLICATION, WRITE_ARTICLES, EMPLOYEES, CHAPTER_BODIES, ARTICLE_BODIES
 
 
 class PublicationHandler(object):
     """
     Focuses on providing functionality over Publications of WolfPub
     """
+    # Versions of the publications for the cache validators of the catalog GETs, shared by the handlers of the process
+    # and dropped on their writes, the writes of other processes are seen after the ttl
+    versions = LRUCache(API_SETTINGS.get('CATALOG_VERSION_CACHE_SIZE', 10000),
+                        API_SETTINGS.get('CATALOG_VERSION_TTL_SECONDS', 5))
 
     def __init__(self, db):
         self.db = db
@@ -22,7 +31,9 @@ class PublicationHandler(object):
         self.editor_table_name = REVIEW_PUBLICATION['table_name']
 
         self.primary_key = 'publication_id'
-        self.columns = PUBLICATIONS['columns'].keys()
+        self.columns = columns_of(PUBLICATIONS)
+        # Columns of the own table of the handler, selected by get_by_id and get
+        self.select_columns = response_columns(PUBLICATIONS)
         self.query_gen = QueryGenerator()
 
     def reformat(self, obj):
@@ -37,26 +48,121 @@ class PublicationHandler(object):
 
     def get_by_id(self, publication_ids, select_cols: list = None):
         if select_cols is None:
-            select_cols = ['*']
+            select_cols = self.select_columns
         if isinstance(publication_ids, list) and len(publication_ids) == 1:
             publication_ids = publication_ids[0]
         cond = {'publication_id': publication_ids}
         select_query = self.query_gen.select(self.table_name, select_cols, cond)
         return self.db.get_result(select_query)
 
+    # Get version and last update (unix time) of a publication, None if it does not exist
+    def get_version(self, publication_id):
+        version = self.versions.get(str(publication_id))
+        if version is None:
+            cond = {'publication_id': publication_id}
+            select_cols = ['version', 'unix_timestamp(updated_at) as updated_at']
+            select_query = self.query_gen.select(PUBLICATIONS['table_name'], select_cols, cond)
+            output = self.db.get_result(select_query)
+            if len(output) == 0:
+                return None
+            version = output[0]
+            self.versions.put(str(publication_id), version)
+        return version
+
+    # Query bumping the version of a publication, part of every write to the publication, its book or periodical,
+    # its chapters and articles (updated_at follows by 'on update current_timestamp')
+    def version_query(self, publication_id):
+        return self.query_gen.update(PUBLICATIONS['table_name'], {'publication_id': publication_id},
+                                     {'version': {'+': 1}})
+
+    # Execute the queries of a write together with the version bump of the publication
+    def execute_versioned(self, publication_id, queries: list):
+        """
+        :return: rows affected by the last query and the last row ids of the queries, as db.execute
+        """
+        row_affected, last_row_ids = self.db.execute([self.version_query(publication_id)] + queries)
+        self.versions.pop(str(publication_id))
+        return row_affected, last_row_ids[1:]
+
+    # Queries writing a chapter or article, long texts are stored compressed in its body table
+    def text_queries(self, table: str, body_table: str, key: dict, text_column: str, data: dict, write):
+        """
+        :param key: primary key of the chapter or article
+        :param data: values of the chapter or article, the text column is optional for updates
+        :param write: function of the values, returns the insert or update query of the chapter or article
+        :return: queries for execute_versioned, the last one tells the affected rows
+        """
+        text = data.get(text_column)
+        if text is None:
+            return [write(data)]
+        values = content.body_values(text)
+        if values is None:
+            return [self.query_gen.delete(body_table, key), write(data)]
+        # The body row is selected from the written chapter or article, no row is written when it does not exist
+        columns = ', '.join(list(key) + list(values))
+        literals = ', '.join([quote_literal(value) for value in key.values()] +
+                             [str(value) for value in values.values()])
+        condition = ' and '.join(f'{column} = {quote_literal(value)}' for column, value in key.items())
+        return [write({**data, text_column: ''}),
+                f'replace into {body_table} ({columns}) select {literals} from {table} where {condition}']
+
     def get_ids(self, condition):
         self.reformat(condition)
         table = self.table_name
         if table != PUBLICATIONS['table_name']:
             table = f"{table} natural join {PUBLICATIONS['table_name']}"
-        select_query = self.query_gen.select(table, ['*'], condition)
+        select_query = self.query_gen.select(table, self.columns, condition)
         return self.db.get_result(select_query)
 
+    # Query resolving the series of a new book or periodical by its title: book_id and next edition of a known book
+    # (periodical_id of a known periodical), a null id for a new title. The rows read stay locked until the insert
+    # commits
+    def series_query(self, pub_type: str, title: str):
+        if pub_type == 'book':
+            table = self.book_table_name
+            select_cols = ['max(book_id) as book_id', 'coalesce(max(edition), 0) + 1 as edition']
+            cond = {'title_key': title.lower()}
+        else:
+            table = self.periodical_table_name
+            select_cols = ['max(periodical_id) as periodical_id']
+            cond = {'title_key': title.lower(), 'is_available': 1}
+        select_query = self.query_gen.select(f"{self.table_name} natural join {table}", select_cols, cond)
+        return f'{select_query} for update'
+
+    # Locked read of the highest book_id (periodical_id), a concurrent allocation of a new title waits for the
+    # inserting transaction instead of reading the same id
+    def last_id_query(self, pub_type: str):
+        table, key = ((self.book_table_name, 'book_id') if pub_type == 'book'
+                      else (self.periodical_table_name, 'periodical_id'))
+        select_query = self.query_gen.select(table, [key], order_by=[f'{key} desc'], limit=1)
+        return f'{select_query} for update'
+
+    # Resolve the series of a new book or periodical in the transaction inserting it
+    def allocate_series(self, pub_type: str, title: str, cursor):
+        """
+        :return: {'book_id': 4, 'edition': 3} for books, {'periodical_id': 2} for periodicals
+        """
+        key = 'book_id' if pub_type == 'book' else 'periodical_id'
+        self.db._execute(self.series_query(pub_type, title), cursor)
+        series = self.db._fetch(cursor)[0]
+        if series[key] is None:
+            self.db._execute(self.last_id_query(pub_type), cursor)
+            last = self.db._fetch(cursor)
+            series[key] = int(last[0][key]) + 1 if last else 1
+        return {column: int(value) for column, value in series.items()}
+
     def set(self, publication: dict, book: dict = None, periodical: dict = None):
-        cursor = self.db.get_cursor()
-        self.db.conn.autocommit = False
-        try:
-            pub_type = publication.pop('pub_type', None)
+        """
+        Inserts the publication and its book or periodical in one transaction, a book without book_id (periodical without
+        periodical_id) is added to the series of its title by allocate_series
+        """
+        pub_type = publication.pop('pub_type', None)
+        with self.db.transaction() as cursor:
+            if pub_type == "book" and 'book_id' not in book:
+                book.update(self.allocate_series(pub_type, publication['title'], cursor))
+            elif pub_type == "periodical" and 'periodical_id' not in periodical:
+                periodical.update(self.allocate_series(pub_type, publication['title'], cursor))
+
             insert_query = self.query_gen.insert(self.table_name, [publication])
             _, last_row_id = self.db._execute(insert_query, cursor)
             publication_id = str(last_row_id)
@@ -64,25 +170,18 @@ class PublicationHandler(object):
             if pub_type == "book":
                 book['publication_id'] = publication_id
                 insert_query = self.query_gen.insert(self.book_table_name, [book])
-                _, last_row_id = self.db._execute(insert_query, cursor)
+                self.db._execute(insert_query, cursor)
             elif pub_type == "periodical":
                 periodical['publication_id'] = publication_id
                 insert_query = self.query_gen.insert(self.periodical_table_name, [periodical])
-                _, last_row_id = self.db._execute(insert_query, cursor)
-
-            self.db.conn.commit()
-        except (MariaDBException, Exception) as e:
-            self.db.conn.rollback()
-            raise e
+                self.db._execute(insert_query, cursor)
 
         return {'publication_id': publication_id}
 
     def update(self, publication_id: str, publication: dict, book: dict, periodical: dict):
         cond = {'publication_id': publication_id}
-        cursor = self.db.get_cursor()
-        self.db.conn.autocommit = False
         pubs_affected = 0
-        try:
+        with self.db.transaction() as cursor:
             if len(publication) != 0:
                 update_query = self.query_gen.update(self.table_name, cond, publication)
                 pubs_affected, _ = self.db._execute(update_query, cursor)
@@ -95,10 +194,8 @@ class PublicationHandler(object):
                 update_query = self.query_gen.update(self.periodical_table_name, cond, periodical)
                 pubs_affected, _ = self.db._execute(update_query, cursor)
 
-            self.db.conn.commit()
-        except (MariaDBException, Exception) as e:
-            self.db.conn.rollback()
-            raise e
+            self.db._execute(self.version_query(publication_id), cursor)
+        self.versions.pop(str(publication_id))
 
         return pubs_affected
 
@@ -106,6 +203,7 @@ class PublicationHandler(object):
         cond = {'publication_id': publication_id}
         delete_query = self.query_gen.delete(self.table_name, cond)
         row_affected, _ = self.db.execute([delete_query])
+        self.versions.pop(str(publication_id))
         return row_affected
 
     def set_editor(self, association):
@@ -131,16 +229,24 @@ class BookHandler(PublicationHandler):
         self.employee_table_name = EMPLOYEES['table_name']
         self.parent_table_name = PUBLICATIONS['table_name']
         self.chapter_table_name = CHAPTERS['table_name']
+        self.chapter_body_table_name = CHAPTER_BODIES['table_name']
         self.secondary_key = set()
         self.secondary_key.update(['book_id', 'edition'])
-        self.columns = list(set(list(PUBLICATIONS['columns'].keys()) + list(BOOKS['columns'].keys())))
+        self.columns = columns_of(PUBLICATIONS, BOOKS)
+        self.select_columns = columns_of(BOOKS)
+        # Columns of the search results
+        self.filter_columns = response_columns(PUBLICATIONS, BOOKS)
         self.book_filter_table_name = f"{PUBLICATIONS['table_name']} natural join " \
                                       f"{BOOKS['table_name']}"
         self.book_author_table_name = WRITE_BOOKS['table_name']
+        # Sort key of the search results, pages continue after it
+        self.search_keys = ['publication_id']
 
-    def get(self, publication_id: str):
+    def get(self, publication_id: str, select_cols: list = None):
+        if select_cols is None:
+            select_cols = self.select_columns
         cond = {'publication_id': publication_id, 'is_available': 1}
-        select_query = self.query_gen.select(self.table_name, ['*'], cond)
+        select_query = self.query_gen.select(self.table_name, select_cols, cond)
         return self.db.get_result(select_query)
 
     def set(self, book: dict):
@@ -151,36 +257,43 @@ class BookHandler(PublicationHandler):
     def update(self, publication_id: str, update_data: dict):
         cond = {'publication_id': publication_id, 'is_available': 1}
         update_query = self.query_gen.update(self.table_name, cond, update_data)
-        row_affected, _ = self.db.execute([update_query])
+        row_affected, _ = self.execute_versioned(publication_id, [update_query])
         return row_affected
 
     def remove(self, publication_id: str):
         cond = {'publication_id': publication_id, 'is_available': 1}
         update_data = {'is_available': 0}
         delete_query = self.query_gen.update(self.table_name, cond, update_data)
-        row_affected, _ = self.db.execute([delete_query])
+        row_affected, _ = self.execute_versioned(publication_id, [delete_query])
         return row_affected
 
     def set_chapter(self, chapter: dict):
-        insert_query = self.query_gen.insert(self.chapter_table_name, [chapter])
-        _, last_row_id = self.db.execute([insert_query])
-        return {'chapter_id': last_row_id[-1]}
-
-    def get_chapter(self, publication_id, chapter_id):
+        key = {'chapter_id': chapter['chapter_id'], 'publication_id': chapter['publication_id']}
+        queries = self.text_queries(self.chapter_table_name, self.chapter_body_table_name, key, 'chapter_text', chapter,
+                                    lambda data: self.query_gen.insert(self.chapter_table_name, [data]))
+        self.execute_versioned(chapter['publication_id'], queries)
+        return {'chapter_id': chapter['chapter_id']}
+
+    # Get chapter with its full text or a range of it (offset and length in characters)
+    def get_chapter(self, publication_id, chapter_id, offset: int = 0, length: int = None):
         cond = {'publication_id': publication_id, 'chapter_id': chapter_id}
-        select_query = self.query_gen.select(self.chapter_table_name, ['*'], cond)
-        return self.db.get_result(select_query)
+        table = f"{self.chapter_table_name} natural left join {self.chapter_body_table_name}"
+        select_cols = [f'{self.chapter_table_name}.*', 'encoding', 'body']
+        select_query = self.query_gen.select(table, select_cols, cond)
+        return [content.read_text(row, 'chapter_text', offset, length) for row in self.db.get_result(select_query)]
 
     def update_chapter(self, publication_id, chapter_id, update_data):
         cond = {'publication_id': publication_id, 'chapter_id': chapter_id}
-        update_query = self.query_gen.update(self.chapter_table_name, cond, update_data)
-        row_affected, _ = self.db.execute([update_query])
+        queries = self.text_queries(self.chapter_table_name, self.chapter_body_table_name, cond, 'chapter_text',
+                                    update_data,
+                                    lambda data: self.query_gen.update(self.chapter_table_name, cond, data))
+        row_affected, _ = self.execute_versioned(publication_id, queries)
         return row_affected
 
     def remove_chapter(self, publication_id, chapter_id):
         cond = {'publication_id': publication_id, 'chapter_id': chapter_id}
         delete_query = self.query_gen.delete(self.chapter_table_name, cond)
-        row_affected, _ = self.db.execute([delete_query])
+        row_affected, _ = self.execute_versioned(publication_id, [delete_query])
         return row_affected
 
     def get_latest_chapter(self, publication_id):
@@ -199,14 +312,14 @@ class BookHandler(PublicationHandler):
 
     def get_id_from_title(self, title):
         try:
-            cond1 = {'title': title.lower()}
-            select_query = self.query_gen.select(self.parent_table_name, ['*'], cond1)
+            cond1 = {'title_key': title.lower()}
+            select_query = self.query_gen.select(self.parent_table_name, [self.primary_key], cond1)
             response = self.db.get_result(select_query)
             if len(response) == 0:
                 return None
             publication_id = response[0]['publication_id']
             cond2 = {'publication_id': publication_id}
-            select_query = self.query_gen.select(self.table_name, ['*'], cond2)
+            select_query = self.query_gen.select(self.table_name, ['book_id'], cond2)
             response = self.db.get_result(select_query)
             if len(response) == 0:
                 return None
@@ -233,15 +346,18 @@ class BookHandler(PublicationHandler):
             return 1
         return int(book_count) + 1
 
-    def get_filter_result(self, condition, select_cols: list = None):
+    def get_filter_result(self, condition, select_cols: list = None, limit: int = None, after: list = None):
+        """
+        :param after: [publication_id] of the last book of the previous page
+        """
         author = condition.pop("author", None)
         if select_cols is None:
-            select_cols = ['*']
+            select_cols = self.filter_columns
 
         table = self.book_filter_table_name
         if author:
             cond = {'name': author}
-            select_query = self.query_gen.select(self.employee_table_name, select_cols, cond)
+            select_query = self.query_gen.select(self.employee_table_name, ['emp_id'], cond)
             output = self.db.get_result(select_query)
             if len(output) < 1:
                 return []
@@ -251,9 +367,9 @@ class BookHandler(PublicationHandler):
 
         self.reformat(condition)
         condition.update({'is_available': 1})
-        if select_cols is None:
-            select_cols = self.primary_key
-        select_query = self.query_gen.select(table, select_cols, condition)
+        if after is not None:
+            condition.update(self.query_gen.keyset(after_keys(self.search_keys, after)))
+        select_query = self.query_gen.select(table, select_cols, condition, order_by=self.search_keys, limit=limit)
         return self.db.get_result(select_query)
 
     def set_author(self, association):
@@ -278,16 +394,25 @@ class PeriodicalHandler(PublicationHandler):
         self.table_name = PERIODICALS['table_name']
         self.parent_table_name = PUBLICATIONS['table_name']
         self.article_table_name = ARTICLES['table_name']
+        self.article_body_table_name = ARTICLE_BODIES['table_name']
         self.secondary_key = set()
         self.secondary_key.update(['periodical_id', 'issue'])
-        self.columns = list(set(list(PUBLICATIONS['columns'].keys()) + list(PERIODICALS['columns'].keys())))
+        self.columns = columns_of(PUBLICATIONS, PERIODICALS)
+        self.select_columns = columns_of(PERIODICALS)
         self.article_filter_table_name = f"{PERIODICALS['table_name']} natural join " \
-                                         f"{ARTICLES['table_name']}"
+                                         f"{ARTICLES['table_name']} natural left join " \
+                                         f"{ARTICLE_BODIES['table_name']}"
+        # Listed articles come with an excerpt instead of their text
+        self.article_listing_columns = list(dict.fromkeys(list(PERIODICALS['columns'].keys()) + [
+            column for column in ARTICLES['columns'].keys() if column != 'text'])) + content.excerpt_sql('text')
         self.article_author_table_name = WRITE_ARTICLES['table_name']
+        self.search_keys = ['publication_id', 'article_id']
 
-    def get(self, publication_id: str):
+    def get(self, publication_id: str, select_cols: list = None):
+        if select_cols is None:
+            select_cols = self.select_columns
         cond = {'publication_id': publication_id, 'is_available': 1}
-        select_query = self.query_gen.select(self.table_name, ['*'], cond)
+        select_query = self.query_gen.select(self.table_name, select_cols, cond)
         return self.db.get_result(select_query)
 
     def set(self, periodical: dict):
@@ -298,36 +423,42 @@ class PeriodicalHandler(PublicationHandler):
     def update(self, publication_id: str, update_data: dict):
         cond = {'publication_id': publication_id, 'is_available': 1}
         update_query = self.query_gen.update(self.table_name, cond, update_data)
-        row_affected, _ = self.db.execute([update_query])
+        row_affected, _ = self.execute_versioned(publication_id, [update_query])
         return row_affected
 
     def remove(self, publication_id: str):
         cond = {'publication_id': publication_id, 'is_available': 1}
         update_data = {'is_available': 0}
         delete_query = self.query_gen.update(self.table_name, cond, update_data)
-        row_affected, _ = self.db.execute([delete_query])
+        row_affected, _ = self.execute_versioned(publication_id, [delete_query])
         return row_affected
 
     def set_article(self, article: dict):
-        insert_query = self.query_gen.insert(self.article_table_name, [article])
-        _, last_row_id = self.db.execute([insert_query])
-        return {'article_id': last_row_id[-1]}
-
-    def get_article(self, publication_id, article_id):
+        key = {'article_id': article['article_id'], 'publication_id': article['publication_id']}
+        queries = self.text_queries(self.article_table_name, self.article_body_table_name, key, 'text', article,
+                                    lambda data: self.query_gen.insert(self.article_table_name, [data]))
+        self.execute_versioned(article['publication_id'], queries)
+        return {'article_id': article['article_id']}
+
+    # Get article with its full text or a range of it (offset and length in characters)
+    def get_article(self, publication_id, article_id, offset: int = 0, length: int = None):
         cond = {'publication_id': publication_id, 'article_id': article_id}
-        select_query = self.query_gen.select(self.article_table_name, ['*'], cond)
-        return self.db.get_result(select_query)
+        table = f"{self.article_table_name} natural left join {self.article_body_table_name}"
+        select_cols = [f'{self.article_table_name}.*', 'encoding', 'body']
+        select_query = self.query_gen.select(table, select_cols, cond)
+        return [content.read_text(row, 'text', offset, length) for row in self.db.get_result(select_query)]
 
     def update_article(self, publication_id, article_id, update_data):
         cond = {'publication_id': publication_id, 'article_id': article_id}
-        update_query = self.query_gen.update(self.article_table_name, cond, update_data)
-        row_affected, _ = self.db.execute([update_query])
+        queries = self.text_queries(self.article_table_name, self.article_body_table_name, cond, 'text', update_data,
+                                    lambda data: self.query_gen.update(self.article_table_name, cond, data))
+        row_affected, _ = self.execute_versioned(publication_id, queries)
         return row_affected
 
     def remove_article(self, publication_id, article_id):
         cond = {'publication_id': publication_id, 'article_id': article_id}
         delete_query = self.query_gen.delete(self.article_table_name, cond)
-        row_affected, _ = self.db.execute([delete_query])
+        row_affected, _ = self.execute_versioned(publication_id, [delete_query])
         return row_affected
 
     @staticmethod
@@ -338,14 +469,14 @@ class PeriodicalHandler(PublicationHandler):
 
     def get_id_from_title(self, title):
         try:
-            cond1 = {'title': title.lower()}
-            select_query = self.query_gen.select(self.parent_table_name, ['*'], cond1)
+            cond1 = {'title_key': title.lower()}
+            select_query = self.query_gen.select(self.parent_table_name, [self.primary_key], cond1)
             response = self.db.get_result(select_query)
             if len(response) == 0:
                 return None
             publication_id = response[0]['publication_id']
             cond2 = {'publication_id': publication_id, 'is_available': 1}
-            select_query = self.query_gen.select(self.table_name, ['*'], cond2)
+            select_query = self.query_gen.select(self.table_name, ['periodical_id'], cond2)
             response = self.db.get_result(select_query)
             if len(response) == 0:
                 return None
@@ -364,12 +495,18 @@ class PeriodicalHandler(PublicationHandler):
             return 1
         return int(periodical_count) + 1
 
-    def get_filter_result(self, condition, select_cols: list = None):
+    def get_filter_result(self, condition, select_cols: list = None, limit: int = None, after: list = None):
+        """
+        :param after: [publication_id, article_id] of the last article of the previous page
+        """
         self.reformat(condition)
         condition.update({'is_available': 1})
+        if after is not None:
+            condition.update(self.query_gen.keyset(after_keys(self.search_keys, after)))
         if select_cols is None:
-            select_cols = self.primary_key
-        select_query = self.query_gen.select(self.article_filter_table_name, select_cols, condition)
+            select_cols = self.article_listing_columns
+        select_query = self.query_gen.select(self.article_filter_table_name, select_cols, condition,
+                                             order_by=self.search_keys, limit=limit)
         return self.db.get_result(select_query)
 
     def set_author(self, association):
@@ -1,10 +1,20 @@
 """
 Module for handling distributors
 """
+from datetime import date
 
-from wolfpub.api.utils.query_generator import QueryGenerator
+from dateutil.relativedelta import relativedelta
+
+from wolfpub.api.utils.columnar import ColumnarStore, numpy, date_mask, lookup, group_sum
+from wolfpub.api.utils.pagination import after_keys
+from wolfpub.api.utils.query_builder import QueryBuilder
+from wolfpub.api.utils.query_generator import QueryGenerator, RawSQL
 from wolfpub.constants import DISTRIBUTORS, ACCOUNT_PAYMENTS, SALARY_PAYMENTS, ORDERS, ACCOUNTS, AUTHORS, \
-    BOOK_ORDERS_INFO, PERIODICAL_ORDERS_INFO, REPORTS
+    BOOK_ORDERS_INFO, PERIODICAL_ORDERS_INFO, REPORTS, REPORT_PUBLICATION_DISTRIBUTORS
+
+# Work types of the salary reports, sorted like the group by of the database
+WORK_TYPES = ['article authorship', 'book authorship', 'editorial work']
+AUTHOR_WORK_TYPES = {'journalist': 0, 'writer': 1}
 
 
 class ReportHandler(object):
@@ -16,9 +26,19 @@ class ReportHandler(object):
         self.db = db
         self.query_gen = QueryGenerator()
         self.table_name = REPORTS['table_name']
-        self.revenue_table = f"{ACCOUNT_PAYMENTS['table_name']} natural join " \
-                             f"{ACCOUNTS['table_name']} natural join " \
-                             f"{DISTRIBUTORS['table_name']}"
+
+    # Payments joined with their account and distributor
+    @staticmethod
+    def revenue_query():
+        return QueryBuilder(ACCOUNT_PAYMENTS['table_name'], 'ap') \
+            .join(ACCOUNTS['table_name'], 'a', on={'a.account_id': 'ap.account_id'}) \
+            .join(DISTRIBUTORS['table_name'], 'd', on={'d.distributor_id': 'a.distributor_id'})
+
+    # Salary payments joined with the author type of the employee
+    @staticmethod
+    def salary_query():
+        return QueryBuilder(SALARY_PAYMENTS['table_name'], 's') \
+            .left_join(AUTHORS['table_name'], 'a', on={'a.emp_id': 's.emp_id'})
 
     # Util date validation
     @staticmethod
@@ -27,131 +47,410 @@ class ReportHandler(object):
         cond.update({'<': end_date} if end_date else {})
         return {date_col: cond} if cond else cond
 
-    # insert or update report in the reports table
-    def set_monthly_report(self, report, month, year):
-        cond = {'month': month,
-                'year': year}
-        select_report = self.db.get_result(self.query_gen.select(self.table_name, ['report_id'], cond))
-        data = {'total_revenue': report['total_revenue'],
-                'total_expense': report['total_expense']['salary_expense'] + report['total_expense']['shipping_cost']}
-        if select_report:
-            self.db.execute([self.query_gen.update(self.table_name, condition=cond, update_data=data)])
-        else:
-            self.db.execute([self.query_gen.insert(self.table_name, [{**cond, **data}])])
+    # First day of the month and of the following month
+    @staticmethod
+    def month_range(month: int, year: int):
+        start_date = date(int(year), int(month), 1)
+        end_date = start_date + relativedelta(months=1)
+        return start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')
+
+    # Check if the month is over, the transactions of closed months do not change anymore
+    def is_closed(self, month: int, year: int):
+        return self.month_range(month, year)[1] <= date.today().strftime('%Y-%m-%d')
+
+    # Compute the monthly report of revenue and expenditure from the transactions
+    def compute_monthly_report(self, month: int, year: int):
+        start_date, end_date = self.month_range(month, year)
+        output = {}
+        output['order_per_pub_per_dist'] = self.get_number_price_per_publication_per_distributor(start_date, end_date)
+        output['total_revenue'] = self.get_revenue(start_date, end_date)
+        output['total_expense'] = self.get_salary_expense(start_date, end_date)
+        output['total_expense'].update(self.get_shipping_cost_expense(start_date, end_date))
+        return output
+
+    # Upsert the monthly report and its per publication per distributor breakdown within one transaction
+    def materialize_monthly_report(self, month: int, year: int, report: dict = None, batch_size: int = 1000):
+        report = report or self.compute_monthly_report(month, year)
+        cond = {'month': int(month), 'year': int(year)}
+        expense = report['total_expense']
+        data = {**cond,
+                'total_revenue': round(float(report['total_revenue']), 2),
+                'salary_expense': round(float(expense['salary_expense']), 2),
+                'shipping_cost': round(float(expense['shipping_cost']), 2),
+                'total_expense': round(float(expense['salary_expense']) + float(expense['shipping_cost']), 2),
+                'refreshed_at': RawSQL('now()')}
+        queries = [self.query_gen.upsert(self.table_name, [data], [column for column in data if column not in cond])]
+        lines = [{**cond,
+                  'account_id': int(line['account_id']),
+                  'publication_id': int(line['publication_id']),
+                  'total_quantity': int(line['total_quantity']),
+                  'total_price': round(float(line['total_price']), 2)} for line in report['order_per_pub_per_dist']]
+        for i in range(0, len(lines), batch_size):
+            queries.append(self.query_gen.upsert(REPORT_PUBLICATION_DISTRIBUTORS['table_name'],
+                                                 lines[i:i + batch_size], ['total_quantity', 'total_price']))
+        self.db.execute(queries)
+        return report
+
+    # Fetch the materialized report of a month, None if it was not materialized after the month closed
+    def get_materialized_monthly_report(self, month: int, year: int):
+        cond = {'month': int(month), 'year': int(year)}
+        columns = ['total_revenue', 'salary_expense', 'shipping_cost']
+        report = self.db.get_result(self.query_gen.select(
+            self.table_name, columns, {**cond, 'refreshed_at': {'>=': self.month_range(month, year)[1]}}))
+        if not report:
+            return None
+        lines = self.db.get_result(self.query_gen.select(
+            REPORT_PUBLICATION_DISTRIBUTORS['table_name'],
+            ['account_id', 'publication_id', 'total_quantity', 'total_price'], cond,
+            order_by=['account_id', 'publication_id']))
+        return {'order_per_pub_per_dist': lines,
+                'total_revenue': float(report[0]['total_revenue']),
+                'total_expense': {'salary_expense': float(report[0]['salary_expense']),
+                                  'shipping_cost': float(report[0]['shipping_cost'])}}
+
+    # Materialize the closed months of the last months_back months which have no complete report yet
+    # and refresh the report of the current month
+    def refresh_monthly_reports(self, months_back: int = 12):
+        today = date.today()
+        complete = {(row['month'], row['year']) for row in self.db.get_result(self.query_gen.select(
+            self.table_name, ['month', 'year', 'refreshed_at'], {'year': {'>=': today.year - months_back // 12 - 1}}))
+            if row['refreshed_at'].strftime('%Y-%m-%d') >= self.month_range(row['month'], row['year'])[1]}
+        for months in range(months_back, -1, -1):
+            month = today - relativedelta(months=months)
+            if (month.month, month.year) not in complete:
+                self.materialize_monthly_report(month.month, month.year)
+
+    # Query of number of publications and total price of publication for each publication for each distributor
+    def number_price_per_publication_per_distributor_query(self, start_date: str = None, end_date: str = None):
+        cond = self.date_cond('o.order_date', start_date, end_date)
+        group_by = ['o.account_id', 't.publication_id']
+        order_lines = QueryBuilder(BOOK_ORDERS_INFO['table_name']) \
+            .union(QueryBuilder(PERIODICAL_ORDERS_INFO['table_name']), union_all=True)
+        return QueryBuilder(order_lines, 't') \
+            .join(ORDERS['table_name'], 'o', on={'o.order_id': 't.order_id'}) \
+            .select(*group_by, 'sum(t.quantity) total_quantity', 'sum(t.price) total_price') \
+            .where(cond).group_by(*group_by).build()
 
     # Get Number of publications and total price of publication for each publication for each distributor
     def get_number_price_per_publication_per_distributor(self, start_date: str, end_date: str):
-        cond = self.date_cond('order_date', start_date, end_date)
-        group_by = ['account_id', 'publication_id']
-        inner_select_query1 = self.query_gen.select(BOOK_ORDERS_INFO['table_name'], ['*'])
-        inner_select_query2 = self.query_gen.select(PERIODICAL_ORDERS_INFO['table_name'], ['*'])
-        union_query = f"({inner_select_query1} union {inner_select_query2}) as t natural join {ORDERS['table_name']}"
-        select_query = self.query_gen.select(union_query,
-                                             group_by + ['sum(quantity) total_quantity', 'sum(price) total_price'],
-                                             cond, group_by)
-        return self.db.get_result(select_query)
+        return self.db.get_result(self.number_price_per_publication_per_distributor_query(start_date, end_date))
 
-    # Fetch count of active distributors
-    def get_active_distributor_count(self, cond: dict = None):
+    # Query of count of active distributors
+    def active_distributor_count_query(self, cond: dict = None):
         if cond:
             cond.update({'is_active': 1})
         else:
             cond = {'is_active': 1}
-        select_query = self.query_gen.select(ACCOUNTS['table_name'], ['count(account_id) as total_distributors'], cond)
-        count = self.db.get_result(select_query)
+        return self.query_gen.select(ACCOUNTS['table_name'], ['count(account_id) as total_distributors'], cond)
+
+    # Fetch count of active distributors
+    def get_active_distributor_count(self, cond: dict = None):
+        count = self.db.get_result(self.active_distributor_count_query(cond))
         if not count:
             raise ValueError('No Distributor linked with the Publication House')
         return count[0]
 
+    # Query of revenue
+    def revenue_total_query(self, start_date: str = None, end_date: str = None):
+        cond = self.date_cond('payment_date', start_date, end_date)
+        return self.query_gen.select(ACCOUNT_PAYMENTS['table_name'], ['sum(amount) as total_revenue'], cond)
+
     # Generate revenue
     def get_revenue(self, start_date: str = None, end_date: str = None):
-        cond = self.date_cond('payment_date', start_date, end_date)
-        select_query = self.query_gen.select(ACCOUNT_PAYMENTS['table_name'], ['sum(amount) as total_revenue'], cond)
-        revenue = self.db.get_result(select_query)[0]['total_revenue']
+        revenue = self.db.get_result(self.revenue_total_query(start_date, end_date))[0]['total_revenue']
         return float(revenue) if revenue else 0.00
 
+    # Query of revenue for each distributor, in the order of the accounts
+    def revenue_per_distributor_query(self, start_date: str = None, end_date: str = None, limit: int = None,
+                                      after: list = None):
+        """
+        :param after: [account_id] of the last row of the previous page
+        """
+        cond = self.date_cond('ap.payment_date', start_date, end_date)
+        query = self.revenue_query() \
+            .select('ap.account_id', 'd.distributor_id', 'd.name', 'sum(ap.amount) as revenue') \
+            .where(cond).group_by('ap.account_id').order_by('ap.account_id')
+        if after is not None:
+            query.after(after_keys(['ap.account_id'], after))
+        if limit is not None:
+            query.limit(limit)
+        return query.build()
+
     # Generate revenue for each distributor
-    def get_revenue_per_distributor(self, start_date: str = None, end_date: str = None):
-        group_by = ['account_id']
-        cond = self.date_cond('payment_date', start_date, end_date)
-        select_query = self.query_gen.select(self.revenue_table,
-                                             ['distributor_id', 'name', 'sum(amount) as revenue'], cond, group_by)
-        revenue = self.db.get_result(select_query)
-        if not revenue:
+    def get_revenue_per_distributor(self, start_date: str = None, end_date: str = None, limit: int = None,
+                                    after: list = None):
+        revenue = self.db.get_result(self.revenue_per_distributor_query(start_date, end_date, limit, after))
+        if not revenue and after is None:
             raise ValueError('No revenue collected from Distributors for given parameters')
         return revenue
 
+    # Query of revenue for each city
+    def revenue_per_city_query(self, start_date: str = None, end_date: str = None):
+        cond = self.date_cond('ap.payment_date', start_date, end_date)
+        return self.revenue_query().select('d.city', 'sum(ap.amount) as revenue').where(cond).group_by('d.city') \
+            .build()
+
     # Generate revenue for each city
     def get_revenue_per_city(self, start_date: str = None, end_date: str = None):
-        group_by = ['city']
-        cond = self.date_cond('payment_date', start_date, end_date)
-        select_query = self.query_gen.select(self.revenue_table, ['city', 'sum(amount) as revenue'], cond, group_by)
-        revenue = self.db.get_result(select_query)
+        revenue = self.db.get_result(self.revenue_per_city_query(start_date, end_date))
         if not revenue:
             raise ValueError('No revenue collected from any City for given parameters')
         return revenue
 
+    # Query of revenue for each location
+    def revenue_per_location_query(self, start_date: str = None, end_date: str = None):
+        cond = self.date_cond('ap.payment_date', start_date, end_date)
+        columns = ['substr(d.address, instr(d.address, \' \'), length(d.address) -1) as location',
+                   'd.city',
+                   'sum(ap.amount) as revenue']
+        return self.revenue_query().select(*columns).where(cond).group_by('location', 'd.city').build()
+
     # Generate revenue for each location
     def get_revenue_per_location(self, start_date: str = None, end_date: str = None):
-        group_by = ['location', 'city']
-        cond = self.date_cond('payment_date', start_date, end_date)
-        columns = ['substr(address, instr(address, \' \'), length(address) -1) as location',
-                   'city',
-                   'sum(amount) as revenue']
-        select_query = self.query_gen.select(self.revenue_table, columns, cond, group_by)
-        revenue = self.db.get_result(select_query)
+        revenue = self.db.get_result(self.revenue_per_location_query(start_date, end_date))
         if not revenue:
             raise ValueError('No revenue collected from any Location for given parameters')
         return revenue
 
+    # Query of total expenses
+    def expense_query(self, table, date_col, expense_col, start_date: str, end_date: str):
+        cond = self.date_cond(date_col, start_date, end_date)
+        return self.query_gen.select(table, [f'sum({expense_col}) as expense'], cond)
+
     # Generate total expenses
     def _get_expense(self, table, date_col, expense_col, start_date: str, end_date: str):
-        cond = self.date_cond(date_col, start_date, end_date)
-        select_query = self.query_gen.select(table, [f'sum({expense_col}) as expense'], cond)
-        expense = self.db.get_result(select_query)[0]['expense']
+        expense = self.db.get_result(self.expense_query(table, date_col, expense_col, start_date, end_date))
+        expense = expense[0]['expense']
         return float(expense) if expense else 0.00
 
+    # Query of shipping cost expense
+    def shipping_cost_expense_query(self, start_date: str = None, end_date: str = None):
+        return self.expense_query(ORDERS['table_name'], 'delivery_date', 'shipping_cost', start_date, end_date)
+
     # Generate shipping cost expense
     def get_shipping_cost_expense(self, start_date: str = None, end_date: str = None):
         table = ORDERS['table_name']
         return {'shipping_cost': self._get_expense(table, 'delivery_date', 'shipping_cost', start_date, end_date)}
 
+    # Query of salary expenses
+    def salary_expense_query(self, start_date: str = None, end_date: str = None):
+        return self.expense_query(SALARY_PAYMENTS['table_name'], 'send_date', 'amount', start_date, end_date)
+
     # Generate salary expenses
     def get_salary_expense(self, start_date: str = None, end_date: str = None):
         table = SALARY_PAYMENTS['table_name']
         return {'salary_expense': self._get_expense(table, 'send_date', 'amount', start_date, end_date)}
 
-    # Generate salary expenses per month
-    def get_salary_expense_per_month(self):
+    # Query of salary expenses per month
+    def salary_expense_per_month_query(self, start_date: str = None, end_date: str = None):
         table = SALARY_PAYMENTS['table_name']
         columns = ['year(send_date) as year',
                    'month(send_date) as month',
                    'sum(amount) as salary_expense']
         group_by = ['YEAR(send_date)', 'MONTH(send_date)']
-        select_query = self.query_gen.select(table, columns, condition={}, group_by=group_by)
-        return self.db.get_result(select_query)
+        cond = self.date_cond('send_date', start_date, end_date)
+        return self.query_gen.select(table, columns, condition=cond, group_by=group_by)
+
+    # Generate salary expenses per month
+    def get_salary_expense_per_month(self):
+        return self.db.get_result(self.salary_expense_per_month_query())
+
+    # Query of salary expenses per worktype
+    def salary_expense_per_worktype_query(self, start_date: str = None, end_date: str = None):
+        columns = ["CASE WHEN a.author_type = 'writer' THEN 'book authorship' "
+                   "WHEN a.author_type = 'journalist' THEN 'article authorship' "
+                   "ELSE 'editorial work' END AS work_type",
+                   "sum(s.amount) as salary_expense"]
+        cond = self.date_cond('s.send_date', start_date, end_date)
+        return self.salary_query().select(*columns).where(cond).group_by('work_type').build()
 
     # Generate salary expenses per worktype
     def get_salary_expense_per_worktype(self, start_date: str = None, end_date: str = None):
-        table = f"{SALARY_PAYMENTS['table_name']} as s left join {AUTHORS['table_name']} as a on a.emp_id = s.emp_id"
-        columns = ["CASE WHEN author_type = 'writer' THEN 'book authorship' "
-                   "WHEN author_type = 'journalist' THEN 'article authorship' "
+        return self.db.get_result(self.salary_expense_per_worktype_query(start_date, end_date))
+
+    # Query of salary expenses per month per worktype
+    def salary_expense_per_month_per_worktype_query(self, start_date: str = None, end_date: str = None):
+        columns = ["year(s.send_date) as year",
+                   "month(s.send_date) as month",
+                   "CASE WHEN a.author_type = 'writer' THEN 'book authorship' "
+                   "WHEN a.author_type = 'journalist' THEN 'article authorship' "
                    "ELSE 'editorial work' END AS work_type",
-                   "sum(amount) as salary_expense"]
-        cond = self.date_cond('send_date', start_date, end_date)
-        group_by = ['work_type']
-        select_query = self.query_gen.select(table, columns, condition=cond, group_by=group_by)
-        return self.db.get_result(select_query)
+                   "sum(s.amount) as salary_expense"]
+        cond = self.date_cond('s.send_date', start_date, end_date)
+        return self.salary_query().select(*columns).where(cond) \
+            .group_by('YEAR(s.send_date)', 'MONTH(s.send_date)', 'work_type').build()
 
     # Generate salary expenses per month per worktype
     def get_salary_expense_per_month_per_worktype(self):
-        table = f"{SALARY_PAYMENTS['table_name']} as s left join {AUTHORS['table_name']} as a on a.emp_id = s.emp_id"
-        columns = ["year(send_date) as year",
-                   "month(send_date) as month",
-                   "CASE WHEN author_type = 'writer' THEN 'book authorship' "
-                   "WHEN author_type = 'journalist' THEN 'article authorship' "
-                   "ELSE 'editorial work' END AS work_type",
-                   "sum(amount) as salary_expense"]
-        group_by = ['YEAR(send_date)', 'MONTH(send_date)', 'work_type']
-        select_query = self.query_gen.select(table, columns, condition={}, group_by=group_by)
-        return self.db.get_result(select_query)
+        return self.db.get_result(self.salary_expense_per_month_per_worktype_query())
+
+    # Query of an exportable report for the given time period
+    def export_query(self, report: str, start_date: str = None, end_date: str = None):
+        queries = {'order_per_pub_per_dist': self.number_price_per_publication_per_distributor_query,
+                   'revenue': self.revenue_total_query,
+                   'revenue_distributor_wise': self.revenue_per_distributor_query,
+                   'revenue_city_wise': self.revenue_per_city_query,
+                   'revenue_location_wise': self.revenue_per_location_query,
+                   'shipping_cost_expense': self.shipping_cost_expense_query,
+                   'salary_expense': self.salary_expense_query,
+                   'salary_expense_per_month': self.salary_expense_per_month_query,
+                   'salary_expense_per_work_type': self.salary_expense_per_worktype_query,
+                   'salary_expense_per_month_per_work_type': self.salary_expense_per_month_per_worktype_query}
+        if report not in queries:
+            raise ValueError(f"Unknown report '{report}', expected one of: {', '.join(queries)}")
+        return queries[report](start_date, end_date)
+
+    # Stream rows of an exportable report in batches, memory does not grow with the size of the report
+    def stream_report(self, report: str, start_date: str = None, end_date: str = None, batch_size: int = 1000):
+        return self.db.stream_result(self.export_query(report, start_date, end_date), batch_size)
+
+
+class ColumnarReportHandler(ReportHandler):
+    """
+    Serves the time period reports from the in memory columnar copy of the tables (ColumnarStore),
+    the aggregation runs in-process with vectorized numpy operations instead of on the database
+    """
+
+    def __init__(self, db, refresh_interval: float = 60):
+        super().__init__(db)
+        self.store = ColumnarStore(db, refresh_interval)
+
+    # Payments of the time period with the distributor of their account, payments of accounts without
+    # a distributor are dropped like in the join of revenue_query
+    def _payments(self, start_date: str = None, end_date: str = None):
+        payments = self.store.table(ACCOUNT_PAYMENTS['table_name'])
+        accounts = self.store.table(ACCOUNTS['table_name'])
+        distributors = self.store.table(DISTRIBUTORS['table_name'])
+        mask = date_mask(payments['payment_date'], start_date, end_date)
+        account_pos, found = lookup(accounts['account_id'], payments['account_id'][mask])
+        account_ids, amounts = payments['account_id'][mask][found], payments['amount'][mask][found]
+        distributor_pos, found = lookup(distributors['distributor_id'], accounts['distributor_id'][account_pos[found]])
+        return account_ids[found], distributor_pos[found], amounts[found], distributors
+
+    # Salary payments of the time period with the work type of the employee
+    def _salaries(self, start_date: str = None, end_date: str = None):
+        salaries = self.store.table(SALARY_PAYMENTS['table_name'])
+        authors = self.store.table(AUTHORS['table_name'])
+        mask = date_mask(salaries['send_date'], start_date, end_date)
+        author_pos, found = lookup(authors['emp_id'], salaries['emp_id'][mask])
+        author_work_types = numpy.array([AUTHOR_WORK_TYPES.get(author_type, 2)
+                                         for author_type in authors['author_type']], dtype='int64')
+        work_types = numpy.full(len(found), 2, dtype='int64')
+        work_types[found] = author_work_types[author_pos[found]]
+        return salaries['send_date'][mask], work_types, salaries['amount'][mask]
+
+    # Sums of the payments per distributor grouped again by distributor columns, e.g. city
+    @staticmethod
+    def _per_distributor(distributor_pos, amounts, distributors, columns):
+        (distributor_pos,), (revenue,) = group_sum([distributor_pos], amounts)
+        return group_sum([distributors[column][distributor_pos] for column in columns], revenue)
+
+    # Year and month arrays of a date array
+    @staticmethod
+    def _year_month(dates):
+        months = dates.astype('datetime64[M]').astype('int64')
+        return months // 12 + 1970, months % 12 + 1
+
+    # Get Number of publications and total price of publication for each publication for each distributor
+    def get_number_price_per_publication_per_distributor(self, start_date: str, end_date: str):
+        orders = self.store.table(ORDERS['table_name'])
+        lines = [self.store.table(BOOK_ORDERS_INFO['table_name']),
+                 self.store.table(PERIODICAL_ORDERS_INFO['table_name'])]
+        order_ids = numpy.concatenate([line['order_id'] for line in lines])
+        publication_ids = numpy.concatenate([line['publication_id'] for line in lines])
+        quantities = numpy.concatenate([line['quantity'] for line in lines])
+        prices = numpy.concatenate([line['price'] for line in lines])
+        order_pos, found = lookup(orders['order_id'], order_ids)
+        found[found] = date_mask(orders['order_date'][order_pos[found]], start_date, end_date)
+        if not found.any():
+            return []
+        (account_ids, publication_ids), (quantities, prices) = group_sum(
+            [orders['account_id'][order_pos[found]], publication_ids[found]], quantities[found], prices[found])
+        return [{'account_id': account_id, 'publication_id': publication_id, 'total_quantity': int(quantity),
+                 'total_price': round(price, 2)}
+                for account_id, publication_id, quantity, price in
+                zip(account_ids.tolist(), publication_ids.tolist(), quantities.tolist(), prices.tolist())]
+
+    # Generate revenue
+    def get_revenue(self, start_date: str = None, end_date: str = None):
+        payments = self.store.table(ACCOUNT_PAYMENTS['table_name'])
+        mask = date_mask(payments['payment_date'], start_date, end_date)
+        return round(float(payments['amount'][mask].sum()), 2)
+
+    # Generate revenue for each distributor
+    def get_revenue_per_distributor(self, start_date: str = None, end_date: str = None, limit: int = None,
+                                    after: list = None):
+        account_ids, distributor_pos, amounts, distributors = self._payments(start_date, end_date)
+        if not len(amounts):
+            raise ValueError('No revenue collected from Distributors for given parameters')
+        (account_ids, distributor_pos), (revenue,) = group_sum([account_ids, distributor_pos], amounts)
+        # Groups are sorted by account id like the order by of the database
+        start = numpy.searchsorted(account_ids, after_keys(['account_id'], after)['account_id'], side='right') \
+            if after is not None else 0
+        stop = start + limit if limit is not None else len(account_ids)
+        return [{'account_id': account_id, 'distributor_id': int(distributors['distributor_id'][pos]),
+                 'name': distributors['name'][pos], 'revenue': round(amount, 2)}
+                for account_id, pos, amount in zip(account_ids[start:stop].tolist(),
+                                                   distributor_pos[start:stop].tolist(), revenue[start:stop].tolist())]
+
+    # Generate revenue for each city
+    def get_revenue_per_city(self, start_date: str = None, end_date: str = None):
+        _, distributor_pos, amounts, distributors = self._payments(start_date, end_date)
+        if not len(amounts):
+            raise ValueError('No revenue collected from any City for given parameters')
+        (cities,), (revenue,) = self._per_distributor(distributor_pos, amounts, distributors, ['city'])
+        return [{'city': city, 'revenue': round(amount, 2)} for city, amount in zip(cities.tolist(), revenue.tolist())]
+
+    # Generate revenue for each location
+    def get_revenue_per_location(self, start_date: str = None, end_date: str = None):
+        _, distributor_pos, amounts, distributors = self._payments(start_date, end_date)
+        if not len(amounts):
+            raise ValueError('No revenue collected from any Location for given parameters')
+        # Same as substr(address, instr(address, ' ')): the address from its first space, empty without a space
+        locations = numpy.array([address[address.index(' '):] if ' ' in address else ''
+                                 for address in distributors['address']], dtype=object)
+        (locations, cities), (revenue,) = self._per_distributor(distributor_pos, amounts,
+                                                                {**distributors, 'location': locations},
+                                                                ['location', 'city'])
+        return [{'location': location, 'city': city, 'revenue': round(amount, 2)}
+                for location, city, amount in zip(locations.tolist(), cities.tolist(), revenue.tolist())]
+
+    # Generate shipping cost expense
+    def get_shipping_cost_expense(self, start_date: str = None, end_date: str = None):
+        orders = self.store.table(ORDERS['table_name'])
+        mask = date_mask(orders['delivery_date'], start_date, end_date)
+        return {'shipping_cost': round(float(orders['shipping_cost'][mask].sum()), 2)}
+
+    # Generate salary expenses
+    def get_salary_expense(self, start_date: str = None, end_date: str = None):
+        salaries = self.store.table(SALARY_PAYMENTS['table_name'])
+        mask = date_mask(salaries['send_date'], start_date, end_date)
+        return {'salary_expense': round(float(salaries['amount'][mask].sum()), 2)}
+
+    # Generate salary expenses per month
+    def get_salary_expense_per_month(self, start_date: str = None, end_date: str = None):
+        dates, _, amounts = self._salaries(start_date, end_date)
+        if not len(amounts):
+            return []
+        (years, months), (expense,) = group_sum(list(self._year_month(dates)), amounts)
+        return [{'year': year, 'month': month, 'salary_expense': round(amount, 2)}
+                for year, month, amount in zip(years.tolist(), months.tolist(), expense.tolist())]
+
+    # Generate salary expenses per worktype
+    def get_salary_expense_per_worktype(self, start_date: str = None, end_date: str = None):
+        _, work_types, amounts = self._salaries(start_date, end_date)
+        if not len(amounts):
+            return []
+        (work_types,), (expense,) = group_sum([work_types], amounts)
+        return [{'work_type': WORK_TYPES[work_type], 'salary_expense': round(amount, 2)}
+                for work_type, amount in zip(work_types.tolist(), expense.tolist())]
+
+    # Generate salary expenses per month per worktype
+    def get_salary_expense_per_month_per_worktype(self, start_date: str = None, end_date: str = None):
+        dates, work_types, amounts = self._salaries(start_date, end_date)
+        if not len(amounts):
+            return []
+        (years, months, work_types), (expense,) = group_sum([*self._year_month(dates), work_types], amounts)
+        return [{'year': year, 'month': month, 'work_type': WORK_TYPES[work_type], 'salary_expense': round(amount, 2)}
+                for year, month, work_type, amount in
+                zip(years.tolist(), months.tolist(), work_types.tolist(), expense.tolist())]
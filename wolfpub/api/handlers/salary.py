@@ -2,6 +2,7 @@
 Module for handling payments
 """
 
+from wolfpub.api.utils.projection import columns_of
 from wolfpub.api.utils.query_generator import QueryGenerator
 from wolfpub.constants import SALARY_PAYMENTS
 
@@ -19,7 +20,7 @@ class PaymentHandler(object):
     # Get payment info
     def get_payment(self, transaction_id):
         cond = {'transaction_id': transaction_id}
-        select_query = self.query_gen.select(self.table_name, ['*'], cond)
+        select_query = self.query_gen.select(self.table_name, columns_of(SALARY_PAYMENTS), cond)
         return self.db.get_result(select_query)
 
     # Create new payment
@@ -134,14 +134,14 @@ PUBLICATION_ALL_ARGUMENTS = api.model("Overall_Publication_Model", {
 
 CHAPTER_ARGUMENTS = api.model("Chapter_Model", {
     "chapter_title": fields.String(min_length=1, max_length=200, required=True),
-    "chapter_text": fields.String(min_length=1, max_length=2000, required=True)
+    "chapter_text": fields.String(min_length=1, max_length=1000000, required=True)
 })
 
 ARTICLE_ARGUMENTS = api.model("Article_Model", {
     "creation_date": fields.Date(required=True),
     "topic": fields.String(min_length=1, max_length=200, required=True),
     "title": fields.String(min_length=1, max_length=200, required=True),
-    "text": fields.String(min_length=1, max_length=2000, required=True)
+    "text": fields.String(min_length=1, max_length=1000000, required=True)
 })
 
 SALARY_PAYMENT_ARGUMENTS = api.model("Salary_Payment_Model", {
@@ -177,6 +177,13 @@ SEARCH_ARGUMENTS = api.model("Filter_Model", {
     }), required=True)
 })
 
+JOB_ARGUMENTS = api.model("Job_Model", {
+    "job_type": fields.String(required=True, description='monthly_report, monthly_reports_backfill, account_bills, '
+                                                        'catalog_import'),
+    "params": NoModel(required=False, description="e.g. {'month': 4, 'year': 2022}"),
+    "max_attempts": fields.Integer(required=False, min=1)
+})
+
 REGISTER_ARGUMENT = reqparse.RequestParser()
 REGISTER_ARGUMENT.add_argument('register', type=inputs.boolean, location='args', required=False)
 
@@ -197,3 +204,39 @@ SALARY_REPORT_ARGUMENTS = reqparse.RequestParser()
 SALARY_REPORT_ARGUMENTS.add_argument('stats', type=str, location='args', help='per_month, per_work_type',
                                      required=False)
 
+EXPORT_REPORT_ARGUMENTS = reqparse.RequestParser()
+EXPORT_REPORT_ARGUMENTS.add_argument('report', type=str, location='args', required=True,
+                                     help='order_per_pub_per_dist, revenue, revenue_distributor_wise, '
+                                          'revenue_city_wise, revenue_location_wise, shipping_cost_expense, '
+                                          'salary_expense, salary_expense_per_month, salary_expense_per_work_type, '
+                                          'salary_expense_per_month_per_work_type')
+EXPORT_REPORT_ARGUMENTS.add_argument('format', type=str, location='args', required=False, default='csv',
+                                     choices=('csv', 'parquet'))
+
+EMPLOYEE_PUBLICATION_ARGUMENTS = reqparse.RequestParser()
+EMPLOYEE_PUBLICATION_ARGUMENTS.add_argument('expand', type=inputs.boolean, location='args', required=False,
+                                            help='Return full publication details instead of ids')
+
+CONTENT_RANGE_ARGUMENTS = reqparse.RequestParser()
+CONTENT_RANGE_ARGUMENTS.add_argument('offset', type=int, location='args', required=False, default=0,
+                                     help='first character of the text to return')
+CONTENT_RANGE_ARGUMENTS.add_argument('length', type=int, location='args', required=False,
+                                     help='characters of the text to return, default the rest of the text')
+
+FIELDS_ARGUMENTS = reqparse.RequestParser()
+FIELDS_ARGUMENTS.add_argument('fields', type=str, location='args', required=False,
+                              help='comma separated fields to return, default all fields')
+
+PAGE_ARGUMENTS = reqparse.RequestParser()
+PAGE_ARGUMENTS.add_argument('limit', type=int, location='args', required=False,
+                            help='items per page, default PAGE_SIZE, at most MAX_PAGE_SIZE')
+PAGE_ARGUMENTS.add_argument('cursor', type=str, location='args', required=False,
+                            help='next_cursor of the previous page, default the first page')
+
+BACKGROUND_ARGUMENTS = reqparse.RequestParser()
+BACKGROUND_ARGUMENTS.add_argument('background', type=inputs.boolean, location='args', required=False, default=False,
+                                  help='run as background job and return the job id right away')
+
+IDEMPOTENCY_ARGUMENTS = reqparse.RequestParser()
+IDEMPOTENCY_ARGUMENTS.add_argument('Idempotency-Key', type=str, location='headers', required=False,
+                                   help='unique key per order, retries with the same key get the first response')
@@ -0,0 +1,202 @@
+"""
+Columnar Store: Keeps the report relevant slices of the order and payment tables as NumPy arrays in memory,
+refreshed incrementally by their auto increment ids, and aggregates them with vectorized group-bys
+"""
+import threading
+import time
+
+from wolfpub.api.utils.lazy_import import lazy_import
+from wolfpub.api.utils.query_builder import QueryBuilder
+from wolfpub.constants import ORDERS, BOOK_ORDERS_INFO, PERIODICAL_ORDERS_INFO, ACCOUNT_PAYMENTS, SALARY_PAYMENTS, \
+    ACCOUNTS, DISTRIBUTORS, AUTHORS
+
+numpy = lazy_import('numpy')
+
+# Fact tables are appended by key (auto increment id, order lines follow the id of their order),
+# dimension tables (key None) are small and reloaded completely on every refresh
+TABLES = {
+    ORDERS['table_name']: {'key': 'order_id', 'columns': {
+        'order_id': 'int64', 'account_id': 'int64', 'order_date': 'datetime64[D]',
+        'delivery_date': 'datetime64[D]', 'shipping_cost': 'float64'}},
+    BOOK_ORDERS_INFO['table_name']: {'key': 'order_id', 'columns': {
+        'order_id': 'int64', 'publication_id': 'int64', 'quantity': 'int64', 'price': 'float64'}},
+    PERIODICAL_ORDERS_INFO['table_name']: {'key': 'order_id', 'columns': {
+        'order_id': 'int64', 'publication_id': 'int64', 'quantity': 'int64', 'price': 'float64'}},
+    ACCOUNT_PAYMENTS['table_name']: {'key': 'payment_id', 'columns': {
+        'payment_id': 'int64', 'account_id': 'int64', 'amount': 'float64', 'payment_date': 'datetime64[D]'}},
+    SALARY_PAYMENTS['table_name']: {'key': 'transaction_id', 'columns': {
+        'transaction_id': 'int64', 'emp_id': 'object', 'amount': 'float64', 'send_date': 'datetime64[D]'}},
+    ACCOUNTS['table_name']: {'key': None, 'where': 'distributor_id is not null', 'columns': {
+        'account_id': 'int64', 'distributor_id': 'int64'}},
+    DISTRIBUTORS['table_name']: {'key': None, 'columns': {
+        'distributor_id': 'int64', 'name': 'object', 'city': 'object', 'address': 'object'}},
+    AUTHORS['table_name']: {'key': None, 'columns': {'emp_id': 'object', 'author_type': 'object'}},
+}
+
+
+def check_numpy():
+    """
+    :return: throws ValueError if numpy is not installed
+    """
+    if numpy is None:
+        raise ValueError('Columnar reports need numpy, install it with: pip install numpy')
+
+
+def date_mask(dates, start_date: str = None, end_date: str = None):
+    """
+    :return: boolean array of the dates in [start_date, end_date)
+    """
+    mask = numpy.ones(len(dates), dtype=bool)
+    if start_date:
+        mask &= dates >= numpy.datetime64(start_date, 'D')
+    if end_date:
+        mask &= dates < numpy.datetime64(end_date, 'D')
+    return mask
+
+
+def lookup(keys, values):
+    """
+    Vectorized join of values against the unique keys of a dimension
+    :return: (positions of the values in keys, boolean array of the values found in keys)
+    """
+    if not len(keys):
+        return numpy.zeros(len(values), dtype='int64'), numpy.zeros(len(values), dtype=bool)
+    if keys.dtype.kind in 'iu' and values.dtype.kind in 'iu' and 0 <= keys.min() and keys.max() <= 4 * len(keys) + 1024:
+        # Dense integer ids (auto increment) are looked up through an index array instead of a binary search
+        index = numpy.full(int(keys.max()) + 1, -1, dtype='int64')
+        index[keys] = numpy.arange(len(keys))
+        in_range = (values >= 0) & (values < len(index))
+        positions = numpy.where(in_range, index[numpy.where(in_range, values, 0)], -1)
+        return positions.clip(0), positions >= 0
+    order = numpy.argsort(keys, kind='stable')
+    positions = order[numpy.searchsorted(keys, values, sorter=order).clip(0, len(keys) - 1)]
+    return positions, keys[positions] == values
+
+
+def group_sum(keys: list, *values):
+    """
+    Group by one or more key columns and sum the value columns of every group
+    :param keys: list of equally long arrays, integer keys are the fastest, strings need a sort
+    :return: ([unique key array per key column], [sum array per value column]), groups sorted by the keys
+    """
+    codes = numpy.zeros(len(keys[0]), dtype='int64')
+    uniques = []
+    for key in keys:
+        if key.dtype.kind in 'iu' and len(key) and key.max() - key.min() <= max(len(key), 1 << 20):
+            # Dense integer keys are their own codes, no sort needed
+            low = key.min()
+            unique, inverse = numpy.arange(low, key.max() + 1), key - low
+        else:
+            unique, inverse = numpy.unique(key, return_inverse=True)
+        codes = codes * len(unique) + inverse.reshape(-1)
+        uniques.append(unique)
+    size = int(numpy.prod([len(unique) for unique in uniques]))
+    if size <= max(4 * len(codes), 1 << 20):
+        groups = numpy.flatnonzero(numpy.bincount(codes, minlength=size))
+        sums = [numpy.bincount(codes, weights=value, minlength=size)[groups] for value in values]
+    else:
+        groups, inverse = numpy.unique(codes, return_inverse=True)
+        sums = [numpy.bincount(inverse.reshape(-1), weights=value, minlength=len(groups)) for value in values]
+    key_values = []
+    for unique in reversed(uniques):
+        groups, position = numpy.divmod(groups, len(unique))
+        key_values.insert(0, unique[position])
+    return key_values, sums
+
+
+class ColumnarStore(object):
+    """
+    In memory copy of the report tables, served from the read replicas.
+    Rows are treated as append only: updates of already loaded fact rows and ids committed out of order
+    are only picked up after reload()
+    """
+
+    def __init__(self, db, refresh_interval: float = 60):
+        """
+        :param db: connector the rows are streamed from
+        :param refresh_interval: seconds after which the next read triggers an incremental refresh
+        """
+        check_numpy()
+        self.db = db
+        self.refresh_interval = refresh_interval
+        self.lock = threading.Lock()
+        self.refreshed_at = None
+        self.reload()
+
+    def reload(self):
+        """
+        Drops every loaded row, the next read loads the tables again
+        """
+        with self.lock:
+            self.tables = {name: self.empty(spec) for name, spec in TABLES.items()}
+            self.last_ids = {name: 0 for name in TABLES}
+            self.refreshed_at = None
+
+    @staticmethod
+    def empty(spec: dict):
+        return {column: numpy.array([], dtype=dtype) for column, dtype in spec['columns'].items()}
+
+    @staticmethod
+    def to_arrays(spec: dict, column_names: list, rows: list):
+        columns = list(zip(*rows)) or [[] for _ in column_names]
+        return {name: numpy.array(column, dtype=spec['columns'][name]) for name, column in zip(column_names, columns)}
+
+    def append(self, table: str, column_names: list, rows: list):
+        """
+        Appends the rows of a fact table or replaces the rows of a dimension table
+        """
+        self.append_arrays(table, [self.to_arrays(TABLES[table], column_names, rows)])
+
+    def append_arrays(self, table: str, parts: list):
+        """
+        Appends the arrays of a fact table or replaces the arrays of a dimension table
+        :param parts: list of {column: array}, e.g. one per fetched batch
+        """
+        spec = TABLES[table]
+        if spec['key'] is None:
+            self.tables[table] = {column: numpy.concatenate([part[column] for part in parts])
+                                  for column in spec['columns']} if parts else self.empty(spec)
+            return
+        # Arrays are replaced, not modified, so readers keep a consistent view of the previous refresh
+        self.tables[table] = {column: numpy.concatenate([self.tables[table][column]] + [part[column] for part in parts])
+                              for column in spec['columns']}
+        for part in parts:
+            if len(part[spec['key']]):
+                self.last_ids[table] = max(self.last_ids[table], int(part[spec['key']].max()))
+
+    def refresh(self, batch_size: int = 10000):
+        """
+        Loads the fact rows added since the last refresh and reloads the dimension tables
+        """
+        with self.lock:
+            self._refresh(batch_size)
+
+    def _refresh(self, batch_size: int = 10000):
+        for table, spec in TABLES.items():
+            query = QueryBuilder(table).select(*spec['columns'])
+            if spec.get('where'):
+                query.where(spec['where'])
+            if spec['key']:
+                query.where({spec['key']: {'>': self.last_ids[table]}}).order_by(spec['key'])
+            # Every batch is turned into arrays as it arrives, the fetched tuples of a table are never held at once
+            parts = [self.to_arrays(spec, list(spec['columns']), rows)
+                     for _, rows in self.db.stream_result(query.build(), batch_size)]
+            self.append_arrays(table, parts)
+        self.refreshed_at = time.monotonic()
+
+    def table(self, name: str):
+        """
+        :return: {column: array} of the table, refreshed first when older than refresh_interval
+        """
+        if self.refreshed_at is None:
+            # Nothing to serve yet, readers wait for the first load
+            with self.lock:
+                if self.refreshed_at is None:
+                    self._refresh()
+        elif time.monotonic() - self.refreshed_at >= self.refresh_interval and self.lock.acquire(blocking=False):
+            # Only one reader refreshes, the others keep serving the previous arrays
+            try:
+                self._refresh()
+            finally:
+                self.lock.release()
+        return self.tables[name]
@@ -0,0 +1,93 @@
+"""
+Content: Compression of long chapter and article texts, their excerpts for listings and ranged reads
+"""
+import zlib
+
+from wolfpub.api.utils.lazy_import import lazy_import
+from wolfpub.api.utils.query_generator import RawSQL, quote_literal
+from wolfpub.config import API_SETTINGS
+
+zstandard = lazy_import('zstandard')
+
+CODECS = ['zlib', 'zstd']
+
+
+def codec():
+    """
+    :return: codec of new bodies, None stores them inline
+    """
+    name = API_SETTINGS.get('CONTENT_COMPRESSION', 'zlib') or None
+    if name is not None and name not in CODECS:
+        raise ValueError(f"Unknown content compression '{name}', expected one of: {', '.join(CODECS)}")
+    if name == 'zstd' and zstandard is None:
+        raise ValueError('zstd content compression needs zstandard, install it with: pip install zstandard')
+    return name
+
+
+def compress(text: str, encoding: str):
+    data = text.encode('utf-8')
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor().compress(data)
+    return zlib.compress(data, 6)
+
+
+def decompress(body: bytes, encoding: str):
+    if encoding == 'zstd':
+        if zstandard is None:
+            raise ValueError('Reading zstd compressed content needs zstandard, install it with: pip install zstandard')
+        return zstandard.ZstdDecompressor().decompress(bytes(body)).decode('utf-8')
+    return zlib.decompress(bytes(body)).decode('utf-8')
+
+
+def excerpt_length():
+    return min(API_SETTINGS.get('CONTENT_EXCERPT_LENGTH', 200), 250)
+
+
+def excerpt(text: str):
+    """
+    :return: the first characters of the text, the same as excerpt_sql for inline texts
+    """
+    size = excerpt_length()
+    return text if len(text) <= size else text[:size].rstrip() + '...'
+
+
+def excerpt_sql(text_column: str):
+    """
+    :return: select expressions of excerpt and length of listed chapters or articles, computed from the inline text
+        when there is no body row
+    """
+    size = excerpt_length()
+    return [f"coalesce(excerpt, if(char_length({text_column}) > {size}, "
+            f"concat(rtrim(left({text_column}, {size})), '...'), {text_column})) as excerpt",
+            f"coalesce(text_length, char_length({text_column})) as text_length"]
+
+
+def body_values(text: str):
+    """
+    :return: column values of the body row of a long text, None when the text is stored inline
+    """
+    encoding = codec()
+    if encoding is None or len(text) < API_SETTINGS.get('CONTENT_COMPRESS_MIN_LENGTH', 1024):
+        return None
+    return {'encoding': quote_literal(encoding), 'text_length': len(text), 'excerpt': quote_literal(excerpt(text)),
+            'body': RawSQL(f"x'{compress(text, encoding).hex()}'")}
+
+
+def read_text(row: dict, text_column: str, offset: int = 0, length: int = None):
+    """
+    Replaces the inline text of a chapter or article row (selected with encoding and body of its body row) by the
+    requested range of its full text
+    :param offset: first character of the range
+    :param length: characters of the range, None for the rest of the text
+    :return: the row with text_length, and offset and next_offset (None after the last range) for ranged reads
+    """
+    body = row.pop('body', None)
+    encoding = row.pop('encoding', None)
+    text = decompress(body, encoding) if body is not None else row[text_column] or ''
+    end = len(text) if length is None else min(offset + length, len(text))
+    row[text_column] = text[offset:end]
+    row['text_length'] = len(text)
+    if offset or length is not None:
+        row['offset'] = offset
+        row['next_offset'] = end if end < len(text) else None
+    return row
@@ -19,3 +19,15 @@ class UnauthorizedOperation(Exception):
     """
     Custom exception for Query Generator
     """
+
+
+class JobCancelled(Exception):
+    """
+    Custom exception raised in a running job whose cancellation was requested
+    """
+
+
+class IdempotencyConflict(Exception):
+    """
+    Custom exception for a request reusing an idempotency key of a different or still running request
+    """
@@ -2,17 +2,27 @@ import json
 
 from flask import Response
 
+from wolfpub.logger import WOLFPUB_LOGGER as logger
+
+
+# Default of next_cursor for responses which are not pages of a list
+UNPAGED = object()
+
 
 class CustomResponse(Response):
     """
     Success response structure: {'data': {}, 'message': '', 'status_code': 200}
+    Paged lists also return {'next_cursor': '<cursor of the next page>'}, null after the last page
     Error response structure: {'error': '<error_class>', 'message': '<error_msg>', 'status_code': 400}
     """
-    def __init__(self, data: dict = None, error: str = None, status_code: int = 200, message: str = 'OK', **kwargs):
+    def __init__(self, data: dict = None, error: str = None, status_code: int = 200, message: str = 'OK',
+                 next_cursor=UNPAGED, **kwargs):
         response_object = {
             'message': message,
             'status_code': status_code
         }
+        if next_cursor is not UNPAGED:
+            response_object['next_cursor'] = next_cursor
         if 'content_type' not in kwargs:
             kwargs['content_type'] = 'application/json'
         try:
@@ -47,7 +57,7 @@ class CustomResponse(Response):
             response_object['message'] = e.__str__()
             response_object['error'] = 'CustomResponse'
         finally:
-            print(response_object)
+            logger.debug(response_object)
             return super(CustomResponse, self).__init__(response=json.dumps(response_object, default=str),
                                                         status=response_object['status_code'],
                                                         **kwargs)
@@ -0,0 +1,105 @@
+"""
+Export: Serializes batches of rows (column_names, rows) into CSV or Parquet chunks while they are streamed
+"""
+import csv
+import io
+
+from wolfpub.api.utils.lazy_import import lazy_import
+
+pyarrow = lazy_import('pyarrow')
+
+EXPORT_FORMATS = {'csv': 'text/csv', 'parquet': 'application/vnd.apache.parquet'}
+
+
+def check_format(export_format: str):
+    """
+    :return: throws ValueError if the format is unknown or its library is not installed
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{export_format}', expected one of: {', '.join(EXPORT_FORMATS)}")
+    if export_format == 'parquet' and pyarrow is None:
+        raise ValueError('Parquet export needs pyarrow, install it with: pip install pyarrow')
+
+
+def csv_chunks(batches):
+    """
+    :param batches: iterable of (column_names, rows)
+    :return: generator of csv text, the header followed by one chunk per batch
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    header = False
+    for column_names, rows in batches:
+        if not header:
+            writer.writerow(column_names)
+            header = True
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+class ChunkSink(io.RawIOBase):
+    """
+    Write only file collecting the bytes written by the parquet writer until they are drained
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def column_type(inferred):
+    if pyarrow.types.is_null(inferred):
+        return pyarrow.string()
+    if pyarrow.types.is_decimal(inferred):
+        return pyarrow.decimal128(38, inferred.scale)
+    return inferred
+
+
+def parquet_chunks(batches):
+    """
+    :param batches: iterable of (column_names, rows), every batch becomes one row group
+    :return: generator of parquet bytes, the footer is part of the last chunk
+    """
+    import pyarrow.parquet
+    sink = ChunkSink()
+    writer = None
+    schema = None
+    for column_names, rows in batches:
+        columns = list(zip(*rows)) or [[] for _ in column_names]
+        if schema is None:
+            # Types are inferred from the first batch, columns without any value there are written as strings
+            # and decimals get the widest precision, so the later batches fit
+            schema = pyarrow.schema([(name, column_type(pyarrow.array(column).type))
+                                     for name, column in zip(column_names, columns)])
+            writer = pyarrow.parquet.ParquetWriter(sink, schema)
+        arrays = [pyarrow.array([None if value is None else str(value) for value in column]
+                                if pyarrow.types.is_string(field.type) else column, type=field.type)
+                  for column, field in zip(columns, schema)]
+        writer.write_table(pyarrow.Table.from_arrays(arrays, schema=schema))
+        yield sink.drain()
+    if writer is not None:
+        writer.close()
+        yield sink.drain()
+
+
+def export_chunks(export_format: str, batches):
+    return parquet_chunks(batches) if export_format == 'parquet' else csv_chunks(batches)
@@ -0,0 +1,32 @@
+"""
+HTTP Cache: ETag, Last-Modified and Cache-Control validators of the catalog GETs, conditional requests are answered
+with 304 from the version of the publication before its content is read
+"""
+from flask import request, Response
+
+from wolfpub.config import API_SETTINGS
+
+
+def set_validators(response: Response, route: str, tag: str, last_modified=None):
+    """
+    :param route: key of CATALOG_CACHE_MAX_AGE in the api settings, e.g. 'publication'
+    :param tag: entity tag, sent as weak ETag
+    :param last_modified: datetime of the last update
+    :return: the response with ETag, Last-Modified and Cache-Control headers
+    """
+    response.set_etag(tag, weak=True)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.cache_control.public = True
+    response.cache_control.max_age = API_SETTINGS.get('CATALOG_CACHE_MAX_AGE', {}).get(route, 60)
+    return response
+
+
+def not_modified(route: str, tag: str, last_modified=None):
+    """
+    Evaluates If-None-Match (or If-Modified-Since without it) of the request against the validators
+    :return: 304 response when the client's copy is current, else None
+    """
+    response = set_validators(Response(), route, tag, last_modified)
+    response.make_conditional(request)
+    return response if response.status_code == 304 else None
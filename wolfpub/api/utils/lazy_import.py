@@ -0,0 +1,24 @@
+"""
+Lazy Import: Optional heavy libraries (NumPy, pyarrow) are imported on their first use instead of at startup
+"""
+import importlib.util
+import sys
+
+
+def lazy_import(name: str):
+    """
+    Module which executes on its first attribute access
+    :param name: top level module name, e.g. 'numpy'
+    :return: the module, None if it is not installed
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        return None
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
@@ -0,0 +1,76 @@
+"""
+LRU Cache: Thread safe, size bound cache with optional expiry and hit statistics
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache(object):
+    """
+    Keeps the most recently used maxsize entries, entries older than ttl seconds are treated as missing
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """
+        :param key: hashable key of the entry
+        :param default: returned when the entry is missing or expired
+        :return: value of the entry
+        """
+        entry = self.entries.get(key)
+        if entry is not None and (self.ttl is None or time.monotonic() - entry[1] <= self.ttl):
+            # Hits skip the lock, the entry may have been evicted meanwhile and the counter is approximate
+            try:
+                self.entries.move_to_end(key)
+            except KeyError:
+                pass
+            self.hits += 1
+            return entry[0]
+        with self.lock:
+            if entry is not None:
+                self.entries.pop(key, None)
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        """
+        Adds or replaces the entry, the least recently used entry is evicted when the cache is full
+        """
+        with self.lock:
+            self.entries[key] = (value, time.monotonic())
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key, default=None):
+        with self.lock:
+            entry = self.entries.pop(key, None)
+            return default if entry is None else entry[0]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """
+        :return: {hits, misses, evictions, hit_ratio, size, maxsize}
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                    'size': len(self.entries), 'maxsize': self.maxsize}
+
+    def __len__(self):
+        return len(self.entries)
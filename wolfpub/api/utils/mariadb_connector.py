@@ -1,63 +1,183 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
 import mariadb
 
 from wolfpub.api.utils.custom_exceptions import MariaDBException
-from wolfpub.config import MARIADB_SETTINGS
+from wolfpub.config import MARIADB_SETTINGS, MARIADB_REPLICA_SETTINGS
 from wolfpub.logger import WOLFPUB_LOGGER as logger
 
+# Longer queries (multi-row inserts) are logged cut to that many characters
+LOG_QUERY_LENGTH = 1000
+
 
 class MariaDBConnector(object):
-    def __init__(self):
+    # Connection pools of the process per (host, port, options), created on first use after a fork, so every worker
+    # process of the pre-fork server gets pools of its own
+    pools = {}
+    pools_pid = None
+    pools_lock = threading.Lock()
+
+    def __init__(self, read_replica: bool = False, connect_options: dict = None):
+        """
+        :param read_replica: route select queries of get_result to the configured read replicas (round-robin),
+                             writes always go to the primary
+        :param connect_options: additional options for mariadb.connect, e.g. {'local_infile': True}
+        """
         self.user = MARIADB_SETTINGS['USERNAME']
         self.password = MARIADB_SETTINGS['PASSWORD']
         self.host = MARIADB_SETTINGS['HOST']
         self.port = int(MARIADB_SETTINGS['PORT'])
         self.database = MARIADB_SETTINGS['DB']
-        self.conn = None
+        self.replicas = self.parse_replicas(MARIADB_REPLICA_SETTINGS['HOSTS']) if read_replica else []
+        self.max_replica_lag = int(MARIADB_REPLICA_SETTINGS['MAX_LAG_SECONDS'])
+        self.lag_check_interval = int(MARIADB_REPLICA_SETTINGS['LAG_CHECK_INTERVAL'])
+        self.replica_lag = {}
+        self.next_replica = 0
+        self.connect_options = connect_options or {}
+        self.pool_size = int(MARIADB_SETTINGS.get('POOL_SIZE', 0))
+
+    @staticmethod
+    def parse_replicas(hosts: str):
+        """
+        Parse comma separated replica addresses
+        :param hosts: "replica1:3306,replica2:3307"
+        :return: [('replica1', 3306), ('replica2', 3307)]
+        """
+        replicas = []
+        for address in filter(None, [host.strip() for host in hosts.split(',')]):
+            host, _, port = address.partition(':')
+            replicas.append((host, int(port) if port else int(MARIADB_SETTINGS['PORT'])))
+        return replicas
 
-    def connect(self):
+    def pool(self, host: str, port: int):
         """
-        Returns connection to mariadb
+        Connection pool of this process for the server, closing a pooled connection returns it to the pool
         """
+        key = (host, port, tuple(sorted(self.connect_options.items())))
+        with self.pools_lock:
+            if MariaDBConnector.pools_pid != os.getpid():
+                # Pools inherited from the parent process hold the parent's connections
+                MariaDBConnector.pools = {}
+                MariaDBConnector.pools_pid = os.getpid()
+            pool = self.pools.get(key)
+            if pool is None:
+                pool = mariadb.ConnectionPool(pool_name=f'wolfpub-{os.getpid()}-{len(self.pools)}',
+                                              pool_size=self.pool_size, user=self.user, password=self.password,
+                                              host=host, port=port, database=self.database, **self.connect_options)
+                self.pools[key] = pool
+        return pool
+
+    def _connect(self, host: str, port: int):
         try:
+            if self.pool_size:
+                try:
+                    conn = self.pool(host, port).get_connection()
+                    if conn is not None:
+                        return conn
+                except mariadb.PoolError as e:
+                    logger.warning(f'Connection pool exhausted, opening a connection of its own: {e}')
             return mariadb.connect(
                 user=self.user,
                 password=self.password,
-                host=self.host,
-                port=self.port,
-                database=self.database
+                host=host,
+                port=port,
+                database=self.database,
+                **self.connect_options
             )
         except mariadb.Error as e:
             raise MariaDBException(f'Error connecting to MariaDB Platform: {e}')
 
-    def get_cursor(self):
+    def is_lagging(self, replica: tuple, conn):
+        """
+        Checks replication lag of the replica, the lag is re-checked only after LAG_CHECK_INTERVAL seconds
+        """
+        checked_at, lag = self.replica_lag.get(replica, (0, None))
+        if time.monotonic() - checked_at >= self.lag_check_interval:
+            try:
+                cur = conn.cursor(dictionary=True)
+                cur.execute('SHOW SLAVE STATUS')
+                status = cur.fetchone()
+                lag = status.get('Seconds_Behind_Master') if status else None
+            except mariadb.Error as e:
+                logger.error(e)
+                lag = None
+            self.replica_lag[replica] = (time.monotonic(), lag)
+        return lag is None or lag > self.max_replica_lag
+
+    def connect(self, read_only: bool = False):
+        """
+        Returns connection to mariadb, read only connections are served by a healthy replica when configured
+        """
+        if read_only and self.replicas:
+            for _ in range(len(self.replicas)):
+                replica = self.replicas[self.next_replica % len(self.replicas)]
+                self.next_replica += 1
+                try:
+                    conn = self._connect(*replica)
+                except MariaDBException as e:
+                    logger.error(e)
+                    continue
+                if not self.is_lagging(replica, conn):
+                    return conn
+                logger.warning(f'Skipping read replica {replica[0]}:{replica[1]}, replication lag too high')
+                conn.close()
+            logger.warning('No healthy read replica available, reading from primary')
+        return self._connect(self.host, self.port)
+
+    @staticmethod
+    def get_cursor(conn):
         """
-        Get a connection and return the cursor for the active connection
+        Return a cursor of the connection, the connection is closed when no cursor can be opened
         """
         try:
-            self.conn = self.connect()
-            return self.conn.cursor()
+            return conn.cursor()
         except mariadb.Error as e:
             logger.error(e)
+            conn.close()
             raise MariaDBException(f'Error in getting cursor for MariaDB: {e}')
 
     def execute(self, queries: list):
         """
         Executes the list of queries within one transaction
         """
-        cur = self.get_cursor()
-        self.conn.autocommit = False
+        conn = self.connect()
+        cur = self.get_cursor(conn)
+        conn.autocommit = False
         last_row_ids = []
         try:
             for query in queries:
                 _, rowid = self._execute(query, cur)
                 last_row_ids.append(rowid)
-            self.conn.commit()
+            conn.commit()
             return cur.rowcount, last_row_ids
         except MariaDBException as e:
-            self.conn.rollback()
+            conn.rollback()
             raise MariaDBException(e)
         finally:
-            self.conn.close()
+            conn.close()
+
+    @contextmanager
+    def transaction(self):
+        """
+        One connection of its own and one transaction for dependent queries, e.g. reads locking rows (for update)
+        followed by the writes depending on them. Committed at the end of the block, rolled back on any error
+            with db.transaction() as cursor:
+                db._execute(query, cursor)
+        :return: cursor for _execute and _fetch
+        """
+        conn = self.connect()
+        conn.autocommit = False
+        try:
+            yield conn.cursor()
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
 
     @staticmethod
     def _execute(query: str, cursor):
@@ -66,7 +186,10 @@ class MariaDBConnector(object):
         everything is supposed to be in one transaction.
         This function does not commit after execution, so the function calling it should take care of the commit process
         """
-        logger.info(f'Executing: {query}')
+        if len(query) > LOG_QUERY_LENGTH:
+            logger.info(f'Executing: {query[:LOG_QUERY_LENGTH]}... ({len(query)} characters)')
+        else:
+            logger.info(f'Executing: {query}')
         try:
             cursor.execute(query)
             return cursor.rowcount, cursor.lastrowid
@@ -74,15 +197,96 @@ class MariaDBConnector(object):
             logger.error(e)
             raise MariaDBException(e)
 
+    def bulk_execute(self, queries, cursor=None):
+        """
+        Executes the queries one by one as they are generated, e.g. the multi-row inserts of QueryGenerator.bulk_insert
+        :param queries: iterable of queries, consumed lazily
+        :param cursor: cursor of an open transaction (transaction()), otherwise the queries run in a transaction of
+                       their own
+        :return: number of affected rows
+        """
+        if cursor is None:
+            with self.transaction() as cursor:
+                return self.bulk_execute(queries, cursor)
+        rowcount = 0
+        for query in queries:
+            rowcount += self._execute(query, cursor)[0]
+        return rowcount
+
+    @staticmethod
+    def compound_statement(queries: list, result_query: str = None, transaction: bool = True):
+        """
+        Wraps the queries into one anonymous block (BEGIN NOT ATOMIC ... END) which reaches the server as a single
+        statement. Values can be passed between the queries with session variables (set @id = last_insert_id()).
+        :param queries: list of queries to be executed in the given order
+        :param result_query: select query executed at the end of the block, its rows are returned to the client
+        :param transaction: wrap the queries in a transaction which is rolled back on any error
+        :return: "BEGIN NOT ATOMIC query1; query2; END"
+        """
+        statements = []
+        if transaction:
+            statements += ['DECLARE EXIT HANDLER FOR SQLEXCEPTION BEGIN ROLLBACK; RESIGNAL; END', 'START TRANSACTION']
+        statements += queries
+        if transaction:
+            statements.append('COMMIT')
+        if result_query:
+            statements.append(result_query)
+        return f"BEGIN NOT ATOMIC {'; '.join(statements)}; END"
+
+    def execute_block(self, queries: list, result_query: str = None):
+        """
+        Executes the list of queries within one transaction and one network round trip
+        :return: rows of the result_query as a list
+        """
+        conn = self.connect()
+        try:
+            cur = self.get_cursor(conn)
+            self._execute(self.compound_statement(queries, result_query), cur)
+            return self._fetch(cur) if result_query else []
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _fetch(cursor):
+        """
+        Fetch all the rows of the executed query as a list of dictionaries
+        """
+        rows = cursor.fetchall()
+        column_names = [col[0] for col in cursor.description]
+        return [dict(zip(column_names, row)) for row in rows]
+
+    def stream_result(self, query: str, batch_size: int = 1000):
+        """
+        Streams the rows of a select query from an unbuffered (server side) cursor on its own connection
+        :param batch_size: rows fetched per round trip
+        :return: generator of (column_names, rows) with at most batch_size tuples in rows
+        """
+        conn = self.connect(read_only=True)
+        try:
+            cur = conn.cursor(buffered=False)
+            self._execute(query, cur)
+            column_names = [col[0] for col in cur.description]
+            # The first batch is yielded even when empty, so the consumers always get the column names
+            rows = cur.fetchmany(batch_size)
+            yield column_names, rows
+            while rows:
+                rows = cur.fetchmany(batch_size)
+                if rows:
+                    yield column_names, rows
+        except mariadb.Error as e:
+            logger.error(e)
+            raise MariaDBException(e)
+        finally:
+            conn.close()
+
     def get_result(self, query: str):
         """
         Get response for select queries as a list
         """
-        cur = self.get_cursor()
-        self._execute(query, cur)
-        rows = cur.fetchall()
-        desc = cur.description
-        column_names = [col[0] for col in desc]
-        result = [dict(zip(column_names, row)) for row in rows]
-        self.conn.close()
-        return result
+        conn = self.connect(read_only=True)
+        try:
+            cur = self.get_cursor(conn)
+            self._execute(query, cur)
+            return self._fetch(cur)
+        finally:
+            conn.close()
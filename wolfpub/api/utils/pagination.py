@@ -0,0 +1,74 @@
+"""
+Pagination: Keyset pagination of the list end-points with limit=50&cursor=<next_cursor of the previous page>
+
+The cursor is the opaque sort key of the last row of a page, the next page continues after it with an index range
+(QueryGenerator.keyset, QueryBuilder.after) instead of skipping OFFSET rows
+"""
+import base64
+import binascii
+import json
+
+from flask import request
+
+from wolfpub.config import API_SETTINGS
+
+
+def encode_cursor(values: list):
+    """
+    :param values: sort key of the last row of the page, integer ids
+    :return: url safe cursor
+    """
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str):
+    """
+    :return: sort key of the last row of the previous page, throws ValueError on malformed cursors
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        raise ValueError('Malformed cursor, use the next_cursor of the previous page')
+    # Sort keys are ids, anything else was not issued by the API
+    if not isinstance(values, list) or not values or not all(type(value) is int for value in values):
+        raise ValueError('Malformed cursor, use the next_cursor of the previous page')
+    return values
+
+
+def requested_page():
+    """
+    Parses the limit and cursor parameters of the request, the limit defaults to PAGE_SIZE and is capped at
+    MAX_PAGE_SIZE
+    :return: (limit, sort key to continue after or None for the first page), throws ValueError
+    """
+    limit = request.args.get('limit')
+    limit = int(limit) if limit else int(API_SETTINGS.get('PAGE_SIZE', 50))
+    if limit < 1:
+        raise ValueError("'limit' has to be positive")
+    cursor = request.args.get('cursor')
+    return min(limit, int(API_SETTINGS.get('MAX_PAGE_SIZE', 500))), decode_cursor(cursor) if cursor else None
+
+
+def after_keys(columns: list, after: list = None):
+    """
+    :param columns: sort key columns of the query
+    :param after: sort key of the cursor
+    :return: {column: value} for QueryGenerator.keyset and QueryBuilder.after, None for the first page
+    """
+    if after is None:
+        return None
+    if len(after) != len(columns):
+        raise ValueError('Cursor does not belong to this list, use the next_cursor of the previous page')
+    return dict(zip(columns, after))
+
+
+def page(rows: list, limit: int, keys: list):
+    """
+    Cuts the rows of a query run with limit + 1 to the page
+    :param keys: names of the sort key columns in the rows
+    :return: (rows of the page, cursor of the next page or None after the last page)
+    """
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor([int(rows[-1][key]) for key in keys])
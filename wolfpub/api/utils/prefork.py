@@ -0,0 +1,199 @@
+"""
+Pre-fork server: A master process binds the listening socket and forks gevent WSGI workers serving it, so the API
+uses every core of the host
+"""
+import logging
+import os
+import random
+import signal
+import socket
+import sys
+import time
+
+import gevent
+from gevent import pywsgi
+
+from wolfpub.logger import WOLFPUB_LOGGER as logger
+
+# Environment of the master re-executed by a reload: listening socket and workers of the previous master
+LISTENER_FD = 'WOLFPUB_LISTENER_FD'
+PREVIOUS_WORKERS = 'WOLFPUB_PREVIOUS_WORKERS'
+
+
+class RequestLimit(object):
+    """
+    WSGI middleware stopping the worker gracefully after max_requests, the master forks a fresh worker
+    """
+
+    def __init__(self, app, max_requests: int, stop):
+        self.app = app
+        self.max_requests = max_requests
+        self.stop = stop
+        self.requests = 0
+
+    def __call__(self, environ, start_response):
+        self.requests += 1
+        if self.requests == self.max_requests:
+            # Stopped from its own greenlet, stopping waits for the running requests including this one
+            gevent.spawn(self.stop)
+        return self.app(environ, start_response)
+
+
+class PreforkServer(object):
+    """
+    Master process of the pre-fork workers:
+        SIGHUP reloads gracefully: the master re-executes itself with the listening socket kept open, so the new code
+        and settings.conf are loaded. The new master forks its workers first, then the old workers finish their
+        requests and exit
+        SIGTERM/SIGINT stop the workers gracefully, workers still busy after graceful_timeout are killed
+        workers exiting (crashed or recycled) are replaced
+    """
+
+    def __init__(self, app, host: str, port: int, workers: int = 0, max_requests: int = 0,
+                 max_requests_jitter: int = 0, graceful_timeout: float = 30, backlog: int = 2048,
+                 on_worker_start=None, argv: list = None):
+        """
+        :param workers: number of worker processes, the number of cores by default
+        :param max_requests: requests after which a worker is recycled, 0 to never recycle
+        :param max_requests_jitter: random requests added to max_requests per worker, so they are not recycled at once
+        :param on_worker_start: called with the slot number in every new worker, after the fork
+        :param argv: command starting the master again on a reload, the command of the running process by default
+        """
+        self.app = app
+        self.address = (host, int(port))
+        self.workers = int(workers) or os.cpu_count() or 1
+        self.max_requests = int(max_requests)
+        self.max_requests_jitter = int(max_requests_jitter)
+        self.graceful_timeout = graceful_timeout
+        self.backlog = backlog
+        self.on_worker_start = on_worker_start
+        self.argv = argv or [sys.executable] + sys.argv
+        self.listener = None
+        self.children = {}  # pid -> slot
+        self.signals = []
+
+    def bind(self):
+        fd = os.environ.pop(LISTENER_FD, None)
+        if fd is not None:
+            # Kept open by the master before the reload, connections arriving meanwhile wait in its backlog
+            listener = socket.socket(fileno=int(fd))
+        else:
+            listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            listener.bind(self.address)
+            listener.listen(self.backlog)
+        listener.setblocking(False)
+        return listener
+
+    def spawn(self, slot: int):
+        pid = os.fork()
+        if pid:
+            self.children[pid] = slot
+            return pid
+        # Worker process
+        exit_code = 0
+        try:
+            self.serve(slot)
+        except Exception as e:
+            logger.error(f'Worker {slot} ({os.getpid()}) failed: {e}')
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+
+    def serve(self, slot: int):
+        for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, signal.SIG_DFL)
+        gevent.reinit()
+
+        def stop():
+            server.stop(timeout=self.graceful_timeout)
+
+        app = self.app
+        if self.max_requests:
+            app = RequestLimit(app, self.max_requests + random.randint(0, self.max_requests_jitter), stop)
+        server = pywsgi.WSGIServer(self.listener, app)
+        gevent.signal_handler(signal.SIGTERM, lambda: gevent.spawn(stop))
+        gevent.signal_handler(signal.SIGINT, lambda: gevent.spawn(stop))
+        if self.on_worker_start:
+            self.on_worker_start(slot)
+        logger.info(f'Worker {slot} ({os.getpid()}) serving on {self.address[0]}:{self.address[1]}')
+        server.serve_forever()
+        logger.info(f'Worker {slot} ({os.getpid()}) stopped')
+
+    def kill(self, pids: list, timeout: float):
+        """
+        Stops the workers gracefully, kills the ones still running after the timeout
+        """
+        for pid in pids:
+            self.signal(pid, signal.SIGTERM)
+        deadline = time.monotonic() + timeout
+        while any(pid in self.children for pid in pids) and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.1)
+        for pid in pids:
+            if pid in self.children:
+                logger.warning(f'Worker {pid} did not stop within {timeout} seconds, killing it')
+                self.signal(pid, signal.SIGKILL)
+        while any(pid in self.children for pid in pids):
+            self.reap()
+            time.sleep(0.1)
+
+    def signal(self, pid: int, signum: int):
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            self.children.pop(pid, None)
+
+    def reap(self):
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self.children.clear()
+                break
+            if not pid:
+                break
+            slot = self.children.pop(pid, None)
+            if slot is not None:
+                logger.info(f'Worker {slot} ({pid}) exited with status {status}')
+
+    def reload(self):
+        """
+        Re-executes the master in its process, the workers stay its children and are stopped by the new master
+        """
+        os.set_inheritable(self.listener.fileno(), True)
+        os.environ[LISTENER_FD] = str(self.listener.fileno())
+        os.environ[PREVIOUS_WORKERS] = ','.join(str(pid) for pid in self.children)
+        logger.info(f'Master {os.getpid()} reloading')
+        logging.shutdown()
+        os.execv(self.argv[0], self.argv)
+
+    def run(self):
+        self.listener = self.bind()
+        for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda s, _: self.signals.append(s))
+        logger.info(f'Master {os.getpid()} forking {self.workers} workers on {self.address[0]}:{self.address[1]}')
+        for slot in range(self.workers):
+            self.spawn(slot)
+        previous = [int(pid) for pid in os.environ.pop(PREVIOUS_WORKERS, '').split(',') if pid]
+        if previous:
+            self.children.update({pid: None for pid in previous})
+            self.kill(previous, self.graceful_timeout)
+            logger.info(f'Reloaded {self.workers} workers')
+        try:
+            while True:
+                while self.signals:
+                    signum = self.signals.pop(0)
+                    if signum == signal.SIGHUP:
+                        self.reload()
+                    else:
+                        return
+                # Replacing the crashed and recycled workers
+                self.reap()
+                for slot in set(range(self.workers)) - set(self.children.values()):
+                    self.spawn(slot)
+                time.sleep(0.5)
+        finally:
+            self.kill(list(self.children), self.graceful_timeout)
+            self.listener.close()
+            logger.info(f'Master {os.getpid()} stopped')
@@ -0,0 +1,59 @@
+"""
+Projection: Columns selected by the handlers instead of '*', and sparse fieldsets requested by the clients with
+fields=name,balance
+"""
+from flask import request
+
+
+def columns_of(*tables: dict):
+    """
+    :param tables: table dictionaries of wolfpub.constants, in the order of the natural join
+    :return: distinct column names of the tables
+    """
+    return list(dict.fromkeys(column for table in tables for column in table['columns']))
+
+
+def response_columns(*tables: dict):
+    """
+    :param tables: table dictionaries of wolfpub.constants, in the order of the natural join
+    :return: distinct column names of the tables without their internal_columns, the columns end-points return
+    """
+    internal = {column for table in tables for column in table.get('internal_columns', [])}
+    return [column for column in columns_of(*tables) if column not in internal]
+
+
+def requested_fields(allowed: list):
+    """
+    Parses the fields parameter of the request, comma separated names of the fields to return
+    :param allowed: fields the end-point returns
+    :return: list of the requested fields, None for all fields. Throws ValueError on unknown fields
+    """
+    fields = request.args.get('fields')
+    if not fields:
+        return None
+    fields = list(dict.fromkeys(field.strip() for field in fields.split(',') if field.strip()))
+    unknown = [field for field in fields if field not in allowed]
+    if unknown or not fields:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}, expected some of: {', '.join(allowed)}")
+    return fields
+
+
+def project(columns: list, fields: list = None, required: list = None):
+    """
+    :param columns: columns of the query
+    :param fields: requested fields, None for all columns
+    :param required: columns the end-point needs itself, selected even when they are not requested
+    :return: columns to select
+    """
+    if fields is None:
+        return list(columns)
+    return list(dict.fromkeys((required or []) + [field for field in fields if field in columns]))
+
+
+def sparse(row: dict, fields: list = None):
+    """
+    :return: the row with the requested fields only
+    """
+    if fields is None:
+        return row
+    return {key: value for key, value in row.items() if key in fields}
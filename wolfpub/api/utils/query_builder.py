@@ -0,0 +1,180 @@
+"""
+Query Builder: Fluent builder for select queries with explicit joins, ordering, paging, unions and CTEs
+"""
+
+from wolfpub.api.utils.custom_exceptions import QueryGenerationException
+from wolfpub.api.utils.query_generator import QueryGenerator, RawSQL
+from wolfpub.logger import WOLFPUB_LOGGER as logger
+
+
+class QueryBuilder(object):
+    """
+    Builds a select query step by step, conditions are rendered by QueryGenerator. e.g.
+        QueryBuilder('account_payments', 'ap').join('accounts', 'a', on={'a.account_id': 'ap.account_id'})
+            .select('ap.account_id', 'sum(ap.amount) as revenue').where({'payment_date': {'>=': '2022-01-01'}})
+            .group_by('ap.account_id').order_by('revenue desc').limit(10).build()
+    """
+
+    def __init__(self, table, alias: str = None):
+        """
+        :param table: table name or QueryBuilder of a subquery
+        :param alias: alias of the table, required for subqueries
+        """
+        self.query_gen = QueryGenerator()
+        self.table = self.table_ref(table, alias)
+        self.columns = []
+        self.joins = []
+        self.conditions = []
+        self.group_by_columns = []
+        self.having_conditions = []
+        self.order_by_columns = []
+        self.limit_value = None
+        self.offset_value = None
+        self.ctes = []
+        self.unions = []
+
+    @staticmethod
+    def table_ref(table, alias: str = None):
+        if isinstance(table, QueryBuilder):
+            if not alias:
+                error_msg = 'Subquery needs an alias'
+                logger.error(error_msg)
+                raise QueryGenerationException(error_msg)
+            return f'({table.build()}) as {alias}'
+        return f'{table} as {alias}' if alias else table
+
+    @staticmethod
+    def literal(value):
+        """
+        Quotes the value the same way as QueryGenerator, RawSQL values are placed as they are
+        """
+        return str(value) if isinstance(value, RawSQL) else f"'{value}'"
+
+    def condition(self, condition):
+        return condition if isinstance(condition, str) else self.query_gen.get_where_cond(condition)
+
+    def select(self, *columns: str):
+        self.columns.extend(columns)
+        return self
+
+    def join(self, table, alias: str = None, on: dict = None, using: list = None, how: str = 'join'):
+        """
+        Joins a table or subquery on explicit keys
+        :param on: {left_column: right_column}, joined with and
+        :param using: column names shared by both tables
+        :param how: join, left join, right join, straight_join
+        """
+        if on:
+            join_cond = f"on {' and '.join([f'{left} = {right}' for left, right in on.items()])}"
+        elif using:
+            join_cond = f"using ({', '.join(using)})"
+        else:
+            error_msg = 'Join needs explicit keys with on or using'
+            logger.error(error_msg)
+            raise QueryGenerationException(error_msg)
+        self.joins.append(f'{how} {self.table_ref(table, alias)} {join_cond}')
+        return self
+
+    def left_join(self, table, alias: str = None, on: dict = None, using: list = None):
+        return self.join(table, alias, on, using, how='left join')
+
+    def where(self, condition):
+        """
+        :param condition: condition dictionary as accepted by QueryGenerator or raw sql, multiple calls are and-ed
+        """
+        if condition:
+            self.conditions.append(self.condition(condition))
+        return self
+
+    def or_where(self, *conditions):
+        """
+        Adds ((condition1) or (condition2) ...)
+        """
+        conditions = [self.condition(condition) for condition in conditions if condition]
+        if conditions:
+            self.conditions.append(f"(({') or ('.join(conditions)}))")
+        return self
+
+    def after(self, keys: dict, descending: bool = False):
+        """
+        Keyset predicate to continue after the given row, to be used with order_by on the same columns
+        :param keys: {column: value of the last row} in sort order
+        :return: (a > 1) or (a = 1 and b > 2) ...
+        """
+        operator = '<' if descending else '>'
+        columns = list(keys.items())
+        predicates = []
+        for i, (column, value) in enumerate(columns):
+            equal = [f'{c} = {self.literal(v)}' for c, v in columns[:i]]
+            predicates.append(' and '.join(equal + [f'{column} {operator} {self.literal(value)}']))
+        if predicates:
+            self.conditions.append(f"(({') or ('.join(predicates)}))")
+        return self
+
+    def group_by(self, *columns: str):
+        self.group_by_columns.extend(columns)
+        return self
+
+    def having(self, condition):
+        if condition:
+            self.having_conditions.append(self.condition(condition))
+        return self
+
+    def order_by(self, *columns: str):
+        """
+        :param columns: column names, optionally followed by asc/desc
+        """
+        self.order_by_columns.extend(columns)
+        return self
+
+    def limit(self, limit: int, offset: int = None):
+        self.limit_value = int(limit)
+        self.offset_value = int(offset) if offset else None
+        return self
+
+    def with_query(self, name: str, query):
+        """
+        Adds a common table expression, with name as (query)
+        """
+        self.ctes.append(f'{name} as ({query.build() if isinstance(query, QueryBuilder) else query})')
+        return self
+
+    def union(self, query, union_all: bool = False):
+        """
+        Appends another select, order by and limit of this builder apply to the whole union
+        """
+        self.unions.append(f"{'union all' if union_all else 'union'} "
+                           f"{query.build() if isinstance(query, QueryBuilder) else query}")
+        return self
+
+    def build(self):
+        query = f"with {', '.join(self.ctes)} " if self.ctes else ''
+        query += f"select {', '.join(self.columns or ['*'])} from {self.table}"
+        if self.joins:
+            query += f" {' '.join(self.joins)}"
+        if self.conditions:
+            query += f" where {' and '.join(self.conditions)}"
+        if self.group_by_columns:
+            query += f" group by {', '.join(self.group_by_columns)}"
+        if self.having_conditions:
+            query += f" having {' and '.join(self.having_conditions)}"
+        if self.unions:
+            query += f" {' '.join(self.unions)}"
+        if self.order_by_columns:
+            query += f" order by {', '.join(self.order_by_columns)}"
+        if self.limit_value is not None:
+            query += f" limit {self.limit_value}"
+            if self.offset_value:
+                query += f" offset {self.offset_value}"
+        return query
+
+    def explain(self, analyze: bool = False, json_format: bool = False):
+        """
+        :param analyze: run the query and report the actual row counts (ANALYZE statement of MariaDB)
+        :param json_format: plan as json
+        :return: explain query
+        """
+        return f"{'analyze' if analyze else 'explain'} {'format=json ' if json_format else ''}{self.build()}"
+
+    def __str__(self):
+        return self.build()
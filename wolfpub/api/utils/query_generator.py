@@ -1,15 +1,90 @@
 """
 Query Generator: To create complex queries for AuroraPg
 """
+import itertools
+import math
+from datetime import date, time, timedelta
+from decimal import Decimal
 
 from wolfpub.api.utils.custom_exceptions import QueryGenerationException
+from wolfpub.api.utils.lru_cache import LRUCache
+from wolfpub.config import API_SETTINGS
 from wolfpub.logger import WOLFPUB_LOGGER as logger
 
 
+class RawSQL(str):
+    """
+    SQL expression to be placed in the query as it is, without quotes. e.g. RawSQL('@order_id')
+    """
+
+    def __repr__(self):
+        return str(self)
+
+
+SCALAR_KINDS = {str: 'eq', int: 'eq', float: 'eq', RawSQL: 'raw'}
+STRING_ESCAPES = str.maketrans({'\\': '\\\\', "'": "\\'", '\0': '\\0'})
+# Statements of bulk_insert stay below that many bytes, max_allowed_packet of the server has to be larger
+BULK_INSERT_MAX_BYTES = int(API_SETTINGS.get('BULK_INSERT_MAX_BYTES', 4 * 1024 * 1024))
+
+
+def quote_literal(text: str):
+    """
+    Escapes free text (messages, json documents) into a quoted string literal
+    :return: RawSQL("'it\\'s'")
+    """
+    return RawSQL(f"'{str(text).translate(STRING_ESCAPES)}'")
+
+
+def sql_literal(value):
+    """
+    SQL literal of an inserted value: numbers as they are, strings, dates and decimals quoted and escaped, None as NULL,
+    RawSQL without quotes
+    :return: "'it\\'s'", throws QueryGenerationException for lists, dictionaries, nan and infinite floats
+    """
+    kind = type(value)
+    if kind is int:
+        return repr(value)
+    if kind is float:
+        if not math.isfinite(value):
+            error_msg = f"Value of a column can not be {value}"
+            logger.error(error_msg)
+            raise QueryGenerationException(error_msg)
+        return repr(value)
+    if kind is str:
+        return f"'{value.translate(STRING_ESCAPES)}'"
+    if kind is RawSQL:
+        return value
+    if value is None:
+        return 'NULL'
+    if kind is bool:
+        return '1' if value else '0'
+    if isinstance(value, (str, date, time, timedelta, Decimal)):
+        return f"'{str(value).translate(STRING_ESCAPES)}'"
+    if isinstance(value, int):
+        return str(int(value))
+    if isinstance(value, (bytes, bytearray)):
+        return f"x'{bytes(value).hex()}'"
+    error_msg = f"Value of a column can not be {kind.__name__}"
+    logger.error(error_msg)
+    raise QueryGenerationException(error_msg)
+
+
+def escape_braces(text: str):
+    """
+    Escapes the braces of column and table names, compiled templates are filled with str.format
+    """
+    return text.replace('{', '{{').replace('}', '}}')
+
+
 class QueryGenerator(object):
     """
     Focuses on providing the functionality to create mariadb sub-queries for the arguments provided
+
+    Queries are compiled to a template per shape (table, columns, condition structure and operators), later calls
+    with the same shape only bind the values to the cached template
     """
+    # Shared by all instances, every handler creates its own QueryGenerator
+    templates = LRUCache(API_SETTINGS.get('QUERY_TEMPLATE_CACHE_SIZE', 1024))
 
     def __init__(self):
         self.where_operators = ['>', '<', '>=', '<=', 'like', 'ilike']
@@ -63,54 +138,225 @@ class QueryGenerator(object):
                 clause.append(f"{key} = {key} {operator} '{value[operator]}'")
         return ', '.join(clause)
 
-    def get_where_cond(self, cond: dict):
+    def where_shape(self, cond: dict, values: list, shape: list):
         """
-        Creates where condition for specified where_operators ('+', '-', '/', '*')
+        Flat structure of the condition without its values, used as key of the compiled template
         :param cond: condition dictionary
-        :return
+        :param values: values are appended in the order of their placeholders in the template
+        :param shape: column names and kinds are appended, nested conditions and operators are prefixed with their size
         """
-        where_cond = []
+        append = shape.append
         for key, value in cond.items():
-            if not value:
-                where_cond.append(f'{key} IS NULL')
+            kind = SCALAR_KINDS.get(type(value))
+            if kind and value:
+                # Fast path for the common flat conditions
+                values.append(value)
+                append(key)
+                append(kind)
+            elif not value:
+                shape.extend((key, 'null'))
             elif isinstance(value, list):
-                if value and (isinstance(value[0], str) or isinstance(value[0], int) or isinstance(value[0], float)):
-                    where_cond.append(f'{key} IN {tuple(value)}')
+                if isinstance(value[0], str) or isinstance(value[0], int) or isinstance(value[0], float):
+                    values.append(tuple(value))
+                    shape.extend((key, 'in'))
                 else:
-                    where_cond.append(f"(({') or ('.join([self.get_where_cond(v) for v in value])}))")
+                    shape.extend((key, 'or', len(value)))
+                    for v in value:
+                        shape.append(len(v))
+                        self.where_shape(v, values, shape)
             elif isinstance(value, str) or isinstance(value, int) or isinstance(value, float):
-                where_cond.append(f"{key}='{value}'")
+                values.append(value)
+                shape.extend((key, 'raw' if isinstance(value, RawSQL) else 'eq'))
             elif isinstance(value, dict):
-                if any(k in self.where_operators for k in value):
-                    where_cond.append(self.handling_where_operator(key, value))
+                operators = [operator for operator in self.where_operators if operator in value]
+                if operators:
+                    values.extend(value[operator] for operator in operators)
+                    shape.extend((key, 'operators', len(operators), *operators))
                 else:
-                    where_cond.append(self.get_where_cond(value))
+                    shape.extend((key, 'nested', len(value)))
+                    self.where_shape(value, values, shape)
             else:
                 error_msg = 'Value for a column not in correct format, expected format: list or string'
                 logger.error(error_msg)
                 raise QueryGenerationException(error_msg)
+        return shape
+
+    def where_template(self, cond: dict):
+        """
+        Compiles the condition to a where clause with a {} placeholder for every value
+        """
+        where_cond = []
+        for key, value in cond.items():
+            key = escape_braces(key)
+            if not value:
+                where_cond.append(f'{key} IS NULL')
+            elif isinstance(value, list):
+                if isinstance(value[0], str) or isinstance(value[0], int) or isinstance(value[0], float):
+                    where_cond.append(f'{key} IN {{}}')
+                else:
+                    where_cond.append(f"(({') or ('.join([self.where_template(v) for v in value])}))")
+            elif isinstance(value, RawSQL):
+                where_cond.append(f'{key}={{}}')
+            elif isinstance(value, dict):
+                if any(k in self.where_operators for k in value):
+                    where_cond.append(' and '.join([f"{key} {operator} '{{}}'" for operator in self.where_operators
+                                                    if operator in value]))
+                else:
+                    where_cond.append(self.where_template(value))
+            else:
+                where_cond.append(f"{key}='{{}}'")
         return ' and '.join(where_cond)
 
+    def compiled(self, key: tuple, compile_template, *args):
+        """
+        Template for the query shape from the shared cache, compiled and cached on a miss
+        :param key: (query type, table, columns, ..., condition shape)
+        :param compile_template: function returning the template for args
+        """
+        template = self.templates.get(key)
+        if template is None:
+            template = compile_template(*args)
+            self.templates.put(key, template)
+        return template
+
+    @classmethod
+    def cache_info(cls):
+        """
+        :return: hit statistics of the compiled templates
+        """
+        return cls.templates.stats()
+
+    def get_where_cond(self, cond: dict):
+        """
+        Creates where condition for specified where_operators ('+', '-', '/', '*')
+        :param cond: condition dictionary
+        :return
+        """
+        values = []
+        shape = self.where_shape(cond, values, ['where'])
+        return self.compiled(tuple(shape), self.where_template, cond).format(*values)
+
     def insert(self, table_name: str, rows: list[dict]):
         """
-        Creates insert query for given table and rows
+        Creates insert query for given table and rows, all rows need the columns of the first row
         """
-        self.is_list(rows[0])
-        self.is_dict(rows[0])
-        query = f"insert into {table_name} ({', '.join(rows[0].keys())}) values " \
-                f"{', '.join([f'{tuple(row.values())}' for row in rows])}"
-        return query
+        columns = tuple(rows[0].keys())
+        query = self.compiled(('insert', table_name, columns), self.insert_template, table_name, columns)
+        return query + ', '.join([self.row_values(row, columns, number) for number, row in enumerate(rows)])
 
-    def select(self, table_name: str, columns: list, condition: dict = None, group_by: list = None):
+    @staticmethod
+    def insert_template(table_name: str, columns: tuple):
+        return f"insert into {table_name} ({', '.join(columns)}) values "
+
+    @staticmethod
+    def row_values(row: dict, columns: tuple, number: int = 0):
         """
-        Creates select query for given table, select_cols, condition and group by
+        Values of the row in the order of the columns
+        :return: "(1, 'ABC', NULL)", throws QueryGenerationException when the row has other columns
         """
-        query = f"""select {', '.join(columns)} from {table_name}"""
+        if len(row) != len(columns):
+            error_msg = f"Row {number} has the columns ({', '.join(row)}), expected ({', '.join(columns)})"
+            logger.error(error_msg)
+            raise QueryGenerationException(error_msg)
+        try:
+            return f"({', '.join([sql_literal(row[column]) for column in columns])})"
+        except KeyError as e:
+            error_msg = f"Row {number} has no value for the column {e}"
+            logger.error(error_msg)
+            raise QueryGenerationException(error_msg)
+
+    def bulk_insert(self, table_name: str, rows, columns: list = None, max_bytes: int = None, max_rows: int = None):
+        """
+        Creates multi-row insert queries for any number of rows, every query stays below max_bytes so it fits into
+        one packet of the server. Rows are consumed lazily, a generator of rows is never held in memory as a whole
+        :param rows: iterable of row dictionaries, all of them with the same columns
+        :param columns: column order of the queries, columns of the first row by default
+        :param max_bytes: size limit of one query (utf-8), BULK_INSERT_MAX_BYTES by default
+        :param max_rows: row limit of one query, unlimited by default
+        :return: generator of insert queries
+        """
+        max_bytes = max_bytes or BULK_INSERT_MAX_BYTES
+        rows = iter(rows)
+        first = next(rows, None)
+        if first is None:
+            return
+        columns = tuple(columns or first.keys())
+        prefix = self.compiled(('insert', table_name, columns), self.insert_template, table_name, columns)
+        values, size, number = [], len(prefix.encode()), 0
+        for number, row in enumerate(itertools.chain([first], rows)):
+            row_values = self.row_values(row, columns, number)
+            row_size = (len(row_values) if row_values.isascii() else len(row_values.encode())) + 2
+            if values and (size + row_size > max_bytes or len(values) == max_rows):
+                yield prefix + ', '.join(values)
+                values, size = [], len(prefix.encode())
+            if size + row_size > max_bytes:
+                error_msg = f'Row {number} of {table_name} exceeds the statement size limit of {max_bytes} bytes'
+                logger.error(error_msg)
+                raise QueryGenerationException(error_msg)
+            values.append(row_values)
+            size += row_size
+        yield prefix + ', '.join(values)
+
+    def upsert(self, table_name: str, rows: list[dict], update_columns: list = None):
+        """
+        Creates insert query which updates the existing row on a duplicate primary or unique key
+        :param update_columns: columns taken from the inserted row on a duplicate key, all columns by default
+        :return: "insert into table (...) values (...) on duplicate key update col1 = values(col1)"
+        """
+        columns = tuple(update_columns or rows[0].keys())
+        query = self.insert(table_name, rows)
+        return query + self.compiled(('upsert', table_name, columns), self.upsert_template, columns)
+
+    @staticmethod
+    def upsert_template(columns: tuple):
+        return ' on duplicate key update ' + ', '.join([f'{column} = values({column})' for column in columns])
+
+    @staticmethod
+    def keyset(keys: dict, descending: bool = False):
+        """
+        Keyset condition to continue after the given row, to be merged into the condition of select with order_by on
+        the same columns (same as QueryBuilder.after)
+        :param keys: {column: value of the last row} in sort order
+        :return: {a: {'>': 1}} for one column, {a: {'>=': 1}, 'after': [{a: {'>': 1}}, {a: 1, b: {'>': 2}}]} for more,
+            the condition on the first column keeps it an index range
+        """
+        operator = '<' if descending else '>'
+        columns = list(keys.items())
+        if len(columns) == 1:
+            return {columns[0][0]: {operator: columns[0][1]}}
+        predicates = [{**dict(columns[:i]), column: {operator: value}} for i, (column, value) in enumerate(columns)]
+        return {columns[0][0]: {f'{operator}=': columns[0][1]}, 'after': predicates}
+
+    def select(self, table_name: str, columns: list, condition: dict = None, group_by: list = None,
+               order_by: list = None, limit: int = None, offset: int = None):
+        """
+        Creates select query for given table, select_cols, condition, group by, order by and limit/offset
+        """
+        values = []
+        shape = ['select', table_name, tuple(columns), tuple(group_by) if group_by else None,
+                 tuple(order_by) if order_by else None, limit is not None, limit is not None and bool(offset)]
+        if condition:
+            self.where_shape(condition, values, shape)
+        if limit is not None:
+            values.append(int(limit))
+            if offset:
+                values.append(int(offset))
+        return self.compiled(tuple(shape), self.select_template, table_name, columns, condition, group_by,
+                             order_by, limit, offset).format(*values)
+
+    def select_template(self, table_name: str, columns: list, condition: dict, group_by: list, order_by: list,
+                        limit: int, offset: int):
+        query = f"""select {escape_braces(', '.join(columns))} from {escape_braces(table_name)}"""
         if condition:
-            where_cond = self.get_where_cond(condition)
-            query += f" where {where_cond}"
+            query += f" where {self.where_template(condition)}"
         if group_by:
-            query += f" group by {', '.join(group_by)}"
+            query += f" group by {escape_braces(', '.join(group_by))}"
+        if order_by:
+            query += f" order by {escape_braces(', '.join(order_by))}"
+        if limit is not None:
+            query += " limit {}"
+            if offset:
+                query += " offset {}"
         return query
 
     def update(self, table_name: str, condition: dict, update_data: dict):
@@ -118,26 +364,48 @@ class QueryGenerator(object):
         Creates update query for given table, condition and key-value pair for column to be updated with given value
         """
         self.is_list(update_data)
-        set_values = []
+        values = []
+        shape = ['update', table_name]
         for key, value in update_data.items():
             if isinstance(value, dict) and any(k in self.set_operators for k in value):
-                set_values.append(self.handling_set_operator(key, value))
+                operators = [operator for operator in self.set_operators if operator in value]
+                values.extend(value[operator] for operator in operators)
+                shape.extend((key, 'operators', len(operators), *operators))
             elif isinstance(value, str) or isinstance(value, int) or isinstance(value, float):
-                set_values.append(f"{key}='{value}'")
+                values.append(value)
+                shape.extend((key, 'raw' if isinstance(value, RawSQL) else 'eq'))
             else:
                 error_msg = 'Update Query Generator does not support list or dictionary values'
                 logger.error(error_msg)
                 raise QueryGenerationException(error_msg)
-        query = f"""update {table_name} set {', '.join(set_values)}"""
+        shape.append('where')
         if condition:
-            where_cond = self.get_where_cond(condition)
-            query += f" where {where_cond}"
+            self.where_shape(condition, values, shape)
+        return self.compiled(tuple(shape), self.update_template, table_name, condition, update_data).format(*values)
+
+    def update_template(self, table_name: str, condition: dict, update_data: dict):
+        set_values = []
+        for key, value in update_data.items():
+            key = escape_braces(key)
+            if isinstance(value, dict):
+                set_values.append(', '.join([f"{key} = {key} {operator} '{{}}'" for operator in self.set_operators
+                                             if operator in value]))
+            elif isinstance(value, RawSQL):
+                set_values.append(f'{key}={{}}')
+            else:
+                set_values.append(f"{key}='{{}}'")
+        query = f"""update {escape_braces(table_name)} set {', '.join(set_values)}"""
+        if condition:
+            query += f" where {self.where_template(condition)}"
         return query
 
     def delete(self, table_name: str, condition: dict):
         """
         Creates delete query for given table, condition.
         """
-        where_cond = self.get_where_cond(condition)
-        query = f"""delete from {table_name} where {where_cond}"""
-        return query
+        values = []
+        shape = self.where_shape(condition, values, ['delete', table_name])
+        return self.compiled(tuple(shape), self.delete_template, table_name, condition).format(*values)
+
+    def delete_template(self, table_name: str, condition: dict):
+        return f"""delete from {escape_braces(table_name)} where {self.where_template(condition)}"""
@@ -0,0 +1,32 @@
+"""
+Scheduler: Runs background tasks of the API periodically in daemon threads
+"""
+import threading
+
+from wolfpub.logger import WOLFPUB_LOGGER as logger
+
+
+class PeriodicTask(threading.Thread):
+    """
+    Daemon thread calling the function every interval seconds, starting after delay seconds (right away by default).
+    Errors are logged and the task keeps running
+    """
+
+    def __init__(self, name: str, function, interval: float, delay: float = 0):
+        super().__init__(name=name, daemon=True)
+        self.function = function
+        self.interval = interval
+        self.delay = delay
+        self.stopped = threading.Event()
+
+    def run(self):
+        self.stopped.wait(self.delay)
+        while not self.stopped.is_set():
+            try:
+                self.function()
+            except Exception as e:
+                logger.error(f'Periodic task {self.name} failed: {e}')
+            self.stopped.wait(self.interval)
+
+    def stop(self):
+        self.stopped.set()
@@ -0,0 +1,8 @@
+"""
+Benchmarks for the Wolf Pub API hot paths
+
+    python -m wolfpub.benchmarks micro
+    python -m wolfpub.benchmarks startup
+    python -m wolfpub.benchmarks e2e --requests 1000 --concurrency 8
+    python -m wolfpub.benchmarks plans
+"""
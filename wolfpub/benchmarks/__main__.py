@@ -0,0 +1,73 @@
+"""
+Command line entry point for the benchmarks
+"""
+import argparse
+import sys
+
+from wolfpub.benchmarks import runner
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m wolfpub.benchmarks', description='Wolf Pub API benchmarks')
+    parser.add_argument('--json', help='save results to this json file')
+    parser.add_argument('--baseline', help='json results of an earlier run, fail when p95 regressed')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed p95 slow down against the baseline')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    micro = commands.add_parser('micro', help='QueryGenerator and CustomResponse micro benchmarks')
+    micro.add_argument('--iterations', type=int, default=10000)
+
+    e2e = commands.add_parser('e2e', help='end to end scenarios against the configured MariaDB')
+    e2e.add_argument('--requests', type=int, default=500)
+    e2e.add_argument('--concurrency', type=int, default=4)
+
+    startup = commands.add_parser('startup', help='cold start of the API in fresh interpreters')
+    startup.add_argument('--iterations', type=int, default=10)
+    startup.add_argument('--imports', type=int, default=0, help='also list this many slowest imports')
+
+    plans = commands.add_parser('plans', help='compare EXPLAIN plans of the handler queries with the snapshots')
+    plans.add_argument('--snapshots', help='snapshot file, default wolfpub/benchmarks/plan_snapshots.json')
+    plans.add_argument('--update', action='store_true', help='record the current plans as snapshots')
+    plans.add_argument('--row-growth', type=float, default=10.0,
+                       help='allowed growth of the rows estimate of a step against its snapshot')
+    plans.add_argument('--min-rows', type=int, default=1000, help='ignore steps estimating fewer rows')
+    plans.add_argument('--max-rows', type=int, help='fail when any step estimates more rows')
+
+    args = parser.parse_args(argv)
+    if args.command == 'plans':
+        from wolfpub.benchmarks import plans as query_plans
+        snapshots = args.snapshots or query_plans.SNAPSHOTS
+        current = query_plans.collect()
+        if args.update:
+            query_plans.save(current, snapshots)
+            print(f'Saved plans of {len(current)} query shapes to {snapshots}')
+            return 0
+        findings = query_plans.compare(current, query_plans.load(snapshots), args.row_growth, args.min_rows,
+                                       args.max_rows)
+        query_plans.report(current, findings)
+        return 1 if any(finding['failed'] for finding in findings) else 0
+    if args.command == 'micro':
+        from wolfpub.benchmarks import micro
+        results = micro.run(args.iterations)
+    elif args.command == 'startup':
+        from wolfpub.benchmarks import startup as startup_benchmark
+        results = startup_benchmark.run(args.iterations)
+        for cumulative, module in startup_benchmark.slowest_imports(args.imports) if args.imports else []:
+            print(f'{cumulative:10.1f} ms  {module}')
+    else:
+        from wolfpub.benchmarks.scenarios import Scenarios
+        results = Scenarios().run(args.requests, args.concurrency)
+
+    runner.report(results)
+    if args.json:
+        runner.save(results, args.json)
+    if args.baseline:
+        regressions = runner.compare(results, args.baseline, args.tolerance)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
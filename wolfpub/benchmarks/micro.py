@@ -0,0 +1,39 @@
+"""
+Micro benchmarks for QueryGenerator and CustomResponse, no database required
+"""
+from wolfpub.api.utils.custom_response import CustomResponse
+from wolfpub.api.utils.query_generator import QueryGenerator
+from wolfpub.benchmarks.runner import measure
+
+
+def run(iterations: int = 10000):
+    query_gen = QueryGenerator()
+    account_cond = {'account_id': 42, 'is_active': 1}
+    order_items_cond = {'items': [{'title': f'title {i}', 'edition': i % 5 + 1} for i in range(20)]}
+    report_cond = {'payment_date': {'>=': '2022-01-01', '<': '2022-02-01'}}
+    order_rows = [{'order_id': 1, 'publication_id': i, 'quantity': 2, 'price': 12.5} for i in range(50)]
+    bulk_rows = [{'order_id': i // 5, 'publication_id': i % 1000, 'quantity': 2, 'price': 12.5,
+                  'title': f"Wolf's Tale {i}"} for i in range(100000)]
+    orders = [{'order_id': i, 'account_id': 42, 'order_date': '2022-01-01', 'shipping_cost': 10.0,
+               'delivery_date': '2022-01-10', 'total_price': 150.0} for i in range(200)]
+
+    benchmarks = [
+        ('query_gen.select account', lambda: query_gen.select('accounts natural join distributors', ['*'],
+                                                               account_cond)),
+        ('query_gen.select order items', lambda: query_gen.select('books natural join publications', ['*'],
+                                                                   order_items_cond)),
+        ('query_gen.select revenue report', lambda: query_gen.select('account_payments', ['sum(amount) as revenue'],
+                                                                      report_cond, ['account_id'])),
+        ('query_gen.insert 50 order lines', lambda: query_gen.insert('book_orders_info', order_rows)),
+        ('query_gen.update balance', lambda: query_gen.update('accounts', {'account_id': 42},
+                                                              {'balance': {'+': 160.0}})),
+        ('custom_response dict', lambda: CustomResponse(data=orders[0])),
+        ('custom_response 200 orders', lambda: CustomResponse(data=orders)),
+        ('custom_response error', lambda: CustomResponse(error='ValueError', message='invalid', status_code=400)),
+    ]
+    results = [measure(name, func, iterations, warmup=min(iterations, 100)) for name, func in benchmarks]
+    # Building and splitting the statements of a 100k row import, a few runs are enough
+    results.append(measure('query_gen.bulk_insert 100k rows',
+                           lambda: sum(1 for _ in query_gen.bulk_insert('book_orders_info', bulk_rows)),
+                           max(1, iterations // 1000), warmup=1))
+    return results
@@ -0,0 +1,223 @@
+"""
+Query plan regression checker: runs the query shapes of the handlers through EXPLAIN against a seeded MariaDB
+and compares the plans with the recorded snapshots
+
+    python -m wolfpub.benchmarks plans --update     # record the snapshots
+    python -m wolfpub.benchmarks plans              # fail on full scans and row estimate blow ups
+"""
+import json
+import os
+
+from wolfpub.api.handlers.account import AccountHandler, AccountBillHandler, AccountSummaryHandler
+from wolfpub.api.handlers.distributor import DistributorHandler
+from wolfpub.api.handlers.employees import EmployeesHandler
+from wolfpub.api.handlers.orders import OrderHandler
+from wolfpub.api.handlers.publication import PublicationHandler, BookHandler, PeriodicalHandler
+from wolfpub.api.handlers.report import ReportHandler
+from wolfpub.api.handlers.salary import PaymentHandler
+from wolfpub.api.utils.mariadb_connector import MariaDBConnector
+
+SNAPSHOTS = os.path.join(os.path.dirname(__file__), 'plan_snapshots.json')
+EXPLAINABLE = ('select', 'update', 'delete', 'with')
+
+# Query shapes of the handlers: name -> function(handlers, samples), samples are values of existing rows
+SHAPES = {
+    'account.get': lambda h, s: h['account'].get(s['account_id']),
+    'account.check_balance': lambda h, s: h['account'].check_balance(s['account_id']),
+    'account.update_balance': lambda h, s: h['account'].update(s['account_id'], update_data={'balance': 0}),
+    'account_bill.get': lambda h, s: h['account_bill'].get(s['bill_account_id'], s['order_id']),
+    'account_bill.create_bill': lambda h, s: h['account_bill'].create_bill(
+        s['account_id'], {'order_id': s['order_id'], 'total_price': 10, 'shipping_cost': 1}),
+    'account_bill.pay_bills': lambda h, s: h['account_bill'].pay_bills(s['account_id'], 10),
+    'account_summary.summary_query': lambda h, s: h['account_summary'].db.get_result(
+        h['account_summary'].summary_query(s['account_id'])),
+    'distributor.get': lambda h, s: h['distributor'].get(s['distributor_id']),
+    'order.get_orders': lambda h, s: h['order'].get_orders(s['account_id']),
+    'order.get_order': lambda h, s: h['order'].get_order(s['bill_account_id'], s['order_id']),
+    'publication.get_by_id': lambda h, s: h['publication'].get_by_id([s['book_publication_id']]),
+    'publication.get_ids': lambda h, s: h['publication'].get_ids({'topic': s['topic']}),
+    'publication.series_query_book': lambda h, s: h['publication'].db.get_result(
+        h['publication'].series_query('book', s['book_title'])),
+    'publication.series_query_periodical': lambda h, s: h['publication'].db.get_result(
+        h['publication'].series_query('periodical', s['periodical_title'])),
+    'publication.last_id_query_book': lambda h, s: h['publication'].db.get_result(
+        h['publication'].last_id_query('book')),
+    'publication.last_id_query_periodical': lambda h, s: h['publication'].db.get_result(
+        h['publication'].last_id_query('periodical')),
+    'book.get': lambda h, s: h['book'].get(s['book_publication_id']),
+    'book.get_chapter': lambda h, s: h['book'].get_chapter(s['book_publication_id'], 1),
+    'book.get_latest_chapter': lambda h, s: h['book'].get_latest_chapter(s['book_publication_id']),
+    'book.get_id_from_title': lambda h, s: h['book'].get_id_from_title(s['book_title']),
+    'book.get_edition': lambda h, s: h['book'].get_edition(s['book_id']),
+    'book.new_book_id': lambda h, s: h['book'].new_book_id(),
+    'book.get_filter_result': lambda h, s: h['book'].get_filter_result({'topic': s['topic']}),
+    'book.get_filter_result_author': lambda h, s: h['book'].get_filter_result({'author': s['emp_name']}),
+    'periodical.get': lambda h, s: h['periodical'].get(s['periodical_publication_id']),
+    'periodical.get_article': lambda h, s: h['periodical'].get_article(s['periodical_publication_id'], 1),
+    'periodical.get_id_from_title': lambda h, s: h['periodical'].get_id_from_title(s['periodical_title']),
+    'periodical.get_filter_result': lambda h, s: h['periodical'].get_filter_result({'topic': s['topic']}),
+    'employee.get': lambda h, s: h['employee'].get(s['emp_id']),
+    'employee.get_publication_details': lambda h, s: h['employee'].get_publication_details(s['emp_id'], 50),
+    'salary.get_payment': lambda h, s: h['salary'].get_payment(s['transaction_id']),
+    'report.per_publication_per_distributor': lambda h, s: h['report'].get_number_price_per_publication_per_distributor(
+        s['start_date'], s['end_date']),
+    'report.active_distributor_count': lambda h, s: h['report'].get_active_distributor_count(),
+    'report.revenue': lambda h, s: h['report'].get_revenue(s['start_date'], s['end_date']),
+    'report.revenue_per_distributor': lambda h, s: h['report'].get_revenue_per_distributor(s['start_date'],
+                                                                                          s['end_date']),
+    'report.revenue_per_city': lambda h, s: h['report'].get_revenue_per_city(s['start_date'], s['end_date']),
+    'report.revenue_per_location': lambda h, s: h['report'].get_revenue_per_location(s['start_date'],
+                                                                                    s['end_date']),
+    'report.shipping_cost_expense': lambda h, s: h['report'].get_shipping_cost_expense(s['start_date'],
+                                                                                      s['end_date']),
+    'report.salary_expense': lambda h, s: h['report'].get_salary_expense(s['start_date'], s['end_date']),
+    'report.salary_expense_per_month': lambda h, s: h['report'].get_salary_expense_per_month(),
+    'report.salary_expense_per_worktype': lambda h, s: h['report'].get_salary_expense_per_worktype(
+        s['start_date'], s['end_date']),
+}
+
+
+class RecordingConnector(MariaDBConnector):
+    """
+    Records the queries of the handlers, select queries are executed so the handlers get real rows,
+    writes are only recorded and never reach the database
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.queries = []
+
+    def get_result(self, query: str):
+        self.queries.append(query)
+        return super().get_result(query)
+
+    def execute(self, queries: list):
+        self.queries.extend(queries)
+        return 0, [0] * len(queries)
+
+    def execute_block(self, queries: list, result_query: str = None):
+        self.queries.extend(queries)
+        return [{}]
+
+
+def samples(db: MariaDBConnector):
+    """
+    Values of existing rows used as arguments of the query shapes
+    """
+    queries = {
+        'account_id, distributor_id': 'select account_id, distributor_id from accounts where is_active = 1 limit 1',
+        'bill_account_id, order_id': 'select account_id as bill_account_id, order_id from account_bills limit 1',
+        'book_publication_id, book_title, book_id, topic':
+            'select publication_id as book_publication_id, title as book_title, book_id, topic '
+            'from publications natural join books limit 1',
+        'periodical_publication_id, periodical_title':
+            'select publication_id as periodical_publication_id, title as periodical_title '
+            'from publications natural join periodicals limit 1',
+        'emp_id, emp_name': 'select emp_id, name as emp_name from employees limit 1',
+        'transaction_id': 'select transaction_id from salary_payments limit 1',
+        'start_date, end_date': "select date_format(max(payment_date) - interval 1 year, '%Y-%m-01') as start_date, "
+                                "date_format(max(payment_date), '%Y-%m-01') as end_date from account_payments",
+    }
+    values = {}
+    for columns, query in queries.items():
+        rows = db.get_result(query)
+        if not rows:
+            raise ValueError(f'Seed the database first (python -m wolfpub.datagen), no rows for {columns}')
+        values.update({key: str(value) if value is not None else None for key, value in rows[0].items()})
+    return values
+
+
+def explain(db: MariaDBConnector, query: str):
+    """
+    :return: steps of the plan [{'step': '1:accounts', 'type': 'ref', 'key': 'PRIMARY', 'rows': 1}]
+    """
+    steps = []
+    for row in db.get_result(f'explain {query}'):
+        steps.append({'step': f"{row['id']}:{row['table']}", 'type': row['type'], 'key': row['key'],
+                      'rows': int(row['rows'] or 0), 'extra': row.get('Extra')})
+    return steps
+
+
+def collect(db: MariaDBConnector = None, shapes: dict = None):
+    """
+    Runs every shape through the handlers and explains the recorded queries
+    :return: {shape: [{'query': query, 'plan': [step, ...]}, ...]}
+    """
+    db = db or RecordingConnector()
+    handlers = {'account': AccountHandler(db), 'account_bill': AccountBillHandler(db),
+                'account_summary': AccountSummaryHandler(db),
+                'distributor': DistributorHandler(db), 'order': OrderHandler(db),
+                'publication': PublicationHandler(db), 'book': BookHandler(db), 'periodical': PeriodicalHandler(db),
+                'employee': EmployeesHandler(db), 'salary': PaymentHandler(db), 'report': ReportHandler(db)}
+    explain_db = MariaDBConnector()
+    values = samples(explain_db)
+    plans = {}
+    for name, shape in (shapes or SHAPES).items():
+        db.queries = []
+        try:
+            shape(handlers, values)
+        except (IndexError, KeyError, ValueError, TypeError):
+            # Missing rows or the faked write results, the queries issued so far are recorded already
+            pass
+        plans[name] = [{'query': query, 'plan': explain(explain_db, query)} for query in db.queries
+                       if query.lstrip().lower().startswith(EXPLAINABLE)]
+    return plans
+
+
+def compare(plans: dict, snapshots: dict, row_growth: float = 10.0, min_rows: int = 1000, max_rows: int = None):
+    """
+    Checks the plans against the snapshots, steps estimating fewer than min_rows rows are never reported
+    :param row_growth: allowed growth of the rows estimate of a step against its snapshot
+    :param max_rows: upper bound of the rows estimate of any step
+    :return: list of findings {'shape', 'step', 'status', 'detail', 'failed'}
+    """
+    findings = []
+    for name, queries in plans.items():
+        if name not in snapshots:
+            findings.append({'shape': name, 'step': '', 'status': 'new', 'detail': 'no snapshot', 'failed': False})
+            continue
+        recorded = {(i, step['step']): step for i, query in enumerate(snapshots[name])
+                    for step in query['plan']}
+        for i, query in enumerate(queries):
+            for step in query['plan']:
+                before = recorded.get((i, step['step']))
+                if step['rows'] < min_rows:
+                    continue
+                if step['type'] == 'ALL' and (before is None or before['type'] != 'ALL'):
+                    detail = f"full scan of {step['rows']} rows, was {before['type'] if before else 'missing'}"
+                    findings.append({'shape': name, 'step': step['step'], 'status': 'full scan', 'detail': detail,
+                                     'failed': True})
+                elif before and step['rows'] > max(before['rows'], 1) * row_growth:
+                    detail = f"{step['rows']} rows estimated, was {before['rows']}"
+                    findings.append({'shape': name, 'step': step['step'], 'status': 'rows', 'detail': detail,
+                                     'failed': True})
+                if max_rows and step['rows'] > max_rows:
+                    detail = f"{step['rows']} rows estimated, limit {max_rows}"
+                    findings.append({'shape': name, 'step': step['step'], 'status': 'max rows', 'detail': detail,
+                                     'failed': True})
+    return findings
+
+
+def load(path: str = SNAPSHOTS):
+    with open(path) as snapshot_file:
+        return json.load(snapshot_file)
+
+
+def save(plans: dict, path: str = SNAPSHOTS):
+    with open(path, 'w') as snapshot_file:
+        json.dump(plans, snapshot_file, indent=2, sort_keys=True)
+
+
+def report(plans: dict, findings: list):
+    """
+    Prints every step of every shape followed by the findings
+    """
+    print(f"{'shape':<45} {'step':<28} {'type':<10} {'key':<24} {'rows':>10}")
+    for name, queries in plans.items():
+        for query in queries:
+            for step in query['plan']:
+                print(f"{name:<45} {step['step']:<28} {step['type'] or '':<10} {step['key'] or '':<24} "
+                      f"{step['rows']:>10}")
+    for finding in findings:
+        status = 'FAIL' if finding['failed'] else 'INFO'
+        print(f"{status} {finding['shape']} {finding['step']} {finding['status']}: {finding['detail']}")
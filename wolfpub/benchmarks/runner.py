@@ -0,0 +1,98 @@
+"""
+Benchmark runner: measures latency percentiles and throughput of a callable
+"""
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class BenchmarkResult(object):
+    """
+    Latency distribution (milliseconds) and throughput (operations per second) of one benchmark
+    """
+
+    def __init__(self, name: str, latencies: list, elapsed: float, errors: int = 0):
+        self.name = name
+        self.count = len(latencies)
+        self.errors = errors
+        self.elapsed = elapsed
+        latencies = sorted(latencies) if latencies else [0.0]
+        cut_points = statistics.quantiles(latencies, n=100, method='inclusive') if len(latencies) > 1 \
+            else latencies * 99
+        self.mean = statistics.fmean(latencies) * 1000
+        self.p50 = cut_points[49] * 1000
+        self.p95 = cut_points[94] * 1000
+        self.p99 = cut_points[98] * 1000
+        self.throughput = self.count / elapsed if elapsed else 0.0
+
+    def to_dict(self):
+        return {'name': self.name, 'count': self.count, 'errors': self.errors, 'mean_ms': round(self.mean, 4),
+                'p50_ms': round(self.p50, 4), 'p95_ms': round(self.p95, 4), 'p99_ms': round(self.p99, 4),
+                'throughput': round(self.throughput, 2)}
+
+
+def measure(name: str, func, iterations: int, warmup: int = 0, concurrency: int = 1):
+    """
+    Calls func iterations times (split over concurrency threads) and records the latency of each call
+    :param func: callable without arguments, an exception counts as error
+    :return: BenchmarkResult
+    """
+    for _ in range(warmup):
+        func()
+
+    def run(count: int):
+        latencies, errors = [], 0
+        for _ in range(count):
+            start = time.perf_counter()
+            try:
+                func()
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+        return latencies, errors
+
+    shares = [iterations // concurrency + (1 if i < iterations % concurrency else 0) for i in range(concurrency)]
+    start = time.perf_counter()
+    if concurrency == 1:
+        outcomes = [run(iterations)]
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            outcomes = list(pool.map(run, shares))
+    elapsed = time.perf_counter() - start
+    latencies = [latency for outcome in outcomes for latency in outcome[0]]
+    return BenchmarkResult(name, latencies, elapsed, sum(outcome[1] for outcome in outcomes))
+
+
+def report(results: list):
+    """
+    Prints the results as a table
+    """
+    header = f"{'benchmark':<40} {'count':>8} {'errors':>6} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'ops/s':>12}"
+    print(header)
+    print('-' * len(header))
+    for result in results:
+        print(f"{result.name:<40} {result.count:>8} {result.errors:>6} {result.p50:>10.4f} {result.p95:>10.4f} "
+              f"{result.p99:>10.4f} {result.throughput:>12.2f}")
+
+
+def save(results: list, path: str):
+    with open(path, 'w') as result_file:
+        json.dump([result.to_dict() for result in results], result_file, indent=2)
+
+
+def compare(results: list, baseline_path: str, tolerance: float):
+    """
+    Compares p95 latency of the results against a saved baseline
+    :param tolerance: allowed relative slow down, e.g. 0.2 for 20%
+    :return: list of regression messages, empty when nothing regressed
+    """
+    with open(baseline_path) as baseline_file:
+        baseline = {result['name']: result for result in json.load(baseline_file)}
+    regressions = []
+    for result in results:
+        previous = baseline.get(result.name)
+        if previous and previous['p95_ms'] and result.p95 > previous['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{result.name}: p95 {result.p95:.4f} ms, baseline {previous['p95_ms']:.4f} ms")
+    return regressions
@@ -0,0 +1,76 @@
+"""
+End to end benchmark scenarios, requests go through the Flask app against the MariaDB configured in .env
+"""
+import random
+import threading
+from datetime import date, timedelta
+
+from wolfpub import app, config
+from wolfpub.api.utils.mariadb_connector import MariaDBConnector
+from wolfpub.benchmarks.runner import measure
+
+
+class Scenarios(object):
+    """
+    Hot path scenarios: order placement, monthly report, revenue report and search
+    """
+
+    def __init__(self, seed: int = None):
+        # run.py lives at the repository root, benchmarks are run from there
+        from run import initialize_app
+        initialize_app(app)
+        self.prefix = config.API_SETTINGS['URL_PREFIX']
+        self.random = random.Random(seed)
+        self.local = threading.local()
+        db = MariaDBConnector()
+        self.account_ids = [row['account_id'] for row in
+                            db.get_result('select account_id from accounts where is_active = 1 limit 500')]
+        self.books = db.get_result('select title, edition from publications natural join books '
+                                   'where is_available = 1 limit 500')
+        self.topics = [row['topic'] for row in db.get_result('select distinct topic from publications limit 50')]
+        if not self.account_ids or not self.books or not self.topics:
+            raise ValueError('Seed the database first: python -m wolfpub.datagen')
+
+    @property
+    def client(self):
+        if not hasattr(self.local, 'client'):
+            self.local.client = app.test_client()
+        return self.local.client
+
+    def check(self, response):
+        if response.status_code >= 400:
+            raise ValueError(f'{response.status_code}: {response.get_data(as_text=True)[:200]}')
+
+    def place_order(self):
+        books = self.random.sample(self.books, min(3, len(self.books)))
+        order = {'order_id': 0,
+                 'delivery_date': (date.today() + timedelta(days=7)).strftime('%Y-%m-%d'),
+                 'items': {'books': [{'title': book['title'], 'edition': str(book['edition']),
+                                      'quantity': self.random.randrange(1, 10)} for book in books],
+                           'periodicals': []}}
+        account_id = self.random.choice(self.account_ids)
+        self.check(self.client.post(f'{self.prefix}/accounts/{account_id}/orders', json=order))
+
+    def monthly_report(self):
+        month = self.random.randrange(1, 13)
+        year = self.random.choice([2019, 2020, 2021])
+        self.check(self.client.get(f'{self.prefix}/reports/monthly?month={month}&year={year}'))
+
+    def revenue_report(self):
+        year = self.random.choice([2019, 2020, 2021])
+        self.check(self.client.get(f'{self.prefix}/reports/revenue?stats=total,distributor_wise,city_wise,'
+                                   f'location_wise&start_date={year}-01-01&end_date={year + 1}-01-01'))
+
+    def search(self):
+        search = {'filter': 'book', 'meta': {'topic': self.random.choice(self.topics)}}
+        response = self.client.get(f'{self.prefix}/publication/search', json=search)
+        if response.status_code != 404:
+            self.check(response)
+
+    def run(self, requests: int, concurrency: int):
+        scenarios = [('e2e place order', self.place_order),
+                     ('e2e monthly report', self.monthly_report),
+                     ('e2e revenue report', self.revenue_report),
+                     ('e2e search', self.search)]
+        return [measure(name, func, requests, warmup=min(requests, 5), concurrency=concurrency)
+                for name, func in scenarios]
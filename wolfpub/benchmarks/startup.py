@@ -0,0 +1,67 @@
+"""
+Startup benchmarks: cold start of the API in fresh interpreters, no database required
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+
+from wolfpub.benchmarks.runner import BenchmarkResult
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Runs in the child interpreter, prints the seconds spent in every phase of the start
+STARTUP_SCRIPT = """
+import json, time
+start = time.perf_counter()
+from wolfpub import app, config
+from run import initialize_app
+imported = time.perf_counter()
+initialize_app(app)
+initialized = time.perf_counter()
+app.test_client().post(config.API_SETTINGS['URL_PREFIX'] + '/healthcheck')
+served = time.perf_counter()
+print(json.dumps({'import': imported - start, 'initialize_app': initialized - imported,
+                  'first request': served - initialized}))
+"""
+
+
+def start(*options):
+    """
+    :param options: interpreter options, e.g. '-X', 'importtime'
+    :return: (wall seconds of the process, phases printed by the child, stderr)
+    """
+    begin = time.perf_counter()
+    process = subprocess.run([sys.executable, *options, '-c', STARTUP_SCRIPT], cwd=ROOT, capture_output=True,
+                             text=True)
+    elapsed = time.perf_counter() - begin
+    if process.returncode:
+        raise RuntimeError(f'Startup failed: {process.stderr.strip().splitlines()[-1:]}')
+    return elapsed, json.loads(process.stdout.strip().splitlines()[-1]), process.stderr
+
+
+def slowest_imports(top: int = 15):
+    """
+    :return: list of (cumulative milliseconds, module) of the slowest imports of one start, from -X importtime
+    """
+    _, _, stderr = start('-X', 'importtime')
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, module = line[len('import time:'):].split('|')
+        imports.append((int(cumulative) / 1000, module.rstrip()))
+    return sorted(imports, reverse=True)[:top]
+
+
+def run(iterations: int = 10):
+    latencies = {'startup process': []}
+    begin = time.perf_counter()
+    for _ in range(iterations):
+        elapsed, phases, _ = start()
+        latencies['startup process'].append(elapsed)
+        for phase, seconds in phases.items():
+            latencies.setdefault(f'startup {phase}', []).append(seconds)
+    elapsed = time.perf_counter() - begin
+    return [BenchmarkResult(name, values, elapsed) for name, values in latencies.items()]
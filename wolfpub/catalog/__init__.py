@@ -0,0 +1,6 @@
+"""
+Bulk import of a publisher's catalog: books and periodicals with their chapters, articles, authors and editors,
+streamed from JSON lines or CSV and committed in chunks that can be resumed
+
+    python -m wolfpub.catalog backlist.jsonl --import-id partner-backlist
+"""
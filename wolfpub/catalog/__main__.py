@@ -0,0 +1,40 @@
+"""
+Bulk import of a catalog file
+
+    python -m wolfpub.catalog backlist.jsonl --import-id partner-backlist
+    python -m wolfpub.catalog backlist.csv --chunk-size 1000
+"""
+import argparse
+import sys
+
+from wolfpub.catalog.reader import FORMATS
+from wolfpub.config import API_SETTINGS
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m wolfpub.catalog',
+                                     description='Import books and periodicals from JSON lines or CSV into WolfPubDB')
+    parser.add_argument('path', help='catalog file, see wolfpub/catalog/reader.py for the record format')
+    parser.add_argument('--import-id', help='name of the import, running it again resumes it (default: file name)')
+    parser.add_argument('--format', choices=FORMATS, help='default from the file extension, jsonl unless .csv')
+    parser.add_argument('--chunk-size', type=int, default=API_SETTINGS.get('CATALOG_IMPORT_CHUNK_SIZE', 500),
+                        help='records per transaction, progress is committed after every chunk')
+    parser.add_argument('--batch-size', type=int, default=API_SETTINGS.get('CATALOG_IMPORT_BATCH_SIZE', 1000),
+                        help='rows per multi-row insert')
+    args = parser.parse_args(argv)
+
+    from wolfpub.api.utils.mariadb_connector import MariaDBConnector
+    from wolfpub.catalog.importer import CatalogImporter
+    importer = CatalogImporter(MariaDBConnector(), args.chunk_size, args.batch_size,
+                               API_SETTINGS.get('CATALOG_IMPORT_MAX_ERRORS', 100))
+    summary = importer.run(args.path, args.import_id, args.format,
+                           progress=lambda done, total: print(f'\r{done}/{total} records', end='', flush=True))
+    print(f"\nImport '{summary['import_id']}': {summary['publications']} publications imported, "
+          f"{summary['rejected']} records rejected")
+    for error in summary['errors']:
+        print(f"  record {error['record']}: {error['error']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,370 @@
+"""
+Importer: Validates the catalog records and writes them chunk by chunk. Every chunk is one transaction together with
+its checkpoint in catalog_imports, so an interrupted import resumes after its last committed chunk
+"""
+import math
+import os
+from datetime import datetime
+
+from wolfpub.api.handlers.publication import BookHandler, PeriodicalHandler
+from wolfpub.api.utils import content
+from wolfpub.api.utils.query_generator import QueryGenerator, quote_literal
+from wolfpub.catalog.reader import read_records, parse_record, chunks, detect_format, count_records
+from wolfpub.constants import PUBLICATIONS, BOOKS, PERIODICALS, CHAPTERS, CHAPTER_BODIES, ARTICLES, ARTICLE_BODIES, \
+    WRITE_BOOKS, WRITE_ARTICLES, REVIEW_PUBLICATION, AUTHORS, EDITORS, CATALOG_IMPORTS
+from wolfpub.logger import WOLFPUB_LOGGER as logger
+
+PUBLICATION_TYPES = ['book', 'periodical']
+
+
+# Condition value matching any of the values, the query generator takes a single value for one
+def any_of(values):
+    values = sorted(values)
+    return values[0] if len(values) == 1 else values
+
+
+class CatalogImporter(object):
+    """
+    Imports books and periodicals with their chapters, articles, authors and editors in batched inserts
+    """
+
+    def __init__(self, db, chunk_size: int = 500, batch_size: int = 1000, max_errors: int = 100):
+        """
+        :param chunk_size: records per transaction and checkpoint
+        :param batch_size: rows per multi-row insert
+        :param max_errors: rejected records reported in the summary, all of them are logged
+        """
+        self.db = db
+        self.table_name = CATALOG_IMPORTS['table_name']
+        self.query_gen = QueryGenerator()
+        self.chunk_size = int(chunk_size)
+        self.batch_size = int(batch_size)
+        self.max_errors = int(max_errors)
+
+    # Util to fetch the rows of a query executed in the transaction
+    def fetch(self, query: str, cursor):
+        self.db._execute(query, cursor)
+        return self.db._fetch(cursor)
+
+    @staticmethod
+    def text(record: dict, key: str, max_length: int):
+        value = record.get(key)
+        if value is None or not str(value).strip():
+            raise ValueError(f"'{key}' is required")
+        value = str(value)
+        if len(value) > max_length:
+            raise ValueError(f"'{key}' can not be longer than {max_length} characters")
+        return value
+
+    @staticmethod
+    def date(record: dict, key: str):
+        value = record.get(key)
+        if not value:
+            raise ValueError(f"'{key}' is required")
+        try:
+            return datetime.strptime(str(value), '%Y-%m-%d').strftime('%Y-%m-%d')
+        except ValueError:
+            raise ValueError(f"'{key}' has to be a date as YYYY-MM-DD, got '{value}'")
+
+    @staticmethod
+    def emp_ids(record: dict, key: str):
+        emp_ids = record.get(key) or []
+        if not isinstance(emp_ids, list) or any(not isinstance(emp_id, str) or not 0 < len(emp_id) <= 6
+                                                for emp_id in emp_ids):
+            raise ValueError(f"'{key}' has to be a list of employee ids")
+        return list(dict.fromkeys(emp_ids))
+
+    # Validate a record with the checks of the publication end-points
+    def validate(self, record: dict):
+        """
+        :return: {'type': 'book', 'publication': {...}, 'book': {...}, 'chapters': [...], 'authors': [...],
+                  'editors': [...]}, periodicals with 'periodical' and 'articles'. Throws ValueError
+        """
+        pub_type = str(record.get('type', '')).lower()
+        if pub_type not in PUBLICATION_TYPES:
+            raise ValueError(f"'type' has to be one of: {', '.join(PUBLICATION_TYPES)}")
+        try:
+            price = round(float(record['price']), 2)
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("'price' has to be a number")
+        if not math.isfinite(price) or price < 0:
+            raise ValueError("'price' has to be a finite number, not negative")
+        publication = {'title': self.text(record, 'title', 100), 'topic': self.text(record, 'topic', 20),
+                       'price': price, 'publication_date': self.date(record, 'publication_date')}
+        is_available = int(str(record.get('is_available', 1)).lower() in ('1', 'true'))
+        valid = {'type': pub_type, 'publication': publication, 'authors': self.emp_ids(record, 'authors'),
+                 'editors': self.emp_ids(record, 'editors')}
+        if pub_type == 'book':
+            creation_date = self.date(record, 'creation_date')
+            if creation_date > publication['publication_date']:
+                raise ValueError('Creation date has to be before publication date')
+            isbn = record.get('isbn')
+            valid['book'] = {'isbn': self.text(record, 'isbn', 17) if isbn else None, 'creation_date': creation_date,
+                             'is_available': is_available}
+            valid['chapters'] = [{'chapter_title': self.text(chapter, 'chapter_title', 255),
+                                  'chapter_text': self.text(chapter, 'chapter_text', 1000000)}
+                                 for chapter in record.get('chapters') or []]
+            return valid
+
+        issue = self.text(record, 'issue', 10).lower()
+        periodical_type = self.text(record, 'periodical_type', 20).lower()
+        if periodical_type == 'magazine' and not issue.startswith('week'):
+            raise ValueError("Magazines must be published weekly. Expected input format - `Week<num>`")
+        elif periodical_type == 'journal' and not issue.startswith('month'):
+            raise ValueError("Journals must be published monthly. Expected input format - `Month<num>`")
+        elif periodical_type not in ['magazine', 'journal']:
+            raise ValueError("Periodicals must either be a magazine or a journal")
+        issn = record.get('issn')
+        valid['periodical'] = {'issn': self.text(record, 'issn', 17) if issn else None, 'issue': issue,
+                               'periodical_type': periodical_type, 'is_available': is_available}
+        valid['articles'] = [{'creation_date': self.date(article, 'creation_date'),
+                              'topic': self.text(article, 'topic', 20), 'title': self.text(article, 'title', 100),
+                              'text': self.text(article, 'text', 1000000),
+                              'authors': self.emp_ids(article, 'authors')}
+                             for article in record.get('articles') or []]
+        return valid
+
+    # Drop the records referring to employees which are not authors or editors
+    def check_employees(self, records: list, rejected: list, cursor):
+        known = {}
+        for key, table in (('authors', AUTHORS), ('editors', EDITORS)):
+            emp_ids = {emp_id for _, record in records for emp_id in record[key]}
+            if key == 'authors':
+                emp_ids.update(emp_id for _, record in records for article in record.get('articles', [])
+                               for emp_id in article['authors'])
+            known[key] = set()
+            if emp_ids:
+                select_query = self.query_gen.select(table['table_name'], ['emp_id'], {'emp_id': any_of(emp_ids)})
+                known[key] = {row['emp_id'] for row in self.fetch(select_query, cursor)}
+        valid = []
+        for number, record in records:
+            authors = record['authors'] + [emp_id for article in record.get('articles', [])
+                                           for emp_id in article['authors']]
+            unknown = sorted(set(authors) - known['authors']) + sorted(set(record['editors']) - known['editors'])
+            if unknown:
+                rejected.append({'record': number, 'error': f"Unknown authors or editors: {', '.join(unknown)}"})
+            else:
+                valid.append((number, record))
+        return valid
+
+    # Check the given ISBNs (ISSNs) against the catalog and the chunk, generate unique ones for the others
+    def check_identifiers(self, records: list, rejected: list, cursor, pub_type: str, key: str, table: dict,
+                          generate):
+        rows = [(number, record[pub_type]) for number, record in records if record['type'] == pub_type]
+        given = {row[key] for _, row in rows if row[key]}
+        taken = set()
+        if given:
+            select_query = self.query_gen.select(table['table_name'], [key], {key: any_of(given)})
+            taken = {row[key] for row in self.fetch(select_query, cursor)}
+        dropped = set()
+        for number, row in rows:
+            if row[key] and row[key] in taken:
+                rejected.append({'record': number, 'error': f"{key.upper()} '{row[key]}' already exists"})
+                dropped.add(number)
+            elif row[key]:
+                taken.add(row[key])
+        missing = [row for number, row in rows if not row[key]]
+        while missing:
+            candidates = {}
+            for row in missing:
+                candidate = generate()
+                while candidate in taken or candidate in candidates:
+                    candidate = generate()
+                candidates[candidate] = row
+            select_query = self.query_gen.select(table['table_name'], [key], {key: any_of(candidates)})
+            existing = {row[key] for row in self.fetch(select_query, cursor)}
+            missing = []
+            for candidate, row in candidates.items():
+                if candidate in existing:
+                    missing.append(row)
+                else:
+                    row[key] = candidate
+                    taken.add(candidate)
+        return [(number, record) for number, record in records if number not in dropped]
+
+    # Add the books to the series of their titles (book_id and next edition), periodicals get the periodical_id of
+    # their title, new titles get new ids
+    def assign_series(self, records: list, rejected: list, cursor):
+        # Locked reads of the highest ids, a concurrent import or insert of a new title waits for this transaction
+        next_ids = {}
+        for table, key in ((BOOKS, 'book_id'), (PERIODICALS, 'periodical_id')):
+            select_query = self.query_gen.select(table['table_name'], [key], order_by=[f'{key} desc'], limit=1)
+            last = self.fetch(f'{select_query} for update', cursor)
+            next_ids[key] = int(last[0][key]) if last else 0
+        series = {'book': {}, 'periodical': {}}
+        issues = set()
+        for pub_type, table, key, columns in (
+                ('book', BOOKS, 'book_id', ['max(book_id) as book_id', 'max(edition) as edition']),
+                ('periodical', PERIODICALS, 'periodical_id', ['max(periodical_id) as periodical_id'])):
+            titles = {record['publication']['title'].lower() for _, record in records if record['type'] == pub_type}
+            if not titles:
+                continue
+            cond = {'title_key': any_of(titles)}
+            if pub_type == 'periodical':
+                cond['is_available'] = 1
+            select_query = self.query_gen.select(f"{PUBLICATIONS['table_name']} natural join {table['table_name']}",
+                                                 ['title_key'] + columns, cond, group_by=['title_key'])
+            for row in self.fetch(f'{select_query} for update', cursor):
+                series[pub_type][row['title_key']] = {k: int(v) for k, v in row.items() if k != 'title_key'}
+            if pub_type == 'periodical' and series['periodical']:
+                periodical_ids = {row['periodical_id'] for row in series['periodical'].values()}
+                select_query = self.query_gen.select(table['table_name'], ['periodical_id', 'issue'],
+                                                     {'periodical_id': any_of(periodical_ids)})
+                issues = {(int(row['periodical_id']), row['issue']) for row in self.fetch(select_query, cursor)}
+
+        valid = []
+        for number, record in records:
+            title_key = record['publication']['title'].lower()
+            known = series[record['type']].get(title_key)
+            if record['type'] == 'book':
+                if known is None:
+                    next_ids['book_id'] += 1
+                    known = series['book'][title_key] = {'book_id': next_ids['book_id'], 'edition': 0}
+                known['edition'] += 1
+                record['book'].update(known)
+            else:
+                if known is None:
+                    next_ids['periodical_id'] += 1
+                    known = series['periodical'][title_key] = {'periodical_id': next_ids['periodical_id']}
+                issue = (known['periodical_id'], record['periodical']['issue'])
+                if issue in issues:
+                    rejected.append({'record': number, 'error': f"Issue '{issue[1]}' of "
+                                                                f"'{record['publication']['title']}' already exists"})
+                    continue
+                issues.add(issue)
+                record['periodical'].update(known)
+            valid.append((number, record))
+        return valid
+
+    # Rows of the tables in insert order, publication ids follow the highest existing one
+    def rows(self, records: list, cursor):
+        select_query = self.query_gen.select(PUBLICATIONS['table_name'], ['publication_id'],
+                                             order_by=['publication_id desc'], limit=1)
+        last = self.fetch(f'{select_query} for update', cursor)
+        publication_id = int(last[0]['publication_id']) if last else 0
+        tables = {table['table_name']: [] for table in (PUBLICATIONS, BOOKS, PERIODICALS, CHAPTERS, CHAPTER_BODIES,
+                                                        ARTICLES, ARTICLE_BODIES, WRITE_BOOKS, WRITE_ARTICLES,
+                                                        REVIEW_PUBLICATION)}
+        for _, record in records:
+            publication_id += 1
+            publication = record['publication']
+            tables[PUBLICATIONS['table_name']].append({
+                'publication_id': publication_id, 'title': quote_literal(publication['title']),
+                'topic': quote_literal(publication['topic']), 'price': publication['price'],
+                'publication_date': publication['publication_date']})
+            if record['type'] == 'book':
+                tables[BOOKS['table_name']].append({'publication_id': publication_id, **record['book']})
+                for chapter_id, chapter in enumerate(record['chapters'], 1):
+                    self.text_rows(tables, CHAPTERS, CHAPTER_BODIES, 'chapter_text',
+                                   {'chapter_id': chapter_id, 'publication_id': publication_id},
+                                   {'chapter_title': quote_literal(chapter['chapter_title'])},
+                                   chapter['chapter_text'])
+                for emp_id in record['authors']:
+                    tables[WRITE_BOOKS['table_name']].append({'emp_id': emp_id, 'publication_id': publication_id})
+            else:
+                tables[PERIODICALS['table_name']].append({'publication_id': publication_id, **record['periodical']})
+                for article_id, article in enumerate(record['articles'], 1):
+                    key = {'article_id': article_id, 'publication_id': publication_id}
+                    self.text_rows(tables, ARTICLES, ARTICLE_BODIES, 'text', key,
+                                   {'creation_date': article['creation_date'],
+                                    'topic': quote_literal(article['topic']),
+                                    'title': quote_literal(article['title'])}, article['text'])
+                    for emp_id in article['authors'] or record['authors']:
+                        tables[WRITE_ARTICLES['table_name']].append({'emp_id': emp_id, **key})
+            for emp_id in record['editors']:
+                tables[REVIEW_PUBLICATION['table_name']].append({'emp_id': emp_id, 'publication_id': publication_id})
+        return tables
+
+    # Chapter or article row, long texts go compressed to the body table as with the chapter and article end-points
+    @staticmethod
+    def text_rows(tables: dict, table: dict, body_table: dict, text_column: str, key: dict, values: dict, text: str):
+        body = content.body_values(text)
+        tables[table['table_name']].append({**key, **values,
+                                            text_column: quote_literal('' if body is not None else text)})
+        if body is not None:
+            tables[body_table['table_name']].append({**key, **body})
+
+    # Write the valid records of a chunk and move the checkpoint past the chunk, in one transaction
+    def write_chunk(self, import_id: str, records: list, last_number: int, rejected: int):
+        """
+        :param records: [(number, validated record)]
+        :param last_number: number of the last record of the chunk
+        :param rejected: records of the chunk rejected by the validation
+        :return: publications written and the records rejected against the catalog, None when the chunk was
+            committed before
+        """
+        with self.db.transaction() as cursor:
+            select_query = self.query_gen.select(self.table_name, ['records_done'], {'import_id': import_id})
+            checkpoint = self.fetch(f'{select_query} for update', cursor)
+            if not checkpoint:
+                raise ValueError(f"Catalog import '{import_id}' not started")
+            if int(checkpoint[0]['records_done']) >= last_number:
+                return None
+            rejections = []
+            if records:
+                records = self.check_employees(records, rejections, cursor)
+                records = self.check_identifiers(records, rejections, cursor, 'book', 'isbn', BOOKS,
+                                                 BookHandler.generate_random_isbn)
+                records = self.check_identifiers(records, rejections, cursor, 'periodical', 'issn', PERIODICALS,
+                                                 PeriodicalHandler.generate_random_issn)
+                records = self.assign_series(records, rejections, cursor)
+            if records:
+                for table_name, rows in self.rows(records, cursor).items():
+                    self.db.bulk_execute(self.query_gen.bulk_insert(table_name, rows, max_rows=self.batch_size),
+                                         cursor)
+            self.db._execute(self.query_gen.update(self.table_name, {'import_id': import_id}, {
+                'records_done': last_number, 'publications': {'+': len(records)},
+                'rejected': {'+': rejected + len(rejections)}}), cursor)
+        return len(records), rejections
+
+    # Register the import or return its checkpoint to resume from
+    def start(self, import_id: str, source: str):
+        if not 0 < len(import_id) <= 64:
+            raise ValueError('Catalog import id has to be 1 to 64 characters long')
+        select_query = self.query_gen.select(self.table_name, ['source', 'status', 'records_done', 'publications',
+                                                               'rejected'], {'import_id': import_id})
+        checkpoint = self.db.get_result(select_query)
+        if not checkpoint:
+            self.db.execute([self.query_gen.insert(self.table_name, [{'import_id': import_id,
+                                                                      'source': quote_literal(source)}])])
+            return {'source': source, 'status': 'running', 'records_done': 0, 'publications': 0, 'rejected': 0}
+        if checkpoint[0]['source'] != source:
+            raise ValueError(f"Catalog import '{import_id}' was started for '{checkpoint[0]['source']}'")
+        return checkpoint[0]
+
+    def run(self, path: str, import_id: str = None, file_format: str = None, progress=None):
+        """
+        Imports the catalog file, resuming after the last committed chunk of an earlier run with the same import id
+        :param import_id: name of the import, the file name by default
+        :param progress: function(records done, records of the file), called after every chunk
+        :return: {'import_id': 'backlist.jsonl', 'records': 1200, 'publications': 1180, 'rejected': 20,
+                  'errors': [{'record': 17, 'error': "'price' has to be a number"}]}
+        """
+        file_format = file_format or detect_format(path)
+        import_id = import_id or os.path.basename(path)
+        checkpoint = self.start(import_id, os.path.abspath(path))
+        summary = {'import_id': import_id, 'records': int(checkpoint['records_done']),
+                   'publications': int(checkpoint['publications']), 'rejected': int(checkpoint['rejected']),
+                   'errors': []}
+        total = count_records(path, file_format) if progress else None
+        for chunk in chunks(read_records(path, file_format, skip=summary['records']), self.chunk_size):
+            valid, rejections = [], []
+            for number, raw in chunk:
+                try:
+                    valid.append((number, self.validate(parse_record(raw, file_format))))
+                except (ValueError, TypeError, AttributeError) as e:
+                    rejections.append({'record': number, 'error': str(e)})
+            written = self.write_chunk(import_id, valid, chunk[-1][0], len(rejections))
+            summary['records'] = chunk[-1][0]
+            if written is not None:
+                rejections += written[1]
+                summary['publications'] += written[0]
+                summary['rejected'] += len(rejections)
+                for rejection in rejections:
+                    logger.warning(f"Catalog import '{import_id}' rejected record {rejection['record']}: "
+                                   f"{rejection['error']}")
+                summary['errors'] += rejections[:self.max_errors - len(summary['errors'])]
+            if progress:
+                progress(summary['records'], total)
+        self.db.execute([self.query_gen.update(self.table_name, {'import_id': import_id}, {'status': 'completed'})])
+        return summary
@@ -0,0 +1,78 @@
+"""
+Reader: Streams the records of a catalog file, the file is never loaded into memory
+
+JSON lines, one publication per line:
+    {"type": "book", "title": "Wolf Tales", "topic": "fiction", "price": 12.5, "publication_date": "2022-01-10",
+     "creation_date": "2021-11-02", "isbn": "978-1-23-456789-0", "authors": ["A00002"], "editors": ["E00001"],
+     "chapters": [{"chapter_title": "One", "chapter_text": "..."}]}
+    {"type": "periodical", "title": "Pack Weekly", "topic": "sports", "price": 4, "publication_date": "2022-02-01",
+     "issue": "week5", "periodical_type": "magazine", "articles": [{"title": "Derby", "topic": "sports",
+     "creation_date": "2022-01-30", "text": "...", "authors": ["A00002"]}]}
+
+CSV, one publication per row without chapters and articles, authors and editors separated by ';':
+    type,title,topic,price,publication_date,creation_date,isbn,issn,issue,periodical_type,authors,editors
+"""
+import csv
+import itertools
+import json
+
+FORMATS = ['jsonl', 'csv']
+LIST_COLUMNS = ['authors', 'editors']
+
+
+def detect_format(path: str):
+    return 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
+
+def read_records(path: str, file_format: str = None, skip: int = 0):
+    """
+    :param skip: records to skip, e.g. the records committed by an earlier run of the import
+    :return: generator of (number, raw record), numbers start at 1. Raw records are lines for jsonl and rows
+        (dictionaries) for csv, see parse_record
+    """
+    file_format = file_format or detect_format(path)
+    if file_format not in FORMATS:
+        raise ValueError(f"Unknown catalog format '{file_format}', expected one of: {', '.join(FORMATS)}")
+    with open(path, encoding='utf-8', newline='' if file_format == 'csv' else None) as source:
+        if file_format == 'csv':
+            records = csv.DictReader(source)
+        else:
+            records = (line for line in source if line.strip())
+        for number, raw in enumerate(records, 1):
+            if number > skip:
+                yield number, raw
+
+
+def count_records(path: str, file_format: str = None):
+    return sum(1 for _ in read_records(path, file_format))
+
+
+def parse_record(raw, file_format: str):
+    """
+    :return: record dictionary, throws ValueError on malformed records
+    """
+    if file_format == 'csv':
+        record = {key: value.strip() for key, value in raw.items() if key and value and value.strip()}
+        for column in LIST_COLUMNS:
+            if column in record:
+                record[column] = [value.strip() for value in record[column].split(';') if value.strip()]
+        return record
+    try:
+        record = json.loads(raw)
+    except json.JSONDecodeError as e:
+        raise ValueError(f'Malformed JSON: {e}')
+    if not isinstance(record, dict):
+        raise ValueError('Expected a JSON object per line')
+    return record
+
+
+def chunks(records, size: int):
+    """
+    :return: generator of lists of at most size records
+    """
+    records = iter(records)
+    while True:
+        chunk = list(itertools.islice(records, size))
+        if not chunk:
+            return
+        yield chunk
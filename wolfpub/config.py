@@ -9,6 +9,7 @@ from configparser import ConfigParser
 from dotenv import load_dotenv
 
 load_dotenv()
+os.environ.setdefault('MARIADB_REPLICA_HOSTS', '')
 
 CONFIG_PARSER = ConfigParser(os.environ)
 CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'settings.conf')
@@ -19,3 +20,4 @@ BASE_DIR = os.getcwd()
 API_SETTINGS = literal_eval(CONFIG_PARSER.get("WolfPubAPI", "api_settings"))
 RESTPLUS_SETTINGS = literal_eval(CONFIG_PARSER.get("WolfPubAPI", 'restplus_settings'))
 MARIADB_SETTINGS = literal_eval(CONFIG_PARSER.get("WolfPubAPI", 'mariadb_settings'))
+MARIADB_REPLICA_SETTINGS = literal_eval(CONFIG_PARSER.get("WolfPubAPI", 'mariadb_replica_settings'))
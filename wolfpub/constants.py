@@ -33,12 +33,15 @@ EMPLOYEES = {
     'table_name': 'employees',
     'columns': {
         'emp_id': {'type': 'varchar(6)', 'constraint': 'not null'},
+        'personnel_id': {'type': 'varchar(4)', 'constraint': 'not null'},
         'ssn': {'type': 'varchar(12)', 'constraint': 'not null unique'},
         'name': {'type': 'varchar(100)', 'constraint': 'not null'},
         'gender': {'type': 'varchar(1)', 'constraint': ''},
         'age': {'type': 'int(2) unsigned', 'constraint': ''},
         'phone_number': {'type': 'int(10) unsigned', 'constraint': 'not null'},
-        'job_title': {'type': 'varchar(20)', 'constraint': 'not null'}
+        'address': {'type': 'varchar(100)', 'constraint': 'not null'},
+        'email_id': {'type': 'varchar(100)', 'constraint': 'not null'},
+        'job_type': {'type': 'varchar(20)', 'constraint': 'not null'}
     }
 }
 
@@ -46,7 +49,8 @@ EDITORS = {
     'table_name': 'editors',
     'columns': {
         'emp_id': {'type': 'varchar(6)', 'constraint': 'not null'},
-        'type': {'type': 'varchar(20)', 'constraint': 'default \'staff\''}
+        'type': {'type': 'varchar(20)', 'constraint': 'default \'staff\''},
+        'payment_frequency': {'type': 'varchar(20)', 'constraint': 'not null'}
     }
 }
 
@@ -54,7 +58,9 @@ AUTHORS = {
     'table_name': 'authors',
     'columns': {
         'emp_id': {'type': 'varchar(6)', 'constraint': 'not null'},
-        'type': {'type': 'varchar(20)', 'constraint': 'default \'staff\''}
+        'type': {'type': 'varchar(20)', 'constraint': 'default \'staff\''},
+        'payment_frequency': {'type': 'varchar(20)', 'constraint': 'not null'},
+        'author_type': {'type': 'varchar(20)', 'constraint': 'default \'writer\''}
     }
 }
 
@@ -85,8 +91,8 @@ SALARY_PAYMENTS = {
         'emp_id': {'type': 'varchar(6)', 'constraint': 'not null'},
         'house_id': {'type': 'int(1)', 'constraint': 'default 1'},
         'amount': {'type': 'decimal(8, 2) unsigned', 'constraint': 'not null'},
-        'send_date': {'type': 'int(6) unsigned', 'constraint': 'not null'},
-        'received_date': {'type': 'int(6) unsigned', 'constraint': ''}
+        'send_date': {'type': 'date', 'constraint': 'not null'},
+        'received_date': {'type': 'date', 'constraint': ''}
     }
 }
 
@@ -96,8 +102,14 @@ PUBLICATIONS = {
         'publication_id': {'type': 'int(6) unsigned', 'constraint': 'primary key auto_increment'},
         'title': {'type': 'varchar(100)', 'constraint': 'not null'},
         'topic': {'type': 'varchar(20)', 'constraint': ''},
-        'price': {'type': 'decimal(3, 2)', 'constraint': 'not null'},
-        'publication_date': {'type': 'date', 'constraint': 'not null'}}
+        'price': {'type': 'decimal(6, 2)', 'constraint': 'not null'},
+        'publication_date': {'type': 'date', 'constraint': 'not null'},
+        'version': {'type': 'int unsigned', 'constraint': 'not null default 1'},
+        'updated_at': {'type': 'timestamp',
+                       'constraint': 'not null default current_timestamp on update current_timestamp'},
+        'title_key': {'type': 'varchar(100)', 'constraint': 'as (lower(title)) persistent'}},
+    # Kept for the cache validators and the title lookup, not returned by the end-points
+    'internal_columns': ['version', 'updated_at', 'title_key']
 }
 
 BOOKS = {
@@ -142,8 +154,31 @@ ARTICLES = {
         'creation_date': {'type': 'date', 'constraint': 'not null'},
         'topic': {'type': 'varchar(20)', 'constraint': 'not null'},
         'title': {'type': 'varchar(100)', 'constraint': 'not null'},
-        'text': {'type': 'text', 'constraint': 'not null'},
-        'journalist_name': {'type': 'varchar(100)', 'constraint': 'not null'}
+        'text': {'type': 'text', 'constraint': 'not null'}
+    }
+}
+
+CHAPTER_BODIES = {
+    'table_name': 'chapter_bodies',
+    'columns': {
+        'chapter_id': {'type': 'int(6) unsigned', 'constraint': 'not null'},
+        'publication_id': {'type': 'int(6) unsigned', 'constraint': 'not null'},
+        'encoding': {'type': 'varchar(10)', 'constraint': 'not null'},
+        'text_length': {'type': 'int unsigned', 'constraint': 'not null'},
+        'excerpt': {'type': 'varchar(255)', 'constraint': 'not null'},
+        'body': {'type': 'mediumblob', 'constraint': 'not null'}
+    }
+}
+
+ARTICLE_BODIES = {
+    'table_name': 'article_bodies',
+    'columns': {
+        'article_id': {'type': 'int(6) unsigned', 'constraint': 'not null'},
+        'publication_id': {'type': 'int(6) unsigned', 'constraint': 'not null'},
+        'encoding': {'type': 'varchar(10)', 'constraint': 'not null'},
+        'text_length': {'type': 'int unsigned', 'constraint': 'not null'},
+        'excerpt': {'type': 'varchar(255)', 'constraint': 'not null'},
+        'body': {'type': 'mediumblob', 'constraint': 'not null'}
     }
 }
 
@@ -209,6 +244,7 @@ ACCOUNT_BILLS = {
     'columns': {
         'bill_id': {'type': 'int(6) unsigned', 'constraint': 'primary key auto_increment'},
         'account_id': {'type': 'int(6) unsigned', 'constraint': 'not null'},
+        'order_id': {'type': 'int(6) unsigned', 'constraint': 'not null'},
         'amount': {'type': 'decimal(8, 2)', 'constraint': 'not null'},
         'bill_date': {'type': 'date', 'constraint': 'not null'}
     }
@@ -225,7 +261,7 @@ ACCOUNT_HOUSES_INFO = {
 ACCOUNT_PAYMENTS = {
     'table_name': 'account_payments',
     'columns': {
-        'payment_id': {'type': 'int(6) unsigned', 'constraint': 'not null'},
+        'payment_id': {'type': 'int(8) unsigned', 'constraint': 'primary key auto_increment'},
         'account_id': {'type': 'int(6) unsigned', 'constraint': 'not null'},
         'amount': {'type': 'decimal(5, 2)', 'constraint': 'not null'},
         'payment_date': {'type': 'date', 'constraint': 'not null'}
@@ -238,7 +274,97 @@ REPORTS = {
         'report_id': {'type': 'int(6) unsigned', 'constraint': 'auto_increment'},
         'month': {'type': 'int(2)', 'constraint': 'not null'},
         'year': {'type': 'int(4)', 'constraint': 'not null'},
-        'total_expense': {'type': 'decimal(8, 2)', 'constraint': 'not null'},
-        'total_revenue': {'type': 'decimal(8, 2)', 'constraint': 'not null'}
+        'total_expense': {'type': 'decimal(12, 2)', 'constraint': 'not null'},
+        'total_revenue': {'type': 'decimal(12, 2)', 'constraint': 'not null'},
+        'salary_expense': {'type': 'decimal(12, 2)', 'constraint': 'not null default 0'},
+        'shipping_cost': {'type': 'decimal(12, 2)', 'constraint': 'not null default 0'},
+        'refreshed_at': {'type': 'datetime', 'constraint': 'not null default current_timestamp'}
+    }
+}
+
+REPORT_PUBLICATION_DISTRIBUTORS = {
+    'table_name': 'report_publication_distributors',
+    'columns': {
+        'month': {'type': 'int(2)', 'constraint': 'not null'},
+        'year': {'type': 'int(4)', 'constraint': 'not null'},
+        'account_id': {'type': 'int(6) unsigned', 'constraint': 'not null'},
+        'publication_id': {'type': 'int(6) unsigned', 'constraint': 'not null'},
+        'total_quantity': {'type': 'int(8) unsigned', 'constraint': 'not null'},
+        'total_price': {'type': 'decimal(12, 2)', 'constraint': 'not null'}
+    }
+}
+
+JOBS = {
+    'table_name': 'jobs',
+    'columns': {
+        'job_id': {'type': 'int(8) unsigned', 'constraint': 'primary key auto_increment'},
+        'job_type': {'type': 'varchar(50)', 'constraint': 'not null'},
+        'params': {'type': 'text', 'constraint': 'not null'},
+        'status': {'type': 'varchar(20)', 'constraint': "not null default 'queued'"},
+        'progress': {'type': 'int(3) unsigned', 'constraint': 'not null default 0'},
+        'message': {'type': 'varchar(255)', 'constraint': ''},
+        'result': {'type': 'mediumtext', 'constraint': ''},
+        'attempts': {'type': 'int(2) unsigned', 'constraint': 'not null default 0'},
+        'max_attempts': {'type': 'int(2) unsigned', 'constraint': 'not null default 3'},
+        'cancel_requested': {'type': 'bool', 'constraint': 'not null default 0'},
+        'worker': {'type': 'varchar(100)', 'constraint': ''},
+        'run_after': {'type': 'datetime', 'constraint': 'not null default current_timestamp'},
+        'created_at': {'type': 'datetime', 'constraint': 'not null default current_timestamp'},
+        'updated_at': {'type': 'datetime',
+                       'constraint': 'not null default current_timestamp on update current_timestamp'},
+        'finished_at': {'type': 'datetime', 'constraint': ''}
+    }
+}
+
+ACCOUNT_LEDGER = {
+    'table_name': 'account_ledger',
+    'columns': {
+        'entry_id': {'type': 'bigint unsigned', 'constraint': 'primary key auto_increment'},
+        'account_id': {'type': 'int(6) unsigned', 'constraint': 'not null'},
+        'entry_type': {'type': 'varchar(20)', 'constraint': 'not null'},
+        'reference_id': {'type': 'int(8) unsigned', 'constraint': 'not null'},
+        'amount': {'type': 'decimal(10, 2)', 'constraint': 'not null'},
+        'created_at': {'type': 'datetime', 'constraint': 'not null default current_timestamp'}
+    }
+}
+
+ACCOUNT_BALANCE_SNAPSHOTS = {
+    'table_name': 'account_balance_snapshots',
+    'columns': {
+        'account_id': {'type': 'int(6) unsigned', 'constraint': 'primary key'},
+        'balance': {'type': 'decimal(12, 2)', 'constraint': 'not null'},
+        'last_entry_id': {'type': 'bigint unsigned', 'constraint': 'not null'},
+        'taken_at': {'type': 'datetime', 'constraint': 'not null default current_timestamp'}
+    }
+}
+
+IDEMPOTENCY_KEYS = {
+    'table_name': 'idempotency_keys',
+    'columns': {
+        'account_id': {'type': 'int(6) unsigned', 'constraint': 'not null'},
+        'idempotency_key': {'type': 'varchar(64)', 'constraint': 'not null'},
+        'request_hash': {'type': 'char(64)', 'constraint': 'not null'},
+        'reservation': {'type': 'char(32)', 'constraint': 'not null'},
+        'status': {'type': 'varchar(20)', 'constraint': "not null default 'processing'"},
+        'order_id': {'type': 'int(6) unsigned', 'constraint': ''},
+        'response_code': {'type': 'int(3)', 'constraint': ''},
+        'response': {'type': 'mediumtext', 'constraint': ''},
+        'created_at': {'type': 'datetime', 'constraint': 'not null default current_timestamp'},
+        'expires_at': {'type': 'datetime', 'constraint': 'not null'}
+    }
+}
+
+CATALOG_IMPORTS = {
+    'table_name': 'catalog_imports',
+    'columns': {
+        'import_id': {'type': 'varchar(64)', 'constraint': 'primary key'},
+        'source': {'type': 'varchar(255)', 'constraint': 'not null'},
+        'status': {'type': 'varchar(20)', 'constraint': "not null default 'running'"},
+        'records_done': {'type': 'int unsigned', 'constraint': 'not null default 0'},
+        'publications': {'type': 'int unsigned', 'constraint': 'not null default 0'},
+        'rejected': {'type': 'int unsigned', 'constraint': 'not null default 0'},
+        'started_at': {'type': 'datetime', 'constraint': 'not null default current_timestamp'},
+        'updated_at': {'type': 'datetime',
+                       'constraint': 'not null default current_timestamp on update current_timestamp'}
     }
 }
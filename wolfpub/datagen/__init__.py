@@ -0,0 +1,3 @@
+"""
+Synthetic production-scale data generator, run with python -m wolfpub.datagen
+"""
@@ -0,0 +1,107 @@
+"""
+Synthetic production-scale data for WolfPubDB
+
+    python -m wolfpub.datagen --scale 10 --workers 8 --method load-data
+"""
+import argparse
+import multiprocessing
+import sys
+import time
+
+from wolfpub.datagen.generator import DataGenerator, Sizes
+from wolfpub.datagen.loader import ChunkLoader
+
+DEFAULT_SIZES = {'distributors': 1000, 'employees': 200, 'publications': 5000, 'orders': 100000, 'payments': 100000}
+
+_generator = None
+_loader = None
+
+
+def _init_worker(generator: DataGenerator, loader: ChunkLoader):
+    global _generator, _loader
+    _generator = generator
+    _loader = loader
+
+
+def _load_chunk(task: tuple):
+    entity, start, end = task
+    return entity, _loader.load(_generator.generate(entity, start, end))
+
+
+def first_ids():
+    """
+    First free id of every entity, so the generated data is appended to the existing rows
+    """
+    from wolfpub.api.utils.mariadb_connector import MariaDBConnector
+    row = MariaDBConnector().get_result(
+        'select greatest(coalesce((select max(distributor_id) from distributors), 0), '
+        'coalesce((select max(account_id) from accounts), 0)) + 1 as distributor, '
+        # Generated and API employee ids are a letter prefix and a number, the numbers are continued after the highest
+        "coalesce((select max(cast(regexp_replace(emp_id, '[^0-9]', '') as unsigned)) from employees), 0) + 1 "
+        'as employee, '
+        'coalesce((select max(publication_id) from publications), 0) + 1 as publication, '
+        'coalesce((select max(order_id) from orders), 0) + 1 as `order`')[0]
+    return {key: int(value) for key, value in row.items()}
+
+
+def run(generator: DataGenerator, loader: ChunkLoader, workers: int, chunk_size: int):
+    total = 0
+    started = time.perf_counter()
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(generator, loader)) as pool:
+        for stage in DataGenerator.STAGES:
+            tasks = [(entity, start, min(start + chunk_size, generator.count(entity)))
+                     for entity in stage for start in range(0, generator.count(entity), chunk_size)]
+            stage_rows = 0
+            stage_started = time.perf_counter()
+            for entity, rows in pool.imap_unordered(_load_chunk, tasks):
+                stage_rows += rows
+                print(f'\r{", ".join(stage)}: {stage_rows} rows', end='', flush=True)
+            elapsed = time.perf_counter() - stage_started
+            print(f' in {elapsed:.1f}s ({stage_rows / elapsed if elapsed else 0:.0f} rows/s)')
+            total += stage_rows
+    first_account_id = generator.sizes.first_ids['distributor']
+    loader.update_balances(first_account_id, first_account_id + generator.sizes.distributors - 1)
+    elapsed = time.perf_counter() - started
+    print(f'Loaded {total} rows in {elapsed:.1f}s ({total / elapsed if elapsed else 0:.0f} rows/s)')
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m wolfpub.datagen',
+                                     description='Generate referentially consistent synthetic data for WolfPubDB')
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help=f'multiplier for the default sizes {DEFAULT_SIZES}')
+    for entity in DEFAULT_SIZES:
+        parser.add_argument(f'--{entity}', type=int, help=f'number of {entity}, overrides --scale')
+    parser.add_argument('--chapters-per-book', type=int, default=5)
+    parser.add_argument('--articles-per-periodical', type=int, default=5)
+    parser.add_argument('--salary-months', type=int, default=12)
+    parser.add_argument('--skew', type=float, default=2.0,
+                        help='popularity skew of accounts and publications, 1 is uniform')
+    parser.add_argument('--text-size', type=int, default=2000, help='max characters of chapter and article text')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--method', choices=['insert', 'load-data'], default='insert',
+                        help="multi-row inserts or LOAD DATA LOCAL INFILE (needs local_infile enabled on the server)")
+    parser.add_argument('--batch-size', type=int, default=1000, help='rows per multi-row insert')
+    parser.add_argument('--chunk-size', type=int, default=5000, help='entities per worker task and transaction')
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count())
+    parser.add_argument('--fast', action='store_true', help='disable foreign key and unique checks while loading')
+    parser.add_argument('--dry-run', action='store_true', help='print the sizes without loading anything')
+    args = parser.parse_args(argv)
+
+    counts = {entity: getattr(args, entity) if getattr(args, entity) is not None else int(size * args.scale)
+              for entity, size in DEFAULT_SIZES.items()}
+    sizes = Sizes(**counts, chapters_per_book=args.chapters_per_book,
+                  articles_per_periodical=args.articles_per_periodical, salary_months=args.salary_months)
+    print(f'Sizes: {counts}')
+    if args.dry_run:
+        return 0
+    sizes.first_ids = first_ids()
+    generator = DataGenerator(sizes, skew=args.skew, text_size=args.text_size, seed=args.seed)
+    loader = ChunkLoader(args.method, args.batch_size, args.fast)
+    run(generator, loader, args.workers, args.chunk_size)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,257 @@
+"""
+Generates referentially consistent rows for the tables defined in wolfpub/constants.py.
+
+Ids are derived from the position of the row, so every chunk of a table can be generated independently
+(and in parallel) while still pointing to existing parent rows:
+    distributors -> accounts -> orders -> order lines -> bills, accounts -> payments
+    employees -> authors/editors -> salary payments
+    publications -> books/periodicals -> chapters/articles -> writers/reviewers
+"""
+import random
+import re
+from datetime import date, timedelta
+
+from wolfpub.constants import DISTRIBUTORS, ACCOUNTS, EMPLOYEES, AUTHORS, EDITORS, SALARY_PAYMENTS, PUBLICATIONS, \
+    BOOKS, PERIODICALS, CHAPTERS, ARTICLES, WRITE_BOOKS, WRITE_ARTICLES, REVIEW_PUBLICATION, ORDERS, \
+    BOOK_ORDERS_INFO, PERIODICAL_ORDERS_INFO, ACCOUNT_BILLS, ACCOUNT_PAYMENTS
+
+WORDS = ['wolf', 'pack', 'raleigh', 'press', 'river', 'north', 'state', 'data', 'story', 'light', 'harbor', 'stone',
+         'garden', 'winter', 'signal', 'market', 'engine', 'forest', 'letter', 'island', 'bridge', 'silver', 'paper',
+         'science', 'history', 'fiction', 'health', 'sports', 'art', 'travel', 'music', 'ocean', 'city', 'field']
+CITIES = ['Raleigh', 'Durham', 'Cary', 'Chapel Hill', 'Charlotte', 'Greensboro', 'Wilmington', 'Boone', 'Apex']
+TOPICS = ['science', 'technology', 'fiction', 'history', 'sports', 'politics', 'health', 'art']
+START_DATE = date(2018, 1, 1)
+END_DATE = date(2022, 12, 31)
+
+TYPE_PATTERN = re.compile(r'(\w+)(?:\((\d+)(?:,\s*(\d+))?\))?')
+DEFAULT_PATTERN = re.compile(r"default\s+'?([^'\s]+)'?")
+
+
+class ValueFactory(object):
+    """
+    Random values for a column based on its type and constraint in wolfpub/constants.py
+    """
+
+    def __init__(self, rng: random.Random, text_size: int):
+        self.rng = rng
+        self.text_size = text_size
+
+    def words(self, size: int):
+        text = ' '.join(self.rng.choices(WORDS, k=size // 6 + 1))
+        return text[:size]
+
+    def date(self, start: date = START_DATE, end: date = END_DATE):
+        return start + timedelta(days=self.rng.randrange((end - start).days + 1))
+
+    def value(self, column: dict):
+        default = DEFAULT_PATTERN.search(column['constraint'])
+        if default:
+            return default.group(1)
+        col_type, size, scale = TYPE_PATTERN.match(column['type']).groups()
+        size = int(size) if size else 0
+        if col_type == 'bool':
+            return 1
+        if col_type == 'int':
+            return self.rng.randrange(1, min(10 ** size, 2 ** 31))
+        if col_type == 'bigint':
+            return self.rng.randrange(10 ** (size - 1), 10 ** size)
+        if col_type == 'decimal':
+            scale = int(scale or 0)
+            return round(self.rng.uniform(1, min(10 ** (size - scale) - 1, 999)), scale)
+        if col_type == 'date':
+            return self.date().strftime('%Y-%m-%d')
+        if col_type == 'text':
+            return self.words(self.rng.randrange(self.text_size // 2, self.text_size + 1))
+        return self.words(self.rng.randrange(1, size + 1))
+
+
+class Sizes(object):
+    """
+    Number of rows to be generated and the first id of every entity
+    """
+
+    def __init__(self, distributors: int, employees: int, publications: int, orders: int, payments: int,
+                 chapters_per_book: int = 5, articles_per_periodical: int = 5, salary_months: int = 12,
+                 first_ids: dict = None):
+        self.distributors = distributors
+        self.employees = employees
+        self.publications = publications
+        self.orders = orders
+        self.payments = payments
+        self.chapters_per_book = chapters_per_book
+        self.articles_per_periodical = articles_per_periodical
+        self.salary_months = salary_months
+        self.first_ids = {'distributor': 1, 'employee': 1, 'publication': 1, 'order': 1, **(first_ids or {})}
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+
+class DataGenerator(object):
+    """
+    Generates rows for a chunk [start, end) of an entity, chunks are independent of each other
+    """
+    # Entities in load order, the chunks of a stage are loaded concurrently and only refer to the rows of their own
+    # entity or of the earlier stages: publications have authors and editors, orders have publications
+    STAGES = [['distributors', 'employees'], ['publications', 'payments'], ['orders']]
+    # Tables of a chunk are loaded parents first
+    TABLES = [DISTRIBUTORS, ACCOUNTS, EMPLOYEES, AUTHORS, EDITORS, SALARY_PAYMENTS, PUBLICATIONS, BOOKS, PERIODICALS,
+              CHAPTERS, ARTICLES, WRITE_BOOKS, WRITE_ARTICLES, REVIEW_PUBLICATION, ORDERS, BOOK_ORDERS_INFO,
+              PERIODICAL_ORDERS_INFO, ACCOUNT_BILLS, ACCOUNT_PAYMENTS]
+
+    def __init__(self, sizes: Sizes, skew: float = 2.0, text_size: int = 2000, seed: int = 0):
+        self.sizes = sizes
+        self.skew = skew
+        self.text_size = text_size
+        self.seed = seed
+
+    def rows(self, table: dict, rng: random.Random, values: dict):
+        """
+        Row for the table, columns not given in values are filled based on their definition, except the generated ones
+        and the ones defaulting to the current time
+        """
+        factory = ValueFactory(rng, self.text_size)
+        row = {}
+        for column, definition in table['columns'].items():
+            if column in values:
+                row[column] = values[column]
+            elif 'auto_increment' not in definition['constraint'] and not definition['constraint'].startswith('as (') \
+                    and 'default current_timestamp' not in definition['constraint']:
+                row[column] = factory.value(definition)
+        return row
+
+    def pick(self, rng: random.Random, first_id: int, count: int):
+        """
+        Skewed pick of an id, skew 1 is uniform, higher values concentrate the picks on the first ids
+        """
+        return first_id + min(int(count * rng.random() ** self.skew), count - 1)
+
+    # Deterministic values shared between entities, so chunks do not have to look up each other
+    @staticmethod
+    def price(publication_id: int):
+        return round(5 + (publication_id * 2654435761 % 9500) / 100, 2)
+
+    def is_book(self, publication_id: int):
+        return (publication_id - self.sizes.first_ids['publication']) % 2 == 0
+
+    def emp_id(self, index: int):
+        return f"{'E' if index % 3 == 0 else 'A'}{self.sizes.first_ids['employee'] + index:05d}"
+
+    def generate(self, entity: str, start: int, end: int):
+        """
+        :return: {table_name: (columns, rows)} for the rows of the entity with index in [start, end)
+        """
+        rng = random.Random(f'{self.seed}-{entity}-{start}')
+        tables = {}
+
+        def add(table: dict, values: dict):
+            row = self.rows(table, rng, values)
+            tables.setdefault(table['table_name'], (list(row.keys()), []))[1].append(list(row.values()))
+
+        getattr(self, f'_{entity}')(start, end, rng, add)
+        return {table['table_name']: tables[table['table_name']] for table in self.TABLES
+                if table['table_name'] in tables}
+
+    def _distributors(self, start: int, end: int, rng: random.Random, add):
+        for index in range(start, end):
+            distributor_id = self.sizes.first_ids['distributor'] + index
+            add(DISTRIBUTORS, {'distributor_id': distributor_id, 'name': f'distributor {distributor_id}',
+                               'city': rng.choice(CITIES), 'phone_number': rng.randrange(10 ** 9, 2 ** 31),
+                               'distributor_type': rng.choice(['wholesale', 'bookstore', 'library'])})
+            add(ACCOUNTS, {'account_id': distributor_id, 'distributor_id': distributor_id, 'balance': 0,
+                           'contact_email': f'distributor_{distributor_id}@wolfpub.com',
+                           'periodicity': rng.choice(['monthly', 'quarterly', 'weekly', 'biweekly'])})
+
+    def _employees(self, start: int, end: int, rng: random.Random, add):
+        factory = ValueFactory(rng, self.text_size)
+        for index in range(start, end):
+            emp_id = self.emp_id(index)
+            number = self.sizes.first_ids['employee'] + index
+            is_editor = emp_id.startswith('E')
+            add(EMPLOYEES, {'emp_id': emp_id, 'personnel_id': f'{number % 10000:04d}',
+                            'ssn': f'{number // 1000000 % 1000:03d}-{number // 10000 % 100:02d}-{number % 10000:04d}',
+                            'gender': rng.choice(['M', 'F']), 'age': rng.randrange(21, 70),
+                            'phone_number': rng.randrange(10 ** 9, 4 * 10 ** 9),
+                            'email_id': f'{emp_id.lower()}@wolfpub.com',
+                            'job_type': 'staff editor' if is_editor else 'staff author'})
+            if is_editor:
+                add(EDITORS, {'emp_id': emp_id, 'payment_frequency': 'monthly'})
+            else:
+                add(AUTHORS, {'emp_id': emp_id, 'payment_frequency': 'monthly',
+                              'author_type': 'journalist' if index % 3 == 2 else 'writer'})
+            for month in range(self.sizes.salary_months):
+                send_date = date(END_DATE.year, 1, 1) - timedelta(days=31 * month)
+                add(SALARY_PAYMENTS, {'emp_id': emp_id, 'amount': round(rng.uniform(1000, 9000), 2),
+                                      'send_date': send_date.strftime('%Y-%m-%d'),
+                                      'received_date': factory.date(send_date, send_date + timedelta(days=5))
+                                      .strftime('%Y-%m-%d')})
+
+    def _publications(self, start: int, end: int, rng: random.Random, add):
+        factory = ValueFactory(rng, self.text_size)
+        for index in range(start, end):
+            publication_id = self.sizes.first_ids['publication'] + index
+            publication_date = factory.date()
+            add(PUBLICATIONS, {'publication_id': publication_id, 'topic': rng.choice(TOPICS),
+                               'title': f'{factory.words(40)} {publication_id}',
+                               'price': self.price(publication_id),
+                               'publication_date': publication_date.strftime('%Y-%m-%d')})
+            creation_date = (publication_date - timedelta(days=rng.randrange(1, 365))).strftime('%Y-%m-%d')
+            author = self.emp_id(self.pick(rng, 0, self.sizes.employees)) if self.sizes.employees else None
+            if self.is_book(publication_id):
+                add(BOOKS, {'publication_id': publication_id, 'isbn': f'978-{publication_id:013d}',
+                            'creation_date': creation_date, 'edition': 1, 'book_id': publication_id})
+                for chapter_id in range(1, self.sizes.chapters_per_book + 1):
+                    add(CHAPTERS, {'chapter_id': chapter_id, 'publication_id': publication_id})
+                if author and author.startswith('A'):
+                    add(WRITE_BOOKS, {'emp_id': author, 'publication_id': publication_id})
+            else:
+                periodical_type = rng.choice(['magazine', 'journal'])
+                issue = f'week{rng.randrange(1, 53)}' if periodical_type == 'magazine' \
+                    else f'month{rng.randrange(1, 13)}'
+                add(PERIODICALS, {'publication_id': publication_id, 'issn': f'{publication_id:08d}',
+                                  'issue': issue, 'periodical_type': periodical_type,
+                                  'periodical_id': publication_id})
+                for article_id in range(1, self.sizes.articles_per_periodical + 1):
+                    add(ARTICLES, {'article_id': article_id, 'publication_id': publication_id,
+                                   'creation_date': creation_date, 'topic': rng.choice(TOPICS)})
+                    if author and author.startswith('A'):
+                        add(WRITE_ARTICLES, {'emp_id': author, 'publication_id': publication_id,
+                                             'article_id': article_id})
+            if self.sizes.employees > 3:
+                editor = self.emp_id(3 * rng.randrange((self.sizes.employees - 1) // 3 + 1))
+                add(REVIEW_PUBLICATION, {'emp_id': editor, 'publication_id': publication_id})
+
+    def _orders(self, start: int, end: int, rng: random.Random, add):
+        factory = ValueFactory(rng, self.text_size)
+        for index in range(start, end):
+            order_id = self.sizes.first_ids['order'] + index
+            account_id = self.pick(rng, self.sizes.first_ids['distributor'], self.sizes.distributors)
+            order_date = factory.date()
+            publication_ids = {self.pick(rng, self.sizes.first_ids['publication'], self.sizes.publications)
+                               for _ in range(rng.randrange(1, 4))}
+            total_price = 0
+            quantities = 0
+            for publication_id in publication_ids:
+                quantity = rng.randrange(1, 20)
+                price = round(self.price(publication_id) * quantity, 2)
+                total_price += price
+                quantities += quantity
+                add(BOOK_ORDERS_INFO if self.is_book(publication_id) else PERIODICAL_ORDERS_INFO,
+                    {'order_id': order_id, 'publication_id': publication_id, 'quantity': quantity, 'price': price})
+            shipping_cost = min(2 * quantities, 100)
+            add(ORDERS, {'order_id': order_id, 'account_id': account_id,
+                         'order_date': order_date.strftime('%Y-%m-%d'), 'shipping_cost': shipping_cost,
+                         'delivery_date': (order_date + timedelta(days=rng.randrange(3, 15))).strftime('%Y-%m-%d'),
+                         'total_price': round(total_price, 2)})
+            add(ACCOUNT_BILLS, {'account_id': account_id, 'order_id': order_id,
+                                'amount': round(total_price + shipping_cost, 2),
+                                'bill_date': order_date.strftime('%Y-%m-%d')})
+
+    def _payments(self, start: int, end: int, rng: random.Random, add):
+        for _ in range(start, end):
+            add(ACCOUNT_PAYMENTS, {'account_id': self.pick(rng, self.sizes.first_ids['distributor'],
+                                                           self.sizes.distributors),
+                                   'amount': round(rng.uniform(10, 999), 2)})
+
+    def count(self, entity: str):
+        return getattr(self.sizes, entity)
@@ -0,0 +1,75 @@
+"""
+Loads generated chunks into MariaDB, every worker process uses its own connection
+"""
+import os
+import tempfile
+
+from wolfpub.api.utils.mariadb_connector import MariaDBConnector
+from wolfpub.api.utils.query_generator import QueryGenerator
+
+
+class ChunkLoader(object):
+    """
+    Loads the tables of one chunk in one transaction with multi-row inserts or LOAD DATA LOCAL INFILE
+    """
+
+    def __init__(self, method: str = 'insert', batch_size: int = 1000, fast: bool = False):
+        self.method = method
+        self.batch_size = batch_size
+        self.fast = fast
+        self.query_gen = QueryGenerator()
+        self.db = None
+
+    def connector(self):
+        # Created lazily, so the connection belongs to the worker process
+        if self.db is None:
+            self.db = MariaDBConnector(connect_options={'local_infile': True} if self.method == 'load-data' else {})
+        return self.db
+
+    @staticmethod
+    def tsv_value(value):
+        if value is None:
+            return '\\N'
+        return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n')
+
+    def insert(self, cursor, table_name: str, columns: list, rows: list):
+        # Executed on the cursor directly, logging every generated statement would flood the log file
+        for query in self.query_gen.bulk_insert(table_name, (dict(zip(columns, row)) for row in rows), columns,
+                                                max_rows=self.batch_size):
+            cursor.execute(query)
+
+    def load_data(self, cursor, table_name: str, columns: list, rows: list):
+        with tempfile.NamedTemporaryFile('w', suffix='.tsv', delete=False) as tsv:
+            for row in rows:
+                tsv.write('\t'.join(self.tsv_value(value) for value in row) + '\n')
+        try:
+            cursor.execute(f"LOAD DATA LOCAL INFILE '{tsv.name}' INTO TABLE {table_name} "
+                           f"FIELDS TERMINATED BY '\\t' ({', '.join(columns)})")
+        finally:
+            os.remove(tsv.name)
+
+    def load(self, tables: dict):
+        """
+        :param tables: {table_name: (columns, rows)} in load order
+        :return: number of rows loaded
+        """
+        with self.connector().transaction() as cursor:
+            if self.fast:
+                cursor.execute('SET foreign_key_checks = 0, unique_checks = 0')
+            for table_name, (columns, rows) in tables.items():
+                if self.method == 'load-data':
+                    self.load_data(cursor, table_name, columns, rows)
+                else:
+                    self.insert(cursor, table_name, columns, rows)
+        return sum(len(rows) for _, rows in tables.values())
+
+    def update_balances(self, first_account_id: int, last_account_id: int):
+        """
+        Opening balance of the generated accounts is the sum of their bills minus their payments, the generated bills
+        and payments have no ledger entries
+        """
+        db = self.connector()
+        db.execute([f'update accounts a set balance = '
+                    f'(select coalesce(sum(amount), 0) from account_bills b where b.account_id = a.account_id) - '
+                    f'(select coalesce(sum(amount), 0) from account_payments p where p.account_id = a.account_id) '
+                    f'where a.account_id between {first_account_id} and {last_account_id}'])
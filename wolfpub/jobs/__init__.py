@@ -0,0 +1,5 @@
+"""
+Background jobs of the Wolf Pub API: submitted to the jobs table and run by a pool of worker processes
+
+    python -m wolfpub.jobs --workers 4
+"""
@@ -0,0 +1,52 @@
+"""
+Worker pool for the background jobs
+
+    python -m wolfpub.jobs --workers 4
+"""
+import argparse
+import multiprocessing
+import signal
+import sys
+
+from wolfpub.config import API_SETTINGS
+
+
+def work(stop_event, poll_interval: float, backoff: float, stale_seconds: int):
+    # Ctrl+C reaches the whole process group, the parent sets the stop event and every worker finishes its job first
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    from wolfpub.jobs.worker import Worker
+    Worker(poll_interval=poll_interval, backoff=backoff, stale_seconds=stale_seconds).run(stop_event)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m wolfpub.jobs', description='Run the background jobs of WolfPub')
+    parser.add_argument('--workers', type=int, default=API_SETTINGS.get('JOB_WORKERS', 2),
+                        help='worker processes, each runs one job at a time')
+    parser.add_argument('--poll-interval', type=float, default=API_SETTINGS.get('JOB_POLL_SECONDS', 2))
+    parser.add_argument('--backoff', type=float, default=API_SETTINGS.get('JOB_RETRY_BACKOFF_SECONDS', 30),
+                        help='seconds before the first retry of a failed job, doubled for every further attempt')
+    parser.add_argument('--stale-seconds', type=int, default=API_SETTINGS.get('JOB_STALE_SECONDS', 600),
+                        help='running jobs without heartbeat for that long are requeued')
+    args = parser.parse_args(argv)
+
+    stop_event = multiprocessing.Event()
+    workers = [multiprocessing.Process(target=work, name=f'wolfpub-job-worker-{i}',
+                                       args=(stop_event, args.poll_interval, args.backoff, args.stale_seconds))
+               for i in range(args.workers)]
+    for worker in workers:
+        worker.start()
+
+    def stop(signum, frame):
+        print('Stopping, waiting for the running jobs to finish', flush=True)
+        stop_event.set()
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    print(f'Started {args.workers} job workers', flush=True)
+    for worker in workers:
+        worker.join()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""
+Job types: functions taking the JobContext and the params of the job, their return value is stored as result
+"""
+from wolfpub.api.handlers.account import AccountBillHandler
+from wolfpub.api.handlers.orders import OrderHandler
+from wolfpub.api.handlers.report import ReportHandler
+from wolfpub.api.utils.mariadb_connector import MariaDBConnector
+from wolfpub.catalog.importer import CatalogImporter
+from wolfpub.config import API_SETTINGS
+
+
+def monthly_report(context, params: dict):
+    """
+    Computes and materializes the monthly report
+    :param params: {'month': 4, 'year': 2022}
+    """
+    handler = ReportHandler(MariaDBConnector())
+    context.progress(0, message='Computing report')
+    report = handler.compute_monthly_report(params['month'], params['year'])
+    context.progress(90, message='Materializing report')
+    handler.materialize_monthly_report(params['month'], params['year'], report)
+    return {'month': params['month'], 'year': params['year'], 'total_revenue': report['total_revenue'],
+            'total_expense': report['total_expense'],
+            'order_per_pub_per_dist': len(report['order_per_pub_per_dist'])}
+
+
+def monthly_reports_backfill(context, params: dict):
+    """
+    Materializes the closed months without a complete report
+    :param params: {'months_back': 24}
+    """
+    context.progress(0, message='Backfilling monthly reports')
+    ReportHandler(MariaDBConnector()).refresh_monthly_reports(int(params.get('months_back', 12)))
+    return {'months_back': params.get('months_back', 12)}
+
+
+def account_bills(context, params: dict):
+    """
+    Bills the orders of the account which are not billed yet
+    :param params: {'account_id': 3}
+    """
+    db = MariaDBConnector()
+    orders = OrderHandler(db).get_orders(params['account_id'])
+    bill_ids = AccountBillHandler(db).create_bills(params['account_id'], orders, progress=context.progress)
+    return {'bill_ids': bill_ids}
+
+
+def catalog_import(context, params: dict):
+    """
+    Imports a catalog file readable by the workers, a retried job resumes after the last committed chunk
+    :param params: {'path': '/data/backlist.jsonl', 'import_id': 'partner-backlist', 'format': 'jsonl'}
+    """
+    importer = CatalogImporter(MariaDBConnector(), API_SETTINGS.get('CATALOG_IMPORT_CHUNK_SIZE', 500),
+                               API_SETTINGS.get('CATALOG_IMPORT_BATCH_SIZE', 1000),
+                               API_SETTINGS.get('CATALOG_IMPORT_MAX_ERRORS', 100))
+    context.progress(0, message='Importing catalog')
+    return importer.run(params['path'], params.get('import_id'), params.get('format'), progress=context.progress)
+
+
+JOB_TYPES = {
+    'monthly_report': monthly_report,
+    'monthly_reports_backfill': monthly_reports_backfill,
+    'account_bills': account_bills,
+    'catalog_import': catalog_import,
+}
@@ -0,0 +1,110 @@
+"""
+Worker: Claims due jobs from the jobs table and runs them, one job at a time
+"""
+import os
+import socket
+import time
+
+from wolfpub.api.handlers.jobs import JobHandler
+from wolfpub.api.utils.custom_exceptions import JobCancelled
+from wolfpub.api.utils.mariadb_connector import MariaDBConnector
+from wolfpub.api.utils.scheduler import PeriodicTask
+from wolfpub.jobs.tasks import JOB_TYPES
+from wolfpub.logger import WOLFPUB_LOGGER as logger
+
+
+class JobContext(object):
+    """
+    Passed to the job functions to report their progress, raises JobCancelled once the cancellation was requested
+    """
+
+    def __init__(self, handler: JobHandler, job: dict, report_interval: float = 1.0):
+        self.handler = handler
+        self.job = job
+        self.report_interval = report_interval
+        self.reported_at = 0
+        self.percent = None
+
+    def progress(self, done: float, total: float = 100, message: str = None):
+        """
+        Stores the progress in percent, at most every report_interval seconds unless the message changes
+        """
+        percent = min(int(done * 100 / total), 99) if total else 0
+        if percent == self.percent and not message:
+            return
+        if not message and time.monotonic() - self.reported_at < self.report_interval:
+            return
+        self.percent = percent
+        self.reported_at = time.monotonic()
+        if self.handler.progress(self.job['job_id'], percent, message):
+            raise JobCancelled(f"Job with id '{self.job['job_id']}' cancelled")
+
+
+class Worker(object):
+    """
+    Runs the jobs of JOB_TYPES, failed jobs are retried with exponential backoff until max_attempts
+    """
+
+    def __init__(self, name: str = None, poll_interval: float = 2, backoff: float = 30, stale_seconds: int = 600,
+                 handler_factory=None):
+        """
+        :param poll_interval: seconds to wait when no job is due
+        :param backoff: seconds before the first retry, doubled for every further attempt
+        :param stale_seconds: running jobs without progress for that long are requeued, their worker is lost
+        :param handler_factory: function returning a JobHandler, called for the worker and for the heartbeat of each job
+        """
+        self.name = name or f'{socket.gethostname()}:{os.getpid()}'
+        self.handler_factory = handler_factory or (lambda: JobHandler(MariaDBConnector()))
+        self.handler = self.handler_factory()
+        self.poll_interval = poll_interval
+        self.backoff = backoff
+        self.stale_seconds = stale_seconds
+
+    def execute(self, job: dict):
+        function = JOB_TYPES.get(job['job_type'])
+        logger.info(f"Worker {self.name} running job {job['job_id']} ({job['job_type']}), attempt {job['attempts']}")
+        # Heartbeat of its own handler, so long steps without progress reports are not taken for a lost worker. The
+        # claim set updated_at, the first beat is due one interval later
+        heartbeat_handler = self.handler_factory()
+        heartbeat = PeriodicTask(f"job-{job['job_id']}-heartbeat", lambda: heartbeat_handler.heartbeat(job['job_id']),
+                                 self.stale_seconds / 4, delay=self.stale_seconds / 4)
+        heartbeat.start()
+        try:
+            if function is None:
+                raise ValueError(f"Unknown job type '{job['job_type']}'")
+            result = function(JobContext(self.handler, job), job['params'])
+            self.handler.finish(job['job_id'], result)
+        except JobCancelled:
+            self.handler.cancelled(job['job_id'])
+        except Exception as e:
+            logger.error(f"Job {job['job_id']} failed: {e.__class__.__name__}: {e}")
+            self.handler.fail(job, f'{e.__class__.__name__}: {e}', self.backoff, retry=function is not None)
+        finally:
+            heartbeat.stop()
+            heartbeat.join()
+
+    def run_once(self):
+        """
+        :return: True if a job was run
+        """
+        job = self.handler.claim(self.name)
+        if job is None:
+            return False
+        self.execute(job)
+        return True
+
+    def run(self, stop_event):
+        """
+        Runs jobs until the stop_event is set, the running job is always finished first
+        """
+        requeued_at = 0
+        while not stop_event.is_set():
+            try:
+                if time.monotonic() - requeued_at >= self.stale_seconds / 2:
+                    self.handler.requeue_stale(self.stale_seconds)
+                    requeued_at = time.monotonic()
+                if self.run_once():
+                    continue
+            except Exception as e:
+                logger.error(f'Worker {self.name} could not claim a job: {e}')
+            stop_event.wait(self.poll_interval)
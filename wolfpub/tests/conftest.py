@@ -4,7 +4,8 @@ Module with pytest fixtures
 import pytest
 from pytest_mysql import factories
 
-from wolfpub.constants import DISTRIBUTORS, ACCOUNTS, ORDERS, BOOK_ORDERS_INFO, PERIODICAL_ORDERS_INFO
+from wolfpub.constants import DISTRIBUTORS, ACCOUNTS, ORDERS, BOOK_ORDERS_INFO, PERIODICAL_ORDERS_INFO, ACCOUNT_LEDGER, \
+    ACCOUNT_BALANCE_SNAPSHOTS
 
 mysql_in_docker = factories.mysql_noproc()
 mock_mysql = factories.mysql('mysql_in_docker')
@@ -35,6 +36,20 @@ def accounts_table():
         tables.append(ACCOUNTS)
 
 
+@pytest.fixture
+def account_ledger_table():
+    global tables
+    if ACCOUNT_LEDGER not in tables:
+        tables.append(ACCOUNT_LEDGER)
+
+
+@pytest.fixture
+def account_balance_snapshots_table():
+    global tables
+    if ACCOUNT_BALANCE_SNAPSHOTS not in tables:
+        tables.append(ACCOUNT_BALANCE_SNAPSHOTS)
+
+
 @pytest.fixture
 def orders_table():
     global tables
@@ -85,3 +100,99 @@ def add_record(mock_mysql):
         cur.execute(insert_query)
     mock_mysql.commit()
     cur.close()
+
+
+class RecordingCursor(object):
+    """
+    Cursor of RecordingConnection, a query returns the rows of its result in RecordingConnection.results
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.rows = []
+        self.description = []
+        self.rowcount = -1
+        self.lastrowid = None
+
+    def execute(self, query: str):
+        self.connection.queries.append(query)
+        rows = self.connection.result(query)
+        self.description = [(column,) for column in rows[0]] if rows else []
+        self.rows = [tuple(row.values()) for row in rows]
+        self.rowcount = self.connection.rowcount
+        self.lastrowid = len(self.connection.queries)
+
+    def fetchall(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+    def fetchmany(self, size: int):
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+
+class RecordingConnection(object):
+    """
+    Stands in for the MariaDB connection and records the executed queries.
+    results maps a part of a query to its rows, or to a function of the query returning the rows, the first part found
+    in the query wins, compound statements are matched by their result query. Queries without a result return no rows.
+    The last row id of a query is the number of queries executed so far
+    """
+    BLOCK_START = 'BEGIN NOT ATOMIC '
+    TRANSACTION_START = 'DECLARE EXIT HANDLER FOR SQLEXCEPTION BEGIN ROLLBACK; RESIGNAL; END; START TRANSACTION; '
+
+    def __init__(self):
+        self.results = {}
+        self.rowcount = 1
+        self.queries = []
+        self.commits = 0
+        self.rollbacks = 0
+        self.autocommit = True
+
+    def cursor(self, **kwargs):
+        return RecordingCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        pass
+
+    @classmethod
+    def split(cls, query: str):
+        """
+        :return: queries of a compound statement (MariaDBConnector.compound_statement), [query] for other queries
+        """
+        if not query.startswith(cls.BLOCK_START):
+            return [query]
+        body = query[len(cls.BLOCK_START):-len('; END')]
+        if body.startswith(cls.TRANSACTION_START):
+            body = body[len(cls.TRANSACTION_START):]
+        return [statement for statement in body.split('; ') if statement != 'COMMIT']
+
+    @property
+    def statements(self):
+        """
+        Executed queries with the compound statements split into their queries
+        """
+        return [statement for query in self.queries for statement in self.split(query)]
+
+    def result(self, query: str):
+        query = self.split(query)[-1]
+        for part, rows in self.results.items():
+            if part in query:
+                return rows(query) if callable(rows) else [dict(row) for row in rows]
+        return []
+
+
+@pytest.fixture
+def recording_connection(mocker):
+    """
+    Connection of every MariaDBConnector, records the queries and returns the rows set in its results
+    """
+    connection = RecordingConnection()
+    mocker.patch('wolfpub.api.utils.mariadb_connector.MariaDBConnector.connect', return_value=connection)
+    return connection
@@ -0,0 +1,171 @@
+"""
+Test Cases for the accounts, the account ledger and the account summary
+"""
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from wolfpub.api.handlers.account import AccountHandler, AccountLedgerHandler, AccountBillHandler, \
+    AccountSummaryHandler
+from wolfpub.api.utils.mariadb_connector import MariaDBConnector
+from wolfpub.api.utils.projection import columns_of
+from wolfpub.constants import ACCOUNTS, DISTRIBUTORS
+
+account_bill_handler = AccountBillHandler(MariaDBConnector())
+
+
+def ledger_results(opening: str, entries: list):
+    """
+    :return: results of the recording connection serving the opening balance and the ledger entries after the
+             requested entry id
+    """
+    return {'as last_entry_id': [{'balance': Decimal(opening), 'last_entry_id': 0}],
+            'from account_ledger': lambda query: [entry for entry in entries if entry['entry_id'] >
+                                                  int(query.split("entry_id > '")[1].split("'")[0])],
+            '@payment_id as payment_id': [{'payment_id': 5}]}
+
+
+class TestAccountHandler(object):
+    """
+    Test Cases for reading accounts
+    """
+
+    def test_handler_columns(self, recording_connection):
+        """
+        Positive Test Case: handlers select the columns of their tables, the columns of a natural join once
+        """
+        columns = columns_of(ACCOUNTS, DISTRIBUTORS)
+        assert columns.count('distributor_id') == 1
+        assert columns[:len(ACCOUNTS['columns'])] == list(ACCOUNTS['columns'])
+        recording_connection.results['from accounts'] = [{'account_id': 1}]
+        AccountHandler(MariaDBConnector()).get('1')
+        assert '*' not in recording_connection.queries[0]
+        assert recording_connection.queries[0].startswith(f"select {', '.join(columns)} from accounts natural join "
+                                                          f"distributors")
+
+
+class TestAccountLedger(object):
+    """
+    Test Cases for the balances computed from the ledger
+    """
+
+    def setup_method(self):
+        AccountLedgerHandler.balances.clear()
+
+    def test_balance_from_opening_and_entries(self, recording_connection):
+        """
+        Positive Test Case: the snapshot (opening balance) is cached, the entries after it are read on every read
+        """
+        entries = [{'entry_id': 1, 'amount': Decimal('24.00')}, {'entry_id': 3, 'amount': Decimal('5.50')}]
+        recording_connection.results = ledger_results('10.00', entries)
+        handler = AccountLedgerHandler(MariaDBConnector())
+        assert handler.balance(3) == 39.5
+        assert AccountLedgerHandler.balances.get('3') == (Decimal('10.00'), 0)
+        # Entry 2 was written by a transaction committing after entry 3
+        entries.insert(1, {'entry_id': 2, 'amount': Decimal('-4.00')})
+        assert handler.balance(3) == 35.5
+        assert len(recording_connection.queries) == 3 and "entry_id > '0'" in recording_connection.queries[-1]
+
+    def test_snapshot_waits_for_late_entry(self, recording_connection):
+        """
+        Positive Test Case: the snapshot locks the account rows before reading the entries, a transaction still
+        appending an entry with a lower id commits first and its entry is part of the snapshot
+        """
+        entries = [{'entry_id': 1, 'amount': Decimal('24.00'), 'committed': True},
+                   {'entry_id': 2, 'amount': Decimal('-4.00'), 'committed': False},
+                   {'entry_id': 3, 'amount': Decimal('5.50'), 'committed': True}]
+        snapshot = {}
+
+        def lock_accounts(query):
+            # Granted once the transactions holding the shared lock of the account committed
+            for entry in entries:
+                entry['committed'] = True
+            return [{'account_id': 3}]
+
+        def insert_snapshot(query):
+            committed = [entry for entry in entries if entry['committed']]
+            snapshot.update(balance=sum(entry['amount'] for entry in committed),
+                            last_entry_id=max(entry['entry_id'] for entry in committed))
+            return []
+
+        recording_connection.results = {'having max(l.entry_id)': [{'account_id': 3}, {'account_id': 4}],
+                                         ' for update': lock_accounts, 'insert into account_balance_snapshots':
+                                         insert_snapshot}
+        assert AccountLedgerHandler(MariaDBConnector()).take_snapshots() == 2
+        assert snapshot == {'balance': Decimal('25.50'), 'last_entry_id': 3}
+        assert recording_connection.commits == 1
+        assert recording_connection.queries[1] == \
+               "select account_id from accounts where account_id in (3, 4) for update"
+        assert "where l.account_id in (3, 4) and l.entry_id > coalesce(s.last_entry_id, 0) " \
+               "group by" in recording_connection.queries[2]
+
+    def test_payment_is_appended(self, recording_connection):
+        """
+        Positive Test Case: payments lock the account row and append a negative entry instead of updating the row
+        """
+        recording_connection.results = ledger_results('0', [])
+        assert account_bill_handler.pay_bills('3', 20, '2022-04-12') == {'payment_id': 5}
+        assert recording_connection.statements == [
+            "select account_id into @ledger_account_id from accounts where account_id='3' lock in share mode",
+            "insert into account_payments (account_id, amount, payment_date) values ('3', 20, '2022-04-12')",
+            'set @payment_id = last_insert_id()',
+            "insert into account_ledger (account_id, entry_type, reference_id, amount) "
+            "values ('3', 'payment', @payment_id, -20.0)",
+            'select @payment_id as payment_id']
+
+
+class TestAccountSummary(object):
+    """
+    Test Cases for the order history summary
+    """
+
+    def setup_method(self):
+        AccountLedgerHandler.balances.clear()
+        AccountSummaryHandler.summaries.clear()
+
+    def test_summary_from_rollup(self, recording_connection):
+        """
+        Positive Test Case: months come from the detail rows and totals from the rollup row, payments drop the cache
+        """
+        recording_connection.results = ledger_results('0', [{'entry_id': 1, 'amount': Decimal('42.00')}])
+        recording_connection.results['with rollup'] = [
+            {'year': 2022, 'month': 1, 'orders': 2, 'spend': Decimal('30.00'), 'last_order_date': date(2022, 1, 20),
+             'last_payment_date': date(2022, 2, 1)},
+            {'year': 2022, 'month': 3, 'orders': 1, 'spend': Decimal('12.00'), 'last_order_date': date(2022, 3, 2),
+             'last_payment_date': date(2022, 2, 1)},
+            {'year': 2022, 'month': None, 'orders': 3, 'spend': Decimal('42.00'),
+             'last_order_date': date(2022, 3, 2), 'last_payment_date': date(2022, 2, 1)},
+            {'year': None, 'month': None, 'orders': 3, 'spend': Decimal('42.00'),
+             'last_order_date': date(2022, 3, 2), 'last_payment_date': date(2022, 2, 1)}]
+        handler = AccountSummaryHandler(MariaDBConnector())
+        summary = handler.get('3')
+        assert summary == {'account_id': 3, 'orders': 3, 'total_spend': 42.0, 'balance': 42.0,
+                           'last_order_date': '2022-03-02', 'last_payment_date': '2022-02-01',
+                           'monthly_spend': [{'month': '2022-01', 'orders': 2, 'spend': 30.0},
+                                             {'month': '2022-03', 'orders': 1, 'spend': 12.0}]}
+        assert recording_connection.queries[0] == "select year(order_date) as year, month(order_date) as month, " \
+                                "count(order_id) as orders, coalesce(sum(total_price + shipping_cost), 0) as spend, " \
+                                "max(order_date) as last_order_date, max(last_payment_date) as last_payment_date " \
+                                "from accounts left join orders using (account_id) left join (select account_id, " \
+                                "max(payment_date) as last_payment_date from account_payments group by account_id) " \
+                                "as payments using (account_id) where account_id='3' and is_active='1' " \
+                                "group by year(order_date), month(order_date) with rollup"
+        queries = len(recording_connection.queries)
+        assert handler.get('3') is summary and len(recording_connection.queries) == queries
+        account_bill_handler.pay_bills('3', 20, '2022-04-12')
+        assert AccountSummaryHandler.summaries.get('3') is None
+
+    def test_summary_without_orders(self, recording_connection):
+        """
+        Negative Test Case: an account without orders has zero totals, an unknown account is not found
+        """
+        recording_connection.results = ledger_results('0', [])
+        recording_connection.results['with rollup'] = [{'year': None, 'month': None, 'orders': 0, 'spend': 0,
+                                                        'last_order_date': None, 'last_payment_date': None}] * 3
+        handler = AccountSummaryHandler(MariaDBConnector())
+        summary = handler.get('3')
+        assert summary['orders'] == 0 and summary['monthly_spend'] == [] and summary['last_order_date'] is None
+        recording_connection.results['with rollup'] = []
+        with pytest.raises(IndexError):
+            handler.get('4')
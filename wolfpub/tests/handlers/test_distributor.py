@@ -85,6 +85,7 @@ class TestDeleteDistributor(object):
 
     def test_delete_distributor_with_outstanding_balance(self, mocker, mock_mysql,
                                                 distributors_table, accounts_table,
+                                                account_ledger_table, account_balance_snapshots_table,
                                                 mock_table, add_record):
         """
         Negative Test Case
@@ -0,0 +1,56 @@
+"""
+Test Cases for reserving and replaying idempotency keys
+"""
+import pytest
+
+from wolfpub.api.handlers.idempotency import IdempotencyHandler
+from wolfpub.api.utils.custom_exceptions import IdempotencyConflict
+from wolfpub.api.utils.mariadb_connector import MariaDBConnector
+
+idempotency_handler = IdempotencyHandler(MariaDBConnector(), ttl=600, lock_seconds=60)
+
+
+class TestIdempotencyHandler(object):
+    """
+    Test Cases for reserving and replaying idempotency keys
+    """
+
+    def test_reserve_key(self, recording_connection):
+        """
+        Positive Test Case: a new key is reserved, expired and abandoned rows of the key are deleted first
+        """
+        reservation, stored = idempotency_handler.begin('3', 'order-1', 'abc')
+        assert stored is None and len(reservation) == 32
+        assert recording_connection.queries == [
+            "delete from idempotency_keys where account_id='3' and idempotency_key='order-1' and (expires_at < now() "
+            "or (status = 'processing' and created_at < now() - interval 60 second))",
+            "insert ignore into idempotency_keys (account_id, idempotency_key, request_hash, reservation, expires_at) "
+            f"values ('3', 'order-1', 'abc', '{reservation}', now() + interval 600 second)"]
+        assert reservation != idempotency_handler.begin('3', 'order-1', 'abc')[0]
+
+    def test_completed_by_its_reservation(self):
+        """
+        Positive Test Case: only the request holding the reservation completes or releases the key
+        """
+        assert idempotency_handler.complete_query('3', 'order-1', 'a1') == \
+               "update idempotency_keys set status='completed', order_id=@order_id where account_id='3' and " \
+               "idempotency_key='order-1' and status='processing' and reservation='a1'"
+
+    def test_replay_and_conflicts(self, recording_connection):
+        """
+        Negative Test Case: a used key replays the stored response, unless the request differs or is still running
+        """
+        recording_connection.rowcount = 0
+        recording_connection.results['from idempotency_keys'] = [
+            {'request_hash': 'abc', 'status': 'completed', 'order_id': 7, 'response_code': 200,
+             'response': '{"data": {"order_id": 7}, "message": "Order Placed!"}'}]
+        reservation, stored = idempotency_handler.begin('3', 'order-1', 'abc')
+        assert reservation is None
+        assert stored['response'] == {'data': {'order_id': 7}, 'message': 'Order Placed!'}
+        with pytest.raises(IdempotencyConflict):
+            idempotency_handler.begin('3', 'order-1', 'xyz')
+        recording_connection.results['from idempotency_keys'] = [{'request_hash': 'abc', 'status': 'processing'}]
+        with pytest.raises(IdempotencyConflict):
+            idempotency_handler.begin('3', 'order-1', 'abc')
+        with pytest.raises(ValueError):
+            idempotency_handler.begin('3', "order' or 1=1", 'abc')
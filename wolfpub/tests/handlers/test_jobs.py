@@ -0,0 +1,86 @@
+"""
+Test Cases for the background jobs
+"""
+import threading
+import time
+
+import pytest
+
+from wolfpub.api.handlers.jobs import JobHandler
+from wolfpub.api.utils.custom_exceptions import JobCancelled
+from wolfpub.api.utils.mariadb_connector import MariaDBConnector
+from wolfpub.jobs.worker import JobContext, Worker
+
+job_handler = JobHandler(MariaDBConnector())
+
+
+class TestJobHandler(object):
+    """
+    Test Cases for the job queue queries
+    """
+
+    def test_submit_and_retry(self, recording_connection):
+        """
+        Positive Test Case: params are stored as json, failed jobs are retried with exponential backoff
+        """
+        assert job_handler.submit('account_bills', {'account_id': "3'"}) == {'job_id': 1, 'status': 'queued'}
+        job_handler.fail({'job_id': 7, 'attempts': 2, 'max_attempts': 3}, "KeyError: 'x'", backoff=30)
+        job_handler.fail({'job_id': 7, 'attempts': 3, 'max_attempts': 3}, 'KeyError', backoff=30)
+        assert recording_connection.statements == [
+            "insert into jobs (job_type, params, max_attempts) values ('account_bills', '{\"account_id\": \"3\\'\"}', 3)",
+            "update jobs set message='KeyError: \\'x\\'', status='queued', run_after=now() + interval 60 second "
+            "where job_id='7'",
+            "update jobs set message='KeyError', status='failed', finished_at=now() where job_id='7'"]
+
+    def test_cancel_finished_job(self, recording_connection):
+        """
+        Negative Test Case: finished jobs can not be cancelled
+        """
+        recording_connection.results['from jobs'] = [{'job_id': 7, 'status': 'succeeded', 'params': '{}',
+                                                      'result': None}]
+        with pytest.raises(ValueError):
+            job_handler.cancel(7)
+
+
+class TestWorker(object):
+    """
+    Test Cases for running jobs
+    """
+
+    def test_progress_cancelled(self, recording_connection):
+        """
+        Negative Test Case: progress report of a job whose cancellation was requested
+        """
+        recording_connection.results['from jobs'] = [{'cancel_requested': 1}]
+        context = JobContext(job_handler, {'job_id': 7})
+        with pytest.raises(JobCancelled):
+            context.progress(1, 4)
+
+    def test_failed_job_is_retried(self, recording_connection):
+        """
+        Positive Test Case: an error of the job function requeues the job
+        """
+        worker = Worker(name='test', stale_seconds=600, handler_factory=lambda: job_handler)
+        worker.execute({'job_id': 7, 'job_type': 'account_bills', 'params': {}, 'attempts': 1, 'max_attempts': 3})
+        assert recording_connection.statements[-1].startswith("update jobs set message='KeyError: \\'account_id\\'', "
+                                                           "status='queued', run_after=now() + interval 30 second")
+        # The claim set updated_at, a job shorter than the heartbeat interval gets no heartbeat
+        assert not any('set updated_at=now()' in statement for statement in recording_connection.statements)
+
+    def test_heartbeat_of_long_job(self, recording_connection, mocker):
+        """
+        Positive Test Case: a long job gets heartbeats after the first interval, the heartbeat thread ends with the job
+        """
+        handlers = []
+
+        def handler_factory():
+            handlers.append(JobHandler(MariaDBConnector()))
+            return handlers[-1]
+
+        mocker.patch.dict('wolfpub.jobs.worker.JOB_TYPES', {'sleep': lambda context, params: time.sleep(0.25)})
+        worker = Worker(name='test', stale_seconds=0.4, handler_factory=handler_factory)
+        worker.execute({'job_id': 7, 'job_type': 'sleep', 'params': {}, 'attempts': 1, 'max_attempts': 3})
+        heartbeats = [statement for statement in recording_connection.statements if 'set updated_at=now()' in statement]
+        assert len(handlers) == 2
+        assert 1 <= len(heartbeats) <= 3
+        assert not any(thread.name == 'job-7-heartbeat' for thread in threading.enumerate())
@@ -0,0 +1,116 @@
+"""
+Test Cases for listing and placing orders
+"""
+import pytest
+
+from wolfpub.api.handlers.idempotency import IdempotencyHandler
+from wolfpub.api.handlers.orders import OrderHandler, OrderPlacementHandler
+from wolfpub.api.utils.custom_exceptions import IdempotencyConflict
+from wolfpub.api.utils.mariadb_connector import MariaDBConnector
+
+order_handler = OrderHandler(MariaDBConnector())
+order_placement_handler = OrderPlacementHandler(MariaDBConnector())
+
+
+class TestGetOrders(object):
+    """
+    Test Cases for the pages of the orders of an account
+    """
+
+    def test_next_page(self, recording_connection):
+        """
+        Positive Test Case: the page continues after the order id of the cursor with an index range
+        """
+        recording_connection.results['from orders'] = [{'order_id': 9}]
+        assert order_handler.get_orders('4', ['order_id'], 501, [7]) == [{'order_id': 9}]
+        assert recording_connection.queries == ["select order_id from orders where account_id='4' and "
+                                                "order_id > '7' order by order_id limit 501"]
+
+    def test_cursor_of_other_list(self, recording_connection):
+        """
+        Negative Test Case: a cursor with more keys than the sort key of the orders is rejected
+        """
+        with pytest.raises(ValueError):
+            order_handler.get_orders('4', limit=2, after=[1, 2])
+        assert recording_connection.queries == []
+
+
+class TestGetOrder(object):
+    """
+    Test Cases for fetching one order of an account
+    """
+
+    def test_requested_columns(self, recording_connection):
+        """
+        Positive Test Case: the order is returned as a row with the selected columns only
+        """
+        recording_connection.results['from orders'] = [{'total_price': 5}]
+        assert order_handler.get_order('3', '1', ['total_price']) == {'total_price': 5}
+        assert recording_connection.queries == ["select total_price from orders where account_id='3' and "
+                                                "order_id='1'"]
+
+    def test_order_of_other_account(self, recording_connection):
+        """
+        Negative Test Case: an order not placed by the account is not found
+        """
+        with pytest.raises(IndexError):
+            order_handler.get_order('3', '1')
+
+
+class TestOrderPlacement(object):
+    """
+    Test Cases for placing the order and its bill in one transaction
+    """
+
+    def test_place_order(self, recording_connection):
+        """
+        Positive Test Case: account lock, pricing, order, items, bill, ledger entry and idempotency key in one transaction
+        """
+        recording_connection.results = {' from accounts ': [{'account_id': 3, 'balance': 0}],
+                                         ' from books ': [{'publication_id': 4, 'title': 'T', 'edition': 1,
+                                                           'price': 10}]}
+        order = {'delivery_date': '2022-05-01', 'order_date': '2022-04-12',
+                 'items': {'books': [{'title': 'T', 'edition': '1', 'quantity': 2}], 'periodicals': []}}
+        queries = [IdempotencyHandler(MariaDBConnector()).complete_query('3', 'order-1', 'a1')]
+        order = order_placement_handler.place('3', order, queries)
+        assert (order['order_id'], order['bill_id'], order['total_price'], order['shipping_cost']) == (3, 6, 20.0, 4)
+        assert recording_connection.commits == 1
+        assert recording_connection.queries == [
+            "select account_id from accounts where account_id='3' and is_active='1' lock in share mode",
+            "select publication_id, title, edition, price from books natural join publications "
+            "where ((title='T' and edition='1'))",
+            "insert into orders (delivery_date, order_date, account_id, total_price, shipping_cost) "
+            "values ('2022-05-01', '2022-04-12', '3', 20.0, 4)",
+            'set @order_id = last_insert_id()',
+            "insert into book_orders_info (order_id, publication_id, quantity, price) values (@order_id, 4, 2, 20.0)",
+            "insert into account_bills (account_id, order_id, amount, bill_date) "
+            "values ('3', @order_id, 24.0, '2022-04-12')",
+            'set @bill_id = last_insert_id()',
+            "insert into account_ledger (account_id, entry_type, reference_id, amount) values ('3', 'bill', @bill_id, 24.0)",
+            "update idempotency_keys set status='completed', order_id=@order_id "
+            "where account_id='3' and idempotency_key='order-1' and status='processing' and reservation='a1'"]
+
+    def test_place_order_taken_over_by_retry(self, recording_connection):
+        """
+        Negative Test Case: the key was reserved again by a retry, completing the old reservation changes no row and
+        the order of the old request is rolled back
+        """
+        recording_connection.results = {' from accounts ': [{'account_id': 3, 'balance': 0}],
+                                         ' from books ': [{'publication_id': 4, 'title': 'T', 'edition': 1,
+                                                           'price': 10}]}
+        recording_connection.rowcount = 0
+        order = {'items': {'books': [{'title': 'T', 'edition': '1', 'quantity': 2}], 'periodicals': []}}
+        with pytest.raises(IdempotencyConflict):
+            order_placement_handler.place('3', order, [IdempotencyHandler(MariaDBConnector()).complete_query(
+                '3', 'order-1', 'a1')])
+        assert (recording_connection.commits, recording_connection.rollbacks) == (0, 1)
+        assert recording_connection.queries[-1].endswith("reservation='a1'")
+
+    def test_place_order_unknown_account(self, recording_connection):
+        """
+        Negative Test Case: nothing is written for an account which is not registered
+        """
+        with pytest.raises(IndexError):
+            order_placement_handler.place('3', {'items': {'books': [], 'periodicals': []}})
+        assert (recording_connection.commits, recording_connection.rollbacks) == (0, 1)
+        assert len(recording_connection.queries) == 1
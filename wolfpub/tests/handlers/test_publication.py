@@ -0,0 +1,167 @@
+"""
+Test Cases for the publication handlers: series of the titles, versions and chapter texts
+"""
+import threading
+import zlib
+
+from wolfpub.api.handlers.publication import BookHandler, PublicationHandler
+from wolfpub.api.utils.mariadb_connector import MariaDBConnector
+
+book_handler = BookHandler(MariaDBConnector())
+publication_handler = PublicationHandler(MariaDBConnector())
+
+
+class TestPublicationSeries(object):
+    """
+    Test Cases for the allocation of book ids, editions and periodical ids
+    """
+
+    def test_next_edition(self, recording_connection):
+        """
+        Positive Test Case: a book of a known title gets its book_id and next edition in the inserting transaction
+        """
+        recording_connection.results[' for update'] = [{'book_id': 4, 'edition': 3}]
+        output = publication_handler.set({'title': 'Wolf Tales', 'price': 10, 'pub_type': 'book'},
+                                         {'isbn': '1', 'creation_date': '2022-01-01', 'is_available': 1})
+        assert output == {'publication_id': '2'}
+        assert recording_connection.commits == 1
+        assert recording_connection.queries == [
+            "select max(book_id) as book_id, coalesce(max(edition), 0) + 1 as edition from publications "
+            "natural join books where title_key='wolf tales' for update",
+            "insert into publications (title, price) values ('Wolf Tales', 10)",
+            "insert into books (isbn, creation_date, is_available, book_id, edition, publication_id) "
+            "values ('1', '2022-01-01', 1, 4, 3, '2')"]
+
+    def test_new_book(self, recording_connection):
+        """
+        Positive Test Case: a book of a new title gets the highest book_id + 1 from a locked read and its first edition
+        """
+        recording_connection.results = {'where title_key': [{'book_id': None, 'edition': 1}],
+                                         'select book_id from books': [{'book_id': 6}]}
+        book = {'isbn': '1'}
+        publication_handler.set({'title': 'Wolf Tales', 'pub_type': 'book'}, book)
+        assert (book['book_id'], book['edition']) == (7, 1)
+        assert recording_connection.queries[1] == "select book_id from books order by book_id desc limit 1 for update"
+
+    def test_first_book(self, recording_connection):
+        """
+        Negative Test Case: without any book the first title gets book_id 1
+        """
+        recording_connection.results['where title_key'] = [{'book_id': None, 'edition': 1}]
+        book = {'isbn': '1'}
+        publication_handler.set({'title': 'Wolf Tales', 'pub_type': 'book'}, book)
+        assert (book['book_id'], book['edition']) == (1, 1)
+
+    def test_periodical_series(self, recording_connection):
+        """
+        Positive Test Case: periodicals are looked up among the available ones, a new title gets a new id
+        """
+        recording_connection.results = {'where title_key': [{'periodical_id': None}],
+                                         'select periodical_id from periodicals': [{'periodical_id': 8}]}
+        periodical = {'issue': 'week1', 'periodical_type': 'magazine'}
+        publication_handler.set({'title': 'Pack', 'pub_type': 'periodical'}, None, periodical)
+        assert recording_connection.queries[:2] == [
+            "select max(periodical_id) as periodical_id from publications natural join periodicals "
+            "where title_key='pack' and is_available='1' for update",
+            "select periodical_id from periodicals order by periodical_id desc limit 1 for update"]
+        assert periodical['periodical_id'] == 9
+
+    def test_interleaved_new_titles(self, recording_connection):
+        """
+        Positive Test Case: two new titles allocated at the same time get different book ids, the second allocation
+        waits on the locked highest row until the first inserting transaction commits
+        """
+        books, allocated, row_lock = [6], {}, threading.Lock()
+        first_locked, second_waiting = threading.Event(), threading.Event()
+
+        def last_book_id(query):
+            if first_locked.is_set():
+                second_waiting.set()
+            row_lock.acquire()
+            allocated[threading.get_ident()] = max(books) + 1
+            return [{'book_id': max(books)}]
+
+        def insert_book(query):
+            if not first_locked.is_set():
+                first_locked.set()
+                second_waiting.wait(5)
+            return []
+
+        def commit():
+            books.append(allocated.pop(threading.get_ident()))
+            row_lock.release()
+
+        recording_connection.results = {'where title_key': [{'book_id': None, 'edition': 1}],
+                                         'select book_id from books': last_book_id, 'insert into books': insert_book}
+        recording_connection.commit = commit
+        outputs = {}
+
+        def add(title):
+            book = {'isbn': title}
+            publication_handler.set({'title': title, 'pub_type': 'book'}, book)
+            outputs[title] = book['book_id']
+
+        first = threading.Thread(target=add, args=('Wolf Tales',))
+        first.start()
+        assert first_locked.wait(5)
+        second = threading.Thread(target=add, args=('Pack Tales',))
+        second.start()
+        first.join(5)
+        second.join(5)
+        assert outputs == {'Wolf Tales': 7, 'Pack Tales': 8}
+        assert books == [6, 7, 8]
+
+
+class TestPublicationVersion(object):
+    """
+    Test Cases for the versions of the publications
+    """
+
+    def test_write_bumps_version(self, recording_connection):
+        """
+        Positive Test Case: versions are cached until a write of the process bumps them
+        """
+        bumps = 'set version = version + '
+        recording_connection.results['select version'] = lambda query: [
+            {'version': 3 + sum(bumps in executed for executed in recording_connection.queries),
+             'updated_at': 1650000000}]
+        book_handler.versions.clear()
+        assert book_handler.get_version('1')['version'] == 3
+        assert book_handler.get_version('1')['version'] == 3
+        assert book_handler.update_chapter('1', '2', {'chapter_title': 'new'}) == 1
+        assert book_handler.get_version('1')['version'] == 4
+        assert recording_connection.queries[1:3] == [
+            "update publications set version = version + '1' where publication_id='1'",
+            "update chapters set chapter_title='new' where publication_id='1' and chapter_id='2'"]
+        assert len(recording_connection.queries) == 4
+
+
+class TestContentStorage(object):
+    """
+    Test Cases for compressed bodies of the chapter texts
+    """
+
+    def test_long_text_compressed(self, recording_connection):
+        """
+        Positive Test Case: long texts are written compressed to the body table, the chapter keeps an empty text
+        """
+        text = 'All work and no play. ' * 100
+        book_handler.set_chapter({'chapter_id': 2, 'publication_id': '1', 'chapter_title': 'One',
+                                  'chapter_text': text})
+        insert_query, body_query = recording_connection.queries[1:]
+        assert insert_query == "insert into chapters (chapter_id, publication_id, chapter_title, chapter_text) " \
+                               "values (2, '1', 'One', '')"
+        assert body_query.startswith("replace into chapter_bodies (chapter_id, publication_id, encoding, text_length, "
+                                     "excerpt, body) select '2', '1', 'zlib', 2200, 'All work and no play.")
+        assert body_query.endswith(" from chapters where chapter_id = '2' and publication_id = '1'")
+        body = bytes.fromhex(body_query.split("x'")[1].split("'")[0])
+        assert zlib.decompress(body).decode('utf-8') == text
+
+    def test_short_text_inline(self, recording_connection):
+        """
+        Positive Test Case: short texts stay inline and replace an earlier body row
+        """
+        book_handler.update_chapter('1', '2', {'chapter_text': 'short'})
+        assert recording_connection.queries[1:] == [
+            "delete from chapter_bodies where publication_id='1' and chapter_id='2'",
+            "update chapters set chapter_text='short' where publication_id='1' and chapter_id='2'"]
@@ -0,0 +1,53 @@
+"""
+Test Cases for the materialized monthly reports
+"""
+from datetime import date, datetime
+
+from dateutil.relativedelta import relativedelta
+
+from wolfpub.api.handlers.report import ReportHandler
+from wolfpub.api.utils.mariadb_connector import MariaDBConnector
+
+report_handler = ReportHandler(MariaDBConnector())
+
+
+REPORT = {'order_per_pub_per_dist': [{'account_id': 1, 'publication_id': 7, 'total_quantity': 3, 'total_price': 45}],
+          'total_revenue': 100.5,
+          'total_expense': {'salary_expense': 40.0, 'shipping_cost': 4.25}}
+
+
+class TestMonthlyReports(object):
+    """
+    Test Cases for materializing and serving monthly reports
+    """
+
+    def test_materialize_monthly_report(self, recording_connection):
+        """
+        Positive Test Case: report and its breakdown are upserted within one transaction
+        """
+        report_handler.materialize_monthly_report(1, 2022, REPORT)
+        assert recording_connection.commits == 1
+        assert recording_connection.queries == [
+            "insert into reports (month, year, total_revenue, salary_expense, shipping_cost, total_expense, "
+            "refreshed_at) values (1, 2022, 100.5, 40.0, 4.25, 44.25, now()) on duplicate key update "
+            "total_revenue = values(total_revenue), salary_expense = "
+            "values(salary_expense), shipping_cost = values(shipping_cost), total_expense = values(total_expense), "
+            "refreshed_at = values(refreshed_at)",
+            "insert into report_publication_distributors (month, year, account_id, publication_id, total_quantity, "
+            "total_price) values (1, 2022, 1, 7, 3, 45.0) on duplicate key update total_quantity = "
+            "values(total_quantity), total_price = values(total_price)"]
+
+    def test_refresh_skips_complete_months(self, recording_connection):
+        """
+        Positive Test Case: closed months materialized after they closed are not computed again
+        """
+        today = date.today()
+        rows = [{'month': month.month, 'year': month.year, 'refreshed_at': datetime(today.year, today.month, 1)}
+                for month in [today - relativedelta(months=months) for months in range(1, 4)]]
+        recording_connection.results['from reports'] = rows
+        handler = ReportHandler(MariaDBConnector())
+        materialized = []
+        handler.materialize_monthly_report = lambda month, year: materialized.append((month, year))
+        handler.refresh_monthly_reports(months_back=3)
+        assert materialized == [(today.month, today.year)]
+        assert handler.is_closed(rows[0]['month'], rows[0]['year']) and not handler.is_closed(today.month, today.year)
@@ -0,0 +1,87 @@
+"""
+Test Cases for the bulk catalog import
+"""
+import json
+
+from wolfpub.api.utils.mariadb_connector import MariaDBConnector
+from wolfpub.catalog.importer import CatalogImporter
+
+
+def progress(source: str = '/tmp/catalog.jsonl', records_done: int = 0, publications: int = 0):
+    """
+    :return: row of the import in catalog_imports
+    """
+    return [{'source': source, 'status': 'running', 'records_done': records_done, 'publications': publications,
+             'rejected': 0}]
+
+
+def inserts(recording_connection):
+    return [query for query in recording_connection.queries if query.startswith('insert')]
+
+
+BOOK = {'type': 'book', 'title': 'Wolf Tales', 'topic': 'fiction', 'price': 12.5, 'publication_date': '2022-01-10',
+        'creation_date': '2021-11-02', 'authors': ['A1'], 'chapters': [{'chapter_title': 'One',
+                                                                       'chapter_text': "It's short"}]}
+
+
+class TestCatalogImport(object):
+    """
+    Test Cases for validation, series and batched inserts of a chunk
+    """
+
+    def test_write_chunk(self, recording_connection):
+        """
+        Positive Test Case: editions continue the series of the title, rows are inserted in one statement per table
+        """
+        recording_connection.results = {
+            'select emp_id from authors': [{'emp_id': 'A1'}], 'select isbn from books': [{'isbn': '978-0'}],
+            'select book_id from books': [{'book_id': 7}],
+            'select title_key, max(book_id)': [{'title_key': 'wolf tales', 'book_id': 3, 'edition': 2}],
+            'select publication_id from publications': [{'publication_id': 40}],
+            'select records_done': progress(), 'select source': progress()}
+        importer = CatalogImporter(MariaDBConnector())
+        records = [(1, importer.validate(dict(BOOK, isbn='978-0'))), (2, importer.validate(dict(BOOK, isbn='978-1'))),
+                   (3, importer.validate(dict(BOOK, isbn='978-2')))]
+        written, rejections = importer.write_chunk('partner', records, 4, 1)
+        assert written == 2
+        assert rejections == [{'record': 1, 'error': "ISBN '978-0' already exists"}]
+        assert inserts(recording_connection)[:2] == [
+            "insert into publications (publication_id, title, topic, price, publication_date) values "
+            "(41, 'Wolf Tales', 'fiction', 12.5, '2022-01-10'), (42, 'Wolf Tales', 'fiction', 12.5, '2022-01-10')",
+            "insert into books (publication_id, isbn, creation_date, is_available, book_id, edition) values "
+            "(41, '978-1', '2021-11-02', 1, 3, 3), (42, '978-2', '2021-11-02', 1, 3, 4)"]
+        assert inserts(recording_connection)[2] == \
+               "insert into chapters (chapter_id, publication_id, chapter_title, chapter_text) " \
+               "values (1, 41, 'One', 'It\\'s short'), (1, 42, 'One', 'It\\'s short')"
+        assert recording_connection.queries[-1] == "update catalog_imports set records_done='4', " \
+                                                   "publications = publications + '2', rejected = rejected + '2' " \
+                                                   "where import_id='partner'"
+
+    def test_resume(self, recording_connection, tmp_path):
+        """
+        Negative Test Case: committed records are skipped on resume, invalid records are rejected and reported
+        """
+        path = tmp_path / 'catalog.jsonl'
+        lines = [BOOK, dict(BOOK, price='free'), dict(BOOK, type='comic')]
+        path.write_text('\n'.join(json.dumps(line) for line in lines) + '\n')
+        recording_connection.results = {'select records_done': progress(records_done=1),
+                                         'select source': progress(str(path), 1, 1)}
+        summary = CatalogImporter(MariaDBConnector(), chunk_size=10).run(str(path), 'partner')
+        assert summary == {'import_id': 'partner', 'records': 3, 'publications': 1, 'rejected': 2,
+                           'errors': [{'record': 2, 'error': "'price' has to be a number"},
+                                      {'record': 3, 'error': "'type' has to be one of: book, periodical"}]}
+        assert inserts(recording_connection) == []
+
+    def test_price_not_finite(self, recording_connection, tmp_path):
+        """
+        Negative Test Case: nan, infinite and negative prices are rejected like other invalid records, nothing is written
+        """
+        path = tmp_path / 'catalog.jsonl'
+        lines = [dict(BOOK, price='nan'), dict(BOOK, price='inf'), dict(BOOK, price='-inf'), dict(BOOK, price=-1)]
+        path.write_text('\n'.join(json.dumps(line) for line in lines) + '\n')
+        recording_connection.results = {'select records_done': progress(),
+                                         'select source': progress(str(path))}
+        summary = CatalogImporter(MariaDBConnector(), chunk_size=10).run(str(path), 'partner')
+        assert summary['rejected'] == 4
+        assert [error['error'] for error in summary['errors']] == ["'price' has to be a finite number, not negative"] * 4
+        assert inserts(recording_connection) == []
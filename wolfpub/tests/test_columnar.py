@@ -0,0 +1,114 @@
+"""
+Test Cases for the columnar report handler
+"""
+import time
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from wolfpub.api.handlers.report import ColumnarReportHandler  # noqa: E402
+from wolfpub.api.utils.mariadb_connector import MariaDBConnector  # noqa: E402
+
+
+@pytest.fixture
+def handler():
+    handler = ColumnarReportHandler(None, refresh_interval=3600)
+    rows = {
+        'distributors': (['distributor_id', 'name', 'city', 'address'],
+                         [(1, 'Books Inc', 'Raleigh', '12 Hillsborough St'), (2, 'Paper Co', 'Cary', 'Main')]),
+        'accounts': (['account_id', 'distributor_id'], [(10, 1), (20, 2)]),
+        'authors': (['emp_id', 'author_type'], [('E1', 'writer'), ('E2', 'journalist')]),
+        'account_payments': (['payment_id', 'account_id', 'amount', 'payment_date'],
+                             [(1, 10, Decimal('100.50'), date(2022, 1, 5)), (2, 20, Decimal('20.00'), date(2022, 1, 9)),
+                              (3, 10, Decimal('5.25'), date(2022, 2, 1)), (4, 30, Decimal('7.00'), date(2022, 1, 2))]),
+        'salary_payments': (['transaction_id', 'emp_id', 'amount', 'send_date'],
+                            [(1, 'E1', Decimal('300'), date(2022, 1, 1)), (2, 'E2', Decimal('200'), date(2022, 1, 3)),
+                             (3, 'E3', Decimal('100'), date(2022, 2, 1))]),
+        'orders': (['order_id', 'account_id', 'order_date', 'delivery_date', 'shipping_cost'],
+                   [(1, 10, date(2022, 1, 2), date(2022, 1, 8), Decimal('4.50')),
+                    (2, 20, date(2022, 2, 2), date(2022, 2, 8), Decimal('3.00'))]),
+        'book_orders_info': (['order_id', 'publication_id', 'quantity', 'price'],
+                             [(1, 7, 2, Decimal('30.00')), (2, 7, 1, Decimal('15.00'))]),
+        'periodical_orders_info': (['order_id', 'publication_id', 'quantity', 'price'], [(1, 9, 3, Decimal('9.00'))]),
+    }
+    for table, (column_names, table_rows) in rows.items():
+        handler.store.append(table, column_names, table_rows)
+    handler.store.refreshed_at = time.monotonic()
+    return handler
+
+
+class TestColumnarReportHandler(object):
+    """
+    Test Cases for the reports computed from the in memory arrays
+    """
+
+    def test_revenue_group_by(self, handler):
+        """
+        Positive Test Case: totals and group-bys of the time period, payments without distributor are dropped, the
+        distributors are paged by account
+        """
+        assert handler.get_revenue('2022-01-01', '2022-02-01') == 127.5
+        assert handler.get_revenue_per_distributor('2022-01-01', '2022-02-01') == [
+            {'account_id': 10, 'distributor_id': 1, 'name': 'Books Inc', 'revenue': 100.5},
+            {'account_id': 20, 'distributor_id': 2, 'name': 'Paper Co', 'revenue': 20.0}]
+        assert handler.get_revenue_per_distributor('2022-01-01', '2022-02-01', limit=1, after=[10]) == [
+            {'account_id': 20, 'distributor_id': 2, 'name': 'Paper Co', 'revenue': 20.0}]
+        assert handler.get_revenue_per_location() == [{'location': '', 'city': 'Cary', 'revenue': 20.0},
+                                                      {'location': ' Hillsborough St', 'city': 'Raleigh',
+                                                       'revenue': 105.75}]
+
+    def test_salary_and_orders(self, handler):
+        """
+        Positive Test Case: salary per month per work type and order lines per publication per distributor
+        """
+        assert handler.get_salary_expense_per_month_per_worktype() == [
+            {'year': 2022, 'month': 1, 'work_type': 'article authorship', 'salary_expense': 200.0},
+            {'year': 2022, 'month': 1, 'work_type': 'book authorship', 'salary_expense': 300.0},
+            {'year': 2022, 'month': 2, 'work_type': 'editorial work', 'salary_expense': 100.0}]
+        assert handler.get_number_price_per_publication_per_distributor('2022-01-01', '2022-02-01') == [
+            {'account_id': 10, 'publication_id': 7, 'total_quantity': 2, 'total_price': 30.0},
+            {'account_id': 10, 'publication_id': 9, 'total_quantity': 3, 'total_price': 9.0}]
+        assert handler.get_shipping_cost_expense('2022-02-01') == {'shipping_cost': 3.0}
+
+    def test_no_revenue(self, handler):
+        """
+        Negative Test Case: no payments in the time period
+        """
+        with pytest.raises(ValueError):
+            handler.get_revenue_per_city('2023-01-01', '2023-02-01')
+
+
+class TestColumnarStore(object):
+    """
+    Test Cases for loading the arrays from the streamed rows
+    """
+
+    @staticmethod
+    def test_refresh_in_batches(recording_connection):
+        """
+        Positive Test Case: every batch is appended, the next refresh continues after the last loaded id
+        """
+        orders = [{'order_id': order_id, 'account_id': 10, 'order_date': date(2022, 1, order_id),
+                   'delivery_date': date(2022, 1, 9), 'shipping_cost': Decimal('1.5')} for order_id in (1, 2, 3)]
+        recording_connection.results["from orders where order_id > '0'"] = orders
+        handler = ColumnarReportHandler(MariaDBConnector(), refresh_interval=3600)
+        handler.store.refresh(batch_size=2)
+        assert handler.store.tables['orders']['order_id'].tolist() == [1, 2, 3]
+        assert handler.store.last_ids['orders'] == 3
+        handler.store.refresh(batch_size=2)
+        assert handler.store.tables['orders']['order_id'].tolist() == [1, 2, 3]
+        assert "order_id > '3'" in recording_connection.queries[-len(handler.store.tables)]
+
+    @staticmethod
+    def test_stale_read_during_refresh(recording_connection, handler):
+        """
+        Positive Test Case: while one reader refreshes the others are served the previous arrays without waiting
+        """
+        handler.store.db = MariaDBConnector()
+        handler.store.refreshed_at = time.monotonic() - 7200
+        with handler.store.lock:
+            assert handler.store.table('orders')['order_id'].tolist() == [1, 2]
+        assert recording_connection.queries == []
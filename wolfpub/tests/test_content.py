@@ -0,0 +1,23 @@
+"""
+Test Cases for reading chapter and article texts
+"""
+import zlib
+
+from wolfpub.api.utils.content import read_text
+
+
+class TestReadText(object):
+    """
+    Test Cases for ranged reads of the texts
+    """
+
+    def test_ranged_read(self):
+        """
+        Positive Test Case: a range of a compressed text is returned with the offset of the next range
+        """
+        text = 'abcdefghij' * 10
+        row = read_text({'chapter_text': '', 'encoding': 'zlib', 'body': zlib.compress(text.encode())},
+                        'chapter_text', 95, 10)
+        assert row == {'chapter_text': 'fghij', 'text_length': 100, 'offset': 95, 'next_offset': None}
+        row = read_text({'chapter_text': text, 'encoding': None, 'body': None}, 'chapter_text', 0, 30)
+        assert (row['chapter_text'], row['next_offset']) == (text[:30], 30)
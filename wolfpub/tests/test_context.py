@@ -0,0 +1,46 @@
+"""
+Test Cases for the application context
+"""
+from wolfpub.api.context import AppContext
+
+
+class CountingHandler(object):
+    """
+    Handler counting its instances
+    """
+    instances = 0
+
+    def __init__(self, db, ttl: int = 60):
+        CountingHandler.instances += 1
+        self.db = db
+        self.ttl = ttl
+
+
+class TestAppContext(object):
+    """
+    Test Cases for the shared, lazily built handlers
+    """
+
+    def test_handlers_built_once_on_first_use(self):
+        """
+        Positive Test Case: handlers are built on their first attribute access and shared per connector and arguments
+        """
+        context = AppContext()
+        context.connectors = {False: 'primary', True: 'replica'}
+        CountingHandler.instances = 0
+        handler = context.handler(CountingHandler)
+        same_handler = context.handler(CountingHandler)
+        replica_handler = context.handler(CountingHandler, 30, read_replica=True)
+        assert CountingHandler.instances == 0
+        assert (handler.db, same_handler.db, replica_handler.db) == ('primary', 'primary', 'replica')
+        assert (handler.ttl, replica_handler.ttl) == (60, 30)
+        assert CountingHandler.instances == 2
+
+    def test_attribute_set_on_handler(self):
+        """
+        Positive Test Case: attributes set through the stand in are set on the shared handler
+        """
+        context = AppContext()
+        context.connectors = {False: 'primary'}
+        context.handler(CountingHandler).db = 'other'
+        assert context.get(CountingHandler).db == 'other'
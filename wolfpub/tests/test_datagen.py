@@ -0,0 +1,165 @@
+"""
+Test Cases for the synthetic data generator
+"""
+import os
+import random
+import re
+
+from wolfpub.constants import PUBLICATIONS
+from wolfpub.datagen.generator import DataGenerator, Sizes, ValueFactory
+
+SCHEMA_FILE = os.path.join(os.path.dirname(__file__), '..', '..', 'create_queries.sql')
+FIRST_IDS = {'distributor': 11, 'employee': 1235, 'publication': 101, 'order': 5001}
+
+
+def schema():
+    """
+    :return: {table_name: (columns, columns without a value of their own)} of create_queries.sql
+    """
+    with open(SCHEMA_FILE) as sql:
+        tables = re.findall(r'CREATE TABLE (\w+)\s*\((.*?)\n\);', sql.read(), re.S)
+    result = {}
+    for table_name, body in tables:
+        columns, required = set(), set()
+        for line in body.split('\n'):
+            line = line.strip().rstrip(',')
+            if not line or line.split()[0].upper() in ['CONSTRAINT', 'INDEX', 'PRIMARY', 'UNIQUE', 'KEY']:
+                continue
+            column, definition = line.split(None, 1)
+            columns.add(column)
+            definition = definition.upper()
+            if 'NOT NULL' in definition and 'DEFAULT' not in definition and 'AUTO_INCREMENT' not in definition:
+                required.add(column)
+        result[table_name] = (columns, required)
+    return result
+
+
+def references():
+    """
+    :return: {table_name: names of the tables its foreign keys refer to} of create_queries.sql
+    """
+    with open(SCHEMA_FILE) as sql:
+        tables = re.findall(r'CREATE TABLE (\w+)\s*\((.*?)\n\);', sql.read(), re.S)
+    return {table_name: set(re.findall(r'REFERENCES (\w+)\(', body)) for table_name, body in tables}
+
+
+def generate_all(generator: DataGenerator, chunk_size: int):
+    """
+    :return: {table_name: list of row dictionaries} of all entities, generated in chunks
+    """
+    tables = {}
+    for stage in DataGenerator.STAGES:
+        for entity in stage:
+            for start in range(0, generator.count(entity), chunk_size):
+                end = min(start + chunk_size, generator.count(entity))
+                for table_name, (columns, rows) in generator.generate(entity, start, end).items():
+                    tables.setdefault(table_name, []).extend(dict(zip(columns, row)) for row in rows)
+    return tables
+
+
+class TestDataGenerator(object):
+    """
+    Test Cases for the generated rows
+    """
+    sizes = Sizes(distributors=7, employees=10, publications=9, orders=25, payments=12, chapters_per_book=3,
+                  articles_per_periodical=2, salary_months=2, first_ids=FIRST_IDS)
+    tables = generate_all(DataGenerator(sizes, text_size=50, seed=1), chunk_size=4)
+
+    def test_row_counts(self):
+        """
+        Positive Test Case: one row per entity and the configured number of child rows
+        """
+        counts = {table_name: len(rows) for table_name, rows in self.tables.items()}
+        books = counts['books']
+        assert books + counts['periodicals'] == counts['publications'] == 9
+        assert counts['distributors'] == counts['accounts'] == 7
+        assert counts['employees'] == counts['authors'] + counts['editors'] == 10
+        assert counts['salary_payments'] == 10 * 2
+        assert counts['chapters'] == books * 3
+        assert counts['articles'] == (9 - books) * 2
+        assert counts['orders'] == counts['account_bills'] == 25
+        assert counts['account_payments'] == 12
+
+    def test_ids_continue_after_first_ids(self):
+        """
+        Positive Test Case: ids start at the first free id and are unique across chunks
+        """
+        emp_ids = [row['emp_id'] for row in self.tables['employees']]
+        assert len(set(emp_ids)) == 10
+        assert sorted(int(emp_id[1:]) for emp_id in emp_ids) == list(range(1235, 1245))
+        assert sorted(row['distributor_id'] for row in self.tables['distributors']) == list(range(11, 18))
+        assert sorted(row['publication_id'] for row in self.tables['publications']) == list(range(101, 110))
+        assert sorted(row['order_id'] for row in self.tables['orders']) == list(range(5001, 5026))
+
+    def test_foreign_keys_in_range(self):
+        """
+        Positive Test Case: child rows only point to generated parent rows
+        """
+        ids = {table_name: {row[key] for row in self.tables[table_name]}
+               for table_name, key in [('accounts', 'account_id'), ('employees', 'emp_id'), ('editors', 'emp_id'),
+                                       ('books', 'publication_id'), ('periodicals', 'publication_id'),
+                                       ('orders', 'order_id')]}
+        references = [('accounts', 'distributor_id', 'accounts'), ('orders', 'account_id', 'accounts'),
+                      ('account_bills', 'account_id', 'accounts'), ('account_bills', 'order_id', 'orders'),
+                      ('account_payments', 'account_id', 'accounts'), ('salary_payments', 'emp_id', 'employees'),
+                      ('authors', 'emp_id', 'employees'), ('write_books', 'emp_id', 'employees'),
+                      ('review_publications', 'emp_id', 'editors'), ('chapters', 'publication_id', 'books'),
+                      ('write_books', 'publication_id', 'books'), ('articles', 'publication_id', 'periodicals'),
+                      ('book_orders_info', 'publication_id', 'books'), ('book_orders_info', 'order_id', 'orders'),
+                      ('periodical_orders_info', 'publication_id', 'periodicals'),
+                      ('periodical_orders_info', 'order_id', 'orders')]
+        for table_name, column, parent in references:
+            values = {row[column] for row in self.tables.get(table_name, [])}
+            assert values <= ids[parent], f'{table_name}.{column} outside of {parent}'
+
+    def test_columns_match_schema(self):
+        """
+        Positive Test Case: rows only have columns of create_queries.sql and every column without a default
+        """
+        tables = schema()
+        for table_name, rows in self.tables.items():
+            columns, required = tables[table_name]
+            assert set(rows[0]) <= columns, f'{table_name}: {set(rows[0]) - columns}'
+            assert required <= set(rows[0]), f'{table_name}: {required - set(rows[0])}'
+        # Filled by the server, not with the text of the default
+        assert 'updated_at' not in self.tables['publications'][0]
+
+    def test_stages_follow_foreign_keys(self):
+        """
+        Positive Test Case: the rows of an entity only refer to tables of the entity or of an earlier stage, the
+        chunks of one stage are loaded concurrently
+        """
+        generator = DataGenerator(self.sizes, text_size=50, seed=1)
+        loaded = set()
+        for stage in DataGenerator.STAGES:
+            stage_tables = {entity: set(generator.generate(entity, 0, 2)) for entity in stage}
+            for entity, tables in stage_tables.items():
+                for table_name in tables:
+                    parents = references()[table_name] & set().union(*stage_tables.values(), loaded)
+                    assert parents <= tables | loaded, f'{entity}: {table_name} refers to {parents - loaded - tables}'
+            loaded.update(*stage_tables.values())
+
+    def test_chunks_are_deterministic(self):
+        """
+        Positive Test Case: a chunk generated again with the same seed has the same rows
+        """
+        generator = DataGenerator(self.sizes, text_size=50, seed=1)
+        assert generator.generate('orders', 4, 8) == generator.generate('orders', 4, 8)
+
+
+class TestValueFactory(object):
+    """
+    Test Cases for column values generated from the column definitions
+    """
+
+    def test_values_fit_column_types(self):
+        """
+        Positive Test Case: defaults are used, strings and numbers fit their declared size
+        """
+        factory = ValueFactory(random.Random(3), text_size=20)
+        columns = PUBLICATIONS['columns']
+        for _ in range(50):
+            assert len(factory.value(columns['title'])) <= 100
+            assert 1 <= factory.value(columns['price']) < 10 ** 4
+            assert factory.value(columns['version']) == '1'
+            assert '2018-01-01' <= factory.value(columns['publication_date']) <= '2022-12-31'
@@ -0,0 +1,44 @@
+"""
+Test Cases for Export Module
+"""
+import io
+from decimal import Decimal
+
+import pytest
+
+from wolfpub.api.utils.export import csv_chunks, parquet_chunks, check_format
+
+BATCHES = [(['city', 'revenue'], [('Raleigh', Decimal('10.50')), ('Cary', None)]),
+           (['city', 'revenue'], [('Apex', Decimal('12345.25'))])]
+
+
+class TestExport(object):
+    """
+    Test Cases for csv and parquet export of streamed batches
+    """
+
+    def test_csv_chunks(self):
+        """
+        Positive Test Case: header once, one chunk per batch
+        """
+        chunks = list(csv_chunks(iter(BATCHES)))
+        assert chunks == ['city,revenue\r\nRaleigh,10.50\r\nCary,\r\n', 'Apex,12345.25\r\n']
+
+    def test_parquet_chunks(self):
+        """
+        Positive Test Case: every batch is a row group of the same schema
+        """
+        parquet = pytest.importorskip('pyarrow.parquet')
+        data = b''.join(parquet_chunks(iter(BATCHES)))
+        parquet_file = parquet.ParquetFile(io.BytesIO(data))
+        assert parquet_file.num_row_groups == 2
+        assert parquet_file.read().to_pylist() == [{'city': 'Raleigh', 'revenue': Decimal('10.50')},
+                                                   {'city': 'Cary', 'revenue': None},
+                                                   {'city': 'Apex', 'revenue': Decimal('12345.25')}]
+
+    def test_unknown_format(self):
+        """
+        Negative Test Case: unsupported export format
+        """
+        with pytest.raises(ValueError):
+            check_format('xlsx')
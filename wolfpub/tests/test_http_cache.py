@@ -0,0 +1,29 @@
+"""
+Test Cases for the cache validators of the catalog GETs
+"""
+from flask import Flask
+
+from wolfpub.api.utils.http_cache import not_modified
+
+
+class TestNotModified(object):
+    """
+    Test Cases for conditional requests
+    """
+
+    def test_matching_etag(self):
+        """
+        Positive Test Case: If-None-Match with the current tag is answered with 304 and the validators
+        """
+        with Flask(__name__).test_request_context(headers={'If-None-Match': 'W/"publication-1-3"'}):
+            response = not_modified('publication', 'publication-1-3', 1650000000)
+            assert response.status_code == 304
+            assert response.headers['ETag'] == 'W/"publication-1-3"'
+            assert response.headers['Cache-Control'] == 'public, max-age=60'
+
+    def test_stale_etag(self):
+        """
+        Negative Test Case: a tag of an older version is not answered with 304
+        """
+        with Flask(__name__).test_request_context(headers={'If-None-Match': 'W/"publication-1-2"'}):
+            assert not_modified('publication', 'publication-1-3', 1650000000) is None
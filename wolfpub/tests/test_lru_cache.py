@@ -0,0 +1,35 @@
+"""
+Test Cases for LRU Cache Module
+"""
+import time
+
+from wolfpub.api.utils.lru_cache import LRUCache
+
+
+class TestLRUCache(object):
+    """
+    Test Cases for LRU Cache
+    """
+
+    def test_evicts_least_recently_used(self):
+        """
+        Positive Test Case: recently read entry is kept when the cache is full
+        """
+        cache = LRUCache(maxsize=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        assert cache.get('a') == 1
+        cache.put('c', 3)
+        assert cache.get('b') is None
+        assert cache.get('a') == 1 and cache.get('c') == 3
+        assert cache.stats() == {'hits': 3, 'misses': 1, 'evictions': 1, 'hit_ratio': 0.75, 'size': 2, 'maxsize': 2}
+
+    def test_expired_entry(self):
+        """
+        Negative Test Case: entry older than ttl is missing
+        """
+        cache = LRUCache(maxsize=2, ttl=0.01)
+        cache.put('a', 1)
+        time.sleep(0.02)
+        assert cache.get('a', 'expired') == 'expired'
+        assert len(cache) == 0
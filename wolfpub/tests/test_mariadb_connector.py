@@ -4,6 +4,7 @@ Test Cases for Mongo Connector
 import pytest
 from MySQLdb import DataError
 
+from wolfpub.api.utils.custom_exceptions import MariaDBException
 from wolfpub.api.utils.mariadb_connector import MariaDBConnector
 from wolfpub.constants import DISTRIBUTORS
 
@@ -65,3 +66,101 @@ class TestGetResult(object):
         mocker.patch('wolfpub.api.utils.mariadb_connector.MariaDBConnector.connect', return_value=mock_mysql)
         result = mariadb.get_result(query)
         assert len(result) == 0
+
+
+class TestCompoundStatement(object):
+    """
+    Test Cases for wrapping multiple queries in one anonymous block
+    """
+
+    @staticmethod
+    def test_compound_statement():
+        """
+        Positive Test Case
+        """
+        queries = ["insert into test1 (name) values ('ABC')", "set @id = last_insert_id()"]
+        block = mariadb.compound_statement(queries, 'select @id as id')
+        assert block == "BEGIN NOT ATOMIC DECLARE EXIT HANDLER FOR SQLEXCEPTION BEGIN ROLLBACK; RESIGNAL; END; " \
+                        "START TRANSACTION; insert into test1 (name) values ('ABC'); set @id = last_insert_id(); " \
+                        "COMMIT; select @id as id; END"
+
+    @staticmethod
+    def test_compound_statement_without_transaction():
+        """
+        Positive Test Case: no transaction handling and no result query
+        """
+        block = mariadb.compound_statement(["set @id = 1"], transaction=False)
+        assert block == "BEGIN NOT ATOMIC set @id = 1; END"
+
+
+class TestReadReplica(object):
+    """
+    Test Cases for routing select queries to read replicas
+    """
+
+    @staticmethod
+    def test_parse_replicas():
+        """
+        Positive Test Case
+        """
+        replicas = mariadb.parse_replicas('replica1:3307, replica2,')
+        assert replicas == [('replica1', 3307), ('replica2', 3306)]
+
+    @staticmethod
+    def test_get_result_falls_back_to_primary(mocker, mock_mysql, distributors_table, mock_table):
+        """
+        Positive Test Case: replica not reachable, query is served by the primary
+        """
+        replica_mariadb = MariaDBConnector(read_replica=True)
+        replica_mariadb.replicas = [('replica1', 3307)]
+        connect = mocker.patch('wolfpub.api.utils.mariadb_connector.MariaDBConnector._connect',
+                               side_effect=[MariaDBException('replica down'), mock_mysql])
+        result = replica_mariadb.get_result(f"select * from {DISTRIBUTORS['table_name']}")
+        assert len(result) == 0
+        assert connect.call_args_list[-1][0] == (replica_mariadb.host, replica_mariadb.port)
+
+
+class TestConnectionPool(object):
+    """
+    Test Cases for the connection pools of the processes
+    """
+
+    @staticmethod
+    def test_pools_are_recreated_after_fork(mocker):
+        """
+        Positive Test Case: a forked worker creates its own pool instead of using the inherited one
+        """
+        pool = mocker.patch('wolfpub.api.utils.mariadb_connector.mariadb.ConnectionPool')
+        pooled_mariadb = MariaDBConnector()
+        pooled_mariadb.pool_size = 2
+        pooled_mariadb.pool('primary', 3306)
+        pooled_mariadb.pool('primary', 3306)
+        assert pool.call_count == 1
+        mocker.patch('wolfpub.api.utils.mariadb_connector.os.getpid', return_value=-1)
+        pooled_mariadb.pool('primary', 3306)
+        assert pool.call_count == 2
+        assert pool.call_args[1]['pool_name'] == 'wolfpub--1-0'
+
+
+class TestSharedConnector(object):
+    """
+    Test Cases for one connector shared by the request threads and the background tasks
+    """
+
+    @staticmethod
+    def test_interleaved_transactions(mocker):
+        """
+        Positive Test Case: a query of another thread running while a transaction is open does not commit or close the
+        connection of the transaction
+        """
+        transaction_conn, other_conn = mocker.MagicMock(), mocker.MagicMock()
+        connect = mocker.patch('wolfpub.api.utils.mariadb_connector.MariaDBConnector.connect',
+                               side_effect=[transaction_conn, other_conn])
+        transaction_conn.cursor.return_value.execute.side_effect = lambda query: mariadb.get_result('select 1')
+        other_conn.cursor.return_value.description = [('1',)]
+        mariadb.execute(["insert into test1 (name) values ('ABC')"])
+        assert connect.call_count == 2
+        transaction_conn.commit.assert_called_once()
+        transaction_conn.close.assert_called_once()
+        other_conn.commit.assert_not_called()
+        other_conn.close.assert_called_once()
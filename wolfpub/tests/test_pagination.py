@@ -0,0 +1,34 @@
+"""
+Test Cases for the keyset pagination of the list end-points
+"""
+import pytest
+from flask import Flask
+
+from wolfpub.api.utils.pagination import encode_cursor, requested_page, page
+
+
+class TestPagination(object):
+    """
+    Test Cases for the cursors and the page size
+    """
+
+    def test_next_page(self):
+        """
+        Positive Test Case: the cursor holds the sort key of the last row of the page, the limit is capped
+        """
+        orders = [{'order_id': order_id} for order_id in (3, 7, 9)]
+        rows, next_cursor = page(orders, 2, ['order_id'])
+        assert rows == orders[:2] and next_cursor == encode_cursor([7])
+        assert page(orders, 3, ['order_id']) == (orders, None)
+        with Flask(__name__).test_request_context(f'/?limit=100000&cursor={next_cursor}'):
+            limit, after = requested_page()
+        assert (limit, after) == (500, [7])
+
+    def test_malformed_cursor(self):
+        """
+        Negative Test Case: cursors not issued by the API are rejected
+        """
+        for cursor in ['not-a-cursor', encode_cursor(["1' or '1"]), encode_cursor([])]:
+            with Flask(__name__).test_request_context(f'/?cursor={cursor}'):
+                with pytest.raises(ValueError):
+                    requested_page()
@@ -0,0 +1,183 @@
+"""
+Test Cases for the pre-fork server, forking workers of a trivial WSGI app
+"""
+import os
+import signal
+import socket
+import subprocess
+import sys
+import textwrap
+import time
+import urllib.request
+
+import gevent
+
+from wolfpub.api.utils.prefork import PreforkServer, RequestLimit
+
+REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+# Master of a trivial app answering with the version read when the master started and the pid of the worker
+MASTER_SCRIPT = '''
+import os
+import sys
+
+sys.path.insert(0, {repo_dir!r})
+from wolfpub.api.utils.prefork import PreforkServer
+
+with open('version.txt') as version_file:
+    VERSION = version_file.read()
+
+
+def app(environ, start_response):
+    start_response('200 OK', [('Content-Type', 'text/plain')])
+    return [f'{{VERSION}} {{os.getpid()}}'.encode()]
+
+
+PreforkServer(app, '127.0.0.1', int(sys.argv[1]), workers=1, max_requests=int(sys.argv[2]),
+              graceful_timeout=2).run()
+'''
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def get(port: int):
+    """
+    :return: (version, worker pid) of the answer
+    """
+    with urllib.request.urlopen(f'http://127.0.0.1:{port}/', timeout=10) as response:
+        version, pid = response.read().decode().split()
+    return version, int(pid)
+
+
+def wait_until(condition, timeout: float = 10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.1)
+
+
+def process_exists(pid: int):
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+
+
+def start_master(tmp_path, max_requests: int = 0):
+    """
+    :return: (master process, port) of the trivial app, serving once the first answer arrived
+    """
+    (tmp_path / 'version.txt').write_text('v1')
+    (tmp_path / 'master.py').write_text(textwrap.dedent(MASTER_SCRIPT.format(repo_dir=REPO_DIR)))
+    port = free_port()
+    master = subprocess.Popen([sys.executable, str(tmp_path / 'master.py'), str(port), str(max_requests)],
+                              cwd=str(tmp_path))
+
+    def serving():
+        try:
+            return get(port)
+        except OSError:
+            return False
+
+    wait_until(serving)
+    return master, port
+
+
+def stop_master(master):
+    master.send_signal(signal.SIGTERM)
+    return master.wait(10)
+
+
+class TestRequestLimit(object):
+    """
+    Test Cases for recycling a worker after its requests
+    """
+
+    def test_stop_after_max_requests(self):
+        """
+        Positive Test Case: the worker is stopped once, after the request reaching the limit was passed on
+        """
+        stops = []
+        app = RequestLimit(lambda environ, start_response: [b'ok'], 2, lambda: stops.append(1))
+        assert app({}, None) == [b'ok']
+        gevent.sleep(0)
+        assert stops == []
+        assert app({}, None) == [b'ok'] and app({}, None) == [b'ok']
+        gevent.sleep(0)
+        assert stops == [1]
+
+
+class TestPreforkServer(object):
+    """
+    Test Cases for the master process and its workers
+    """
+
+    def test_recycled_worker_is_replaced(self, tmp_path):
+        """
+        Positive Test Case: a worker stops after max_requests and a new worker serves the next requests
+        """
+        master, port = start_master(tmp_path, max_requests=3)
+        try:
+            # start_master got the first answer
+            _, first = get(port)
+            assert get(port)[1] == first
+            _, second = get(port)
+            assert second != first
+            wait_until(lambda: not process_exists(first))
+        finally:
+            assert stop_master(master) == 0
+
+    def test_crashed_worker_is_replaced(self, tmp_path):
+        """
+        Negative Test Case: a killed worker is reaped and its slot gets a new worker
+        """
+        master, port = start_master(tmp_path)
+        try:
+            _, first = get(port)
+            os.kill(first, signal.SIGKILL)
+            wait_until(lambda: not process_exists(first))
+            assert get(port)[1] != first
+        finally:
+            assert stop_master(master) == 0
+
+    def test_reload_loads_new_code(self, tmp_path):
+        """
+        Positive Test Case: SIGHUP re-executes the master on the same socket, the new workers run the code read after
+        the reload and the old worker is stopped
+        """
+        master, port = start_master(tmp_path)
+        try:
+            _, first = get(port)
+            (tmp_path / 'version.txt').write_text('v2')
+            master.send_signal(signal.SIGHUP)
+            wait_until(lambda: get(port)[0] == 'v2')
+            wait_until(lambda: not process_exists(first))
+            assert master.poll() is None
+        finally:
+            assert stop_master(master) == 0
+
+    def test_stop_kills_busy_worker(self):
+        """
+        Negative Test Case: a worker ignoring SIGTERM is killed after the graceful timeout and reaped
+        """
+        ready, started = os.pipe()
+        pid = os.fork()
+        if not pid:
+            signal.signal(signal.SIGTERM, signal.SIG_IGN)
+            os.write(started, b'1')
+            time.sleep(30)
+            os._exit(0)
+        os.read(ready, 1)
+        os.close(ready)
+        os.close(started)
+        server = PreforkServer(None, '127.0.0.1', 0, workers=1)
+        server.children[pid] = 0
+        stopping = time.monotonic()
+        server.kill([pid], 0.5)
+        assert server.children == {}
+        assert 0.5 <= time.monotonic() - stopping < 5
+        assert not process_exists(pid)
@@ -0,0 +1,43 @@
+"""
+Test Cases for the sparse fieldsets
+"""
+import pytest
+from flask import Flask
+
+from wolfpub.api.utils.projection import requested_fields, project, sparse, response_columns
+from wolfpub.constants import PUBLICATIONS, BOOKS
+
+
+class TestProjection(object):
+    """
+    Test Cases for the fields parameter
+    """
+
+    def test_requested_fields(self):
+        """
+        Positive Test Case: the requested fields are selected with the columns the end-point needs
+        """
+        with Flask(__name__).test_request_context('/?fields=name, balance'):
+            fields = requested_fields(['account_id', 'name', 'balance'])
+        assert fields == ['name', 'balance']
+        assert project(['account_id', 'name', 'city'], fields, ['account_id']) == ['account_id', 'name']
+        assert sparse({'account_id': 1, 'name': 'A', 'balance': 2}, fields) == {'name': 'A', 'balance': 2}
+
+    def test_unknown_field(self):
+        """
+        Negative Test Case: unknown fields are rejected
+        """
+        with Flask(__name__).test_request_context('/?fields=name,password'):
+            with pytest.raises(ValueError):
+                requested_fields(['account_id', 'name'])
+
+    def test_internal_columns(self):
+        """
+        Negative Test Case: internal columns of the tables are neither returned nor accepted as fields
+        """
+        columns = response_columns(PUBLICATIONS, BOOKS)
+        assert columns == ['publication_id', 'title', 'topic', 'price', 'publication_date', 'isbn', 'creation_date',
+                           'edition', 'book_id', 'is_available']
+        with Flask(__name__).test_request_context('/?fields=title,title_key'):
+            with pytest.raises(ValueError):
+                requested_fields(columns)
@@ -0,0 +1,58 @@
+"""
+Test Cases for Query Builder Module
+"""
+import pytest
+
+from wolfpub.api.utils.custom_exceptions import QueryGenerationException
+from wolfpub.api.utils.query_builder import QueryBuilder
+
+
+class TestQueryBuilder(object):
+    """
+    Test Cases for Query Builder
+    """
+
+    def test_join_order_by_limit(self):
+        """
+        Positive Test Case: explicit join keys, grouping, ordering and paging
+        """
+        query_formed = QueryBuilder('account_payments', 'ap') \
+            .join('accounts', 'a', on={'a.account_id': 'ap.account_id'}) \
+            .select('ap.account_id', 'sum(ap.amount) as revenue') \
+            .where({'payment_date': {'>=': '2022-01-01'}}) \
+            .group_by('ap.account_id').having('sum(ap.amount) > 100') \
+            .order_by('revenue desc').limit(10, 20).build()
+        assert query_formed == "select ap.account_id, sum(ap.amount) as revenue from account_payments as ap " \
+                               "join accounts as a on a.account_id = ap.account_id " \
+                               "where payment_date >= '2022-01-01' group by ap.account_id " \
+                               "having sum(ap.amount) > 100 order by revenue desc limit 10 offset 20"
+
+    def test_or_where_and_keyset(self):
+        """
+        Positive Test Case: or conditions and keyset predicate after the last row
+        """
+        query_formed = QueryBuilder('orders').select('order_id') \
+            .or_where({'account_id': 1}, {'account_id': 2}) \
+            .after({'order_date': '2022-01-01', 'order_id': 5}) \
+            .order_by('order_date', 'order_id').limit(50).build()
+        assert query_formed == "select order_id from orders where ((account_id='1') or (account_id='2')) and " \
+                               "((order_date > '2022-01-01') or (order_date = '2022-01-01' and order_id > '5')) " \
+                               "order by order_date, order_id limit 50"
+
+    def test_subquery_union_and_cte(self):
+        """
+        Positive Test Case: union as subquery, common table expression and explain
+        """
+        lines = QueryBuilder('book_orders_info').union(QueryBuilder('periodical_orders_info'), union_all=True)
+        query = QueryBuilder(lines, 't').join('orders', 'o', using=['order_id']) \
+            .with_query('active', QueryBuilder('accounts').where({'is_active': 1})).select('t.order_id')
+        assert query.explain() == "explain with active as (select * from accounts where is_active='1') " \
+                                  "select t.order_id from (select * from book_orders_info union all " \
+                                  "select * from periodical_orders_info) as t join orders as o using (order_id)"
+
+    def test_join_without_keys(self):
+        """
+        Negative Test Case: join needs explicit keys
+        """
+        with pytest.raises(QueryGenerationException):
+            QueryBuilder('orders').join('accounts')
@@ -1,10 +1,12 @@
 """
 Test Cases for Query Generator Module
 """
+from datetime import date
+
 import pytest
 
 from wolfpub.api.utils.custom_exceptions import QueryGenerationException
-from wolfpub.api.utils.query_generator import QueryGenerator
+from wolfpub.api.utils.query_generator import QueryGenerator, RawSQL
 
 
 class TestQueryGeneratorUtility(object):
@@ -112,6 +114,68 @@ class TestInsertQuery(object):
         assert query_formed.strip() == "insert into sample (name, type) " \
                                        "values ('ABC', 'Retailer'), ('DEF', 'Whole Seller')"
 
+    def test_insert_query_raw_value(self):
+        """
+        Positive Test Case: raw sql value is not quoted
+        """
+        rows = [{'order_id': RawSQL('@order_id'), 'name': 'ABC'}]
+        query_generator = QueryGenerator()
+        query_formed = query_generator.insert('sample', rows)
+        assert query_formed.strip() == "insert into sample (order_id, name) values (@order_id, 'ABC')"
+
+    def test_insert_query_literals(self):
+        """
+        Positive Test Case: strings are escaped, None and dates are valid literals, a single column has no trailing comma
+        """
+        rows = [{'name': "it's", 'note': None, 'created': date(2022, 1, 10)}]
+        query_generator = QueryGenerator()
+        assert query_generator.insert('sample', rows) == \
+            "insert into sample (name, note, created) values ('it\\'s', NULL, '2022-01-10')"
+        assert query_generator.insert('sample', [{'name': 'ABC'}]) == "insert into sample (name) values ('ABC')"
+
+    def test_insert_query_other_columns(self):
+        """
+        Negative Test Case: every row is checked against the columns of the first row
+        """
+        rows = [{'name': 'ABC', 'type': 'Retailer'}, {'name': 'DEF', 'city': 'Raleigh'}]
+        query_generator = QueryGenerator()
+        with pytest.raises(QueryGenerationException):
+            query_generator.insert('sample', rows)
+
+    def test_bulk_insert_query(self):
+        """
+        Positive Test Case: rows are split into queries below the size and row limits, in the given column order
+        """
+        rows = ({'type': 'Retailer', 'id': i} for i in range(5))
+        query_generator = QueryGenerator()
+        queries = list(query_generator.bulk_insert('sample', rows, ['id', 'type'], max_bytes=80, max_rows=2))
+        assert queries == ["insert into sample (id, type) values (0, 'Retailer'), (1, 'Retailer')",
+                           "insert into sample (id, type) values (2, 'Retailer'), (3, 'Retailer')",
+                           "insert into sample (id, type) values (4, 'Retailer')"]
+        assert all(len(query) <= 80 for query in queries)
+        assert len(list(query_generator.bulk_insert('sample', ({'id': i} for i in range(5)), max_bytes=50))) == 2
+        with pytest.raises(QueryGenerationException):
+            list(query_generator.bulk_insert('sample', [{'id': 'x' * 100}], max_bytes=50))
+
+    def test_bulk_insert_non_finite_float(self):
+        """
+        Negative Test Case: nan and infinite floats have no SQL literal, the rows are rejected
+        """
+        query_generator = QueryGenerator()
+        for value in [float('nan'), float('inf'), float('-inf')]:
+            with pytest.raises(QueryGenerationException):
+                list(query_generator.bulk_insert('sample', [{'id': 1, 'price': 1.5}, {'id': 2, 'price': value}]))
+
+    def test_upsert_query(self):
+        """
+        Positive Test Case: duplicate key updates the given columns
+        """
+        rows = [{'month': 1, 'year': 2022, 'total_revenue': 10.5}]
+        query_generator = QueryGenerator()
+        query_formed = query_generator.upsert('reports', rows, ['total_revenue'])
+        assert query_formed == "insert into reports (month, year, total_revenue) values (1, 2022, 10.5) " \
+                               "on duplicate key update total_revenue = values(total_revenue)"
+
 
 class TestSelectQuery(object):
     """
@@ -146,6 +210,27 @@ class TestSelectQuery(object):
         query_formed = query_generator.select('sample', ['id', 'name'], cond, group_by)
         assert query_formed.strip() == "select id, name from sample where number='9195130' group by id"
 
+    def test_select_query_with_order_by_limit(self):
+        """
+        Positive Test Case: With order by keys, limit and offset
+        """
+        cond = {'number': '9195130'}
+        query_generator = QueryGenerator()
+        query_formed = query_generator.select('sample', ['id', 'name'], cond, order_by=['id'], limit=10, offset=20)
+        assert query_formed.strip() == "select id, name from sample where number='9195130' order by id " \
+                                       "limit 10 offset 20"
+
+    def test_select_query_keyset(self):
+        """
+        Positive Test Case: continues after the last row of a page, the first key column bounds the index range
+        """
+        query_generator = QueryGenerator()
+        cond = {'is_available': 1, **query_generator.keyset({'publication_id': 4, 'article_id': 2})}
+        query_formed = query_generator.select('articles', ['title'], cond, order_by=['publication_id', 'article_id'],
+                                              limit=3)
+        assert query_formed == "select title from articles where is_available='1' and publication_id >= '4' and " \
+                               "((publication_id > '4') or (publication_id='4' and article_id > '2')) " \
+                               "order by publication_id, article_id limit 3"
 
     def test_select_query_nested_cond(self):
         """
@@ -205,3 +290,36 @@ class TestDeleteQuery(object):
         query_formed = query_generator.delete('sample', cond)
         assert query_formed.strip() == "delete from sample where id='1'"
 
+
+
+class TestCompiledTemplates(object):
+    """
+    Test Cases for the cached query templates
+    """
+
+    def test_same_shape_reuses_template(self):
+        """
+        Positive Test Case: second query of the same shape is a cache hit with its own values
+        """
+        query_generator = QueryGenerator()
+        query_generator.select('sample', ['id'], {'id': 1, 'name': 'ABC'})
+        hits = QueryGenerator.cache_info()['hits']
+        query_formed = query_generator.select('sample', ['id'], {'id': 2, 'name': 'DEF'})
+        assert QueryGenerator.cache_info()['hits'] == hits + 1
+        assert query_formed == "select id from sample where id='2' and name='DEF'"
+
+    def test_different_shape(self):
+        """
+        Positive Test Case: null value changes the shape of the condition
+        """
+        query_generator = QueryGenerator()
+        assert query_generator.get_where_cond({'id': 1, 'name': 'ABC'}) == "id='1' and name='ABC'"
+        assert query_generator.get_where_cond({'id': 1, 'name': None}) == "id='1' and name IS NULL"
+
+    def test_braces_in_values(self):
+        """
+        Positive Test Case: braces in table names and values are kept as they are
+        """
+        query_generator = QueryGenerator()
+        query_formed = query_generator.update('sample{1}', {'id': '{0}'}, {'name': '{}'})
+        assert query_formed == "update sample{1} set name='{}' where id='{0}'"
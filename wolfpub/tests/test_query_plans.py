@@ -0,0 +1,56 @@
+"""
+Test Cases for the query plan regression checker
+"""
+import os
+
+import pytest
+
+from wolfpub.benchmarks import plans
+
+
+def plan(step_type: str, rows: int, key: str = None):
+    return [{'query': 'select * from orders', 'plan': [{'step': '1:orders', 'type': step_type, 'key': key,
+                                                        'rows': rows, 'extra': None}]}]
+
+
+class TestComparePlans(object):
+    """
+    Test Cases for comparing plans with snapshots
+    """
+
+    def test_unchanged_plan(self):
+        """
+        Positive Test Case: same plan and a full scan recorded in the snapshot are not reported
+        """
+        snapshots = {'order.get_orders': plan('ref', 5000, 'account_fk'), 'report.revenue': plan('ALL', 90000)}
+        current = {'order.get_orders': plan('ref', 6000, 'account_fk'), 'report.revenue': plan('ALL', 95000)}
+        assert plans.compare(current, snapshots) == []
+
+    def test_regressed_plan(self):
+        """
+        Negative Test Case: index lookup turned into a full scan, row estimate above the growth factor
+        """
+        snapshots = {'order.get_orders': plan('ref', 1000, 'account_fk'), 'order.get_order': plan('ref', 1500)}
+        current = {'order.get_orders': plan('ALL', 100000), 'order.get_order': plan('ref', 20000),
+                   'order.new_shape': plan('const', 1)}
+        findings = plans.compare(current, snapshots)
+        assert [(finding['shape'], finding['status'], finding['failed']) for finding in findings] == \
+               [('order.get_orders', 'full scan', True), ('order.get_order', 'rows', True),
+                ('order.new_shape', 'new', False)]
+
+
+@pytest.mark.skipif(not os.path.exists(plans.SNAPSHOTS),
+                    reason='no plan snapshots, record them with: python -m wolfpub.benchmarks plans --update')
+class TestQueryPlans(object):
+    """
+    Test Cases for the plans of the handler queries against the seeded database of .env
+    """
+
+    def test_no_plan_regressions(self):
+        """
+        Positive Test Case: no query shape regressed against its snapshot
+        """
+        current = plans.collect()
+        findings = plans.compare(current, plans.load())
+        plans.report(current, findings)
+        assert not [finding for finding in findings if finding['failed']]